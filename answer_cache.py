@@ -0,0 +1,282 @@
+# Persistent cache of answers, keyed by a normalized hash of the extracted snippet.
+#
+# PracticeMe repeats questions heavily across rounds, so once a snippet has been
+# answered (locally or by Gemini) the answer is stored in a small SQLite database and
+# served again without any API call. The cache is bounded: when it grows past
+# max_entries the least recently used answers are evicted.
+#
+# Answers start out unverified. Once the site grades one, record_grading marks it
+# verified, or removes it and remembers the wrong answer, so the snippet is evaluated
+# again and the same wrong answer is not accepted from the same path twice.
+import hashlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import js_interpreter
+
+LINE_NUMBER_PATTERN = re.compile(r"^\s*(\d+)(?:\s+|$)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def strip_line_numbers(code):
+    # Only strip leading numbers when every line is numbered 1, 2, 3, ... so that
+    # code lines which happen to start with a number are left alone
+    lines = [line for line in code.split("\n") if line.strip()]
+    if not lines:
+        return code
+    stripped = []
+    for expected, line in enumerate(lines, start=1):
+        match = LINE_NUMBER_PATTERN.match(line)
+        if not match or int(match.group(1)) != expected:
+            return code
+        stripped.append(line[match.end():])
+    return "\n".join(stripped)
+
+
+def normalize_snippet(code):
+    """
+    Normalizes a snippet so that the same program always produces the same key,
+    whichever extraction path produced it (line numbers, indentation, spacing between
+    highlighted tokens and line breaks are all ignored).
+    """
+    code = strip_line_numbers(code.strip())
+    try:
+        tokens, literals = js_interpreter.tokenize(code)
+    except js_interpreter.UnsupportedSyntax:
+        return WHITESPACE_PATTERN.sub(" ", code).strip()
+    return _join_tokens(tokens, literals)
+
+
+def _join_tokens(tokens, literals):
+    parts = []
+    for token in tokens:
+        if token.kind == "eof":
+            break
+        if token.kind in ("num", "str"):
+            parts.append(repr(literals[token.value]))
+        elif token.kind == "template":
+            quasis, expressions = token.value
+            inner = " ${ ".join([repr(quasis[0])] + [
+                _join_tokens(expression, literals) + " } " + repr(quasi)
+                for expression, quasi in zip(expressions, quasis[1:])])
+            parts.append(f"`{inner}`")
+        else:
+            parts.append(token.value)
+    return " ".join(parts)
+
+
+def snippet_key(code):
+    return hashlib.sha256(normalize_snippet(code).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    SQLite-backed answer cache with least-recently-used eviction.
+
+    Args:
+        path: Location of the SQLite database file
+        max_entries: Number of answers kept before the least recently used are evicted
+    """
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # The connection is shared with the evaluation threads of the pipeline
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        # WAL keeps lookups fast and lets several processes share the same file
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                snippet TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                source TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'unverified'
+            )
+        """)
+        # Caches created before grading was read have no status column yet
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(answers)")]
+        if "status" not in columns:
+            self.connection.execute("ALTER TABLE answers ADD COLUMN status TEXT NOT NULL DEFAULT 'unverified'")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS wrong_answers (
+                key TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                graded_at REAL NOT NULL,
+                PRIMARY KEY (key, answer)
+            )
+        """)
+        self.connection.commit()
+
+    def get(self, code):
+        """Returns the cached answer for a snippet, or None on a miss."""
+        key = snippet_key(code)
+        with self.lock:
+            row = self.connection.execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def peek(self, code):
+        """Returns the cached answer for a snippet without counting a lookup or touching its age."""
+        with self.lock:
+            row = self.connection.execute("SELECT answer FROM answers WHERE key = ?", (snippet_key(code),)).fetchone()
+            return row[0] if row else None
+
+    def put(self, code, answer, source, status="unverified"):
+        """Stores an answer and evicts the least recently used entries beyond max_entries."""
+        key = snippet_key(code)
+        with self.lock:
+            now = time.time()
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO answers (key, snippet, answer, source, created_at, last_used, hits, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                    (key, code, answer, source, now, now, status))
+                self.connection.execute(
+                    "DELETE FROM answers WHERE key IN ("
+                    "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+
+    def status(self, code):
+        """Returns "verified" or "unverified" for a cached snippet, None if it is not cached."""
+        with self.lock:
+            row = self.connection.execute("SELECT status FROM answers WHERE key = ?", (snippet_key(code),)).fetchone()
+            return row[0] if row else None
+
+    def source(self, code):
+        """Returns (source, status) of a cached snippet without counting a lookup, None if it is not cached."""
+        with self.lock:
+            row = self.connection.execute("SELECT source, status FROM answers WHERE key = ?",
+                                          (snippet_key(code),)).fetchone()
+            return tuple(row) if row else None
+
+    def record_grading(self, code, answer, correct, source="graded"):
+        """
+        Feeds the site's grading of an answer back into the cache.
+
+        Args:
+            correct: True marks the answer verified (replacing a different cached answer),
+                False removes it if it is the cached answer and remembers it as wrong
+
+        Returns:
+            bool: True if the cached answer changed
+        """
+        key = snippet_key(code)
+        answer = answer.strip()
+        with self.lock:
+            row = self.connection.execute("SELECT answer, status FROM answers WHERE key = ?", (key,)).fetchone()
+            # Answers are compared the way they were typed into the page
+            is_cached = row is not None and row[0].strip() == answer
+            with self.connection:
+                if correct:
+                    self.connection.execute("DELETE FROM wrong_answers WHERE key = ? AND answer = ?", (key, answer))
+                    if is_cached:
+                        self.connection.execute("UPDATE answers SET status = 'verified' WHERE key = ?", (key,))
+                        return row[1] != "verified"
+                else:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO wrong_answers (key, answer, graded_at) VALUES (?, ?, ?)",
+                        (key, answer, time.time()))
+                    if is_cached:
+                        self.connection.execute("DELETE FROM answers WHERE key = ?", (key,))
+                    return is_cached
+            self.put(code, answer, source, "verified")
+            return True
+
+    def wrong_answers(self, code):
+        """Returns the answers the site graded wrong for a snippet."""
+        with self.lock:
+            return {row[0] for row in self.connection.execute(
+                "SELECT answer FROM wrong_answers WHERE key = ?", (snippet_key(code),))}
+
+    def snippets(self):
+        """Returns every cached snippet, most recently used first."""
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT snippet FROM answers ORDER BY last_used DESC")]
+
+    def invalidate(self, code):
+        """Removes the answer for a snippet, e.g. after it was graded wrong."""
+        return self.invalidate_key(snippet_key(code))
+
+    def invalidate_key(self, key_prefix):
+        with self.lock:
+            with self.connection:
+                cursor = self.connection.execute("DELETE FROM answers WHERE key LIKE ?", (key_prefix + "%",))
+            return cursor.rowcount
+
+    def clear(self):
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM answers")
+                self.connection.execute("DELETE FROM wrong_answers")
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self.lock:
+            verified = self.connection.execute("SELECT COUNT(*) FROM answers WHERE status = 'verified'").fetchone()[0]
+            wrong = self.connection.execute("SELECT COUNT(*) FROM wrong_answers").fetchone()[0]
+        return {
+            "entries": len(self),
+            "verified": verified,
+            "wrong": wrong,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print("\n=== Answer Cache ===")
+        print(f"Entries: {stats['entries']}/{stats['max_entries']} ({stats['verified']} verified by the site, "
+              f"{stats['wrong']} answers known to be wrong)")
+        print(f"Hits: {stats['hits']}, Misses: {stats['misses']}, Hit rate: {stats['hit_rate']:.0%}")
+        print("=== End of Answer Cache ===\n")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+# Command line helper: python answer_cache.py [stats|list|invalidate KEY_PREFIX|clear]
+if __name__ == "__main__":
+    import settings
+
+    settings.initialize()
+    cache = AnswerCache(settings.answer_cache_path, settings.answer_cache_size)
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        cache.print_stats()
+    elif command == "list":
+        for key, answer, source, hits, status in cache.connection.execute(
+                "SELECT key, answer, source, hits, status FROM answers ORDER BY last_used DESC"):
+            print(f"{key[:12]}  {source:<8} {status:<10} hits={hits:<4} {answer!r}")
+    elif command == "invalidate" and len(sys.argv) > 2:
+        print(f"Removed {cache.invalidate_key(sys.argv[2])} entries")
+    elif command == "clear":
+        cache.clear()
+        print("Cache cleared")
+    else:
+        print("Usage: python answer_cache.py [stats|list|invalidate KEY_PREFIX|clear]")
+    cache.close()
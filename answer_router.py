@@ -0,0 +1,287 @@
+# Tiered answer routing with per-topic rules learned from graded answers.
+#
+# Every snippet is classified by topic (topics.py) and offered to the answer tiers from the
+# cheapest to the most expensive: the exact answer cache, the template cache, the local
+# interpreter and Gemini. The first tier that answers wins. Which tiers are reliable for a
+# topic is learned from recorded correctness data instead of the notes in settings.py: the
+# harvest (every graded question with the tier that answered it), summaries written by
+# python bench_solver.py --json and the gradings of the running session. A tier is skipped
+# for a topic once min_samples of its answers were graded and fewer than min_accuracy of
+# them were correct, unless the last tier did even worse; tiers without enough data are
+# tried as they always were. Rules are per topic rather than per snippet shape: a shape
+# rarely comes up often enough for its gradings to add up. Every answer carries the
+# confidence of the tier that produced it, and the router counts calls, answers, skips,
+# latency and gradings per tier. Routed answers wait for their grading per session, so two
+# sessions answering the same snippet are each credited for their own answer.
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+from harvest import load as load_harvest
+from pipeline import percentile
+from topics import TOPICS, UNKNOWN_TOPIC, classify_topic
+
+# Tiers from the cheapest to the most expensive, as main.py builds them
+TIERS = ("cache", "template", "local", "gemini")
+# Confidence of a tier before any of its answers was graded, worth PRIOR_WEIGHT gradings
+PRIOR_CONFIDENCE = {"cache": 0.99, "template": 0.95, "local": 0.95, "gemini": 0.8}
+PRIOR_WEIGHT = 2
+# bench_solver.py paths that are a single tier
+SOLVER_PATH_TIERS = {"gemini": "gemini", "local": "local", "template": "template"}
+# Routed answers remembered until the site grades them
+MAX_PENDING_ROUTES = 1000
+
+# Session the current question belongs to (e.g. its WebDriver session id), set by the
+# session's question loop; evaluation threads see it through the pipeline's copied context
+routing_session = contextvars.ContextVar("routing_session", default=None)
+
+
+class NoRoute(Exception):
+    """No tier answered a snippet."""
+
+
+class AnswerRouter:
+    """
+    Sends every snippet through the cheapest tier that is reliable for its topic.
+
+    Args:
+        tiers: [(tier name, solve)] from the cheapest to the last resort; solve(code, context)
+            returns the answer or None if the tier cannot answer the snippet. It may set
+            context["producer"] (the tier whose answer it serves, for cached answers) and
+            context["confidence"].
+        min_accuracy: Graded accuracy below which a tier is skipped for a topic, 0 to never skip
+        min_samples: Gradings of a tier and topic needed before it can be skipped
+    """
+
+    def __init__(self, tiers, min_accuracy=0.9, min_samples=5):
+        self.tiers = list(tiers)
+        self.min_accuracy = min_accuracy
+        self.min_samples = min_samples
+        # (topic, tier) -> [correct, wrong], learned and graded during the run
+        self.gradings = {}
+        # tier -> counters of this run
+        self.counts = {name: {"calls": 0, "answers": 0, "skipped": 0, "correct": 0, "wrong": 0}
+                       for name, _ in self.tiers}
+        self.latencies = {name: [] for name, _ in self.tiers}
+        # (session, snippet code) -> route of its last answer, until it is graded
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+
+    def learn(self, topic, tier, correct, count=1):
+        """Adds gradings of a tier's answers for a topic."""
+        with self.lock:
+            gradings = self.gradings.setdefault((topic, tier), [0, 0])
+            gradings[0 if correct else 1] += count
+
+    def learn_from_harvest(self, path):
+        """
+        Learns from the graded questions of a harvest file (lines recorded before the
+        harvest kept the answering tier are left out).
+
+        Returns:
+            int: Number of gradings learned
+        """
+        learned = 0
+        for record in load_harvest(path):
+            if record.get("tier") and record.get("correct") is not None:
+                self.learn(record["topic"], record["tier"], record["correct"])
+                learned += 1
+        return learned
+
+    def learn_from_solver(self, summary):
+        """
+        Learns from a summary of bench_solver.py (topic -> path -> {"snippets", "coverage",
+        "accuracy", ...}); snippets a tier could not answer do not count against it.
+
+        Returns:
+            int: Number of gradings learned
+        """
+        learned = 0
+        for topic, topic_summary in summary.items():
+            for path, tier in SOLVER_PATH_TIERS.items():
+                stats = topic_summary.get(path)
+                if not stats:
+                    continue
+                correct = round(stats["accuracy"] * stats["snippets"])
+                wrong = round(stats["coverage"] * stats["snippets"]) - correct
+                if correct:
+                    self.learn(topic, tier, True, correct)
+                if wrong > 0:
+                    self.learn(topic, tier, False, wrong)
+                learned += correct + max(wrong, 0)
+        return learned
+
+    def accuracy(self, topic, tier):
+        """Returns (graded accuracy or None without gradings, number of gradings)."""
+        correct, wrong = self.gradings.get((topic, tier), (0, 0))
+        total = correct + wrong
+        return (correct / total if total else None), total
+
+    def confidence(self, topic, tier):
+        """Estimated probability that an answer of the tier is correct for the topic."""
+        correct, wrong = self.gradings.get((topic, tier), (0, 0))
+        prior = PRIOR_CONFIDENCE.get(tier, 0.5)
+        return (correct + prior * PRIOR_WEIGHT) / (correct + wrong + PRIOR_WEIGHT)
+
+    def allows(self, topic, tier):
+        """True if the tier may answer snippets of the topic."""
+        last_tier = self.tiers[-1][0]
+        if tier == last_tier or not self.min_accuracy:
+            return True
+        accuracy, total = self.accuracy(topic, tier)
+        if total < self.min_samples or accuracy >= self.min_accuracy:
+            return True
+        # Still better than nothing when the last resort is known to do worse
+        last_accuracy, last_total = self.accuracy(topic, last_tier)
+        return last_total >= self.min_samples and accuracy > last_accuracy
+
+    def route(self, code):
+        """
+        Answers a snippet with the first allowed tier that can, remembering the route for
+        the grading of the current routing_session.
+
+        Returns:
+            tuple: (answer, route) where route is {"topic", "tier", "producer", "confidence"}
+
+        Raises:
+            NoRoute: if no tier answered; errors of the last tier are raised as they are
+        """
+        topic = classify_topic(code)
+        context = {"topic": topic}
+        for name, solve in self.tiers:
+            if not self.allows(topic, name):
+                with self.lock:
+                    self.counts[name]["skipped"] += 1
+                continue
+            start_time = time.perf_counter()
+            with tracing.span(f"tier {name}", topic=topic) as span_attributes:
+                answer = solve(code, context)
+                span_attributes.update(answered=answer is not None)
+            seconds = time.perf_counter() - start_time
+            with self.lock:
+                self.counts[name]["calls"] += 1
+                self.latencies[name].append(seconds)
+                if answer is not None:
+                    self.counts[name]["answers"] += 1
+            if answer is None:
+                continue
+            producer = context.get("producer", name)
+            confidence = context.get("confidence")
+            if confidence is None:
+                confidence = self.confidence(topic, producer)
+            route = {"topic": topic, "tier": name, "producer": producer, "confidence": confidence}
+            key = (routing_session.get(), code)
+            with self.lock:
+                self.pending[key] = (answer.strip(), route)
+                self.pending.move_to_end(key)
+                while len(self.pending) > MAX_PENDING_ROUTES:
+                    self.pending.popitem(last=False)
+            return answer, route
+        raise NoRoute(f"No answer tier could answer the {topic} snippet")
+
+    def record_grading(self, code, answer, correct):
+        """
+        Credits the site's grading to the tier that produced the answer routed for the
+        current routing_session.
+
+        Returns:
+            str: The producing tier, None if the answer was not routed here
+        """
+        with self.lock:
+            answer_route = self.pending.pop((routing_session.get(), code), None)
+        if answer_route is None or answer_route[0] != answer.strip():
+            return None
+        route = answer_route[1]
+        if correct is not None:
+            self.learn(route["topic"], route["producer"], correct)
+            with self.lock:
+                self.counts[route["tier"]]["correct" if correct else "wrong"] += 1
+        return route["producer"]
+
+    def rules(self):
+        """
+        Returns:
+            dict: topic -> tier -> {"accuracy", "gradings", "allowed"} for every topic with gradings
+        """
+        with self.lock:
+            topics = sorted({topic for topic, _ in self.gradings}, key=topic_order)
+        rules = {}
+        for topic in topics:
+            rules[topic] = {}
+            for name, _ in self.tiers:
+                accuracy, total = self.accuracy(topic, name)
+                rules[topic][name] = {"accuracy": accuracy, "gradings": total, "allowed": self.allows(topic, name)}
+        return rules
+
+    def stats(self):
+        """
+        Returns:
+            dict: tier -> counts with "hit rate" (answers per call) and "p50"/"p95" seconds per call
+        """
+        with self.lock:
+            stats = {}
+            for name, _ in self.tiers:
+                tier_stats = dict(self.counts[name])
+                tier_stats["hit rate"] = tier_stats["answers"] / tier_stats["calls"] if tier_stats["calls"] else 0.0
+                tier_stats["p50"] = percentile(self.latencies[name], 0.5)
+                tier_stats["p95"] = percentile(self.latencies[name], 0.95)
+                stats[name] = tier_stats
+            return stats
+
+    def print_rules(self):
+        rules = self.rules()
+        if not rules:
+            print("No graded answers to learn from yet")
+            return
+        names = [name for name, _ in self.tiers]
+        print(f"{'Topic':<24}" + "".join(f"{name:>14}" for name in names))
+        for topic, topic_rules in rules.items():
+            cells = []
+            for name in names:
+                rule = topic_rules[name]
+                if not rule["gradings"]:
+                    cells.append("-")
+                else:
+                    cells.append(f"{'' if rule['allowed'] else 'skip '}{rule['accuracy']:.0%} ({rule['gradings']})")
+            print(f"{topic:<24}" + "".join(f"{cell:>14}" for cell in cells))
+
+    def print_report(self):
+        stats = self.stats()
+        if not any(tier_stats["calls"] for tier_stats in stats.values()):
+            return
+        print("\n=== Answer Router ===")
+        print(f"{'Tier':<10}{'Calls':>7}{'Answers':>9}{'Hit rate':>10}{'Skipped':>9}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'Correct':>9}{'Wrong':>7}")
+        for name, tier_stats in stats.items():
+            print(f"{name:<10}{tier_stats['calls']:>7}{tier_stats['answers']:>9}{tier_stats['hit rate']:>10.0%}"
+                  f"{tier_stats['skipped']:>9}{tier_stats['p50'] * 1000:>10.2f}{tier_stats['p95'] * 1000:>10.2f}"
+                  f"{tier_stats['correct']:>9}{tier_stats['wrong']:>7}")
+        print(f"Skipped: tiers left out for a topic they answer below {self.min_accuracy:.0%} "
+              f"(after {self.min_samples} gradings). Graded accuracy per topic and tier:")
+        self.print_rules()
+        print("=== End of Answer Router ===\n")
+
+
+def topic_order(topic):
+    order = list(TOPICS.values()) + [UNKNOWN_TOPIC]
+    return order.index(topic) if topic in order else len(order)
+
+
+# Command line helper: python answer_router.py [SOLVER_SUMMARY.json ...]
+# Prints the routing rules learned from the harvest and bench_solver.py summaries
+if __name__ == "__main__":
+    import json
+    import sys
+
+    import settings
+
+    settings.initialize()
+    router = AnswerRouter([(name, None) for name in TIERS], settings.routing_min_accuracy,
+                          settings.routing_min_samples)
+    print(f"Learned {router.learn_from_harvest(settings.harvest_path)} gradings from {settings.harvest_path}")
+    for summary_path in sys.argv[1:] or ([settings.routing_solver_summary] if settings.routing_solver_summary else []):
+        with open(summary_path, encoding="utf-8") as summary_file:
+            print(f"Learned {router.learn_from_solver(json.load(summary_file))} gradings from {summary_path}")
+    router.print_rules()
@@ -0,0 +1,135 @@
+# Gemini requests of concurrent sessions, with and without the evaluation service.
+#
+# Usage: python bench_eval_service.py [--sessions 8] [--questions 10] [--pool 15]
+#
+# Every simulated session answers questions drawn from a pool of snippets of
+# snippet_corpus.py, taking page_delay seconds per page like the site, and looks each
+# snippet up in an answer cache shared by all sessions first (like the SQLite cache of
+# runner.py's workers), so only questions no session has answered yet reach Gemini. The
+# offline stub answers them through a GeminiClient, in three set-ups:
+#   direct        every session sends its own request, as without the service
+#   dedup         requests for a snippet already in flight wait for its answer
+#   dedup+batch   deduplication, at most max_requests requests at once and the snippets
+#                 waiting for one sent together in a single prompt
+# For each it reports the Gemini requests sent, the dedup ratio, the calls saved, the
+# accuracy and the p50/p95 time sessions waited for an answer.
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import random
+import threading
+import time
+
+from answer_cache import snippet_key
+from eval_service import EvaluationService
+from gemini_client import GeminiClient, GeminiError
+from pipeline import percentile
+from snippet_corpus import CORPUS
+from stub_backend import StubModel
+
+# set-up -> EvaluationService options, None to call the client directly
+SETUPS = {
+    "direct": None,
+    "dedup": {"batch_size": 1, "max_requests": 16},
+    "dedup+batch": {"batch_size": 4, "max_requests": 2},
+}
+
+
+def prompt_for(code):
+    # Same code block the stub looks for in main.py's prompt
+    return f"Execute this JavaScript code.\n```javascript\n{code}\n```\n"
+
+
+def run_setup(setup, arguments, pool):
+    """
+    Returns:
+        dict: {"waits", "correct", "answered", "failed", "gemini requests", "service": stats or None}
+    """
+    model = StubModel(arguments.latency, 0.0, arguments.seed)
+    client = GeminiClient(lambda: model, arguments.timeout, hedging=False, workers=16)
+    service = EvaluationService(client.generate, **SETUPS[setup]) if SETUPS[setup] is not None else None
+    cache = {}
+    cache_lock = threading.Lock()
+    results = {"waits": [], "correct": 0, "answered": 0, "failed": 0}
+    results_lock = threading.Lock()
+
+    def play(session):
+        # Every set-up sees the same questions in the same order
+        draw = random.Random(arguments.seed * 1000 + session)
+        for _ in range(arguments.questions):
+            time.sleep(arguments.page_delay * draw.uniform(0.5, 1.5))
+            code, expected = draw.choice(pool)
+            start_time = time.perf_counter()
+            with cache_lock:
+                answer = cache.get(snippet_key(code))
+            try:
+                if answer is None:
+                    if service is not None:
+                        answer = service.evaluate(code)
+                    else:
+                        answer = client.generate(prompt_for(code))
+                    with cache_lock:
+                        cache[snippet_key(code)] = answer
+            except GeminiError:
+                answer = None
+            with results_lock:
+                results["waits"].append(time.perf_counter() - start_time)
+                if answer is None:
+                    results["failed"] += 1
+                else:
+                    results["answered"] += 1
+                    results["correct"] += answer.strip() == expected
+
+    # The client prints its retries, only the report is of interest here
+    with contextlib.redirect_stdout(io.StringIO()):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=arguments.sessions) as executor:
+            list(executor.map(play, range(arguments.sessions)))
+    results["gemini requests"] = model.calls
+    results["service"] = service.stats() if service is not None else None
+    if service is not None:
+        service.close()
+    client.close()
+    return results
+
+
+def print_report(all_results, arguments):
+    print("\n=== Evaluation Service Benchmark ===")
+    print(f"{arguments.sessions} sessions x {arguments.questions} questions from a pool of {arguments.pool} snippets, "
+          f"{arguments.page_delay * 1000:.0f} ms per page, stub latency {arguments.latency * 1000:.0f} ms")
+    print(f"{'Set-up':<14}{'Requests':>10}{'Joined':>8}{'Dedup':>7}{'Batches':>9}{'Saved':>7}"
+          f"{'Correct':>10}{'Failed':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for setup, results in all_results.items():
+        service = results["service"] or {"joined": 0, "dedup ratio": 0.0, "batches": 0, "requests": 0}
+        # Saved against the Gemini questions of the direct set-up
+        saved = all_results["direct"]["gemini requests"] - results["gemini requests"]
+        print(f"{setup:<14}{results['gemini requests']:>10}{service['joined']:>8}{service['dedup ratio']:>7.0%}"
+              f"{service['batches']:>9}{saved:>7}{results['correct']:>5}/{results['answered']:<4}{results['failed']:>8}"
+              f"{percentile(results['waits'], 0.5) * 1000:>9.0f}{percentile(results['waits'], 0.95) * 1000:>9.0f}")
+    print("Requests are Gemini requests sent; Joined and Dedup are requests that waited for one in flight;")
+    print("Saved is requests fewer than the direct set-up; times are what a session waited for its answer")
+    print("=== End of Evaluation Service Benchmark ===\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini requests of concurrent sessions with the evaluation service")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=10, help="questions per session")
+    parser.add_argument("--pool", type=int, default=15, help="snippets the questions are drawn from")
+    parser.add_argument("--page-delay", type=float, default=0.3, help="mean seconds per question page")
+    parser.add_argument("--latency", type=float, default=1.5, help="mean seconds per stub answer")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds each Gemini call may take")
+    parser.add_argument("--seed", type=int, default=1)
+    arguments = parser.parse_args()
+
+    snippets = [item for items in CORPUS.values() for item in items]
+    pool = random.Random(arguments.seed).sample(snippets, min(arguments.pool, len(snippets)))
+    all_results = {}
+    for setup in SETUPS:
+        print(f"Running {arguments.sessions} sessions with the {setup} set-up...")
+        all_results[setup] = run_setup(setup, arguments, pool)
+    print_report(all_results, arguments)
+
+
+if __name__ == "__main__":
+    main()
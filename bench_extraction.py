@@ -0,0 +1,321 @@
+# Benchmark of the question code extraction against highlighted DOM fixtures.
+#
+# Usage: python bench_extraction.py [--repeat 200]
+#
+# Every snippet of snippet_corpus.py is rendered the way react-syntax-highlighter renders
+# it on the question page, in three layouts:
+#   wrapped       one element per line with its line number (wrapLines and showLineNumbers)
+#   flat          tokens and newlines directly in <code>, the line numbers in a <code> of their own
+#   plain         tokens and newlines directly in <code>, without line numbers
+# each inside a #code-snippet element that starts with the question text. The extraction
+# paths main.py had before snippet_parser.py (reading the element text and cutting it at
+# the first keyword, and joining the text of every span) run against fake elements that
+# answer .text, find_elements and get_attribute like Selenium's; the new parser reads the
+# same markup. For each path and layout it reports how many snippets came back exactly,
+# the microseconds spent parsing per snippet and the WebDriver calls a real page needs.
+import argparse
+import html
+import re
+import time
+
+from snippet_corpus import CORPUS
+from snippet_parser import parse_highlighted_html, rebuild_from_tokens
+
+QUESTION_TEXT = "What is the output of the following code?"
+LAYOUTS = ("wrapped", "flat", "plain")
+LINE_NUMBER_CLASS = "linenumber react-syntax-highlighter-line-number"
+LINE_NUMBER_STYLE = "display: inline-block; min-width: 2.25em; padding-right: 1em; text-align: right;"
+
+# Prism's JavaScript tokens, close enough for fixtures
+PRISM_PATTERN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<template>`(?:\\.|[^`\\])*`)
+  | (?P<keyword>\b(?:await|async|break|case|catch|class|const|continue|default|delete|do|else|extends|
+        finally|for|function|if|in|instanceof|let|new|of|return|static|super|switch|this|throw|try|
+        typeof|var|void|while|yield)\b)
+  | (?P<boolean>\b(?:true|false)\b)
+  | (?P<null>\b(?:null|undefined)\b)
+  | (?P<number>\b\d+(?:\.\d+)?\b|\bNaN\b|\bInfinity\b)
+  | (?P<function>\b[A-Za-z_$][\w$]*(?=\s*\())
+  | (?P<operator>=>|[-+*/%=!<>&|^~?]+|\.\.\.)
+  | (?P<punctuation>[{}()\[\];,.:])
+""", re.S | re.X)
+
+
+class FakeElement:
+    """
+    A rendered element that answers like a Selenium WebElement.
+
+    Args:
+        tag: Tag name
+        attributes: Attributes, in order ("class", "style", ...)
+        children: FakeElement or text (str) children
+    """
+
+    def __init__(self, tag, attributes=None, children=None):
+        self.tag = tag
+        self.attributes = attributes or {}
+        self.children = children or []
+
+    @property
+    def text(self):
+        # Selenium's text of the element as displayed: line numbers are set apart from
+        # the code by their padding, shown here as a space (the most favourable case for
+        # the old line number regexes)
+        parts = []
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            elif child.tag == "br":
+                parts.append("\n")
+            elif child.tag in ("p", "div", "pre") and parts and not parts[-1].endswith("\n"):
+                parts.append("\n" + child.text)
+            else:
+                parts.append(child.text)
+        if "linenumber" in self.attributes.get("class", ""):
+            parts.append(" ")
+        return "".join(parts)
+
+    def get_attribute(self, name):
+        if name == "innerHTML":
+            return "".join(child_html(child) for child in self.children)
+        return self.attributes.get(name, "")
+
+    def iter_elements(self):
+        for child in self.children:
+            if not isinstance(child, str):
+                yield child
+                yield from child.iter_elements()
+
+    def find_elements(self, by, value):
+        # Only tag names and "#id" / "tag.class" selectors are needed by the old paths
+        if value.startswith("#"):
+            return [element for element in self.iter_elements() if element.attributes.get("id") == value[1:]]
+        tag, _, class_name = value.partition(".")
+        return [element for element in self.iter_elements()
+                if element.tag == tag and (not class_name or class_name in element.attributes.get("class", "").split())]
+
+    def find_element(self, by, value):
+        return self.find_elements(by, value)[0]
+
+
+def child_html(child):
+    if isinstance(child, str):
+        return html.escape(child, quote=False)
+    attributes = "".join(f' {name}="{html.escape(value)}"' for name, value in child.attributes.items())
+    if child.tag == "br":
+        return f"<br{attributes}>"
+    return f"<{child.tag}{attributes}>{child.get_attribute('innerHTML')}</{child.tag}>"
+
+
+def highlighted_lines(code):
+    """
+    Splits a snippet into Prism tokens, one list per line.
+
+    Returns:
+        list: [[(class or "", text), ...], ...]
+    """
+    tokens = []
+    position = 0
+    for match in PRISM_PATTERN.finditer(code):
+        if match.start() > position:
+            tokens.append(("", code[position:match.start()]))
+        tokens.append((f"token {match.lastgroup}", match.group()))
+        position = match.end()
+    if position < len(code):
+        tokens.append(("", code[position:]))
+    # Tokens spanning several lines (template literals, comments) are split at newlines
+    lines = [[]]
+    for token_class, text in tokens:
+        pieces = text.split("\n")
+        for index, piece in enumerate(pieces):
+            if index:
+                lines.append([])
+            if piece:
+                lines[-1].append((token_class, piece))
+    return lines
+
+
+def token_nodes(line):
+    return [FakeElement("span", {"class": token_class}, [text]) if token_class else text
+            for token_class, text in line]
+
+
+def render(code, layout):
+    """Builds the #code-snippet element of a question page for one layout."""
+    lines = highlighted_lines(code)
+    code_style = {"class": "language-javascript", "style": "white-space: pre;"}
+    if layout == "wrapped":
+        children = []
+        for number, line in enumerate(lines, 1):
+            line_children = [FakeElement("span", {"class": LINE_NUMBER_CLASS, "style": LINE_NUMBER_STYLE},
+                                         [str(number)])]
+            line_children += token_nodes(line)
+            if number < len(lines):
+                line_children.append("\n")
+            children.append(FakeElement("span", {"style": "display: block;"}, line_children))
+        blocks = [FakeElement("code", code_style, children)]
+    else:
+        children = []
+        for number, line in enumerate(lines, 1):
+            children += token_nodes(line)
+            if number < len(lines):
+                children.append("\n")
+        blocks = [FakeElement("code", code_style, children)]
+        if layout == "flat":
+            numbers = [FakeElement("span", {"class": "react-syntax-highlighter-line-number"}, [f"{number}\n"])
+                       for number in range(1, len(lines) + 1)]
+            blocks.insert(0, FakeElement("code", {"style": "float: left; padding-right: 10px;"}, numbers))
+    pre = FakeElement("pre", {"style": "background: rgb(40, 44, 52);"}, blocks)
+    question = FakeElement("p", {}, [QUESTION_TEXT])
+    return FakeElement("div", {"id": "code-snippet"}, [question, pre])
+
+
+# Each path reads the page (WebDriver calls, not timed) and parses what it read (timed)
+def read_text(snippet_element):
+    return snippet_element.text
+
+
+def old_text_extraction(raw_content):
+    # extract_code_snippet before snippet_parser.py, without its prints
+    lines = raw_content.split('\n')
+    js_code_lines = []
+    start_collecting = False
+    for line in lines:
+        if any(keyword in line for keyword in ['let ', 'var ', 'const ', 'function ']):
+            start_collecting = True
+        if start_collecting:
+            cleaned_line = line
+            if line.strip() and line.strip()[0].isdigit():
+                match = re.match(r'^\s*\d+\s+(.+)$', line)
+                if match:
+                    cleaned_line = match.group(1)
+                else:
+                    parts = line.split(None, 1)
+                    if len(parts) > 1 and parts[0].isdigit():
+                        cleaned_line = parts[1]
+            js_code_lines.append(cleaned_line)
+    return '\n'.join(js_code_lines)
+
+
+def read_spans(snippet_element):
+    code_element = snippet_element.find_elements("css selector", "code.language-javascript")[0]
+    return [(span.get_attribute("class"), span.text) for span in code_element.find_elements("tag name", "span")]
+
+
+def old_span_extraction(spans):
+    # extract_from_language_javascript before snippet_parser.py, without its prints
+    combined_text = ""
+    for span_class, span_text in spans:
+        if "linenumber" in span_class or not span_text.strip():
+            continue
+        if span_text:
+            combined_text += span_text + " "
+    raw_content = combined_text.strip()
+    if "What is the output" in raw_content or "What would be the output" in raw_content:
+        valid_indices = [raw_content.find(keyword) for keyword in ['let ', 'var ', 'const ', 'function ']
+                         if keyword in raw_content]
+        if valid_indices:
+            raw_content = raw_content[min(valid_indices):]
+    return raw_content
+
+
+def read_markup(snippet_element):
+    return snippet_element.get_attribute("innerHTML")
+
+
+def read_snapshot(snippet_element):
+    # What CODE_SNAPSHOT_SCRIPT returns for the same page
+    code_element = snippet_element.find_elements("css selector", "code.language-javascript")[0]
+    tokens = []
+
+    def walk(element, in_line_number):
+        for child in element.children:
+            if isinstance(child, str):
+                tokens.append([in_line_number, "" if element is code_element else element.attributes.get("class", ""), child])
+            else:
+                walk(child, in_line_number or "linenumber" in child.attributes.get("class", ""))
+
+    walk(code_element, False)
+    return tokens
+
+
+def webdriver_calls(path, snippet_element):
+    """Round-trips each path makes to the browser for one question on a real page."""
+    if path == "spans (old)":
+        spans = read_spans(snippet_element)
+        # find_element, find_elements, then class and text of every span (text again when kept)
+        return 2 + 2 * len(spans) + sum(1 for span_class, span_text in spans
+                                        if "linenumber" not in span_class and span_text.strip())
+    if path == "snapshot":
+        return 1
+    # find_element and then .text or innerHTML
+    return 2
+
+
+# path -> (read from the page, parse)
+EXTRACTORS = {
+    "text (old)": (read_text, old_text_extraction),
+    "spans (old)": (read_spans, old_span_extraction),
+    "markup (new)": (read_markup, parse_highlighted_html),
+    "snapshot": (read_snapshot, rebuild_from_tokens),
+}
+PATHS = tuple(EXTRACTORS)
+
+
+def run_benchmark(repeat):
+    """
+    Returns:
+        dict: layout -> path -> {"exact", "snippets", "us", "calls", "failures"}
+    """
+    snippets = [code for items in CORPUS.values() for code, _ in items]
+    results = {}
+    for layout in LAYOUTS:
+        elements = [(code, render(code, layout)) for code in snippets]
+        results[layout] = {}
+        for path, (read, parse) in EXTRACTORS.items():
+            raw = [(code, read(element)) for code, element in elements]
+            failures = [code for code, content in raw if parse(content) != code]
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                for _, content in raw:
+                    parse(content)
+            elapsed = time.perf_counter() - start_time
+            results[layout][path] = {
+                "exact": len(raw) - len(failures),
+                "snippets": len(raw),
+                "us": elapsed / (repeat * len(raw)) * 1e6,
+                "calls": sum(webdriver_calls(path, element) for _, element in elements) / len(elements),
+                "failures": failures,
+            }
+    return results
+
+
+def print_report(results):
+    print("\n=== Extraction Benchmark ===")
+    print(f"{'Layout':<10}{'Path':<16}{'Exact':>10}{'us/snippet':>12}{'WebDriver calls':>17}")
+    for layout, paths in results.items():
+        for path, stats in paths.items():
+            print(f"{layout:<10}{path:<16}{stats['exact']:>5}/{stats['snippets']:<4}"
+                  f"{stats['us']:>12.1f}{stats['calls']:>17.1f}")
+    print("us/snippet is the parsing alone, every WebDriver call costs a round-trip to the browser on top")
+    print("=== End of Extraction Benchmark ===\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the question code extraction")
+    parser.add_argument("--repeat", type=int, default=200, help="times every fixture is parsed per path")
+    parser.add_argument("--show-failures", action="store_true", help="print the snippets the markup parser got wrong")
+    arguments = parser.parse_args()
+
+    results = run_benchmark(arguments.repeat)
+    print_report(results)
+    if arguments.show_failures:
+        for layout, paths in results.items():
+            for code in paths["markup (new)"]["failures"]:
+                print(f"--- {layout} ---\n{code}\n")
+
+
+if __name__ == "__main__":
+    main()
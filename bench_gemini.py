@@ -0,0 +1,141 @@
+# Tail latency of the Gemini client against the offline stub, with and without hedging.
+#
+# Usage: python bench_gemini.py [--calls 200] [--slow-rate 0.05] [--failure-rate 0.05] [--timeout 3] [--quota 0]
+#
+# The stub model answers the snippets of snippet_corpus.py after latency seconds (50% to
+# 150% of it), except for a slow tail (slow_rate of the calls take slow_factor times
+# longer) and transient failures (failure_rate of the calls). The same calls go through
+# three client set-ups:
+#   single        one request per call, no retry, like the model was called before
+#   retries       retries with backoff on transient errors, within the deadline
+#   hedged        retries, plus a duplicate request once a call is slower than the p95
+#   streamed      retries, the answer read as it is written and the response left as soon
+#                 as the answer line is complete (see gemini_streaming in settings.py)
+#   limited       hedged, behind a rate limiter set to the stub's quota; only run with
+#                 --quota, which makes the stub turn away requests over N per minute
+# For each it reports answered and failed calls, p50/p95/p99/max latency and the requests
+# sent per call, i.e. the extra load hedging costs, and for the streamed set-up the p50 time
+# to the first text, which is when typing the answer can start. With --quota it also
+# reports the requests the stub turned away for the quota and the p95 wait for budget.
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import time
+
+from gemini_client import GeminiClient, GeminiError, GeminiTimeout, answer_complete, expected_answer_lines
+from pipeline import percentile
+from rate_limiter import RateLimiter
+from snippet_corpus import CORPUS
+from stub_backend import StubModel
+
+SETUPS = {
+    "single": {"retries": 0, "hedging": False},
+    "retries": {"retries": 2, "hedging": False},
+    "hedged": {"retries": 2, "hedging": True},
+    "streamed": {"retries": 2, "hedging": False, "streaming": True},
+    "limited": {"retries": 2, "hedging": True, "limited": True},
+}
+
+
+def prompt_for(code):
+    # Same code block the stub looks for in main.py's prompt
+    return f"Execute this JavaScript code.\n```javascript\n{code}\n```\n"
+
+
+def run_setup(setup, arguments, snippets):
+    """
+    Returns:
+        dict: {"latencies", "answered", "correct", "timeouts", "errors", "client": client stats}
+    """
+    model = StubModel(arguments.latency, 0.0, arguments.seed, arguments.failure_rate,
+                      arguments.slow_rate, arguments.slow_factor, arguments.quota)
+    options = dict(SETUPS[setup])
+    streaming = options.pop("streaming", False)
+    limiter = RateLimiter(arguments.quota, 0) if options.pop("limited", False) else None
+    client = GeminiClient(lambda: model, arguments.timeout, backoff=arguments.latency / 2,
+                          hedge_min_delay=arguments.latency / 2, workers=arguments.concurrency * 3,
+                          limiter=limiter, **options)
+    results = {"latencies": [], "answered": 0, "correct": 0, "timeouts": 0, "errors": 0}
+
+    def call(item):
+        code, expected = item
+        start_time = time.perf_counter()
+        try:
+            if streaming:
+                lines = expected_answer_lines(code)
+                answer, _ = client.stream(prompt_for(code), is_complete=lambda text: answer_complete(text, lines))
+            else:
+                answer = client.generate(prompt_for(code))
+            outcome = "correct" if answer.strip() == expected else "answered"
+        except GeminiTimeout:
+            outcome = "timeouts"
+        except GeminiError:
+            outcome = "errors"
+        return outcome, time.perf_counter() - start_time
+
+    items = [snippets[index % len(snippets)] for index in range(arguments.calls)]
+    # The client prints its retries, only the report is of interest here
+    with contextlib.redirect_stdout(io.StringIO()):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=arguments.concurrency) as executor:
+            for outcome, seconds in executor.map(call, items):
+                results["latencies"].append(seconds)
+                if outcome == "correct":
+                    results["correct"] += 1
+                    results["answered"] += 1
+                else:
+                    results[outcome] += 1
+    results["client"] = client.stats()
+    results["rate limited"] = model.rate_limited
+    results["budget wait p95"] = limiter.stats()["wait p95"] if limiter is not None else 0.0
+    client.close()
+    return results
+
+
+def print_report(all_results, arguments):
+    print("\n=== Gemini Client Benchmark ===")
+    print(f"{arguments.calls} calls, {arguments.concurrency} at a time, stub latency {arguments.latency * 1000:.0f} ms, "
+          f"{arguments.slow_rate:.0%} slow (x{arguments.slow_factor:g}), {arguments.failure_rate:.0%} failing, "
+          f"timeout {arguments.timeout:g} s" + (f", quota {arguments.quota} requests/min" if arguments.quota else ""))
+    print(f"{'Set-up':<10}{'Answered':>10}{'Failed':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+          f"{'Requests/call':>15}{'Hedges':>8}{'First text ms':>15}"
+          + (f"{'429s':>7}{'Budget wait p95 ms':>20}" if arguments.quota else ""))
+    for setup, results in all_results.items():
+        latencies = results["latencies"]
+        client = results["client"]
+        failed = results["timeouts"] + results["errors"]
+        print(f"{setup:<10}{results['answered']:>10}{failed:>8}{percentile(latencies, 0.5) * 1000:>9.0f}"
+              f"{percentile(latencies, 0.95) * 1000:>9.0f}{percentile(latencies, 0.99) * 1000:>9.0f}"
+              f"{max(latencies) * 1000:>9.0f}{client['requests'] / client['calls']:>15.2f}{client['hedges']:>8}"
+              f"{client['first token p50'] * 1000 if client['streams'] else percentile(latencies, 0.5) * 1000:>15.0f}"
+              + (f"{results['rate limited']:>7}{results['budget wait p95'] * 1000:>20.0f}" if arguments.quota else ""))
+    print("First text is when typing can start: the whole answer without streaming, the first chunk with it")
+    print("=== End of Gemini Client Benchmark ===\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail latency of the Gemini client against the offline stub")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="calls running at the same time")
+    parser.add_argument("--latency", type=float, default=0.2, help="mean seconds per stub answer")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="fraction of calls in the slow tail")
+    parser.add_argument("--slow-factor", type=float, default=10.0, help="how much longer a slow call takes")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="fraction of calls failing transiently")
+    parser.add_argument("--timeout", type=float, default=3.0, help="seconds each call may take")
+    parser.add_argument("--quota", type=int, default=0,
+                        help="requests per minute the stub accepts (0 for no quota), adds the limited set-up")
+    parser.add_argument("--seed", type=int, default=1)
+    arguments = parser.parse_args()
+
+    snippets = [item for items in CORPUS.values() for item in items]
+    all_results = {}
+    for setup in SETUPS:
+        if setup == "limited" and not arguments.quota:
+            continue
+        print(f"Running {arguments.calls} calls with the {setup} set-up...")
+        all_results[setup] = run_setup(setup, arguments, snippets)
+    print_report(all_results, arguments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# End-to-end benchmark against the local mock site, fully offline.
+#
+# Usage: python bench_site.py [rounds] [--gemini-only] [--direct] [--capture] [--no-blocking] [--bounce-rate 0.1]
+#
+# Starts mock_site.py on a local port, points main.py at it with the stub evaluation
+# backend and a headless Chrome, and plays the given number of rounds one after another.
+# Reports rounds/min, p50/p95 time per question, the per-phase breakdown of the pipeline,
+# the startup phases and the accuracy graded by the mock site next to the grading the bot
+# read back. The answer cache and the saved sessions go to a temporary folder, so runs do
+# not touch (or benefit from) the real ones. --gemini-only turns off the local evaluator
+# so every answer goes through the stub model, which measures the remote-answer path.
+# --direct answers through the site's endpoints after logging in (direct mode) instead of
+# the question pages, --capture reads the snippets from the question responses instead of
+# the highlighted code, and --no-blocking lets the pages load their images and fonts.
+import argparse
+import os
+import tempfile
+import time
+
+import main as practiceme
+from mock_site import start_server
+from pipeline import QuestionPipeline
+from session_store import SessionStore
+
+# Phases of a question in the order they happen, the rest of the stages follow
+PHASE_ORDER = ("question fetch", "answer submit", "question load", "extract", "page check", "input lookup",
+               "wait for answer", "type answer", "grading", "next click", "transition")
+
+
+def configure(base_url, work_dir, arguments):
+    # main.py reads settings.py when imported, the benchmark overrides its module settings
+    practiceme.BASE_URL = base_url
+    practiceme.EVALUATION_BACKEND = "stub"
+    practiceme.STUB_LATENCY = arguments.stub_latency
+    practiceme.STUB_ERROR_RATE = arguments.stub_error_rate
+    practiceme.HEADLESS = not arguments.show_browser
+    practiceme.CHROME_USER_DATA_DIR = ""
+    practiceme.USE_LOCAL_EVALUATOR = not arguments.gemini_only
+    practiceme.USE_DIRECT_MODE = arguments.direct
+    practiceme.CAPTURE_NETWORK_PAYLOADS = arguments.capture
+    practiceme.BLOCK_RESOURCES = not arguments.no_blocking
+    practiceme.ANSWER_CACHE_PATH = os.path.join(work_dir, "answer_cache.sqlite3")
+    practiceme.session_store = SessionStore(os.path.join(work_dir, "sessions"))
+    practiceme.PREWARM_FROM_HARVEST = False
+    practiceme.HARVEST_PATH = os.path.join(work_dir, "harvest.jsonl")
+
+
+def print_report(results, pipeline_stats, site_stats, grading_stats, wall_clock):
+    rounds = [result for result in results if not result.get("error")]
+    answered = sum(result["answered"] for result in results)
+    stages = pipeline_stats["stages"]
+    question = stages.get("question total")
+
+    print("\n=== Mock Site Benchmark ===")
+    print(f"Rounds: {len(rounds)} of {len(results)}, Questions answered: {answered}, Wall-clock time: {wall_clock:.1f} s")
+    print(f"Throughput: {len(rounds) / wall_clock * 60:.2f} rounds/min, {answered / wall_clock * 60:.1f} questions/min")
+    if question:
+        print(f"Per question: p50 {question['p50'] * 1000:.0f} ms, p95 {question['p95'] * 1000:.0f} ms,"
+              f" mean {question['mean'] * 1000:.0f} ms")
+
+    print(f"\n{'Phase':<20}{'Count':>7}{'p50 ms':>10}{'p95 ms':>10}{'Share':>8}")
+    driver_total = sum(stages[name]["total"] for name in PHASE_ORDER if name in stages) or 1.0
+    names = [name for name in PHASE_ORDER if name in stages]
+    names += sorted(name for name in stages if name not in PHASE_ORDER and name != "question total")
+    for name in names:
+        stage = stages[name]
+        # Only the driver-thread phases add up to a question, background evaluation overlaps them
+        share = f"{stage['total'] / driver_total:>7.0%}" if name in PHASE_ORDER else f"{'-':>7}"
+        print(f"{name:<20}{stage['count']:>7}{stage['p50'] * 1000:>10.1f}{stage['p95'] * 1000:>10.1f} {share}")
+
+    startup_phases = {}
+    for result in rounds:
+        for phase, seconds in result["startup"].items():
+            startup_phases.setdefault(phase, []).append(seconds)
+    if startup_phases:
+        print(f"\n{'Startup phase':<20}{'Mean ms':>10}")
+        for phase, values in startup_phases.items():
+            print(f"{phase:<20}{sum(values) / len(values) * 1000:>10.1f}")
+
+    recoveries = [incident for result in results for incident in result["recoveries"]]
+    if recoveries:
+        mean_recovery = sum(incident["seconds"] for incident in recoveries) / len(recoveries)
+        print(f"\nRecoveries: {len(recoveries)} (server bounced {site_stats['bounces']}), mean {mean_recovery:.2f} s")
+
+    resource_pages = {}
+    for result in rounds:
+        for page, stats in ((result.get("resources") or {}).get("pages") or {}).items():
+            totals = resource_pages.setdefault(page, {"blocked": 0, "bytes": 0, "ms": 0.0})
+            for name in totals:
+                totals[name] += stats[name]
+    if resource_pages:
+        print(f"\n{'Page':<12}{'Blocked':>9}{'KB saved':>10}{'ms saved':>10}   (images/fonts served: {site_stats['static_requests']})")
+        for page, totals in sorted(resource_pages.items()):
+            print(f"{page:<12}{totals['blocked']:>9}{totals['bytes'] / 1024:>10.1f}{totals['ms']:>10.0f}")
+
+    if site_stats["answered"]:
+        print(f"\nGraded by the mock site: {site_stats['correct']}/{site_stats['answered']} correct"
+              f" ({site_stats['correct'] / site_stats['answered']:.0%})")
+        # Next to the grading the bot read back (ungraded: the bot could not read it)
+        print(f"{'Topic':<24}{'Answered':>10}{'Correct':>10}{'Read':>8}{'Ungraded':>10}")
+        for topic, topic_stats in sorted(site_stats["topics"].items()):
+            read = grading_stats.get(topic, {"correct": 0, "ungraded": 0})
+            print(f"{topic:<24}{topic_stats['answered']:>10}{topic_stats['correct']:>10}"
+                  f"{read['correct']:>8}{read['ungraded']:>10}")
+    print("=== End of Mock Site Benchmark ===\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against the local mock site")
+    parser.add_argument("rounds", type=int, nargs="?", default=3)
+    parser.add_argument("--gemini-only", action="store_true", help="answer every snippet through the stub model")
+    parser.add_argument("--direct", action="store_true", help="answer through the site's endpoints after logging in")
+    parser.add_argument("--capture", action="store_true", help="read snippets from the question responses")
+    parser.add_argument("--no-blocking", action="store_true", help="let pages load images and fonts")
+    parser.add_argument("--bounce-rate", type=float, default=0.0,
+                        help="probability that an answer sends the browser back to the dashboard")
+    parser.add_argument("--session-ttl", type=float, default=0, help="seconds a login stays valid, 0 for no expiry")
+    parser.add_argument("--question-delay", type=float, default=0.15, help="seconds before the next question shows")
+    parser.add_argument("--stub-latency", type=float, default=0.8, help="mean seconds per stub model answer")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--show-browser", action="store_true", help="run Chrome with a window")
+    parser.add_argument("--seed", type=int, default=None)
+    arguments = parser.parse_args()
+
+    server, site = start_server(bounce_rate=arguments.bounce_rate, session_ttl=arguments.session_ttl,
+                                question_delay=arguments.question_delay, seed=arguments.seed)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Mock site running on {base_url}")
+
+    with tempfile.TemporaryDirectory(prefix="practiceme-bench-") as work_dir:
+        configure(base_url, work_dir, arguments)
+        profile = practiceme.complete_profile(practiceme.PROFILES[0])
+        # The mock site accepts any login, the real credentials are never sent anywhere
+        profile.update(name="bench", email="bench@example.com", password="bench")
+
+        practiceme.init_evaluation()
+        pipeline = QuestionPipeline(practiceme.evaluate_javascript, practiceme.EVALUATION_WORKERS)
+        results = []
+        start_time = time.perf_counter()
+        try:
+            for round_number in range(1, arguments.rounds + 1):
+                print(f"\n=== Benchmark round {round_number}/{arguments.rounds} ===\n")
+                try:
+                    results.append(practiceme.run_session(profile, pipeline=pipeline))
+                except Exception as e:
+                    print(f"Round failed: {e}")
+                    results.append({"profile": profile["name"], "answered": 0, "elapsed": 0.0, "startup": {},
+                                    "recoveries": [], "error": str(e)})
+        finally:
+            wall_clock = time.perf_counter() - start_time
+            pipeline.shutdown()
+            grading_stats = practiceme.grade_book.stats()
+            practiceme.close_evaluation()
+            server.shutdown()
+
+    print_report(results, pipeline.stats(), site.stats(), grading_stats, wall_clock)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# Per-topic benchmark of every answer path, over the snippets in snippet_corpus.py.
+#
+# Usage: python bench_solver.py [--repeat 3] [--live] [--corpus harvested.json] [--json results.json]
+#
+# Each snippet of each topic is answered through every path main.py can use:
+#   gemini        evaluate_javascript_with_gemini (the offline stub unless --live is given)
+#   local         the local interpreter on its own
+#   template      the template cache, seeded with the corpus like it is from the answer cache
+#   answer cache  a lookup in a warm answer cache
+#   full          evaluate_javascript, the routing main.py uses (caches start empty)
+# For every topic and path it reports accuracy against the expected output, how many
+# snippets the path could answer at all, p50/p95 latency and throughput, and suggests the
+# fastest path that answered every snippet of the topic correctly. No network access is
+# needed without --live; the caches live in a temporary folder. --corpus replaces the
+# built-in snippets with a corpus exported from the harvest (python harvest.py export FILE).
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import js_interpreter
+import main as practiceme
+import stub_backend
+from answer_cache import AnswerCache
+from gemini_client import GeminiError
+from pipeline import percentile
+from snippet_corpus import CORPUS
+from template_cache import TemplateCache
+from topics import TOPICS, UNKNOWN_TOPIC
+
+PATHS = ("gemini", "local", "template", "answer cache", "full")
+
+
+def timed(solve, code):
+    """
+    Runs one answer path on a snippet with its output silenced.
+
+    Returns:
+        tuple: (answer or None if the path cannot answer the snippet, seconds)
+    """
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            answer = solve(code)
+    except (js_interpreter.UnsupportedSyntax, GeminiError):
+        answer = None
+    return answer, time.perf_counter() - start_time
+
+
+def load_corpus(path):
+    """Reads a corpus exported by harvest.py, and lets the stub model know its answers."""
+    with open(path, encoding="utf-8") as corpus_file:
+        corpus = {topic: [tuple(item) for item in items] for topic, items in json.load(corpus_file).items()}
+    for items in corpus.values():
+        for code, expected in items:
+            stub_backend.KNOWN_ANSWERS[stub_backend.snippet_key(code)] = expected
+    return corpus
+
+
+def build_paths(work_dir, corpus):
+    # Caches are warmed with the corpus first, so the timed calls measure hits
+    answer_cache = AnswerCache(os.path.join(work_dir, "answer_cache.sqlite3"))
+    template_cache = TemplateCache()
+    snippets = [(code, expected) for items in corpus.values() for code, expected in items]
+    for code, expected in snippets:
+        answer_cache.put(code, expected, "bench")
+    template_cache.seed(code for code, _ in snippets)
+
+    def solve_with_template(code):
+        return template_cache.solve(code)[0]
+
+    paths = {
+        "gemini": practiceme.evaluate_javascript_with_gemini,
+        "local": js_interpreter.run,
+        "template": solve_with_template,
+        "answer cache": answer_cache.get,
+        "full": practiceme.evaluate_javascript,
+    }
+    return paths, answer_cache
+
+
+def run_benchmark(paths, corpus, repeat):
+    """
+    Returns:
+        dict: topic -> path -> {"answers": [answer or None], "expected": [...], "latencies": [...]}
+    """
+    results = {}
+    for topic in list(TOPICS.values()) + [UNKNOWN_TOPIC]:
+        if not corpus.get(topic):
+            continue
+        results[topic] = {}
+        for path in PATHS:
+            runs = {"answers": [], "expected": [], "latencies": []}
+            for _ in range(repeat):
+                for code, expected in corpus[topic]:
+                    answer, seconds = timed(paths[path], code)
+                    runs["answers"].append(answer)
+                    runs["expected"].append(expected)
+                    runs["latencies"].append(seconds)
+            results[topic][path] = runs
+        print(f"Benchmarked {topic}")
+    return results
+
+
+def summarize(runs):
+    answered = [answer for answer in runs["answers"] if answer is not None]
+    correct = sum(1 for answer, expected in zip(runs["answers"], runs["expected"])
+                  if answer is not None and answer.strip() == expected)
+    total_time = sum(runs["latencies"])
+    return {
+        "snippets": len(runs["answers"]),
+        "coverage": len(answered) / len(runs["answers"]),
+        "accuracy": correct / len(runs["answers"]),
+        "p50": percentile(runs["latencies"], 0.5),
+        "p95": percentile(runs["latencies"], 0.95),
+        "throughput": len(runs["answers"]) / total_time if total_time else 0.0,
+    }
+
+
+def suggest_route(topic_summary):
+    # The fastest path that answered everything correctly, or the most accurate one
+    perfect = [path for path in ("local", "template", "gemini") if topic_summary[path]["accuracy"] == 1.0]
+    if perfect:
+        return min(perfect, key=lambda path: topic_summary[path]["p50"])
+    return max(("local", "template", "gemini"), key=lambda path: topic_summary[path]["accuracy"])
+
+
+def print_report(summary):
+    print("\n=== Solver Benchmark ===")
+    print(f"{'Topic':<24}{'Path':<14}{'Coverage':>9}{'Accuracy':>9}{'p50 ms':>10}{'p95 ms':>10}{'Per s':>9}")
+    for topic, topic_summary in summary.items():
+        for path in PATHS:
+            stats = topic_summary[path]
+            print(f"{topic:<24}{path:<14}{stats['coverage']:>9.0%}{stats['accuracy']:>9.0%}"
+                  f"{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}{stats['throughput']:>9.1f}")
+    print(f"\n{'Topic':<24}{'Suggested route':<16}")
+    for topic, topic_summary in summary.items():
+        print(f"{topic:<24}{topic_summary['route']:<16}")
+    print("=== End of Solver Benchmark ===\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-topic benchmark of every answer path")
+    parser.add_argument("--repeat", type=int, default=1, help="times every snippet is answered per path")
+    parser.add_argument("--live", action="store_true", help="use the real Gemini API (needs GEMINI_API_KEY)")
+    parser.add_argument("--stub-latency", type=float, default=practiceme.STUB_LATENCY,
+                        help="mean seconds per stub model answer")
+    parser.add_argument("--stub-error-rate", type=float, default=practiceme.STUB_ERROR_RATE)
+    parser.add_argument("--corpus", help="JSON corpus exported by harvest.py instead of snippet_corpus.py")
+    parser.add_argument("--json", help="also write the summary to this file")
+    arguments = parser.parse_args()
+    corpus = load_corpus(arguments.corpus) if arguments.corpus else CORPUS
+
+    with tempfile.TemporaryDirectory(prefix="practiceme-solver-") as work_dir:
+        # main.py reads settings.py when imported, the benchmark overrides its module settings
+        practiceme.EVALUATION_BACKEND = "gemini" if arguments.live else "stub"
+        practiceme.STUB_LATENCY = arguments.stub_latency
+        practiceme.STUB_ERROR_RATE = arguments.stub_error_rate
+        practiceme.ANSWER_CACHE_PATH = os.path.join(work_dir, "full_cache.sqlite3")
+        practiceme.PREWARM_FROM_HARVEST = False
+        practiceme.HARVEST_QUESTIONS = False
+        practiceme.init_evaluation()
+        paths, answer_cache = build_paths(work_dir, corpus)
+        try:
+            results = run_benchmark(paths, corpus, arguments.repeat)
+        finally:
+            answer_cache.close()
+            with contextlib.redirect_stdout(io.StringIO()):
+                practiceme.close_evaluation()
+
+    summary = {}
+    for topic, topic_results in results.items():
+        summary[topic] = {path: summarize(runs) for path, runs in topic_results.items()}
+        summary[topic]["route"] = suggest_route(summary[topic])
+    print_report(summary)
+
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as json_file:
+            json.dump(summary, json_file, indent=2)
+        print(f"Summary written to {arguments.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# Direct HTTP mode: after the browser has logged in, the question loop talks to the
+# site's endpoints instead of driving the pages.
+#
+# Fetching a question and submitting an answer is a small JSON request each, so there is
+# no need to render the question page, walk its highlighted code or click Next. The
+# login cookies (and the token the site keeps in localStorage) are copied from the
+# browser, and requests go over a small pool of keep-alive connections so every call
+# reuses an open TCP/TLS connection. The endpoint paths are set in settings.py
+# (direct_endpoints); mock_site.py implements the same ones for testing. Only the
+# standard library is used.
+import http.client
+import json
+import queue
+import threading
+import urllib.parse
+
+from topics import TOPIC_POSITION_TO_VALUE
+
+# Token the site stores in localStorage after logging in, sent as a bearer token
+TOKEN_SCRIPT = "return window.localStorage.getItem('token');"
+
+# A kept-alive connection the server has closed in the meantime fails with one of these
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                           BrokenPipeError, ConnectionResetError)
+# Requests that may be sent again when the connection dropped after sending them
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class DirectModeError(Exception):
+    """The site's endpoints did not answer as expected; the browser loop is used instead."""
+
+
+class SessionExpired(DirectModeError):
+    """The login is no longer accepted by the endpoints."""
+
+
+class RequestInterrupted(DirectModeError):
+    """The connection dropped after a request was sent, the server may have processed it."""
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections to one host, reused across requests and threads.
+
+    Args:
+        base_url: Site address, e.g. https://practiceme.vercel.app
+        size: Connections kept open at most
+        timeout: Seconds to wait for the server on each request
+    """
+
+    def __init__(self, base_url, size=4, timeout=10):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=size)
+        self.lock = threading.Lock()
+        self.created = 0
+        self.requests = 0
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                self.created += 1
+            return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def release(self, connection):
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Sends a request on a pooled connection, reconnecting once if it went stale. A
+        request that was already sent is only sent again if repeating it is harmless.
+
+        Returns:
+            tuple: (status code, response body as bytes)
+
+        Raises:
+            RequestInterrupted: if the connection dropped after a POST or PATCH was sent
+        """
+        for attempt in range(2):
+            connection = self.acquire()
+            sent = False
+            try:
+                connection.request(method, path, body=body, headers=headers or {})
+                sent = True
+                response = connection.getresponse()
+                data = response.read()
+            except STALE_CONNECTION_ERRORS as e:
+                connection.close()
+                if sent and method not in IDEMPOTENT_METHODS:
+                    raise RequestInterrupted(f"{method} {path} got no response ({type(e).__name__})") from e
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+            with self.lock:
+                self.requests += 1
+            if response.will_close:
+                connection.close()
+            else:
+                self.release(connection)
+            return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class DirectClient:
+    """
+    Fetches questions and submits answers through the site's JSON endpoints.
+
+    Args:
+        base_url: Site address
+        endpoints: Paths for "start", "question" and "answer" ({round} is replaced by the round id)
+        cookies: Cookie header value of the logged-in browser
+        token: Bearer token from localStorage, if the site uses one
+        pool_size: Keep-alive connections kept open
+        timeout: Seconds to wait for each response
+    """
+
+    def __init__(self, base_url, endpoints, cookies="", token=None, pool_size=4, timeout=10):
+        self.endpoints = endpoints
+        self.pool = ConnectionPool(base_url, pool_size, timeout)
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        self.set_login(cookies, token)
+
+    @classmethod
+    def from_driver(cls, driver, base_url, endpoints, **options):
+        """Creates a client that shares the login of the browser's current session."""
+        client = cls(base_url, endpoints, **options)
+        client.refresh_login(driver)
+        return client
+
+    def set_login(self, cookies, token=None):
+        self.headers["Cookie"] = cookies
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        else:
+            self.headers.pop("Authorization", None)
+
+    def refresh_login(self, driver):
+        """Copies the cookies and token of the browser, e.g. after it logged in again."""
+        cookies = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in driver.get_cookies())
+        try:
+            token = driver.execute_script(TOKEN_SCRIPT)
+        except Exception:
+            token = None
+        self.set_login(cookies, token)
+
+    def call(self, method, endpoint, round_id=None, payload=None):
+        path = self.endpoints[endpoint].format(round=round_id)
+        body = json.dumps(payload) if payload is not None else None
+        try:
+            status, data = self.pool.request(method, path, body, self.headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise DirectModeError(f"{method} {path} failed: {e}") from e
+        if status in (401, 403):
+            raise SessionExpired(f"{method} {path} was refused ({status}), the login has expired")
+        if status != 200:
+            raise DirectModeError(f"{method} {path} returned {status}")
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise DirectModeError(f"{method} {path} did not return JSON") from e
+
+    def start_round(self, topic_selection, difficulty):
+        """Starts a round with the given topic positions (0 for all topics) and returns its id."""
+        if not isinstance(topic_selection, list):
+            topic_selection = [topic_selection]
+        topics = [TOPIC_POSITION_TO_VALUE[position] for position in topic_selection if position in TOPIC_POSITION_TO_VALUE]
+        if not topics:
+            topics = list(TOPIC_POSITION_TO_VALUE.values())
+        return self.call("POST", "start", payload={"topics": topics, "difficulty": difficulty})["round"]
+
+    def question(self, round_id):
+        """Returns {"finished": bool, "index", "total", "code"} for the round's current question."""
+        return self.call("GET", "question", round_id)
+
+    def answer(self, round_id, answer):
+        """
+        Submits the answer of the current question and returns the site's reply.
+
+        Raises:
+            RequestInterrupted: if it is unknown whether the site took the answer
+        """
+        return self.call("POST", "answer", round_id, {"answer": answer})
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,390 @@
+# Evaluation service that coalesces the Gemini requests of concurrent sessions.
+#
+# Sessions playing the same topics often get the same question at nearly the same time,
+# and each of them would ask Gemini on its own. EvaluationService keeps a single request
+# per snippet in flight: a session asking for a snippet (by its normalized key, like the
+# answer cache) that is already being evaluated waits for that answer instead of sending
+# another request. At most max_requests Gemini requests run at once; snippets arriving
+# while they are all busy wait for a free one, and the next free request takes up to
+# batch_size of them in a single prompt. Batching therefore only happens when snippets
+# would have queued anyway, so an idle service answers every snippet on its own without
+# added latency, and a busy one spends one request (and one slot of the API's quota)
+# on several snippets. The answers of a batch are split up by their headers and handed to
+# every waiting session; a batch answer that cannot be split is asked again one snippet
+# per request.
+#
+# Threads of one process (multisession.py, the pipeline threads) share an
+# EvaluationService directly. The worker processes of runner.py share one through
+# EvaluationServer, a JSON lines server on a local socket, with EvaluationClient on the
+# session side.
+#
+# Usage: python eval_service.py [--port 8765] serves the evaluation of every process
+# configured with evaluation_service = "shared" until interrupted.
+import argparse
+import contextvars
+import json
+import re
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from answer_cache import snippet_key
+from gemini_client import GeminiError, GeminiTimeout, answer_prompt
+from pipeline import question_started
+
+# Header in front of each answer of a batch, and the pattern that finds them again
+BATCH_HEADER = "=== Snippet {number} ==="
+BATCH_HEADER_PATTERN = re.compile(r"^[ \t]*=== Snippet (\d+) ===[ \t]*$", re.M)
+
+
+class ServiceUnreachable(GeminiError):
+    """No evaluation server answers on the configured address."""
+
+
+def batch_prompt(items):
+    """
+    Returns the prompt asking Gemini for the console output of several snippets at once.
+
+    Args:
+        items: (code, wrong answers) of every snippet, in order
+    """
+    headers = "\n".join(BATCH_HEADER.format(number=number) + f"\n<console output of snippet {number}>"
+                        for number in range(1, len(items) + 1))
+    prompt = f"""
+Execute each of these {len(items)} JavaScript snippets on its own and respond with ONLY the exact console output of each.
+
+No explanations, no code, no markdown formatting. Write the output of every snippet under its header line, in order:
+{headers}
+"""
+    for number, (code, wrong_answers) in enumerate(items, 1):
+        prompt += f"\nSnippet {number}:\n```javascript\n{code}\n```\n"
+        if wrong_answers:
+            prompt += (f"These answers are wrong for snippet {number}: "
+                       + "; ".join(repr(answer) for answer in sorted(wrong_answers)) + "\n")
+    return prompt
+
+
+def split_batch_answers(text, count):
+    """
+    Splits the answer to a batch prompt at its headers.
+
+    Returns:
+        list: The answer of every snippet in order, None unless each of the count headers
+            was found exactly once and in order
+    """
+    headers = list(BATCH_HEADER_PATTERN.finditer(text))
+    if [int(header.group(1)) for header in headers] != list(range(1, count + 1)):
+        return None
+    ends = [header.start() for header in headers[1:]] + [len(text)]
+    return [text[header.end():end].strip() for header, end in zip(headers, ends)]
+
+
+class EvaluationService:
+    """
+    Deduplicates and batches the Gemini requests of every session using it.
+
+    Args:
+        generate: Function sending a prompt to Gemini and returning the answer text,
+            raising GeminiError on failure (GeminiClient.generate)
+        batch_size: Most snippets sent in one prompt (1 never batches)
+        max_requests: Gemini requests running at the same time
+        batch_window: Seconds a request waits for more snippets before it is sent
+    """
+
+    def __init__(self, generate, batch_size=4, max_requests=2, batch_window=0.0):
+        self.generate = generate
+        self.batch_size = max(1, batch_size)
+        self.max_requests = max(1, max_requests)
+        self.batch_window = batch_window
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        # key -> Future of the snippet being evaluated
+        self.in_flight = {}
+        # (key, code, wrong answers, context of the asking question) waiting for a free request, oldest first
+        self.pending = []
+        self.active = 0
+        self.closed = False
+        self.counts = {"requests": 0, "joined": 0, "snippets": 0, "gemini calls": 0, "batches": 0,
+                       "batched snippets": 0, "split failures": 0, "errors": 0}
+        self.executor = ThreadPoolExecutor(max_workers=self.max_requests, thread_name_prefix="eval-service")
+        self.dispatcher = threading.Thread(target=self.dispatch, name="eval-service-dispatch", daemon=True)
+        self.dispatcher.start()
+
+    def evaluate(self, code, wrong_answers=()):
+        """
+        Returns the answer for a snippet, sharing the request of any session that asked
+        for the same snippet and has not got its answer yet.
+
+        Raises:
+            GeminiError: if Gemini could not answer
+        """
+        wrong_answers = tuple(sorted(wrong_answers))
+        key = (snippet_key(code), wrong_answers)
+        with self.lock:
+            if self.closed:
+                raise GeminiError("the evaluation service is closed")
+            self.counts["requests"] += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.counts["joined"] += 1
+            else:
+                future = Future()
+                self.in_flight[key] = future
+                self.pending.append((key, code, wrong_answers, contextvars.copy_context()))
+                self.changed.notify_all()
+        return future.result()
+
+    def dispatch(self):
+        # Hands the pending snippets to free requests, as many per request as are waiting
+        while True:
+            with self.lock:
+                self.changed.wait_for(lambda: self.closed or (self.pending and self.active < self.max_requests))
+                if self.closed:
+                    return
+                if self.batch_window and len(self.pending) < self.batch_size:
+                    deadline = time.monotonic() + self.batch_window
+                    self.changed.wait_for(lambda: self.closed or len(self.pending) >= self.batch_size,
+                                          max(0.0, deadline - time.monotonic()))
+                    # The wait lets close() in, which answers the pending snippets itself
+                    if self.closed:
+                        return
+                batch = self.pending[:self.batch_size]
+                del self.pending[:self.batch_size]
+                if not batch:
+                    continue
+                self.active += 1
+                # The batch runs in the context of its question that has waited longest: the rate
+                # limiter serves it by that question's start and its spans belong to that question
+                context = min((item[3] for item in batch),
+                              key=lambda item_context: item_context.get(question_started) or float("inf"))
+                # Submitted under the lock, so close() cannot shut the executor down in between
+                self.executor.submit(context.run, self.run_batch, batch)
+
+    def ask(self, prompt):
+        with self.lock:
+            self.counts["gemini calls"] += 1
+        return self.generate(prompt)
+
+    def run_batch(self, batch):
+        try:
+            answers = None
+            if len(batch) > 1:
+                with self.lock:
+                    self.counts["batches"] += 1
+                    self.counts["batched snippets"] += len(batch)
+                try:
+                    answers = split_batch_answers(self.ask(batch_prompt([(code, wrong) for _, code, wrong, _ in batch])),
+                                                  len(batch))
+                except GeminiError as e:
+                    self.finish(batch, error=e)
+                    return
+                if answers is None:
+                    print("Could not split the answer to a batch of snippets, asking for them one by one...")
+                    with self.lock:
+                        self.counts["split failures"] += 1
+            if answers is not None:
+                self.finish(batch, answers)
+                return
+            for item in batch:
+                _, code, wrong_answers, _ = item
+                try:
+                    self.finish([item], [self.ask(answer_prompt(code, wrong_answers))])
+                except GeminiError as e:
+                    self.finish([item], error=e)
+        except Exception as e:
+            # Never leave a session waiting, snippets already answered are skipped by finish()
+            self.finish(batch, error=GeminiError(f"{type(e).__name__}: {e}"))
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.changed.notify_all()
+
+    def finish(self, items, answers=None, error=None):
+        with self.lock:
+            futures = [self.in_flight.pop(item[0], None) for item in items]
+            answered = sum(1 for future in futures if future is not None)
+            self.counts["snippets"] += answered
+            if error is not None:
+                self.counts["errors"] += answered
+        for index, future in enumerate(futures):
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(answers[index])
+
+    def stats(self):
+        """
+        Returns:
+            dict: The counts, plus "dedup ratio" (share of requests that joined one in flight)
+                and "calls saved" (requests that did not need a Gemini call of their own)
+        """
+        with self.lock:
+            stats = dict(self.counts)
+        stats["dedup ratio"] = stats["joined"] / stats["requests"] if stats["requests"] else 0.0
+        stats["calls saved"] = max(0, stats["requests"] - stats["gemini calls"])
+        return stats
+
+    def print_report(self):
+        stats = self.stats()
+        if not stats["requests"]:
+            return
+        print("\n=== Evaluation Service ===")
+        print(f"Requests: {stats['requests']}, joined a request in flight: {stats['joined']} "
+              f"(dedup ratio {stats['dedup ratio']:.0%})")
+        print(f"Gemini calls: {stats['gemini calls']} for {stats['snippets']} snippets, "
+              f"{stats['batches']} batches holding {stats['batched snippets']} snippets, "
+              f"{stats['split failures']} batch answers could not be split")
+        print(f"Calls saved: {stats['calls saved']} of {stats['requests']}, failed answers: {stats['errors']}")
+        print("=== End of Evaluation Service ===\n")
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            pending = self.pending
+            self.pending = []
+            self.changed.notify_all()
+        self.finish(pending, error=GeminiError("the evaluation service is closed"))
+        self.executor.shutdown(wait=True)
+
+
+class EvaluationHandler(socketserver.StreamRequestHandler):
+    """
+    Answers JSON lines {"code", "wrong_answers", "waited"} with {"answer"} or {"error", "timeout"},
+    waited being the seconds since the session's question was submitted.
+    """
+
+    service = None
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                question_started.set(time.monotonic() - request["waited"] if "waited" in request else None)
+                response = {"answer": self.service.evaluate(request["code"], request.get("wrong_answers", ()))}
+            except GeminiTimeout as e:
+                response = {"error": str(e), "timeout": True}
+            except Exception as e:
+                response = {"error": str(e) if isinstance(e, GeminiError) else f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class EvaluationServer:
+    """
+    Serves an EvaluationService to other processes on a local port, on a background thread.
+
+    Args:
+        service: The EvaluationService every connection shares
+        port: Port on 127.0.0.1 (0 picks a free one)
+    """
+
+    def __init__(self, service, port=0):
+        self.service = service
+        handler = type("BoundEvaluationHandler", (EvaluationHandler,), {"service": service})
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, name="eval-service", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+
+
+class EvaluationClient:
+    """
+    Evaluates snippets through an EvaluationServer, one connection per thread.
+
+    Args:
+        address: "host:port" of the server
+        timeout: Seconds an answer may take before the session stops waiting for the
+            service (main.py passes the Gemini deadline plus a margin)
+    """
+
+    def __init__(self, address, timeout=30.0):
+        host, _, port = address.rpartition(":")
+        self.address = (host or "127.0.0.1", int(port))
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, "file", None) is None:
+            connection = socket.create_connection(self.address, timeout=self.timeout)
+            self.local.socket = connection
+            self.local.file = connection.makefile("rwb")
+        return self.local.file
+
+    def disconnect(self):
+        if getattr(self.local, "file", None) is not None:
+            try:
+                self.local.file.close()
+                self.local.socket.close()
+            except OSError:
+                pass
+        self.local.file = None
+
+    def evaluate(self, code, wrong_answers=()):
+        """
+        Returns the answer for a snippet from the server.
+
+        Raises:
+            ServiceUnreachable: if no server answers on the address, or not within the timeout
+            GeminiError: if Gemini could not answer
+        """
+        request = {"code": code, "wrong_answers": sorted(wrong_answers)}
+        started = question_started.get()
+        if started is not None:
+            request["waited"] = time.monotonic() - started
+        request = (json.dumps(request) + "\n").encode("utf-8")
+        for attempt in range(2):
+            try:
+                connection = self.connection()
+                connection.write(request)
+                connection.flush()
+                line = connection.readline()
+                if not line:
+                    raise ConnectionError("the evaluation server closed the connection")
+                break
+            except socket.timeout as e:
+                # A stuck service: waiting again would outlast the question, and the late
+                # answer must not be read as the answer to the next request
+                self.disconnect()
+                raise ServiceUnreachable(f"the evaluation server on {self.address[0]}:{self.address[1]} gave no "
+                                         f"answer within {self.timeout:g} s") from e
+            except ConnectionError as e:
+                # A connection kept from before may have been closed by the server, try a new one
+                self.disconnect()
+                if attempt:
+                    raise ServiceUnreachable(f"no evaluation server on {self.address[0]}:{self.address[1]} ({e})") from e
+            except OSError as e:
+                self.disconnect()
+                raise ServiceUnreachable(f"no evaluation server on {self.address[0]}:{self.address[1]} ({e})") from e
+        response = json.loads(line)
+        if "error" in response:
+            raise (GeminiTimeout if response.get("timeout") else GeminiError)(response["error"])
+        return response["answer"]
+
+    def close(self):
+        self.disconnect()
+
+
+if __name__ == "__main__":
+    import main as practiceme
+
+    parser = argparse.ArgumentParser(description="Shared evaluation service for the sessions of every process")
+    parser.add_argument("--port", type=int, default=practiceme.EVALUATION_SERVICE_PORT)
+    arguments = parser.parse_args()
+
+    server = practiceme.start_evaluation_server(arguments.port)
+    print(f"Evaluation service running on {server.address}, set evaluation_service = \"shared\" to use it")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.service.print_report()
+        server.close()
@@ -0,0 +1,470 @@
+# Long-lived client for the Gemini model with deadlines, retries and hedged requests.
+#
+# The model is created once and shared by every evaluation thread. Each call gets a
+# deadline: the request runs in the client's own thread pool and the caller stops waiting
+# when the deadline passes, whatever the HTTP stack does. Calls that fail with a
+# transient error (rate limits, server errors, timeouts) are retried with exponential
+# backoff while the deadline allows it. When a call takes longer than the p95 of the
+# recent calls, a duplicate is sent and whichever answers first is used, which cuts the
+# slow tail of the remote model without doubling the load. Errors are raised as
+# GeminiError instead of being returned as answer text.
+#
+# stream() reads the response as it is generated instead: every piece of text is handed
+# to the caller right away (so the answer can be typed while the model is still writing)
+# and reading stops as soon as the caller recognizes a complete answer, without waiting
+# for the end of the response. Time to first token and time to answer are recorded.
+#
+# With a RateLimiter (rate_limiter.py) every request waits for the per-minute budget
+# before it is sent. The wait happens before the call's deadline starts, so a busy quota
+# slows the question loop down instead of failing its questions.
+import collections
+import concurrent.futures
+import queue
+import re
+import threading
+import time
+
+import tracing
+from pipeline import percentile, question_started
+from rate_limiter import estimate_tokens
+
+# HTTP status codes and exception names (google.api_core, requests, grpc) worth a retry
+TRANSIENT_STATUS_CODES = frozenset((408, 429, 500, 502, 503, 504))
+TRANSIENT_ERROR_NAMES = frozenset(("ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+                                   "DeadlineExceeded", "GatewayTimeout", "RetryError", "ConnectTimeout",
+                                   "ReadTimeout", "StubUnavailable"))
+RATE_LIMIT_ERROR_NAMES = frozenset(("ResourceExhausted", "TooManyRequests", "StubRateLimited"))
+# Snippets printing a single line: one console.log, outside any loop, callback or timer
+CONSOLE_LOG_PATTERN = re.compile(r"\bconsole\.log\s*\(")
+REPEATING_CODE_PATTERN = re.compile(r"\b(?:for|while|do|function|forEach|map|filter|reduce|setInterval|setTimeout)\b|=>")
+# An answer the model wrapped in a Markdown code block (with an optional language tag) or in inline code
+CODE_FENCE_PATTERN = re.compile(r"^\s*(`{3,})[\w+-]*[ \t]*\n(.*?)\n?[ \t]*\1\s*$", re.DOTALL)
+INLINE_CODE_PATTERN = re.compile(r"^\s*`([^`\n]+)`\s*$")
+
+
+class GeminiError(Exception):
+    """The model could not answer (after the retries the deadline allowed)."""
+
+
+class GeminiTimeout(GeminiError):
+    """No answer arrived before the deadline."""
+
+
+def is_transient(error):
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in TRANSIENT_STATUS_CODES:
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def is_rate_limited(error):
+    return getattr(error, "code", None) == 429 or type(error).__name__ in RATE_LIMIT_ERROR_NAMES
+
+
+def expected_answer_lines(code):
+    """
+    Returns:
+        int: Lines the snippet prints, 1 for a single console.log outside any loop,
+            callback or timer, 0 when it cannot be told from the code
+    """
+    if len(CONSOLE_LOG_PATTERN.findall(code)) == 1 and not REPEATING_CODE_PATTERN.search(code):
+        return 1
+    return 0
+
+
+def answer_complete(text, lines):
+    """True once text holds the given number of finished (newline terminated) answer lines."""
+    text = text.lstrip()
+    # A code fence means the model is formatting, the answer is only known at the end
+    if not lines or text.startswith("`"):
+        return False
+    return text.count("\n") >= lines
+
+
+def strip_code_fence(text):
+    """Returns the answer without the code fence or inline code marks the model may have put around it."""
+    match = CODE_FENCE_PATTERN.match(text) or INLINE_CODE_PATTERN.match(text)
+    return (match.group(match.lastindex) if match else text).strip()
+
+
+def answer_prompt(code, wrong_answers=()):
+    """Returns the prompt asking Gemini for the console output of one snippet."""
+    prompt = f"""
+    Execute this JavaScript code and respond with ONLY the exact console output value.
+    
+    No explanations, no code, no markdown formatting.
+    
+    ```javascript
+    {code}
+    ```
+    Return only the raw output value that would appear in the console. Nothing else.
+    """
+    if wrong_answers:
+        # Answers the site already graded wrong for this snippet
+        prompt += "These answers are wrong: " + "; ".join(repr(answer) for answer in sorted(wrong_answers)) + "\n"
+    return prompt
+
+
+class AnswerStream:
+    """Text of an answer that is still being generated, shared between threads."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.text = ""
+        self.finished = False
+
+    def append(self, text):
+        with self.condition:
+            self.text += text
+            self.condition.notify_all()
+
+    def finish(self):
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def wait(self, length, timeout):
+        """
+        Waits until there is more text than length characters or the stream finished.
+
+        Returns:
+            tuple: (text so far, True if the stream finished)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.text) > length or self.finished, timeout)
+            return self.text, self.finished
+
+
+class GeminiClient:
+    """
+    Shares one model between threads and bounds the time each answer takes.
+
+    Args:
+        model_factory: Function that creates the model (genai.GenerativeModel or StubModel)
+        timeout: Seconds a generate() call may take in total, retries and hedges included
+        retries: Extra attempts after a transient error
+        backoff: Seconds before the first retry, doubled for every further one
+        hedging: True to send a duplicate request when a call is slower than usual
+        hedge_min_delay: Lower bound in seconds of the delay before the duplicate is sent
+        hedge_quantile: Quantile of the recent latencies used as hedge delay
+        workers: Threads that run the requests (abandoned slow requests keep theirs busy)
+        limiter: RateLimiter every request waits for, None to send requests right away
+    """
+
+    # Latencies remembered for the hedge delay, and calls needed before it is trusted
+    HISTORY = 200
+    MIN_SAMPLES = 10
+
+    def __init__(self, model_factory, timeout=20.0, retries=2, backoff=0.5, hedging=True,
+                 hedge_min_delay=1.0, hedge_quantile=0.95, workers=8, limiter=None):
+        self.model_factory = model_factory
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_quantile = hedge_quantile
+        self.limiter = limiter
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini")
+        self.model = None
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=self.HISTORY)
+        self.counts = {"calls": 0, "requests": 0, "hedges": 0, "hedge wins": 0, "retries": 0,
+                       "timeouts": 0, "errors": 0, "streams": 0, "early stops": 0,
+                       "hedges skipped": 0}
+        # Seconds per generate() or stream() call, retries and hedges included
+        self.call_times = []
+        # Seconds to the first piece of text and to the complete answer of stream() calls
+        self.first_token_times = []
+        self.answer_times = []
+
+    def get_model(self):
+        with self.lock:
+            if self.model is None:
+                self.model = self.model_factory()
+            return self.model
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def hedge_delay(self):
+        """Seconds to wait for a request before sending a duplicate."""
+        with self.lock:
+            if len(self.latencies) < self.MIN_SAMPLES:
+                return max(self.hedge_min_delay, self.timeout / 4)
+            return max(self.hedge_min_delay, percentile(self.latencies, self.hedge_quantile))
+
+    def admit(self, prompt, priority, timeout=None):
+        """
+        Waits until the rate limiter lets a request for the prompt through.
+
+        Args:
+            priority: Deadline of the question the request answers (time.monotonic())
+            timeout: Seconds to wait at most, None to wait as long as it takes
+
+        Returns:
+            bool: False if the budget did not come within the timeout
+        """
+        if self.limiter is None:
+            return True
+        with tracing.span("rate limit") as span_attributes:
+            waited = self.limiter.acquire(estimate_tokens(prompt), priority, timeout)
+            span_attributes.update(waited_ms=round((waited or 0.0) * 1000, 1), granted=waited is not None)
+        if waited is not None and waited >= 1:
+            print(f"Waited {waited:.1f} s for the Gemini rate limit")
+        return waited is not None
+
+    def priority(self):
+        # The deadline of the question being answered, for the rate limiter's queue
+        started = question_started.get()
+        return (started if started is not None else time.monotonic()) + self.timeout
+
+    def back_off(self, error, delay):
+        # A rate limit error means the quota is used up for everyone, not just this request
+        if self.limiter is not None and is_rate_limited(error):
+            self.limiter.pause(delay)
+
+    def request(self, prompt, timeout):
+        # One request to the model, run in the client's thread pool
+        self.count("requests")
+        start_time = time.perf_counter()
+        model = self.get_model()
+        try:
+            response = model.generate_content(prompt, request_options={"timeout": timeout})
+        except TypeError as e:
+            # Models without request options (older SDKs)
+            if "request_options" not in str(e):
+                raise
+            response = model.generate_content(prompt)
+        text = response.text
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start_time)
+        usage = getattr(response, "usage_metadata", None)
+        if self.limiter is not None and usage is not None:
+            self.limiter.settle(estimate_tokens(prompt), getattr(usage, "total_token_count", 0))
+        return text
+
+    def attempt(self, prompt, deadline):
+        """
+        Sends a request, and a duplicate if it is slower than the hedge delay.
+
+        Returns:
+            str: The first answer that arrives
+
+        Raises:
+            GeminiTimeout: if the deadline passed first
+            Exception: the error of the request(s), when every one of them failed
+        """
+        remaining = deadline - time.monotonic()
+        futures = {tracing.submit(self.executor, self.request, prompt, remaining)}
+        hedge_at = time.monotonic() + self.hedge_delay() if self.hedging else None
+        hedged = False
+        first = None
+        error = None
+        while futures:
+            wait_until = deadline if hedged or hedge_at is None else min(deadline, hedge_at)
+            done, futures = concurrent.futures.wait(futures, timeout=max(0.0, wait_until - time.monotonic()),
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not first and first is not None:
+                        self.count("hedge wins")
+                    for other in futures:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+            if not futures:
+                break
+            now = time.monotonic()
+            if now >= deadline:
+                raise GeminiTimeout(f"no answer within {self.timeout:.1f} s")
+            if not hedged and hedge_at is not None and now >= hedge_at:
+                hedged = True
+                if self.limiter is not None and not self.limiter.try_acquire(estimate_tokens(prompt)):
+                    # The budget is needed for other questions
+                    self.count("hedges skipped")
+                    continue
+                # Slower than usual: race a duplicate against it
+                first = next(iter(futures))
+                self.count("hedges")
+                futures.add(tracing.submit(self.executor, self.request, prompt, deadline - now))
+        raise error
+
+    def generate(self, prompt):
+        """
+        Returns the model's answer text for a prompt.
+
+        Raises:
+            GeminiError: if the model failed with a permanent error, or kept failing
+            GeminiTimeout: if no answer arrived within the timeout
+        """
+        self.count("calls")
+        start_time = time.perf_counter()
+        priority = self.priority()
+        # Waiting for the rate limit does not count against the deadline
+        self.admit(prompt, priority)
+        deadline = time.monotonic() + self.timeout
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt and not self.admit(prompt, priority, deadline - time.monotonic()):
+                    self.count("timeouts")
+                    raise GeminiTimeout(f"no rate limit budget for a retry within {self.timeout:.1f} s")
+                try:
+                    return self.attempt(prompt, deadline)
+                except GeminiTimeout:
+                    self.count("timeouts")
+                    raise
+                except Exception as e:
+                    delay = self.backoff * 2 ** attempt
+                    if not is_transient(e) or attempt == self.retries or time.monotonic() + delay >= deadline:
+                        self.count("errors")
+                        raise GeminiError(f"{type(e).__name__}: {e}") from e
+                    print(f"Gemini request failed ({type(e).__name__}: {e}), retrying in {delay:.1f} s...")
+                    self.count("retries")
+                    self.back_off(e, delay)
+                    time.sleep(delay)
+        finally:
+            with self.lock:
+                self.call_times.append(time.perf_counter() - start_time)
+
+    def read_stream(self, prompt, timeout, chunks, stop):
+        # Runs in the client's thread pool and passes the pieces of text on through chunks
+        self.count("requests")
+        try:
+            model = self.get_model()
+            try:
+                response = model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+            except TypeError as e:
+                if "request_options" not in str(e):
+                    raise
+                response = model.generate_content(prompt, stream=True)
+            for chunk in response:
+                if stop.is_set():
+                    break
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text, e.g. the last one that only holds the finish reason
+                    continue
+                if text:
+                    chunks.put(text)
+            chunks.put(None)
+        except Exception as e:
+            chunks.put(e)
+
+    def stream(self, prompt, on_text=None, is_complete=None):
+        """
+        Returns the model's answer text for a prompt, read while it is being generated.
+
+        Args:
+            on_text: Called with every new piece of text as soon as it arrives
+            is_complete: Called with the text so far, True stops reading the response
+
+        Returns:
+            tuple: (text, {"first_token": seconds, "answer": seconds, "early_stop": bool})
+
+        Raises:
+            GeminiError: if the model failed with a permanent error, kept failing, or failed
+                after part of the answer arrived
+            GeminiTimeout: if the answer was not complete within the timeout
+        """
+        self.count("calls")
+        self.count("streams")
+        start_time = time.perf_counter()
+        priority = self.priority()
+        self.admit(prompt, priority)
+        deadline = time.monotonic() + self.timeout
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt and not self.admit(prompt, priority, deadline - time.monotonic()):
+                    self.count("timeouts")
+                    raise GeminiTimeout(f"no rate limit budget for a retry within {self.timeout:.1f} s")
+                chunks = queue.Queue()
+                stop = threading.Event()
+                tracing.submit(self.executor, self.read_stream, prompt, deadline - time.monotonic(), chunks, stop)
+                text = ""
+                first_token = None
+                early_stop = False
+                try:
+                    while True:
+                        try:
+                            item = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+                        except queue.Empty:
+                            self.count("timeouts")
+                            raise GeminiTimeout(f"no complete answer within {self.timeout:.1f} s")
+                        if item is None:
+                            break
+                        if isinstance(item, Exception):
+                            delay = self.backoff * 2 ** attempt
+                            # Text already handed to on_text cannot be taken back, so a stream
+                            # is only retried while nothing arrived yet
+                            if (first_token is not None or not is_transient(item) or attempt == self.retries
+                                    or time.monotonic() + delay >= deadline):
+                                self.count("errors")
+                                raise GeminiError(f"{type(item).__name__}: {item}") from item
+                            print(f"Gemini stream failed ({type(item).__name__}: {item}), retrying in {delay:.1f} s...")
+                            self.count("retries")
+                            self.back_off(item, delay)
+                            time.sleep(delay)
+                            break
+                        if first_token is None:
+                            first_token = time.perf_counter() - start_time
+                        text += item
+                        if on_text is not None:
+                            on_text(item)
+                        if is_complete is not None and is_complete(text):
+                            early_stop = True
+                            self.count("early stops")
+                            break
+                finally:
+                    # The rest of the response is not needed (or the call failed)
+                    stop.set()
+                if isinstance(item, Exception):
+                    continue
+                answer = time.perf_counter() - start_time
+                with self.lock:
+                    self.first_token_times.append(first_token if first_token is not None else answer)
+                    self.answer_times.append(answer)
+                return text, {"first_token": first_token, "answer": answer, "early_stop": early_stop}
+        finally:
+            with self.lock:
+                self.call_times.append(time.perf_counter() - start_time)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counts)
+            stats["p50"] = percentile(self.call_times, 0.5)
+            stats["p95"] = percentile(self.call_times, 0.95)
+            stats["max"] = max(self.call_times, default=0.0)
+            stats["first token p50"] = percentile(self.first_token_times, 0.5)
+            stats["first token p95"] = percentile(self.first_token_times, 0.95)
+            stats["answer p50"] = percentile(self.answer_times, 0.5)
+            stats["answer p95"] = percentile(self.answer_times, 0.95)
+            return stats
+
+    def print_report(self):
+        stats = self.stats()
+        if not stats["calls"]:
+            return
+        print("\n=== Gemini Client ===")
+        print(f"Calls: {stats['calls']}, Requests: {stats['requests']}, Hedged: {stats['hedges']} "
+              f"(duplicate answered first: {stats['hedge wins']}), Retries: {stats['retries']}")
+        print(f"Timeouts: {stats['timeouts']}, Errors: {stats['errors']}, "
+              f"Hedges skipped to stay within the rate limit: {stats['hedges skipped']}")
+        print(f"Per call: p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms, "
+              f"max {stats['max'] * 1000:.0f} ms")
+        if stats["streams"]:
+            print(f"Streamed: {stats['streams']} calls, {stats['early stops']} stopped once the answer was complete")
+            print(f"Time to first token: p50 {stats['first token p50'] * 1000:.0f} ms, "
+                  f"p95 {stats['first token p95'] * 1000:.0f} ms; time to answer: "
+                  f"p50 {stats['answer p50'] * 1000:.0f} ms, p95 {stats['answer p95'] * 1000:.0f} ms")
+        print("=== End of Gemini Client ===\n")
+        if self.limiter is not None:
+            self.limiter.print_report()
+
+    def close(self):
+        # Requests still running are abandoned, their threads end when they return
+        self.executor.shutdown(wait=False, cancel_futures=True)
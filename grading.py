@@ -0,0 +1,217 @@
+# The site's grading of every answer, read back so wrong answers are not repeated.
+#
+# After Next is clicked the site grades the answer. The grading is taken from the JSON
+# response of the answer request when the DevTools network events are available
+# (GradingCapture, a listener of the same NetworkLog as the payload capture), and from the
+# feedback element of the page otherwise. The feedback element only grades once the site
+# wrote to it (or replaced it) after the answer was submitted, which watch_feedback() sets
+# up with a MutationObserver, so a streak of the same verdict is graded every time. main.py feeds each grade into the answer cache
+# (verified or wrong), the template cache and the harvest, and GradeBook reports the share
+# of correct answers per topic next to the time each question took.
+import collections
+import json
+import re
+import threading
+import time
+
+from pipeline import percentile
+from topics import TOPICS, UNKNOWN_TOPIC
+
+# Feedback only grades when it is nothing but the verdict, e.g. "Correct!" or "Incorrect";
+# text that merely mentions one ("The correct answer is 5") or an unrelated status message
+# does not grade
+WRONG_PATTERN = re.compile(r"^\s*(?:(?:incorrect|wrong|not correct)(?:[\s,.!]+try again)?|try again)[\s.!]*$", re.I)
+CORRECT_PATTERN = re.compile(r"^\s*(?:correct|well done)[\s.!]*$", re.I)
+
+# Script that starts counting the changes of the first feedback element matching the
+# selector (arguments[0]), before the answer is submitted
+WATCH_FEEDBACK_SCRIPT = """
+if (window.__practicemeFeedbackWatch) {
+    window.__practicemeFeedbackWatch.observer.disconnect();
+}
+const feedback = document.querySelector(arguments[0]);
+const watch = {node: feedback, changes: 0};
+watch.observer = new MutationObserver(() => { watch.changes += 1; });
+if (feedback) {
+    watch.observer.observe(feedback, {childList: true, subtree: true, characterData: true});
+}
+window.__practicemeFeedbackWatch = watch;
+"""
+
+# Script that returns the text of the feedback element if the site wrote to it or replaced
+# it since WATCH_FEEDBACK_SCRIPT ran, else null
+FEEDBACK_SCRIPT = """
+const feedback = document.querySelector(arguments[0]);
+const watch = window.__practicemeFeedbackWatch;
+if (!feedback || !watch || (feedback === watch.node && watch.changes === 0)) {
+    return null;
+}
+return feedback.textContent.trim();
+"""
+
+
+def grade_from_text(text):
+    """
+    Returns:
+        bool: True or False as the feedback text says, None if it does not grade
+    """
+    if not text:
+        return None
+    if WRONG_PATTERN.match(text):
+        return False
+    if CORRECT_PATTERN.match(text):
+        return True
+    return None
+
+
+def grade_from_payload(data, keys):
+    """Returns the first boolean under one of the keys of an answer response, or None."""
+    if not isinstance(data, dict):
+        return None
+    for key in keys:
+        if isinstance(data.get(key), bool):
+            return data[key]
+    return None
+
+
+def watch_feedback(driver, selector):
+    """Starts watching the page's feedback element for the grading of the next answer."""
+    try:
+        driver.execute_script(WATCH_FEEDBACK_SCRIPT, selector)
+    except Exception:
+        pass
+
+
+def read_feedback(driver, selector):
+    """
+    Returns the text of the page's feedback element, None if there is none or the site did
+    not update it since watch_feedback() (it still shows the previous question's grading).
+    """
+    try:
+        return driver.execute_script(FEEDBACK_SCRIPT, selector)
+    except Exception:
+        return None
+
+
+class GradingCapture:
+    """
+    Watches a driver's network responses for the grading of submitted answers.
+
+    Args:
+        network_log: NetworkLog of the driver, the capture adds itself as a listener
+        url_pattern: Regular expression matching the URLs of answer responses
+        keys: JSON keys that may hold the grading (a boolean)
+    """
+
+    def __init__(self, network_log, url_pattern, keys=("correct",)):
+        self.network_log = network_log
+        self.driver = network_log.driver
+        network_log.listeners.append(self)
+        self.url_pattern = re.compile(url_pattern)
+        self.keys = keys
+        # requestId of matching responses whose body has not been read yet
+        self.pending = set()
+        # Grades seen and not yet handed out, oldest first
+        self.grades = collections.deque()
+
+    def handle_events(self, messages):
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                if self.url_pattern.search(params.get("response", {}).get("url", "")):
+                    self.pending.add(params["requestId"])
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.pending:
+                self.pending.discard(params["requestId"])
+                try:
+                    body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                    grade = grade_from_payload(json.loads(body["body"]), self.keys)
+                except Exception:
+                    grade = None
+                if grade is not None:
+                    self.grades.append(grade)
+            elif method == "Network.loadingFailed":
+                self.pending.discard(params.get("requestId"))
+
+    def forget(self):
+        """Drops the grades seen so far, e.g. before a question is answered."""
+        try:
+            self.network_log.poll()
+        except Exception:
+            pass
+        self.grades.clear()
+
+    def take_grade(self, timeout=0.0, interval=0.05):
+        """
+        Returns the oldest grade not handed out yet, polling for up to timeout seconds.
+
+        Returns:
+            bool: The grade, or None if no answer response was seen
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.network_log.poll()
+            except Exception as e:
+                print(f"Could not read the network log: {e}")
+                break
+            if self.grades or time.monotonic() >= deadline:
+                break
+            time.sleep(interval)
+        return self.grades.popleft() if self.grades else None
+
+
+class GradeBook:
+    """Share of correct answers and question time per topic, shared by every session."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # topic -> {"answered", "correct", "wrong", "latencies"}
+        self.topics = {}
+
+    def record(self, topic, correct, seconds):
+        with self.lock:
+            stats = self.topics.setdefault(topic, {"answered": 0, "correct": 0, "wrong": 0, "latencies": []})
+            stats["answered"] += 1
+            if correct is True:
+                stats["correct"] += 1
+            elif correct is False:
+                stats["wrong"] += 1
+            stats["latencies"].append(seconds)
+
+    def stats(self):
+        """
+        Returns:
+            dict: topic -> {"answered", "correct", "wrong", "ungraded", "accuracy", "p50", "p95"},
+                accuracy being the share of graded answers that were correct
+        """
+        with self.lock:
+            summary = {}
+            for topic, stats in self.topics.items():
+                graded = stats["correct"] + stats["wrong"]
+                summary[topic] = {
+                    "answered": stats["answered"],
+                    "correct": stats["correct"],
+                    "wrong": stats["wrong"],
+                    "ungraded": stats["answered"] - graded,
+                    "accuracy": stats["correct"] / graded if graded else None,
+                    "p50": percentile(stats["latencies"], 0.5),
+                    "p95": percentile(stats["latencies"], 0.95),
+                }
+            return summary
+
+    def print_report(self):
+        summary = self.stats()
+        if not summary:
+            return
+        order = list(TOPICS.values()) + [UNKNOWN_TOPIC]
+        print("\n=== Grading ===")
+        print(f"{'Topic':<24}{'Answered':>9}{'Correct':>9}{'Wrong':>7}{'Ungraded':>10}{'Accuracy':>10}"
+              f"{'p50 ms':>9}{'p95 ms':>9}")
+        for topic in sorted(summary, key=lambda name: order.index(name) if name in order else len(order)):
+            stats = summary[topic]
+            accuracy = f"{stats['accuracy']:.0%}" if stats["accuracy"] is not None else "-"
+            print(f"{topic:<24}{stats['answered']:>9}{stats['correct']:>9}{stats['wrong']:>7}{stats['ungraded']:>10}"
+                  f"{accuracy:>10}{stats['p50'] * 1000:>9.0f}{stats['p95'] * 1000:>9.0f}")
+        print("Accuracy counts graded answers only, times are per question from extraction to the next question")
+        print("=== End of Grading ===\n")
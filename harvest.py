@@ -0,0 +1,182 @@
+# Harvest of every question played: snippet, topic, difficulty, answer and grading.
+#
+# With harvest_questions on, each answered question is appended as one compact JSON line.
+# The file only ever grows, so parallel runs can share it and a crash loses at most the
+# line being written. Answers the site graded correct are verified: they pre-warm the
+# answer cache of a fresh install (init_evaluation does this on startup) and can be
+# exported as a corpus for bench_solver.py, answers graded wrong are never served again.
+# Questions whose grading is unknown (e.g. the last question of a round played without
+# the network events) are kept too, and count once a later run verifies them.
+import json
+import os
+import threading
+import time
+
+from answer_cache import snippet_key
+from topics import TOPICS, UNKNOWN_TOPIC, classify_topic
+
+
+class Harvest:
+    """
+    Append-only store of played questions.
+
+    Args:
+        path: JSON lines file the questions are appended to
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.recorded = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, code, answer, difficulty, correct=None, tier=None):
+        """
+        Appends one question.
+
+        Args:
+            correct: True or False as graded by the site, None if the grading is unknown
+            tier: Answer tier that produced the answer (see answer_router.py), None if unknown
+        """
+        line = json.dumps({
+            "key": snippet_key(code),
+            "code": code,
+            "topic": classify_topic(code),
+            "difficulty": difficulty,
+            "answer": answer,
+            "correct": correct,
+            "tier": tier,
+            "time": round(time.time(), 3),
+        }, separators=(",", ":"))
+        # One write per line with O_APPEND keeps lines whole across processes
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as harvest_file:
+                harvest_file.write(line + "\n")
+            self.recorded += 1
+
+
+def load(path):
+    """Yields every harvested question, skipping a line cut off by a crash."""
+    try:
+        harvest_file = open(path, encoding="utf-8")
+    except OSError:
+        return
+    with harvest_file:
+        for line in harvest_file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def verified_answers(path):
+    """
+    Returns the answers the site graded correct, one per snippet.
+
+    Returns:
+        dict: snippet key -> question record (the latest correct one)
+    """
+    verified = {}
+    for record in load(path):
+        if record.get("correct") is True:
+            verified[record["key"]] = record
+    return verified
+
+
+def prewarm(answer_cache, path):
+    """
+    Puts the verified answers into the answer cache, replacing any different answer, and
+    lets the cache know the answers graded wrong.
+
+    Returns:
+        int: Number of answers added, corrected or marked wrong
+    """
+    changed = 0
+    verified = verified_answers(path)
+    for record in verified.values():
+        if answer_cache.peek(record["code"]) != record["answer"] or answer_cache.status(record["code"]) != "verified":
+            answer_cache.put(record["code"], record["answer"], "harvest", "verified")
+            changed += 1
+    for record in load(path):
+        if record.get("correct") is not False or verified.get(record["key"], {}).get("answer") == record["answer"]:
+            continue
+        if record["answer"] not in answer_cache.wrong_answers(record["code"]):
+            answer_cache.record_grading(record["code"], record["answer"], False)
+            changed += 1
+    return changed
+
+
+def export_corpus(path):
+    """
+    Groups the verified answers by topic in the format of snippet_corpus.CORPUS.
+
+    Returns:
+        dict: topic -> [(code, expected output), ...]
+    """
+    corpus = {}
+    for record in verified_answers(path).values():
+        corpus.setdefault(record["topic"], []).append((record["code"], record["answer"]))
+    return corpus
+
+
+def stats(path):
+    """
+    Returns:
+        dict: topic -> {"questions", "unique", "correct", "wrong", "ungraded"}
+    """
+    topics = {}
+    seen = {}
+    for record in load(path):
+        topic_stats = topics.setdefault(record["topic"], {"questions": 0, "unique": 0, "correct": 0,
+                                                           "wrong": 0, "ungraded": 0})
+        topic_stats["questions"] += 1
+        if record["key"] not in seen:
+            seen[record["key"]] = True
+            topic_stats["unique"] += 1
+        if record.get("correct") is True:
+            topic_stats["correct"] += 1
+        elif record.get("correct") is False:
+            topic_stats["wrong"] += 1
+        else:
+            topic_stats["ungraded"] += 1
+    return topics
+
+
+def print_stats(path):
+    topics = stats(path)
+    order = list(TOPICS.values()) + [UNKNOWN_TOPIC]
+    print("\n=== Harvest ===")
+    print(f"{'Topic':<24}{'Questions':>10}{'Unique':>8}{'Correct':>9}{'Wrong':>7}{'Ungraded':>10}")
+    for topic in sorted(topics, key=lambda name: order.index(name) if name in order else len(order)):
+        topic_stats = topics[topic]
+        print(f"{topic:<24}{topic_stats['questions']:>10}{topic_stats['unique']:>8}{topic_stats['correct']:>9}"
+              f"{topic_stats['wrong']:>7}{topic_stats['ungraded']:>10}")
+    print(f"Verified answers: {len(verified_answers(path))}")
+    print("=== End of Harvest ===\n")
+
+
+# Command line helper: python harvest.py [stats|prewarm|export FILE]
+if __name__ == "__main__":
+    import sys
+
+    import settings
+    from answer_cache import AnswerCache
+
+    settings.initialize()
+    harvest_path = settings.harvest_path
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+
+    if command == "stats":
+        print_stats(harvest_path)
+    elif command == "prewarm":
+        cache = AnswerCache(settings.answer_cache_path, settings.answer_cache_size)
+        print(f"Added, corrected or marked wrong {prewarm(cache, harvest_path)} answers in {settings.answer_cache_path}")
+        cache.close()
+    elif command == "export" and len(sys.argv) > 2:
+        with open(sys.argv[2], "w", encoding="utf-8") as corpus_file:
+            json.dump(export_corpus(harvest_path), corpus_file, indent=1)
+        print(f"Corpus written to {sys.argv[2]} (use it with python bench_solver.py --corpus {sys.argv[2]})")
+    else:
+        print("Usage: python harvest.py [stats|prewarm|export FILE]")
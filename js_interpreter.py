@@ -0,0 +1,2702 @@
+# A small JavaScript interpreter for the snippets used in PracticeMe questions.
+#
+# It covers the subset of the language the practice topics use (strings, indexes,
+# loops, switch, do...while, increments, shorthand operators, functions, booleans,
+# if/else) and produces the exact console output, so most questions can be answered
+# without a round-trip to Gemini.
+#
+# Anything outside that subset raises UnsupportedSyntax, which tells the caller to
+# fall back to Gemini instead of guessing.
+import math
+import re
+from decimal import Decimal, ROUND_HALF_UP, localcontext
+from functools import cmp_to_key
+
+# Upper bound on loop iterations + function calls, so runaway snippets fall back
+MAX_STEPS = 100000
+
+NAN = float("nan")
+INF = float("inf")
+
+
+class UnsupportedSyntax(Exception):
+    """Raised when a snippet uses something the local interpreter does not model."""
+
+
+class JSThrow(Exception):
+    """A JavaScript exception travelling through the interpreter."""
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.value = value
+
+
+class _Undefined:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "undefined"
+
+
+# null is represented by None, undefined by this sentinel
+UNDEFINED = _Undefined()
+# Marks let/const bindings that are not initialised yet (temporal dead zone)
+TDZ = object()
+
+
+class ErrorObject(dict):
+    """A JavaScript Error instance (name + message)."""
+
+
+class BuiltinObject(dict):
+    """A read-only namespace object such as Math or console."""
+
+
+class NativeFunction:
+    __slots__ = ("name", "impl")
+
+    def __init__(self, name, impl):
+        self.name = name
+        self.impl = impl
+
+
+class JSFunction:
+    __slots__ = ("node", "closure", "this")
+
+    def __init__(self, node, closure, this=None):
+        self.node = node
+        self.closure = closure
+        # Arrow functions capture the enclosing `this`
+        self.this = this
+
+    @property
+    def name(self):
+        return self.node.name or self.node.inferred_name or ""
+
+
+class FunctionNode:
+    __slots__ = ("name", "inferred_name", "params", "rest", "body", "lexicals",
+                 "functions", "var_names", "is_arrow", "expression")
+
+    def __init__(self, name, params, rest, body, lexicals, functions, var_names,
+                 is_arrow, expression):
+        self.name = name
+        self.inferred_name = None
+        self.params = params
+        self.rest = rest
+        self.body = body
+        self.lexicals = lexicals
+        self.functions = functions
+        self.var_names = var_names
+        self.is_arrow = is_arrow
+        self.expression = expression
+
+
+# ---------------------------------------------------------------------------
+# Tokenizer
+# ---------------------------------------------------------------------------
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>[ \t\r\f\v\u00a0\ufeff]+)
+  | (?P<nl>[\n\u2028\u2029])
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<num>(?:0[xX][0-9a-fA-F_]+|0[oO][0-7_]+|0[bB][01_]+|(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d+)?)n?)
+  | (?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>>>>=|\.\.\.|===|!==|\*\*=|<<=|>>=|>>>|&&=|\|\|=|\?\?=|=>|==|!=|<=|>=|&&|\|\||\?\?|\?\.(?!\d)|\+\+|--|\+=|-=|\*=|/=|%=|&=|\|=|\^=|\*\*|<<|>>|[{}()\[\];,<>+\-*/%&|^!~?:=.])
+""", re.VERBOSE | re.DOTALL)
+
+ESCAPE_PATTERN = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|.)", re.DOTALL)
+
+SIMPLE_ESCAPES = {
+    "n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0",
+    "\n": "", "\r\n": "", "\u2028": "", "\u2029": "",
+}
+
+
+class Token:
+    __slots__ = ("kind", "value", "nl")
+
+    def __init__(self, kind, value, nl):
+        self.kind = kind
+        # For num/str tokens the value is an index into the literal table
+        self.value = value
+        # True when a line break precedes the token (used for semicolon insertion)
+        self.nl = nl
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r})"
+
+
+def _decode_escape(match):
+    escape = match.group(1)
+    if escape[0] == "u" and len(escape) > 1:
+        return chr(int(escape[2:-1] if escape[1] == "{" else escape[1:], 16))
+    if escape[0] == "x" and len(escape) == 3:
+        return chr(int(escape[1:], 16))
+    return SIMPLE_ESCAPES.get(escape, escape)
+
+
+def decode_escapes(text):
+    if "\\" not in text:
+        return text
+    return ESCAPE_PATTERN.sub(_decode_escape, text)
+
+
+def parse_number_literal(text):
+    if text.endswith("n"):
+        raise UnsupportedSyntax("BigInt literals are not supported")
+    text = text.replace("_", "")
+    prefix = text[:2].lower()
+    if prefix == "0x":
+        return float(int(text[2:], 16))
+    if prefix == "0o":
+        return float(int(text[2:], 8))
+    if prefix == "0b":
+        return float(int(text[2:], 2))
+    if len(text) > 1 and text[0] == "0" and text[1].isdigit():
+        raise UnsupportedSyntax("legacy octal literals are not supported")
+    return float(text)
+
+
+def _scan_template(code, start, literals):
+    # Scans a template literal starting at the opening backtick
+    quasis = []
+    expressions = []
+    chunk_start = pos = start + 1
+    length = len(code)
+    while pos < length:
+        char = code[pos]
+        if char == "\\":
+            pos += 2
+            continue
+        if char == "`":
+            quasis.append(decode_escapes(code[chunk_start:pos]))
+            return Token("template", (quasis, expressions), False), pos + 1
+        if char == "$" and code.startswith("${", pos):
+            quasis.append(decode_escapes(code[chunk_start:pos]))
+            depth = 1
+            expr_start = pos = pos + 2
+            while pos < length and depth:
+                char = code[pos]
+                if char in "\"'`":
+                    # Skip over nested string literals
+                    end = pos + 1
+                    while end < length and code[end] != char:
+                        end += 2 if code[end] == "\\" else 1
+                    pos = end
+                elif char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                pos += 1
+            if depth:
+                break
+            expressions.append(tokenize(code[expr_start:pos - 1], literals)[0])
+            chunk_start = pos
+            continue
+        pos += 1
+    raise UnsupportedSyntax("unterminated template literal")
+
+
+def tokenize(code, literals=None):
+    """
+    Splits JavaScript source into tokens.
+
+    Number and string literals are collected into a separate literal table and the
+    tokens only carry their index, so a parsed program can be re-run with different
+    literal values.
+
+    Returns:
+        tuple: (list of Token, list of literal values)
+    """
+    if literals is None:
+        literals = []
+    tokens = []
+    pos = 0
+    length = len(code)
+    newline = True
+    while pos < length:
+        if code[pos] == "`":
+            token, pos = _scan_template(code, pos, literals)
+            token.nl = newline
+            tokens.append(token)
+            newline = False
+            continue
+        match = TOKEN_PATTERN.match(code, pos)
+        if match is None:
+            raise UnsupportedSyntax(f"unexpected character {code[pos]!r}")
+        kind = match.lastgroup
+        text = match.group()
+        pos = match.end()
+        if kind == "ws":
+            continue
+        if kind == "nl" or (kind == "comment" and "\n" in text):
+            newline = True
+            continue
+        if kind == "comment":
+            continue
+        if kind == "num":
+            literals.append(parse_number_literal(text))
+            tokens.append(Token("num", len(literals) - 1, newline))
+        elif kind == "str":
+            literals.append(decode_escapes(text[1:-1]))
+            tokens.append(Token("str", len(literals) - 1, newline))
+        else:
+            tokens.append(Token(kind, text, newline))
+        newline = False
+    tokens.append(Token("eof", None, True))
+    return tokens, literals
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+BINARY_PRECEDENCE = {
+    "??": 1, "||": 2, "&&": 3, "|": 4, "^": 5, "&": 6,
+    "==": 7, "!=": 7, "===": 7, "!==": 7,
+    "<": 8, ">": 8, "<=": 8, ">=": 8, "instanceof": 8, "in": 8,
+    "<<": 9, ">>": 9, ">>>": 9,
+    "+": 10, "-": 10,
+    "*": 11, "/": 11, "%": 11,
+    "**": 12,
+}
+
+ASSIGNMENT_OPERATORS = {
+    "=", "+=", "-=", "*=", "/=", "%=", "**=", "<<=", ">>=", ">>>=", "&=", "|=", "^=",
+    "&&=", "||=", "??=",
+}
+
+UNSUPPORTED_KEYWORDS = {
+    "class", "async", "await", "yield", "import", "export", "with", "debugger", "super",
+}
+
+
+class Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        # Stack of `var` names per function body, used for hoisting
+        self.var_scopes = [set()]
+        # Set when identifier names become runtime values (shorthand object properties)
+        self.name_sensitive = False
+
+    # -- token helpers ------------------------------------------------------
+
+    def peek(self, offset=0):
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        if token.kind != "eof":
+            self.pos += 1
+        return token
+
+    def at(self, value):
+        token = self.tokens[self.pos]
+        return token.value == value and token.kind in ("punct", "name")
+
+    def eat(self, value):
+        if self.at(value):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.eat(value):
+            raise UnsupportedSyntax(f"expected {value!r} but found {self.peek()!r}")
+
+    def expect_name(self):
+        token = self.next()
+        if token.kind != "name":
+            raise UnsupportedSyntax(f"expected an identifier but found {token!r}")
+        if token.value in UNSUPPORTED_KEYWORDS:
+            raise UnsupportedSyntax(f"'{token.value}' is not supported")
+        return token.value
+
+    def consume_semicolon(self):
+        # Automatic semicolon insertion: a statement may end at ';', '}', EOF or a line break
+        if self.eat(";"):
+            return
+        token = self.peek()
+        if token.nl or token.kind == "eof" or (token.kind == "punct" and token.value == "}"):
+            return
+        raise UnsupportedSyntax(f"unexpected token {token!r}")
+
+    # -- statements ---------------------------------------------------------
+
+    def parse_program(self):
+        body = self.parse_statements(end=None)
+        lexicals, functions = self.block_declarations(body)
+        return body, lexicals, functions, self.var_scopes[0]
+
+    def parse_statements(self, end):
+        statements = []
+        while True:
+            token = self.peek()
+            if token.kind == "eof":
+                if end is not None:
+                    raise UnsupportedSyntax(f"expected {end!r} before end of input")
+                return statements
+            if end is not None and token.kind == "punct" and token.value == end:
+                return statements
+            statements.append(self.parse_statement())
+
+    @staticmethod
+    def block_declarations(statements):
+        # Collects the let/const names and function declarations scoped to a block
+        lexicals = []
+        functions = []
+        for statement in statements:
+            if statement[0] == "var" and statement[1] != "var":
+                for name, _ in statement[2]:
+                    lexicals.append((name, statement[1] == "const"))
+            elif statement[0] == "func_decl":
+                functions.append(statement)
+        return lexicals, functions
+
+    def parse_block(self):
+        self.expect("{")
+        body = self.parse_statements(end="}")
+        self.expect("}")
+        lexicals, functions = self.block_declarations(body)
+        return ("block", body, lexicals, functions)
+
+    def parse_statement(self):
+        token = self.peek()
+        if token.kind == "punct":
+            if token.value == "{":
+                return self.parse_block()
+            if token.value == ";":
+                self.next()
+                return ("empty",)
+        elif token.kind == "name":
+            keyword = token.value
+            if keyword in ("var", "const") or (keyword == "let" and self.peek(1).kind == "name"):
+                statement = self.parse_declaration()
+                self.consume_semicolon()
+                return statement
+            if keyword == "function":
+                self.next()
+                name = self.expect_name()
+                node = self.parse_function_rest(name)
+                return ("func_decl", name, node)
+            if keyword == "if":
+                self.next()
+                self.expect("(")
+                test = self.parse_expression()
+                self.expect(")")
+                consequent = self.parse_statement()
+                alternate = self.parse_statement() if self.eat("else") else None
+                return ("if", test, consequent, alternate)
+            if keyword == "for":
+                return self.parse_for()
+            if keyword == "while":
+                self.next()
+                self.expect("(")
+                test = self.parse_expression()
+                self.expect(")")
+                return ("while", test, self.parse_statement())
+            if keyword == "do":
+                self.next()
+                body = self.parse_statement()
+                self.expect("while")
+                self.expect("(")
+                test = self.parse_expression()
+                self.expect(")")
+                self.eat(";")
+                return ("do_while", body, test)
+            if keyword == "switch":
+                return self.parse_switch()
+            if keyword in ("break", "continue"):
+                self.next()
+                following = self.peek()
+                if following.kind == "name" and not following.nl:
+                    raise UnsupportedSyntax("labelled break/continue is not supported")
+                self.consume_semicolon()
+                return (keyword,)
+            if keyword == "return":
+                self.next()
+                following = self.peek()
+                argument = None
+                if not (following.nl or following.kind == "eof" or
+                        (following.kind == "punct" and following.value in (";", "}"))):
+                    argument = self.parse_expression()
+                self.consume_semicolon()
+                return ("return", argument)
+            if keyword == "throw":
+                self.next()
+                argument = self.parse_expression()
+                self.consume_semicolon()
+                return ("throw", argument)
+            if keyword == "try":
+                return self.parse_try()
+            if keyword in UNSUPPORTED_KEYWORDS:
+                raise UnsupportedSyntax(f"'{keyword}' is not supported")
+            if self.peek(1).kind == "punct" and self.peek(1).value == ":":
+                raise UnsupportedSyntax("labelled statements are not supported")
+        expression = self.parse_expression()
+        self.consume_semicolon()
+        return ("expr", expression)
+
+    def parse_declaration(self):
+        kind = self.next().value
+        declarations = []
+        while True:
+            if self.at("[") or self.at("{"):
+                raise UnsupportedSyntax("destructuring is not supported")
+            name = self.expect_name()
+            init = None
+            if self.eat("="):
+                init = self.parse_assignment()
+                self.infer_function_name(init, name)
+            elif kind == "const" and not (self.at("of") or self.at("in")):
+                raise UnsupportedSyntax("missing initializer in const declaration")
+            declarations.append((name, init))
+            if kind == "var":
+                self.var_scopes[-1].add(name)
+            if not self.eat(","):
+                return ("var", kind, declarations)
+
+    @staticmethod
+    def infer_function_name(node, name):
+        if node is not None and node[0] == "func" and not node[1].name:
+            node[1].inferred_name = name
+
+    def parse_for(self):
+        self.next()
+        self.expect("(")
+        # for (let x of ...) / for (x in ...)
+        token = self.peek()
+        if token.kind == "name":
+            kind = None
+            offset = 0
+            if token.value in ("let", "const", "var"):
+                kind = token.value
+                offset = 1
+            name_token = self.peek(offset)
+            keyword_token = self.peek(offset + 1)
+            if name_token.kind == "name" and keyword_token.kind == "name" and keyword_token.value in ("of", "in"):
+                self.pos += offset
+                name = self.expect_name()
+                loop_type = "for_of" if self.next().value == "of" else "for_in"
+                if kind == "var":
+                    self.var_scopes[-1].add(name)
+                iterable = self.parse_assignment() if loop_type == "for_of" else self.parse_expression()
+                self.expect(")")
+                return (loop_type, kind, name, iterable, self.parse_statement())
+        init = None
+        if not self.at(";"):
+            if token.kind == "name" and token.value in ("let", "const", "var"):
+                init = self.parse_declaration()
+            else:
+                init = ("expr", self.parse_expression())
+        self.expect(";")
+        test = None if self.at(";") else self.parse_expression()
+        self.expect(";")
+        update = None if self.at(")") else self.parse_expression()
+        self.expect(")")
+        body = self.parse_statement()
+        return ("for", init, test, update, body)
+
+    def parse_switch(self):
+        self.next()
+        self.expect("(")
+        discriminant = self.parse_expression()
+        self.expect(")")
+        self.expect("{")
+        cases = []
+        all_statements = []
+        while not self.eat("}"):
+            if self.eat("default"):
+                test = None
+            else:
+                self.expect("case")
+                test = self.parse_expression()
+            self.expect(":")
+            body = []
+            while not (self.at("case") or self.at("default") or self.at("}")):
+                if self.peek().kind == "eof":
+                    raise UnsupportedSyntax("unterminated switch")
+                body.append(self.parse_statement())
+            cases.append((test, body))
+            all_statements.extend(body)
+        lexicals, functions = self.block_declarations(all_statements)
+        return ("switch", discriminant, cases, lexicals, functions)
+
+    def parse_try(self):
+        self.next()
+        block = self.parse_block()
+        param = handler = finalizer = None
+        if self.eat("catch"):
+            if self.eat("("):
+                param = self.expect_name()
+                self.expect(")")
+            handler = self.parse_block()
+        if self.eat("finally"):
+            finalizer = self.parse_block()
+        if handler is None and finalizer is None:
+            raise UnsupportedSyntax("try without catch or finally")
+        return ("try", block, param, handler, finalizer)
+
+    # -- functions ----------------------------------------------------------
+
+    def parse_params(self):
+        params = []
+        rest = None
+        self.expect("(")
+        while not self.eat(")"):
+            if self.eat("..."):
+                rest = self.expect_name()
+                self.expect(")")
+                break
+            if self.at("[") or self.at("{"):
+                raise UnsupportedSyntax("destructuring parameters are not supported")
+            name = self.expect_name()
+            default = self.parse_assignment() if self.eat("=") else None
+            params.append((name, default))
+            if not self.eat(","):
+                self.expect(")")
+                break
+        return params, rest
+
+    def parse_function_rest(self, name):
+        params, rest = self.parse_params()
+        return self.parse_function_body(name, params, rest, is_arrow=False)
+
+    def parse_function_body(self, name, params, rest, is_arrow):
+        self.var_scopes.append(set())
+        try:
+            if is_arrow and not self.at("{"):
+                body = self.parse_assignment()
+                return FunctionNode(name, params, rest, body, [], [], set(), True, True)
+            self.expect("{")
+            body = self.parse_statements(end="}")
+            self.expect("}")
+            lexicals, functions = self.block_declarations(body)
+            return FunctionNode(name, params, rest, body, lexicals, functions,
+                                self.var_scopes[-1], is_arrow, False)
+        finally:
+            self.var_scopes.pop()
+
+    def is_arrow_ahead(self):
+        # Looks past a parenthesised parameter list for '=>'
+        depth = 0
+        offset = 0
+        while True:
+            token = self.peek(offset)
+            if token.kind == "eof":
+                return False
+            if token.kind == "punct":
+                if token.value in ("(", "[", "{"):
+                    depth += 1
+                elif token.value in (")", "]", "}"):
+                    depth -= 1
+                    if depth == 0:
+                        following = self.peek(offset + 1)
+                        return following.kind == "punct" and following.value == "=>"
+            offset += 1
+
+    # -- expressions --------------------------------------------------------
+
+    def parse_expression(self):
+        expression = self.parse_assignment()
+        if not self.at(","):
+            return expression
+        expressions = [expression]
+        while self.eat(","):
+            expressions.append(self.parse_assignment())
+        return ("seq", expressions)
+
+    def parse_assignment(self):
+        token = self.peek()
+        if token.kind == "name":
+            following = self.peek(1)
+            if following.kind == "punct" and following.value == "=>" and not following.nl:
+                name = self.expect_name()
+                self.next()
+                return ("func", self.parse_function_body(None, [(name, None)], None, is_arrow=True))
+            if token.value == "async":
+                raise UnsupportedSyntax("async functions are not supported")
+        elif token.kind == "punct" and token.value == "(" and self.is_arrow_ahead():
+            params, rest = self.parse_params()
+            self.expect("=>")
+            return ("func", self.parse_function_body(None, params, rest, is_arrow=True))
+
+        left = self.parse_conditional()
+        token = self.peek()
+        if token.kind == "punct" and token.value in ASSIGNMENT_OPERATORS:
+            if left[0] not in ("ident", "member"):
+                raise UnsupportedSyntax("invalid assignment target")
+            self.next()
+            value = self.parse_assignment()
+            if left[0] == "ident":
+                self.infer_function_name(value, left[1])
+            return ("assign", token.value, left, value)
+        return left
+
+    def parse_conditional(self):
+        test = self.parse_binary(1)
+        if not self.eat("?"):
+            return test
+        consequent = self.parse_assignment()
+        self.expect(":")
+        alternate = self.parse_assignment()
+        return ("cond", test, consequent, alternate)
+
+    def parse_binary(self, min_precedence):
+        left = self.parse_unary()
+        while True:
+            token = self.peek()
+            if token.kind not in ("punct", "name"):
+                return left
+            operator = token.value
+            precedence = BINARY_PRECEDENCE.get(operator)
+            if precedence is None or precedence < min_precedence:
+                return left
+            self.next()
+            if operator == "**":
+                # Right associative
+                right = self.parse_binary(precedence)
+            else:
+                right = self.parse_binary(precedence + 1)
+            if operator in ("&&", "||", "??"):
+                left = ("logical", operator, left, right)
+            else:
+                left = ("binary", operator, left, right)
+
+    def parse_unary(self):
+        token = self.peek()
+        if token.kind == "punct":
+            if token.value in ("!", "-", "+", "~"):
+                self.next()
+                argument = self.parse_unary()
+                if self.at("**"):
+                    raise UnsupportedSyntax("unary operator before '**' needs parentheses")
+                return ("unary", token.value, argument)
+            if token.value in ("++", "--"):
+                self.next()
+                target = self.parse_unary()
+                if target[0] not in ("ident", "member"):
+                    raise UnsupportedSyntax("invalid increment target")
+                return ("update", token.value, True, target)
+        elif token.kind == "name" and token.value in ("typeof", "void", "delete"):
+            self.next()
+            return (token.value, self.parse_unary())
+        return self.parse_postfix()
+
+    def parse_postfix(self):
+        expression = self.parse_call()
+        token = self.peek()
+        if token.kind == "punct" and token.value in ("++", "--") and not token.nl:
+            if expression[0] not in ("ident", "member"):
+                raise UnsupportedSyntax("invalid increment target")
+            self.next()
+            return ("update", token.value, False, expression)
+        return expression
+
+    def parse_arguments(self):
+        arguments = []
+        while not self.eat(")"):
+            if self.eat("..."):
+                arguments.append(("spread", self.parse_assignment()))
+            else:
+                arguments.append(self.parse_assignment())
+            if not self.eat(","):
+                self.expect(")")
+                break
+        return arguments
+
+    def parse_call(self):
+        if self.eat("new"):
+            callee = self.parse_primary()
+            while self.at("."):
+                self.next()
+                callee = ("member", callee, self.next_property_name(), False, False)
+            arguments = self.parse_arguments() if self.eat("(") else []
+            expression = ("new", callee, arguments)
+        else:
+            expression = self.parse_primary()
+        while True:
+            token = self.peek()
+            if token.kind == "template":
+                raise UnsupportedSyntax("tagged templates are not supported")
+            if token.kind != "punct":
+                return expression
+            if token.value == ".":
+                self.next()
+                expression = ("member", expression, self.next_property_name(), False, False)
+            elif token.value == "?.":
+                self.next()
+                if self.eat("("):
+                    expression = ("call", expression, self.parse_arguments(), True)
+                elif self.eat("["):
+                    key = self.parse_expression()
+                    self.expect("]")
+                    expression = ("member", expression, key, True, True)
+                else:
+                    expression = ("member", expression, self.next_property_name(), False, True)
+            elif token.value == "[":
+                self.next()
+                key = self.parse_expression()
+                self.expect("]")
+                expression = ("member", expression, key, True, False)
+            elif token.value == "(":
+                self.next()
+                expression = ("call", expression, self.parse_arguments(), False)
+            else:
+                return expression
+
+    def next_property_name(self):
+        token = self.next()
+        if token.kind != "name":
+            raise UnsupportedSyntax(f"expected a property name but found {token!r}")
+        return token.value
+
+    def parse_primary(self):
+        token = self.next()
+        kind = token.kind
+        if kind in ("num", "str"):
+            return ("lit", token.value)
+        if kind == "template":
+            quasis, expression_tokens = token.value
+            expressions = []
+            for tokens in expression_tokens:
+                parser = Parser(tokens)
+                parser.var_scopes = self.var_scopes
+                expressions.append(parser.parse_expression())
+                if parser.peek().kind != "eof":
+                    raise UnsupportedSyntax("unexpected token in template literal")
+            return ("template", quasis, expressions)
+        if kind == "name":
+            name = token.value
+            if name == "true":
+                return ("const", True)
+            if name == "false":
+                return ("const", False)
+            if name == "null":
+                return ("const", None)
+            if name == "this":
+                return ("this",)
+            if name == "function":
+                function_name = self.expect_name() if self.peek().kind == "name" else None
+                return ("func", self.parse_function_rest(function_name))
+            if name in UNSUPPORTED_KEYWORDS:
+                raise UnsupportedSyntax(f"'{name}' is not supported")
+            return ("ident", name)
+        if kind == "punct":
+            if token.value == "(":
+                expression = self.parse_expression()
+                self.expect(")")
+                return expression
+            if token.value == "[":
+                return self.parse_array()
+            if token.value == "{":
+                return self.parse_object()
+        raise UnsupportedSyntax(f"unexpected token {token!r}")
+
+    def parse_array(self):
+        elements = []
+        while not self.eat("]"):
+            if self.at(","):
+                raise UnsupportedSyntax("sparse arrays are not supported")
+            if self.eat("..."):
+                elements.append(("spread", self.parse_assignment()))
+            else:
+                elements.append(self.parse_assignment())
+            if not self.eat(","):
+                self.expect("]")
+                break
+        return ("array", elements)
+
+    def parse_object(self):
+        properties = []
+        while not self.eat("}"):
+            if self.eat("..."):
+                properties.append(("spread", self.parse_assignment()))
+            else:
+                token = self.next()
+                if token.kind == "name":
+                    if token.value in ("get", "set", "async") and self.peek().kind == "name":
+                        raise UnsupportedSyntax("accessors are not supported")
+                    key = ("key", token.value)
+                elif token.kind in ("str", "num"):
+                    key = ("lit", token.value)
+                elif token.kind == "punct" and token.value == "[":
+                    key = self.parse_assignment()
+                    self.expect("]")
+                else:
+                    raise UnsupportedSyntax(f"unexpected token {token!r} in object literal")
+                if self.eat(":"):
+                    value = self.parse_assignment()
+                    if key[0] == "key":
+                        self.infer_function_name(value, key[1])
+                elif self.at("("):
+                    name = key[1] if key[0] == "key" else None
+                    self.name_sensitive = True
+                    value = ("func", self.parse_function_rest(name))
+                elif key[0] == "key":
+                    # Shorthand property { a }
+                    self.name_sensitive = True
+                    value = ("ident", key[1])
+                else:
+                    raise UnsupportedSyntax("expected ':' in object literal")
+                properties.append((key, value))
+            if not self.eat(","):
+                self.expect("}")
+                break
+        return ("object", properties)
+
+
+# ---------------------------------------------------------------------------
+# Value conversions
+# ---------------------------------------------------------------------------
+
+NUMERIC_STRING_PATTERN = re.compile(r"^[+-]?(?:Infinity|\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)$")
+FLOAT_PREFIX_PATTERN = re.compile(r"^[+-]?(?:Infinity|\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)")
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_$][\w$]*$")
+JS_WHITESPACE = " \t\n\r\v\f\u00a0\ufeff\u2028\u2029"
+
+
+def number_to_string(value):
+    # Number::toString from the ECMAScript spec, on top of Python's shortest repr
+    if value != value:
+        return "NaN"
+    if value == INF:
+        return "Infinity"
+    if value == -INF:
+        return "-Infinity"
+    if value == 0:
+        return "0"
+    if value < 0:
+        return "-" + number_to_string(-value)
+    if value.is_integer() and value < 2 ** 53:
+        return str(int(value))
+    _, digit_tuple, exponent = Decimal(repr(value)).normalize().as_tuple()
+    digits = "".join(map(str, digit_tuple))
+    k = len(digits)
+    n = exponent + k
+    if k <= n <= 21:
+        return digits + "0" * (n - k)
+    if 0 < n <= 21:
+        return digits[:n] + "." + digits[n:]
+    if -6 < n <= 0:
+        return "0." + "0" * (-n) + digits
+    e = n - 1
+    mantissa = digits if k == 1 else digits[0] + "." + digits[1:]
+    return f"{mantissa}e{'+' if e >= 0 else '-'}{abs(e)}"
+
+
+def string_to_number(text):
+    text = text.strip(JS_WHITESPACE)
+    if not text:
+        return 0.0
+    prefix = text[:2].lower()
+    try:
+        if prefix == "0x":
+            return float(int(text[2:], 16))
+        if prefix == "0o":
+            return float(int(text[2:], 8))
+        if prefix == "0b":
+            return float(int(text[2:], 2))
+    except ValueError:
+        return NAN
+    if NUMERIC_STRING_PATTERN.match(text):
+        return float(text.replace("Infinity", "inf"))
+    return NAN
+
+
+def to_primitive(value):
+    if type(value) is list:
+        return array_join(value, ",")
+    if isinstance(value, ErrorObject):
+        return error_to_string(value)
+    if isinstance(value, dict):
+        return "[object Object]"
+    if isinstance(value, (JSFunction, NativeFunction)):
+        raise UnsupportedSyntax("converting functions to primitives is not supported")
+    return value
+
+
+def to_number(value):
+    kind = type(value)
+    if kind is float:
+        return value
+    if kind is bool:
+        return 1.0 if value else 0.0
+    if kind is str:
+        return string_to_number(value)
+    if value is None:
+        return 0.0
+    if value is UNDEFINED:
+        return NAN
+    if kind is int:
+        return float(value)
+    return to_number(to_primitive(value))
+
+
+def to_string(value):
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind is float:
+        return number_to_string(value)
+    if kind is bool:
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    if value is UNDEFINED:
+        return "undefined"
+    if kind is int:
+        return number_to_string(float(value))
+    return to_primitive(value)
+
+
+def to_boolean(value):
+    kind = type(value)
+    if kind is bool:
+        return value
+    if kind is float:
+        return not (value == 0 or value != value)
+    if kind is str:
+        return len(value) > 0
+    if value is None or value is UNDEFINED:
+        return False
+    return True
+
+
+def to_integer(value):
+    number = to_number(value)
+    if number != number:
+        return 0
+    if number in (INF, -INF):
+        return number
+    return int(number)
+
+
+def to_int32(value):
+    number = to_number(value)
+    if number != number or number in (INF, -INF):
+        return 0
+    number = int(number) & 0xFFFFFFFF
+    return number - 0x100000000 if number >= 0x80000000 else number
+
+
+def to_uint32(value):
+    return to_int32(value) & 0xFFFFFFFF
+
+
+def to_property_key(value):
+    return value if type(value) is str else to_string(value)
+
+
+def type_of(value):
+    kind = type(value)
+    if kind is str:
+        return "string"
+    if kind is float or kind is int:
+        return "number"
+    if kind is bool:
+        return "boolean"
+    if value is UNDEFINED:
+        return "undefined"
+    if isinstance(value, (JSFunction, NativeFunction)):
+        return "function"
+    return "object"
+
+
+def strict_equals(left, right):
+    if type(left) is not type(right):
+        return False
+    if type(left) in (float, str, bool):
+        return left == right
+    return left is right
+
+
+def same_value_zero(left, right):
+    if type(left) is float and type(right) is float and left != left and right != right:
+        return True
+    return strict_equals(left, right)
+
+
+def loose_equals(left, right):
+    left_type = type(left)
+    right_type = type(right)
+    if left_type is right_type:
+        return strict_equals(left, right)
+    left_nullish = left is None or left is UNDEFINED
+    right_nullish = right is None or right is UNDEFINED
+    if left_nullish or right_nullish:
+        return left_nullish and right_nullish
+    if left_type is bool:
+        return loose_equals(to_number(left), right)
+    if right_type is bool:
+        return loose_equals(left, to_number(right))
+    if left_type is float and right_type is str:
+        return left == string_to_number(right)
+    if left_type is str and right_type is float:
+        return string_to_number(left) == right
+    if left_type in (float, str) and right_type not in (float, str):
+        return loose_equals(left, to_primitive(right))
+    if right_type in (float, str) and left_type not in (float, str):
+        return loose_equals(to_primitive(left), right)
+    return False
+
+
+def error_to_string(error):
+    name = to_string(error.get("name", "Error"))
+    message = to_string(error.get("message", ""))
+    if not message:
+        return name
+    return f"{name}: {message}" if name else message
+
+
+def array_join(array, separator):
+    return separator.join("" if item is None or item is UNDEFINED else to_string(item) for item in array)
+
+
+def own_keys(obj):
+    # Integer-like keys come first in ascending order, then insertion order
+    integer_keys = [key for key in obj if key.isdigit() and (key == "0" or key[0] != "0")]
+    if not integer_keys:
+        return list(obj)
+    integer_keys.sort(key=int)
+    return integer_keys + [key for key in obj if key not in integer_keys]
+
+
+# ---------------------------------------------------------------------------
+# Arithmetic
+# ---------------------------------------------------------------------------
+
+def js_add(left, right):
+    if type(left) is float and type(right) is float:
+        return left + right
+    left = to_primitive(left)
+    right = to_primitive(right)
+    if type(left) is str or type(right) is str:
+        return to_string(left) + to_string(right)
+    return to_number(left) + to_number(right)
+
+
+def js_divide(left, right):
+    left = to_number(left)
+    right = to_number(right)
+    if right == 0:
+        if left == 0 or left != left:
+            return NAN
+        return math.copysign(INF, left) * math.copysign(1.0, right)
+    return left / right
+
+
+def js_modulo(left, right):
+    left = to_number(left)
+    right = to_number(right)
+    if right == 0 or left != left or right != right or left in (INF, -INF):
+        return NAN
+    if right in (INF, -INF):
+        return left
+    return math.fmod(left, right)
+
+
+def js_power(left, right):
+    base = to_number(left)
+    exponent = to_number(right)
+    if exponent != exponent:
+        return NAN
+    if exponent == 0:
+        return 1.0
+    if abs(base) == 1 and exponent in (INF, -INF):
+        return NAN
+    try:
+        return math.pow(base, exponent)
+    except OverflowError:
+        if base < 0 and exponent.is_integer() and int(exponent) % 2:
+            return -INF
+        return INF
+    except ValueError:
+        if base == 0:
+            if exponent.is_integer() and int(exponent) % 2 and math.copysign(1.0, base) < 0:
+                return -INF
+            return INF
+        return NAN
+
+
+def js_compare(left, right):
+    # Returns True/False, or None when either side is NaN (the "undefined" result)
+    left = to_primitive(left)
+    right = to_primitive(right)
+    if type(left) is str and type(right) is str:
+        return left < right
+    left = to_number(left)
+    right = to_number(right)
+    if left != left or right != right:
+        return None
+    return left < right
+
+
+def _less_than(left, right):
+    return js_compare(left, right) is True
+
+
+def _greater_than(left, right):
+    return js_compare(right, left) is True
+
+
+def _less_equal(left, right):
+    result = js_compare(right, left)
+    return result is False
+
+
+def _greater_equal(left, right):
+    result = js_compare(left, right)
+    return result is False
+
+
+def _shift_right_unsigned(left, right):
+    return float(to_uint32(left) >> (to_uint32(right) & 31))
+
+
+def _shift_left(left, right):
+    result = (to_int32(left) << (to_uint32(right) & 31)) & 0xFFFFFFFF
+    return float(result - 0x100000000 if result >= 0x80000000 else result)
+
+
+def _in_operator(left, right):
+    key = to_property_key(left)
+    if type(right) is list:
+        return key == "length" or (key.isdigit() and int(key) < len(right)) or key in ARRAY_METHODS
+    if isinstance(right, dict):
+        return key in right
+    raise JSThrow(make_error("TypeError", f"Cannot use 'in' operator to search for '{key}' in {to_string(right)}"))
+
+
+def _instance_of(left, right):
+    if right is ARRAY_CONSTRUCTOR:
+        return type(left) is list
+    if right is OBJECT_CONSTRUCTOR:
+        return isinstance(left, (list, dict, JSFunction, NativeFunction))
+    if right in ERROR_CONSTRUCTORS:
+        return isinstance(left, ErrorObject) and (right is ERROR_CONSTRUCTORS[0] or left.get("name") == right.name)
+    raise UnsupportedSyntax("instanceof is only supported for built-in constructors")
+
+
+BINARY_OPERATIONS = {
+    "+": js_add,
+    "-": lambda a, b: to_number(a) - to_number(b),
+    "*": lambda a, b: to_number(a) * to_number(b),
+    "/": js_divide,
+    "%": js_modulo,
+    "**": js_power,
+    "==": loose_equals,
+    "!=": lambda a, b: not loose_equals(a, b),
+    "===": strict_equals,
+    "!==": lambda a, b: not strict_equals(a, b),
+    "<": _less_than,
+    ">": _greater_than,
+    "<=": _less_equal,
+    ">=": _greater_equal,
+    "&": lambda a, b: float(to_int32(a) & to_int32(b)),
+    "|": lambda a, b: float(to_int32(a) | to_int32(b)),
+    "^": lambda a, b: float(to_int32(a) ^ to_int32(b)),
+    "<<": _shift_left,
+    ">>": lambda a, b: float(to_int32(a) >> (to_uint32(b) & 31)),
+    ">>>": _shift_right_unsigned,
+    "in": _in_operator,
+    "instanceof": _instance_of,
+}
+
+
+# ---------------------------------------------------------------------------
+# console.log formatting (mirrors Node's util.inspect for simple values)
+# ---------------------------------------------------------------------------
+
+INSPECT_ESCAPES = {"\n": "\\n", "\t": "\\t", "\r": "\\r", "\b": "\\b", "\f": "\\f", "\v": "\\v", "\\": "\\\\"}
+# Output wider than this is wrapped over several lines by Node; we fall back instead
+INSPECT_BREAK_LENGTH = 80
+
+
+def quote_string(text):
+    if "'" not in text:
+        quote = "'"
+    elif '"' not in text:
+        quote = '"'
+    elif "`" not in text:
+        quote = "`"
+    else:
+        quote = "'"
+    escaped = "".join(INSPECT_ESCAPES.get(char, char) for char in text)
+    if quote == "'" and "'" in text:
+        escaped = escaped.replace("'", "\\'")
+    return quote + escaped + quote
+
+
+def inspect(value, depth=0, nested=False):
+    kind = type(value)
+    if kind is str:
+        return quote_string(value) if nested else value
+    if kind is float:
+        if value == 0 and math.copysign(1.0, value) < 0:
+            return "-0"
+        return number_to_string(value)
+    if kind is bool:
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    if value is UNDEFINED:
+        return "undefined"
+    if isinstance(value, (JSFunction, NativeFunction)):
+        return f"[Function: {value.name}]" if value.name else "[Function (anonymous)]"
+    if isinstance(value, ErrorObject):
+        raise UnsupportedSyntax("printing Error objects (stack traces) is not supported")
+    if kind is list:
+        if not value:
+            return "[]"
+        if depth > 2:
+            return "[Array]"
+        if len(value) > 6:
+            raise UnsupportedSyntax("printing arrays with more than 6 items is not supported")
+        entries = [inspect(item, depth + 1, True) for item in value]
+        braces = ("[", "]")
+    elif isinstance(value, dict):
+        if not value:
+            return "{}"
+        if depth > 2:
+            return "[Object]"
+        entries = []
+        for key in own_keys(value):
+            label = key if IDENTIFIER_PATTERN.match(key) else quote_string(key)
+            entries.append(f"{label}: {inspect(value[key], depth + 1, True)}")
+        braces = ("{", "}")
+    else:
+        raise UnsupportedSyntax(f"cannot print {value!r}")
+    # Same single-line test as Node's isBelowBreakLength()
+    width = sum(len(entry) for entry in entries) + 3 * len(entries) + len(braces[0]) + 10 + 2 * depth
+    if width > INSPECT_BREAK_LENGTH or any("\n" in entry for entry in entries):
+        raise UnsupportedSyntax("printing values that Node wraps over several lines is not supported")
+    return f"{braces[0]} {', '.join(entries)} {braces[1]}"
+
+
+# ---------------------------------------------------------------------------
+# Built-in functions
+# ---------------------------------------------------------------------------
+
+def make_error(name, message):
+    return ErrorObject(name=name, message=message)
+
+
+def _arg(args, index):
+    return args[index] if index < len(args) else UNDEFINED
+
+
+def _relative_index(value, length, default):
+    # Resolves slice-style indices (negative counts from the end)
+    if value is UNDEFINED:
+        return default
+    index = to_integer(value)
+    if index < 0:
+        return int(max(length + index, 0))
+    return int(min(index, length))
+
+
+def _console_log(interpreter, this, args):
+    if args and type(args[0]) is str and re.search(r"%[sdifoOjc%]", args[0]):
+        raise UnsupportedSyntax("console.log format specifiers are not supported")
+    line = " ".join(inspect(arg) for arg in args)
+    if "[Function" in line:
+        # Function names come from identifiers, so the output depends on them
+        interpreter.names_observed = True
+    interpreter.output.append(line)
+    return UNDEFINED
+
+
+def _number_to_fixed(interpreter, this, args):
+    value = to_number(this)
+    digits = to_integer(_arg(args, 0))
+    if not 0 <= digits <= 100:
+        raise JSThrow(make_error("RangeError", "toFixed() digits argument must be between 0 and 100"))
+    if value != value:
+        return "NaN"
+    if abs(value) >= 1e21:
+        return number_to_string(value)
+    sign = ""
+    if value < 0:
+        sign = "-"
+        value = -value
+    with localcontext() as context:
+        context.prec = 200
+        quantized = Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP)
+    return sign + format(quantized, "f")
+
+
+def _number_to_string(interpreter, this, args):
+    value = to_number(this)
+    radix = _arg(args, 0)
+    if radix is UNDEFINED or to_integer(radix) == 10:
+        return number_to_string(value)
+    radix = to_integer(radix)
+    if not 2 <= radix <= 36:
+        raise JSThrow(make_error("RangeError", "toString() radix must be between 2 and 36"))
+    if not value.is_integer():
+        raise UnsupportedSyntax("non-integer toString with a radix is not supported")
+    number = int(abs(value))
+    digits = ""
+    while True:
+        number, remainder = divmod(number, radix)
+        digits = "0123456789abcdefghijklmnopqrstuvwxyz"[remainder] + digits
+        if not number:
+            break
+    return ("-" if value < 0 else "") + digits
+
+
+NUMBER_METHODS = {
+    "toFixed": NativeFunction("toFixed", _number_to_fixed),
+    "toString": NativeFunction("toString", _number_to_string),
+    "valueOf": NativeFunction("valueOf", lambda i, this, args: to_number(this)),
+}
+
+
+def _string_replace(interpreter, text, args, replace_all):
+    pattern = _arg(args, 0)
+    if isinstance(pattern, dict):
+        raise UnsupportedSyntax("regular expressions are not supported")
+    pattern = to_string(pattern)
+    replacement = _arg(args, 1)
+    result = []
+    position = 0
+    while True:
+        index = text.find(pattern, position)
+        if index < 0 or (index == position and pattern == "" and position > len(text)):
+            break
+        result.append(text[position:index])
+        if isinstance(replacement, (JSFunction, NativeFunction)):
+            result.append(to_string(interpreter.call(replacement, UNDEFINED, [pattern, float(index), text])))
+        else:
+            replacement_text = to_string(replacement)
+            if "$" in replacement_text:
+                if re.search(r"\$[`'\d<]", replacement_text):
+                    raise UnsupportedSyntax("replacement patterns are not supported")
+                replacement_text = replacement_text.replace("$$", "\0").replace("$&", pattern).replace("\0", "$")
+            result.append(replacement_text)
+        position = index + len(pattern)
+        if not replace_all:
+            break
+        if not pattern:
+            if index >= len(text):
+                break
+            result.append(text[index])
+            position = index + 1
+    result.append(text[position:])
+    return "".join(result)
+
+
+def _string_split(interpreter, text, args):
+    separator = _arg(args, 0)
+    limit = _arg(args, 1)
+    limit = 2 ** 32 - 1 if limit is UNDEFINED else to_uint32(limit)
+    if isinstance(separator, dict):
+        raise UnsupportedSyntax("regular expressions are not supported")
+    if separator is UNDEFINED:
+        parts = [text]
+    else:
+        separator = to_string(separator)
+        if separator == "":
+            parts = list(text)
+        else:
+            parts = text.split(separator)
+    return parts[:limit]
+
+
+def _string_index_of(text, args):
+    search = to_string(_arg(args, 0))
+    start = min(max(to_integer(_arg(args, 1)), 0), len(text))
+    return float(text.find(search, int(start)))
+
+
+def _string_last_index_of(text, args):
+    search = to_string(_arg(args, 0))
+    position = _arg(args, 1)
+    number = to_number(position)
+    start = len(text) if number != number else min(max(to_integer(position), 0), len(text))
+    return float(text.rfind(search, 0, int(start) + len(search)))
+
+
+def _string_substring(text, args):
+    length = len(text)
+    start = min(max(to_integer(_arg(args, 0)), 0), length)
+    end = length if _arg(args, 1) is UNDEFINED else min(max(to_integer(_arg(args, 1)), 0), length)
+    if start > end:
+        start, end = end, start
+    return text[int(start):int(end)]
+
+
+def _string_substr(text, args):
+    length = len(text)
+    start = _relative_index(_arg(args, 0), length, 0)
+    count = length - start if _arg(args, 1) is UNDEFINED else min(max(to_integer(_arg(args, 1)), 0), length - start)
+    return text[start:start + int(count)]
+
+
+def _string_pad(text, args, at_start):
+    target = to_integer(_arg(args, 0))
+    filler = " " if _arg(args, 1) is UNDEFINED else to_string(_arg(args, 1))
+    if target <= len(text) or not filler:
+        return text
+    needed = int(target) - len(text)
+    padding = (filler * (needed // len(filler) + 1))[:needed]
+    return padding + text if at_start else text + padding
+
+
+def _string_at(text, args):
+    index = to_integer(_arg(args, 0))
+    if index < 0:
+        index += len(text)
+    return text[int(index)] if 0 <= index < len(text) else UNDEFINED
+
+
+def _string_char_at(text, args):
+    index = to_integer(_arg(args, 0))
+    return text[int(index)] if 0 <= index < len(text) else ""
+
+
+def _string_char_code_at(text, args):
+    index = to_integer(_arg(args, 0))
+    return float(ord(text[int(index)])) if 0 <= index < len(text) else NAN
+
+
+def _string_repeat(text, args):
+    count = to_integer(_arg(args, 0))
+    if count < 0 or count == INF:
+        raise JSThrow(make_error("RangeError", f"Invalid count value: {to_string(_arg(args, 0))}"))
+    return text * int(count)
+
+
+def _string_position_check(text, args, method):
+    search = _arg(args, 0)
+    if isinstance(search, dict):
+        raise UnsupportedSyntax("regular expressions are not supported")
+    search = to_string(search)
+    position = _arg(args, 1)
+    if method == "includes":
+        start = 0 if position is UNDEFINED else min(max(to_integer(position), 0), len(text))
+        return search in text[int(start):]
+    if method == "startsWith":
+        start = 0 if position is UNDEFINED else min(max(to_integer(position), 0), len(text))
+        return text.startswith(search, int(start))
+    end = len(text) if position is UNDEFINED else min(max(to_integer(position), 0), len(text))
+    return text[:int(end)].endswith(search)
+
+
+def _string_method(function):
+    return lambda interpreter, this, args: function(to_string(this), args)
+
+
+STRING_METHODS = {
+    "charAt": _string_char_at,
+    "charCodeAt": _string_char_code_at,
+    "at": _string_at,
+    "indexOf": _string_index_of,
+    "lastIndexOf": _string_last_index_of,
+    "includes": lambda text, args: _string_position_check(text, args, "includes"),
+    "startsWith": lambda text, args: _string_position_check(text, args, "startsWith"),
+    "endsWith": lambda text, args: _string_position_check(text, args, "endsWith"),
+    "slice": lambda text, args: text[_relative_index(_arg(args, 0), len(text), 0):_relative_index(_arg(args, 1), len(text), len(text))],
+    "substring": _string_substring,
+    "substr": _string_substr,
+    "toUpperCase": lambda text, args: text.upper(),
+    "toLowerCase": lambda text, args: text.lower(),
+    "toLocaleUpperCase": lambda text, args: text.upper(),
+    "toLocaleLowerCase": lambda text, args: text.lower(),
+    "trim": lambda text, args: text.strip(JS_WHITESPACE),
+    "trimStart": lambda text, args: text.lstrip(JS_WHITESPACE),
+    "trimEnd": lambda text, args: text.rstrip(JS_WHITESPACE),
+    "repeat": _string_repeat,
+    "concat": lambda text, args: text + "".join(to_string(arg) for arg in args),
+    "padStart": lambda text, args: _string_pad(text, args, True),
+    "padEnd": lambda text, args: _string_pad(text, args, False),
+    "toString": lambda text, args: text,
+    "valueOf": lambda text, args: text,
+}
+STRING_METHODS = {name: NativeFunction(name, _string_method(function)) for name, function in STRING_METHODS.items()}
+STRING_METHODS["split"] = NativeFunction("split", lambda i, this, args: _string_split(i, to_string(this), args))
+STRING_METHODS["replace"] = NativeFunction("replace", lambda i, this, args: _string_replace(i, to_string(this), args, False))
+STRING_METHODS["replaceAll"] = NativeFunction("replaceAll", lambda i, this, args: _string_replace(i, to_string(this), args, True))
+
+
+def _require_array(this):
+    if type(this) is not list:
+        raise UnsupportedSyntax("array methods on non-arrays are not supported")
+    return this
+
+
+def _require_callback(callback):
+    if not isinstance(callback, (JSFunction, NativeFunction)):
+        raise JSThrow(make_error("TypeError", f"{inspect(callback)} is not a function"))
+    return callback
+
+
+def _array_push(interpreter, this, args):
+    array = _require_array(this)
+    array.extend(args)
+    return float(len(array))
+
+
+def _array_pop(interpreter, this, args):
+    array = _require_array(this)
+    return array.pop() if array else UNDEFINED
+
+
+def _array_shift(interpreter, this, args):
+    array = _require_array(this)
+    return array.pop(0) if array else UNDEFINED
+
+
+def _array_unshift(interpreter, this, args):
+    array = _require_array(this)
+    array[0:0] = args
+    return float(len(array))
+
+
+def _array_slice(interpreter, this, args):
+    array = _require_array(this)
+    length = len(array)
+    return array[_relative_index(_arg(args, 0), length, 0):_relative_index(_arg(args, 1), length, length)]
+
+
+def _array_splice(interpreter, this, args):
+    array = _require_array(this)
+    length = len(array)
+    start = _relative_index(_arg(args, 0), length, 0)
+    if not args:
+        count = 0
+    elif len(args) == 1:
+        count = length - start
+    else:
+        count = int(min(max(to_integer(args[1]), 0), length - start))
+    removed = array[start:start + count]
+    array[start:start + count] = args[2:]
+    return removed
+
+
+def _array_index_of(interpreter, this, args):
+    array = _require_array(this)
+    search = _arg(args, 0)
+    start = _relative_index(_arg(args, 1), len(array), 0)
+    for index in range(start, len(array)):
+        if strict_equals(array[index], search):
+            return float(index)
+    return -1.0
+
+
+def _array_last_index_of(interpreter, this, args):
+    array = _require_array(this)
+    search = _arg(args, 0)
+    for index in range(len(array) - 1, -1, -1):
+        if strict_equals(array[index], search):
+            return float(index)
+    return -1.0
+
+
+def _array_includes(interpreter, this, args):
+    array = _require_array(this)
+    search = _arg(args, 0)
+    start = _relative_index(_arg(args, 1), len(array), 0)
+    return any(same_value_zero(item, search) for item in array[start:])
+
+
+def _array_join(interpreter, this, args):
+    array = _require_array(this)
+    separator = "," if _arg(args, 0) is UNDEFINED else to_string(args[0])
+    return array_join(array, separator)
+
+
+def _array_reverse(interpreter, this, args):
+    array = _require_array(this)
+    array.reverse()
+    return array
+
+
+def _array_concat(interpreter, this, args):
+    result = list(_require_array(this))
+    for arg in args:
+        if type(arg) is list:
+            result.extend(arg)
+        else:
+            result.append(arg)
+    return result
+
+
+def _array_fill(interpreter, this, args):
+    array = _require_array(this)
+    length = len(array)
+    start = _relative_index(_arg(args, 1), length, 0)
+    end = _relative_index(_arg(args, 2), length, length)
+    for index in range(start, end):
+        array[index] = _arg(args, 0)
+    return array
+
+
+def _array_flat(interpreter, this, args):
+    depth = 1 if _arg(args, 0) is UNDEFINED else to_integer(args[0])
+
+    def flatten(items, level):
+        result = []
+        for item in items:
+            if type(item) is list and level > 0:
+                result.extend(flatten(item, level - 1))
+            else:
+                result.append(item)
+        return result
+
+    return flatten(_require_array(this), depth)
+
+
+def _array_at(interpreter, this, args):
+    array = _require_array(this)
+    index = to_integer(_arg(args, 0))
+    if index < 0:
+        index += len(array)
+    return array[int(index)] if 0 <= index < len(array) else UNDEFINED
+
+
+def _array_iterate(interpreter, this, args, mode):
+    array = _require_array(this)
+    callback = _require_callback(_arg(args, 0))
+    this_arg = _arg(args, 1)
+    results = []
+    # Elements appended during iteration are not visited
+    for index in range(len(array)):
+        if index >= len(array):
+            break
+        item = array[index]
+        outcome = interpreter.call(callback, this_arg, [item, float(index), array])
+        if mode == "map":
+            results.append(outcome)
+        elif mode == "filter":
+            if to_boolean(outcome):
+                results.append(item)
+        elif mode == "find":
+            if to_boolean(outcome):
+                return item
+        elif mode == "findIndex":
+            if to_boolean(outcome):
+                return float(index)
+        elif mode == "some":
+            if to_boolean(outcome):
+                return True
+        elif mode == "every":
+            if not to_boolean(outcome):
+                return False
+    if mode in ("map", "filter"):
+        return results
+    return {"find": UNDEFINED, "findIndex": -1.0, "some": False, "every": True, "forEach": UNDEFINED}[mode]
+
+
+def _array_find_last(interpreter, this, args, want_index):
+    array = _require_array(this)
+    callback = _require_callback(_arg(args, 0))
+    for index in range(len(array) - 1, -1, -1):
+        if to_boolean(interpreter.call(callback, _arg(args, 1), [array[index], float(index), array])):
+            return float(index) if want_index else array[index]
+    return -1.0 if want_index else UNDEFINED
+
+
+def _array_reduce(interpreter, this, args, from_right):
+    array = _require_array(this)
+    callback = _require_callback(_arg(args, 0))
+    indices = list(range(len(array)))
+    if from_right:
+        indices.reverse()
+    if len(args) > 1:
+        accumulator = args[1]
+    elif indices:
+        accumulator = array[indices.pop(0)]
+    else:
+        raise JSThrow(make_error("TypeError", "Reduce of empty array with no initial value"))
+    for index in indices:
+        if index < len(array):
+            accumulator = interpreter.call(callback, UNDEFINED, [accumulator, array[index], float(index), array])
+    return accumulator
+
+
+def _array_sort(interpreter, this, args):
+    array = _require_array(this)
+    comparator = _arg(args, 0)
+    defined = [item for item in array if item is not UNDEFINED]
+    missing = len(array) - len(defined)
+    if comparator is UNDEFINED:
+        defined.sort(key=to_string)
+    else:
+        callback = _require_callback(comparator)
+
+        def compare(left, right):
+            result = to_number(interpreter.call(callback, UNDEFINED, [left, right]))
+            if result != result or result == 0:
+                return 0
+            return -1 if result < 0 else 1
+
+        defined.sort(key=cmp_to_key(compare))
+    array[:] = defined + [UNDEFINED] * missing
+    return array
+
+
+ARRAY_METHODS = {
+    "push": _array_push,
+    "pop": _array_pop,
+    "shift": _array_shift,
+    "unshift": _array_unshift,
+    "slice": _array_slice,
+    "splice": _array_splice,
+    "indexOf": _array_index_of,
+    "lastIndexOf": _array_last_index_of,
+    "includes": _array_includes,
+    "join": _array_join,
+    "toString": lambda i, this, args: _array_join(i, this, []),
+    "reverse": _array_reverse,
+    "concat": _array_concat,
+    "fill": _array_fill,
+    "flat": _array_flat,
+    "at": _array_at,
+    "sort": _array_sort,
+    "reduce": lambda i, this, args: _array_reduce(i, this, args, False),
+    "reduceRight": lambda i, this, args: _array_reduce(i, this, args, True),
+    "findLast": lambda i, this, args: _array_find_last(i, this, args, False),
+    "findLastIndex": lambda i, this, args: _array_find_last(i, this, args, True),
+}
+for _mode in ("map", "filter", "find", "findIndex", "some", "every", "forEach"):
+    ARRAY_METHODS[_mode] = (lambda mode: lambda i, this, args: _array_iterate(i, this, args, mode))(_mode)
+ARRAY_METHODS = {name: NativeFunction(name, function) for name, function in ARRAY_METHODS.items()}
+
+
+def _object_has_own(interpreter, this, args):
+    key = to_property_key(_arg(args, 0))
+    if type(this) is list:
+        return key.isdigit() and int(key) < len(this)
+    return isinstance(this, dict) and key in this
+
+
+OBJECT_METHODS = {
+    "hasOwnProperty": NativeFunction("hasOwnProperty", _object_has_own),
+    "toString": NativeFunction("toString", lambda i, this, args: to_string(this)),
+}
+
+
+def _parse_int(interpreter, this, args):
+    text = to_string(_arg(args, 0)).strip(JS_WHITESPACE)
+    radix = to_int32(_arg(args, 1))
+    sign = 1
+    if text[:1] in ("+", "-"):
+        sign = -1 if text[0] == "-" else 1
+        text = text[1:]
+    if radix in (0, 16) and text[:2].lower() == "0x":
+        text = text[2:]
+        radix = 16
+    if radix == 0:
+        radix = 10
+    if not 2 <= radix <= 36:
+        return NAN
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"[:radix]
+    end = 0
+    while end < len(text) and text[end].lower() in digits:
+        end += 1
+    if end == 0:
+        return NAN
+    return float(sign * int(text[:end], radix))
+
+
+def _parse_float(interpreter, this, args):
+    text = to_string(_arg(args, 0)).strip(JS_WHITESPACE)
+    match = FLOAT_PREFIX_PATTERN.match(text)
+    if not match:
+        return NAN
+    return float(match.group().replace("Infinity", "inf"))
+
+
+def _math_round(value):
+    if value != value or value in (INF, -INF):
+        return value
+    result = math.floor(value)
+    if value - result >= 0.5:
+        result += 1
+    if result == 0 and value < 0:
+        return -0.0
+    return float(result)
+
+
+def _math_function(function):
+    def call(interpreter, this, args):
+        value = to_number(_arg(args, 0))
+        try:
+            return float(function(value))
+        except (ValueError, OverflowError):
+            return NAN
+    return call
+
+
+def _math_floor(value):
+    return value if value != value or value in (INF, -INF) else math.floor(value)
+
+
+def _math_ceil(value):
+    return value if value != value or value in (INF, -INF) else math.ceil(value)
+
+
+def _math_trunc(value):
+    return value if value != value or value in (INF, -INF) else math.trunc(value)
+
+
+def _math_extreme(pick, empty):
+    def call(interpreter, this, args):
+        numbers = [to_number(arg) for arg in args]
+        if any(number != number for number in numbers):
+            return NAN
+        return pick(numbers) if numbers else empty
+    return call
+
+
+def _math_random(interpreter, this, args):
+    raise UnsupportedSyntax("Math.random() is not deterministic")
+
+
+MATH = BuiltinObject({
+    "PI": math.pi,
+    "E": math.e,
+    "floor": NativeFunction("floor", _math_function(_math_floor)),
+    "ceil": NativeFunction("ceil", _math_function(_math_ceil)),
+    "round": NativeFunction("round", _math_function(_math_round)),
+    "trunc": NativeFunction("trunc", _math_function(_math_trunc)),
+    "abs": NativeFunction("abs", _math_function(abs)),
+    "sign": NativeFunction("sign", _math_function(lambda v: v if v != v or v == 0 else math.copysign(1.0, v))),
+    "sqrt": NativeFunction("sqrt", _math_function(math.sqrt)),
+    "cbrt": NativeFunction("cbrt", _math_function(lambda v: math.copysign(abs(v) ** (1 / 3), v))),
+    "log": NativeFunction("log", _math_function(math.log)),
+    "log2": NativeFunction("log2", _math_function(math.log2)),
+    "log10": NativeFunction("log10", _math_function(math.log10)),
+    "pow": NativeFunction("pow", lambda i, this, args: js_power(_arg(args, 0), _arg(args, 1))),
+    "max": NativeFunction("max", _math_extreme(max, -INF)),
+    "min": NativeFunction("min", _math_extreme(min, INF)),
+    "random": NativeFunction("random", _math_random),
+})
+
+
+def _error_constructor(name):
+    def construct(interpreter, this, args):
+        message = _arg(args, 0)
+        return make_error(name, "" if message is UNDEFINED else to_string(message))
+    return NativeFunction(name, construct)
+
+
+def _array_constructor(interpreter, this, args):
+    if len(args) == 1 and type(args[0]) is float:
+        if args[0] == 0:
+            return []
+        raise UnsupportedSyntax("arrays with empty slots are not supported")
+    return list(args)
+
+
+def _array_from(interpreter, this, args):
+    source = _arg(args, 0)
+    if type(source) is str:
+        items = list(source)
+    elif type(source) is list:
+        items = list(source)
+    else:
+        raise UnsupportedSyntax("Array.from only supports strings and arrays")
+    mapper = _arg(args, 1)
+    if mapper is not UNDEFINED:
+        items = [interpreter.call(mapper, UNDEFINED, [item, float(index)]) for index, item in enumerate(items)]
+    return items
+
+
+def _object_entries(mode):
+    def call(interpreter, this, args):
+        source = _arg(args, 0)
+        if type(source) is list:
+            keys = [str(index) for index in range(len(source))]
+            values = list(source)
+        elif isinstance(source, dict):
+            keys = own_keys(source)
+            values = [source[key] for key in keys]
+        elif type(source) is str:
+            keys = [str(index) for index in range(len(source))]
+            values = list(source)
+        else:
+            return []
+        if mode == "keys":
+            return keys
+        if mode == "values":
+            return values
+        return [[key, value] for key, value in zip(keys, values)]
+    return call
+
+
+ARRAY_CONSTRUCTOR = NativeFunction("Array", _array_constructor)
+OBJECT_CONSTRUCTOR = NativeFunction("Object", lambda i, this, args: {})
+ERROR_CONSTRUCTORS = [_error_constructor(name) for name in ("Error", "TypeError", "RangeError", "ReferenceError", "SyntaxError")]
+
+# Static members of the constructors, looked up by get_member
+STATIC_MEMBERS = {
+    ARRAY_CONSTRUCTOR: {
+        "isArray": NativeFunction("isArray", lambda i, this, args: type(_arg(args, 0)) is list),
+        "from": NativeFunction("from", _array_from),
+        "of": NativeFunction("of", lambda i, this, args: list(args)),
+    },
+    OBJECT_CONSTRUCTOR: {
+        "keys": NativeFunction("keys", _object_entries("keys")),
+        "values": NativeFunction("values", _object_entries("values")),
+        "entries": NativeFunction("entries", _object_entries("entries")),
+    },
+}
+
+NUMBER_CONSTRUCTOR = NativeFunction("Number", lambda i, this, args: to_number(args[0]) if args else 0.0)
+STATIC_MEMBERS[NUMBER_CONSTRUCTOR] = {
+    "isInteger": NativeFunction("isInteger", lambda i, this, args: type(_arg(args, 0)) is float and _arg(args, 0) not in (INF, -INF) and _arg(args, 0) == _arg(args, 0) and _arg(args, 0).is_integer()),
+    "isNaN": NativeFunction("isNaN", lambda i, this, args: type(_arg(args, 0)) is float and _arg(args, 0) != _arg(args, 0)),
+    "parseInt": NativeFunction("parseInt", _parse_int),
+    "parseFloat": NativeFunction("parseFloat", _parse_float),
+    "MAX_SAFE_INTEGER": 9007199254740991.0,
+    "MIN_SAFE_INTEGER": -9007199254740991.0,
+    "EPSILON": 2.0 ** -52,
+    "MAX_VALUE": 1.7976931348623157e308,
+    "MIN_VALUE": 5e-324,
+    "POSITIVE_INFINITY": INF,
+    "NEGATIVE_INFINITY": -INF,
+    "NaN": NAN,
+}
+
+CONSOLE_LOG = NativeFunction("log", _console_log)
+
+BUILTINS = {
+    "undefined": UNDEFINED,
+    "NaN": NAN,
+    "Infinity": INF,
+    "console": BuiltinObject({"log": CONSOLE_LOG, "info": CONSOLE_LOG, "warn": CONSOLE_LOG, "error": CONSOLE_LOG}),
+    "Math": MATH,
+    "parseInt": NativeFunction("parseInt", _parse_int),
+    "parseFloat": NativeFunction("parseFloat", _parse_float),
+    "isNaN": NativeFunction("isNaN", lambda i, this, args: to_number(_arg(args, 0)) != to_number(_arg(args, 0))),
+    "isFinite": NativeFunction("isFinite", lambda i, this, args: to_number(_arg(args, 0)) not in (INF, -INF, NAN) and to_number(_arg(args, 0)) == to_number(_arg(args, 0))),
+    "String": NativeFunction("String", lambda i, this, args: to_string(args[0]) if args else ""),
+    "Number": NUMBER_CONSTRUCTOR,
+    "Boolean": NativeFunction("Boolean", lambda i, this, args: to_boolean(_arg(args, 0))),
+    "Array": ARRAY_CONSTRUCTOR,
+    "Object": OBJECT_CONSTRUCTOR,
+}
+for _constructor in ERROR_CONSTRUCTORS:
+    BUILTINS[_constructor.name] = _constructor
+
+
+# ---------------------------------------------------------------------------
+# Interpreter
+# ---------------------------------------------------------------------------
+
+class Scope:
+    __slots__ = ("vars", "parent", "consts", "this")
+
+    def __init__(self, parent=None, this=None):
+        self.vars = {}
+        self.parent = parent
+        self.consts = None
+        # Only set on non-arrow function scopes
+        self.this = this
+
+
+BREAK = ("break", None)
+CONTINUE = ("continue", None)
+
+
+class Interpreter:
+    def __init__(self, literals, max_steps=MAX_STEPS):
+        self.literals = literals
+        self.output = []
+        self.names_observed = False
+        self.steps = 0
+        self.max_steps = max_steps
+        self.statement_handlers = {
+            "var": self.exec_var,
+            "expr": self.exec_expression,
+            "func_decl": lambda node, scope: None,
+            "if": self.exec_if,
+            "for": self.exec_for,
+            "for_of": self.exec_for_of,
+            "for_in": self.exec_for_of,
+            "while": self.exec_while,
+            "do_while": self.exec_do_while,
+            "switch": self.exec_switch,
+            "break": lambda node, scope: BREAK,
+            "continue": lambda node, scope: CONTINUE,
+            "return": self.exec_return,
+            "throw": self.exec_throw,
+            "block": self.exec_block,
+            "empty": lambda node, scope: None,
+            "try": self.exec_try,
+        }
+        self.expression_handlers = {
+            "lit": lambda node, scope: self.literals[node[1]],
+            "const": lambda node, scope: node[1],
+            "ident": lambda node, scope: self.lookup(scope, node[1]),
+            "template": self.eval_template,
+            "array": self.eval_array,
+            "object": self.eval_object,
+            "func": self.eval_function,
+            "unary": self.eval_unary,
+            "typeof": self.eval_typeof,
+            "void": self.eval_void,
+            "delete": self.eval_delete,
+            "update": self.eval_update,
+            "binary": self.eval_binary,
+            "logical": self.eval_logical,
+            "cond": self.eval_conditional,
+            "assign": self.eval_assign,
+            "seq": self.eval_sequence,
+            "member": self.eval_member,
+            "call": self.eval_call,
+            "new": self.eval_new,
+            "this": self.eval_this,
+        }
+
+    # -- helpers ------------------------------------------------------------
+
+    def tick(self):
+        self.steps += 1
+        if self.steps > self.max_steps:
+            raise UnsupportedSyntax("step limit exceeded")
+
+    def throw(self, name, message, uses_names=False):
+        if uses_names or "[Function" in message:
+            # The message spells out identifiers, so catching or printing it depends on them
+            self.names_observed = True
+        raise JSThrow(make_error(name, message))
+
+    def lookup(self, scope, name):
+        while scope is not None:
+            scope_vars = scope.vars
+            if name in scope_vars:
+                value = scope_vars[name]
+                if value is TDZ:
+                    self.throw("ReferenceError", f"Cannot access '{name}' before initialization", True)
+                return value
+            scope = scope.parent
+        if name in BUILTINS:
+            return BUILTINS[name]
+        raise UnsupportedSyntax(f"'{name}' is not defined")
+
+    def assign_name(self, scope, name, value):
+        current = scope
+        while current is not None:
+            if name in current.vars:
+                if current.vars[name] is TDZ:
+                    self.throw("ReferenceError", f"Cannot access '{name}' before initialization", True)
+                if current.consts and name in current.consts:
+                    self.throw("TypeError", "Assignment to constant variable.")
+                current.vars[name] = value
+                return value
+            if current.parent is None:
+                break
+            current = current.parent
+        if name in BUILTINS:
+            raise UnsupportedSyntax(f"assigning to built-in '{name}' is not supported")
+        # Sloppy mode: assigning to an undeclared name creates a global
+        current.vars[name] = value
+        return value
+
+    def declare_block(self, scope, lexicals, functions):
+        for name, is_const in lexicals:
+            scope.vars[name] = TDZ
+            if is_const:
+                if scope.consts is None:
+                    scope.consts = set()
+                scope.consts.add(name)
+        for _, name, node in functions:
+            scope.vars[name] = JSFunction(node, scope)
+
+    def call(self, function, this, args):
+        if isinstance(function, NativeFunction):
+            return function.impl(self, this, args)
+        if not isinstance(function, JSFunction):
+            self.throw("TypeError", f"{inspect(function)} is not a function")
+        self.tick()
+        node = function.node
+        scope = Scope(function.closure, None if node.is_arrow else this)
+        scope_vars = scope.vars
+        if not node.is_arrow:
+            scope_vars["arguments"] = list(args)
+            if node.name:
+                scope_vars.setdefault(node.name, function)
+        for index, (name, default) in enumerate(node.params):
+            value = args[index] if index < len(args) else UNDEFINED
+            if value is UNDEFINED and default is not None:
+                value = self.evaluate(default, scope)
+            scope_vars[name] = value
+        if node.rest:
+            scope_vars[node.rest] = list(args[len(node.params):])
+        if node.expression:
+            return self.evaluate(node.body, scope)
+        for name in node.var_names:
+            scope_vars.setdefault(name, UNDEFINED)
+        self.declare_block(scope, node.lexicals, node.functions)
+        signal = self.exec_statements(node.body, scope)
+        if signal is not None and signal[0] == "return":
+            return signal[1]
+        return UNDEFINED
+
+    def get_member(self, obj, key):
+        kind = type(obj)
+        if kind is list:
+            if type(key) is float:
+                index = int(key) if key.is_integer() else -1
+                return obj[index] if 0 <= index < len(obj) else UNDEFINED
+            key = to_property_key(key)
+            if key == "length":
+                return float(len(obj))
+            if key.isdigit():
+                index = int(key)
+                return obj[index] if index < len(obj) else UNDEFINED
+            return ARRAY_METHODS.get(key) or OBJECT_METHODS.get(key, UNDEFINED)
+        if kind is str:
+            if type(key) is float:
+                index = int(key) if key.is_integer() else -1
+                return obj[index] if 0 <= index < len(obj) else UNDEFINED
+            key = to_property_key(key)
+            if key == "length":
+                return float(len(obj))
+            if key.isdigit():
+                index = int(key)
+                return obj[index] if index < len(obj) else UNDEFINED
+            return STRING_METHODS.get(key, UNDEFINED)
+        if isinstance(obj, dict):
+            key = to_property_key(key)
+            if key in obj:
+                return obj[key]
+            return OBJECT_METHODS.get(key, UNDEFINED)
+        if kind is float:
+            return NUMBER_METHODS.get(to_property_key(key), UNDEFINED)
+        if kind is bool:
+            key = to_property_key(key)
+            if key == "toString":
+                return OBJECT_METHODS["toString"]
+            return UNDEFINED
+        if obj is None or obj is UNDEFINED:
+            self.throw("TypeError", f"Cannot read properties of {to_string(obj)} (reading '{to_property_key(key)}')")
+        if isinstance(obj, (JSFunction, NativeFunction)):
+            key = to_property_key(key)
+            if key == "name":
+                if isinstance(obj, JSFunction):
+                    # The name of a declared function comes from its identifier
+                    self.names_observed = True
+                return obj.name
+            statics = STATIC_MEMBERS.get(obj)
+            if statics and key in statics:
+                return statics[key]
+            if key in ("call", "apply", "bind", "prototype", "length"):
+                raise UnsupportedSyntax(f"function .{key} is not supported")
+            return UNDEFINED
+        raise UnsupportedSyntax(f"cannot read properties of {obj!r}")
+
+    def set_member(self, obj, key, value):
+        kind = type(obj)
+        if kind is list:
+            if type(key) is float and key.is_integer():
+                index = int(key)
+            else:
+                key = to_property_key(key)
+                if key == "length":
+                    length = to_number(value)
+                    if not (length >= 0 and length.is_integer()):
+                        self.throw("RangeError", "Invalid array length")
+                    if length > len(obj):
+                        raise UnsupportedSyntax("arrays with empty slots are not supported")
+                    del obj[int(length):]
+                    return value
+                if not key.isdigit():
+                    raise UnsupportedSyntax("non-index properties on arrays are not supported")
+                index = int(key)
+            if 0 <= index < len(obj):
+                obj[index] = value
+            elif index == len(obj):
+                obj.append(value)
+            else:
+                raise UnsupportedSyntax("arrays with empty slots are not supported")
+            return value
+        if isinstance(obj, BuiltinObject):
+            raise UnsupportedSyntax("modifying built-in objects is not supported")
+        if isinstance(obj, dict):
+            obj[to_property_key(key)] = value
+            return value
+        if obj is None or obj is UNDEFINED:
+            self.throw("TypeError", f"Cannot set properties of {to_string(obj)} (setting '{to_property_key(key)}')")
+        if kind in (str, float, bool):
+            # Silently ignored outside strict mode
+            return value
+        raise UnsupportedSyntax(f"cannot set properties on {obj!r}")
+
+    # -- statements ---------------------------------------------------------
+
+    def exec_statements(self, statements, scope):
+        handlers = self.statement_handlers
+        for statement in statements:
+            signal = handlers[statement[0]](statement, scope)
+            if signal is not None:
+                return signal
+        return None
+
+    def exec_statement(self, statement, scope):
+        return self.statement_handlers[statement[0]](statement, scope)
+
+    def exec_expression(self, node, scope):
+        self.evaluate(node[1], scope)
+        return None
+
+    def exec_var(self, node, scope):
+        kind = node[1]
+        for name, init in node[2]:
+            if kind == "var":
+                if init is not None:
+                    self.assign_name(scope, name, self.evaluate(init, scope))
+            else:
+                value = UNDEFINED if init is None else self.evaluate(init, scope)
+                # let/const bindings live in the innermost block scope
+                scope.vars[name] = value
+        return None
+
+    def exec_if(self, node, scope):
+        if to_boolean(self.evaluate(node[1], scope)):
+            return self.exec_statement(node[2], scope)
+        if node[3] is not None:
+            return self.exec_statement(node[3], scope)
+        return None
+
+    def exec_block(self, node, scope):
+        if node[2] or node[3]:
+            scope = Scope(scope)
+            self.declare_block(scope, node[2], node[3])
+        return self.exec_statements(node[1], scope)
+
+    def run_loop_body(self, body, scope):
+        # Returns (stop_loop, signal_to_propagate)
+        signal = self.exec_statement(body, scope)
+        if signal is None or signal is CONTINUE:
+            return False, None
+        if signal is BREAK:
+            return True, None
+        return True, signal
+
+    def exec_for(self, node, scope):
+        _, init, test, update, body = node
+        per_iteration = init is not None and init[0] == "var" and init[1] == "let"
+        if init is not None and init[0] == "var" and init[1] != "var":
+            scope = Scope(scope)
+            lexicals, _ = Parser.block_declarations([init])
+            self.declare_block(scope, lexicals, [])
+        if init is not None:
+            self.exec_statement(init, scope)
+        while True:
+            if test is not None and not to_boolean(self.evaluate(test, scope)):
+                return None
+            self.tick()
+            stop, signal = self.run_loop_body(body, scope)
+            if stop:
+                return signal
+            if per_iteration:
+                # Each iteration gets a fresh copy of the let bindings, so closures
+                # created in the body keep the value they saw
+                iteration = Scope(scope.parent)
+                iteration.vars = dict(scope.vars)
+                scope = iteration
+            if update is not None:
+                self.evaluate(update, scope)
+
+    def exec_for_of(self, node, scope):
+        loop_type, kind, name, iterable, body = node
+        source = self.evaluate(iterable, scope)
+        if loop_type == "for_of":
+            if type(source) is list:
+                # Arrays are iterated live, so pushes inside the loop are visited
+                items = source
+            elif type(source) is str:
+                items = list(source)
+            else:
+                self.throw("TypeError", f"{to_string(source)} is not iterable")
+        else:
+            if type(source) is list or type(source) is str:
+                items = [str(index) for index in range(len(source))]
+            elif isinstance(source, dict):
+                items = own_keys(source)
+            else:
+                items = []
+        index = 0
+        while index < len(items):
+            self.tick()
+            if kind in ("let", "const"):
+                iteration = Scope(scope)
+                iteration.vars[name] = items[index]
+                if kind == "const":
+                    iteration.consts = {name}
+            else:
+                iteration = scope
+                self.assign_name(scope, name, items[index])
+            stop, signal = self.run_loop_body(body, iteration)
+            if stop:
+                return signal
+            index += 1
+        return None
+
+    def exec_while(self, node, scope):
+        test, body = node[1], node[2]
+        while to_boolean(self.evaluate(test, scope)):
+            self.tick()
+            stop, signal = self.run_loop_body(body, scope)
+            if stop:
+                return signal
+        return None
+
+    def exec_do_while(self, node, scope):
+        body, test = node[1], node[2]
+        while True:
+            self.tick()
+            stop, signal = self.run_loop_body(body, scope)
+            if stop:
+                return signal
+            if not to_boolean(self.evaluate(test, scope)):
+                return None
+
+    def exec_switch(self, node, scope):
+        _, discriminant, cases, lexicals, functions = node
+        value = self.evaluate(discriminant, scope)
+        scope = Scope(scope)
+        self.declare_block(scope, lexicals, functions)
+        start = None
+        for index, (test, _) in enumerate(cases):
+            if test is not None and strict_equals(value, self.evaluate(test, scope)):
+                start = index
+                break
+        if start is None:
+            start = next((index for index, (test, _) in enumerate(cases) if test is None), None)
+            if start is None:
+                return None
+        for _, body in cases[start:]:
+            signal = self.exec_statements(body, scope)
+            if signal is BREAK:
+                return None
+            if signal is not None:
+                return signal
+        return None
+
+    def exec_return(self, node, scope):
+        return ("return", UNDEFINED if node[1] is None else self.evaluate(node[1], scope))
+
+    def exec_throw(self, node, scope):
+        raise JSThrow(self.evaluate(node[1], scope))
+
+    def exec_try(self, node, scope):
+        _, block, param, handler, finalizer = node
+        try:
+            try:
+                signal = self.exec_block(block, scope)
+            except JSThrow as error:
+                if handler is None:
+                    raise
+                catch_scope = Scope(scope)
+                if param:
+                    catch_scope.vars[param] = error.value
+                signal = self.exec_block(handler, catch_scope)
+        finally:
+            if finalizer is not None:
+                final_signal = self.exec_block(finalizer, scope)
+                if final_signal is not None:
+                    return final_signal
+        return signal
+
+    # -- expressions --------------------------------------------------------
+
+    def evaluate(self, node, scope):
+        return self.expression_handlers[node[0]](node, scope)
+
+    def eval_template(self, node, scope):
+        quasis, expressions = node[1], node[2]
+        parts = [quasis[0]]
+        for index, expression in enumerate(expressions):
+            parts.append(to_string(self.evaluate(expression, scope)))
+            parts.append(quasis[index + 1])
+        return "".join(parts)
+
+    def eval_array(self, node, scope):
+        result = []
+        for element in node[1]:
+            if element[0] == "spread":
+                result.extend(self.spread(self.evaluate(element[1], scope)))
+            else:
+                result.append(self.evaluate(element, scope))
+        return result
+
+    def spread(self, value):
+        if type(value) is list:
+            return value
+        if type(value) is str:
+            return list(value)
+        self.throw("TypeError", f"{to_string(value)} is not iterable")
+
+    def eval_object(self, node, scope):
+        result = {}
+        for key, value in node[1]:
+            if key == "spread":
+                source = self.evaluate(value, scope)
+                if type(source) is list:
+                    result.update((str(index), item) for index, item in enumerate(source))
+                elif isinstance(source, dict):
+                    result.update(source)
+                continue
+            if key[0] == "key":
+                name = key[1]
+            elif key[0] == "lit":
+                name = to_property_key(self.literals[key[1]])
+            else:
+                name = to_property_key(self.evaluate(key, scope))
+            result[name] = self.evaluate(value, scope)
+        return result
+
+    def eval_function(self, node, scope):
+        function_node = node[1]
+        this = self.current_this(scope, required=False) if function_node.is_arrow else None
+        return JSFunction(function_node, scope, this)
+
+    def current_this(self, scope, required=True):
+        while scope is not None:
+            if scope.this is not None:
+                return scope.this
+            scope = scope.parent
+        if required:
+            raise UnsupportedSyntax("top-level 'this' is not supported")
+        return None
+
+    def eval_this(self, node, scope):
+        return self.current_this(scope)
+
+    def eval_unary(self, node, scope):
+        operator = node[1]
+        value = self.evaluate(node[2], scope)
+        if operator == "!":
+            return not to_boolean(value)
+        if operator == "-":
+            return -to_number(value)
+        if operator == "+":
+            return to_number(value)
+        return float(~to_int32(value))
+
+    def eval_typeof(self, node, scope):
+        argument = node[1]
+        if argument[0] == "ident":
+            try:
+                return type_of(self.lookup(scope, argument[1]))
+            except UnsupportedSyntax:
+                return "undefined"
+        return type_of(self.evaluate(argument, scope))
+
+    def eval_void(self, node, scope):
+        self.evaluate(node[1], scope)
+        return UNDEFINED
+
+    def eval_delete(self, node, scope):
+        target = node[1]
+        if target[0] != "member":
+            raise UnsupportedSyntax("delete is only supported on properties")
+        obj = self.evaluate(target[1], scope)
+        key = self.evaluate(target[2], scope) if target[3] else target[2]
+        if isinstance(obj, BuiltinObject) or not isinstance(obj, dict):
+            raise UnsupportedSyntax("delete is only supported on plain objects")
+        obj.pop(to_property_key(key), None)
+        return True
+
+    def resolve_member(self, node, scope):
+        obj = self.evaluate(node[1], scope)
+        key = self.evaluate(node[2], scope) if node[3] else node[2]
+        return obj, key
+
+    def eval_update(self, node, scope):
+        _, operator, prefix, target = node
+        delta = 1.0 if operator == "++" else -1.0
+        if target[0] == "ident":
+            old = to_number(self.lookup(scope, target[1]))
+            self.assign_name(scope, target[1], old + delta)
+        else:
+            obj, key = self.resolve_member(target, scope)
+            old = to_number(self.get_member(obj, key))
+            self.set_member(obj, key, old + delta)
+        return old + delta if prefix else old
+
+    def eval_binary(self, node, scope):
+        left = self.evaluate(node[2], scope)
+        right = self.evaluate(node[3], scope)
+        return BINARY_OPERATIONS[node[1]](left, right)
+
+    def eval_logical(self, node, scope):
+        operator = node[1]
+        left = self.evaluate(node[2], scope)
+        if operator == "&&":
+            return self.evaluate(node[3], scope) if to_boolean(left) else left
+        if operator == "||":
+            return left if to_boolean(left) else self.evaluate(node[3], scope)
+        return self.evaluate(node[3], scope) if left is None or left is UNDEFINED else left
+
+    def eval_conditional(self, node, scope):
+        if to_boolean(self.evaluate(node[1], scope)):
+            return self.evaluate(node[2], scope)
+        return self.evaluate(node[3], scope)
+
+    def eval_assign(self, node, scope):
+        _, operator, target, value_node = node
+        is_name = target[0] == "ident"
+        if not is_name:
+            obj, key = self.resolve_member(target, scope)
+        if operator == "=":
+            value = self.evaluate(value_node, scope)
+        else:
+            current = self.lookup(scope, target[1]) if is_name else self.get_member(obj, key)
+            if operator in ("&&=", "||=", "??="):
+                if operator == "&&=":
+                    keep = not to_boolean(current)
+                elif operator == "||=":
+                    keep = to_boolean(current)
+                else:
+                    keep = current is not None and current is not UNDEFINED
+                if keep:
+                    return current
+                value = self.evaluate(value_node, scope)
+            else:
+                value = BINARY_OPERATIONS[operator[:-1]](current, self.evaluate(value_node, scope))
+        if is_name:
+            return self.assign_name(scope, target[1], value)
+        return self.set_member(obj, key, value)
+
+    def eval_sequence(self, node, scope):
+        value = UNDEFINED
+        for expression in node[1]:
+            value = self.evaluate(expression, scope)
+        return value
+
+    def eval_member(self, node, scope):
+        obj = self.evaluate(node[1], scope)
+        if node[4] and (obj is None or obj is UNDEFINED):
+            return UNDEFINED
+        key = self.evaluate(node[2], scope) if node[3] else node[2]
+        return self.get_member(obj, key)
+
+    def eval_arguments(self, nodes, scope):
+        args = []
+        for node in nodes:
+            if node[0] == "spread":
+                args.extend(self.spread(self.evaluate(node[1], scope)))
+            else:
+                args.append(self.evaluate(node, scope))
+        return args
+
+    def eval_call(self, node, scope):
+        callee = node[1]
+        if callee[0] == "member":
+            this = self.evaluate(callee[1], scope)
+            if callee[4] and (this is None or this is UNDEFINED):
+                return UNDEFINED
+            key = self.evaluate(callee[2], scope) if callee[3] else callee[2]
+            function = self.get_member(this, key)
+        else:
+            this = UNDEFINED
+            function = self.evaluate(callee, scope)
+        if node[3] and (function is None or function is UNDEFINED):
+            return UNDEFINED
+        if not isinstance(function, (JSFunction, NativeFunction)):
+            self.throw("TypeError", f"{self.describe_callee(callee)} is not a function", True)
+        return self.call(function, this, self.eval_arguments(node[2], scope))
+
+    @staticmethod
+    def describe_callee(callee):
+        if callee[0] == "ident":
+            return callee[1]
+        if callee[0] == "member" and not callee[3]:
+            inner = Interpreter.describe_callee(callee[1])
+            return f"{inner}.{callee[2]}"
+        return "expression"
+
+    def eval_new(self, node, scope):
+        constructor = self.evaluate(node[1], scope)
+        if constructor is ARRAY_CONSTRUCTOR or constructor in ERROR_CONSTRUCTORS or constructor is OBJECT_CONSTRUCTOR:
+            return self.call(constructor, UNDEFINED, self.eval_arguments(node[2], scope))
+        raise UnsupportedSyntax("'new' is only supported for Array, Object and Error")
+
+    # -- entry point --------------------------------------------------------
+
+    def run(self, body, lexicals, functions, var_names):
+        """Executes a program body and returns its console output."""
+        scope = Scope()
+        for name in var_names:
+            scope.vars[name] = UNDEFINED
+        self.declare_block(scope, lexicals, functions)
+        try:
+            self.exec_statements(body, scope)
+        except JSThrow as error:
+            value = error.value
+            description = error_to_string(value) if isinstance(value, ErrorObject) else inspect(value)
+            raise UnsupportedSyntax(f"uncaught exception: {description}")
+        except RecursionError:
+            raise UnsupportedSyntax("recursion too deep")
+        return "\n".join(self.output)
+
+
+class Program:
+    """A parsed snippet that can be executed, optionally with different literals."""
+
+    def __init__(self, body, lexicals, functions, var_names, literals, name_sensitive=False):
+        self.body = body
+        self.lexicals = lexicals
+        self.functions = functions
+        self.var_names = var_names
+        self.literals = literals
+        # True when identifier names can show up in the output
+        self.name_sensitive = name_sensitive
+
+    def execute(self, literals=None, max_steps=MAX_STEPS):
+        """Runs the program and returns the Interpreter, for callers that need more than the output."""
+        interpreter = Interpreter(self.literals if literals is None else literals, max_steps)
+        interpreter.run(self.body, self.lexicals, self.functions, self.var_names)
+        return interpreter
+
+    def run(self, literals=None, max_steps=MAX_STEPS):
+        return "\n".join(self.execute(literals, max_steps).output)
+
+
+def compile_program(code):
+    """
+    Parses a JavaScript snippet into a Program.
+
+    Raises:
+        UnsupportedSyntax: if the snippet uses syntax outside the supported subset
+    """
+    return compile_tokens(*tokenize(code))
+
+
+def compile_tokens(tokens, literals):
+    """Parses an already tokenized snippet into a Program."""
+    parser = Parser(tokens)
+    try:
+        parsed = parser.parse_program()
+    except RecursionError:
+        raise UnsupportedSyntax("expression nested too deeply")
+    return Program(*parsed, literals, name_sensitive=parser.name_sensitive)
+
+
+def run(code):
+    """
+    Executes a JavaScript snippet and returns its console output.
+
+    Args:
+        code: The JavaScript source
+
+    Returns:
+        str: The console.log output, one line per call
+
+    Raises:
+        UnsupportedSyntax: if the snippet cannot be evaluated locally
+    """
+    output = compile_program(code).run()
+    if not output:
+        raise UnsupportedSyntax("the snippet produced no console output")
+    return output
@@ -5,10 +5,33 @@ from selenium.webdriver.chrome.service import Service #type: ignore
 from selenium.webdriver.chrome.options import Options #type: ignore
 from selenium.webdriver.support.ui import WebDriverWait #type: ignore
 from selenium.webdriver.support import expected_conditions as EC #type: ignore
+from selenium.common.exceptions import SessionNotCreatedException #type: ignore
+import concurrent.futures
+import json
+import os
 import time
 from webdriver_manager.chrome import ChromeDriverManager # type: ignore
 import google.generativeai as genai # type: ignore
-from bs4 import BeautifulSoup # type: ignore
+import js_interpreter
+from snippet_parser import parse_highlighted_html, rebuild_from_tokens
+import tracing
+from answer_cache import AnswerCache
+from answer_router import TIERS, AnswerRouter, routing_session
+from template_cache import TemplateCache
+from harvest import Harvest, prewarm
+from eval_service import EvaluationClient, EvaluationServer, EvaluationService, ServiceUnreachable
+from gemini_client import (AnswerStream, GeminiClient, GeminiError, answer_complete, answer_prompt, expected_answer_lines,
+                           strip_code_fence)
+from grading import GradeBook, GradingCapture, grade_from_payload, grade_from_text, read_feedback, watch_feedback
+from topics import TOPIC_POSITION_TO_VALUE, classify_topic
+from page_waits import question_fingerprint, wait_for_question_ready, wait_for_question_change, watch_question
+from pipeline import QuestionPipeline
+from rate_limiter import RateLimiter
+from direct_client import DirectClient, DirectModeError, RequestInterrupted, SessionExpired
+from network_capture import NetworkLog, PayloadCapture, enable_capture
+from resource_blocking import ResourceBlocker
+from round_state import RoundState, QUESTIONS_PER_ROUND
+from session_store import SessionStore, apply_session, finish_apply, clear_session, session_state
 import settings
 
 settings.initialize()
@@ -28,35 +51,217 @@ TOPIC_SELECTION = settings.topic_selection
 # "beginner" or "intermediate"
 DIFFICULTY = settings.difficulty
 
-# Map of topic positions (1-15) to their actual checkbox values in the HTML
-# This mapping is based on the provided HTML elements
-TOPIC_POSITION_TO_VALUE = {
-    1: "8",    
-    2: "9",    
-    3: "10",    
-    4: "11",
-    5: "5",
-    6: "6",
-    7: "12",
-    8: "13",
-    9: "0",
-    10: "1",
-    11: "14",
-    12: "2",
-    13: "4",
-    14: "7",
-    15: "3"
-}
+# Evaluate snippets with the built-in JavaScript interpreter before asking Gemini
+USE_LOCAL_EVALUATOR = settings.use_local_evaluator
+
+# Template cache: reuse compiled snippets for questions that only differ in literals/names
+USE_TEMPLATE_CACHE = settings.use_template_cache
+
+# Answer cache: answers are stored on disk and reused when a question repeats
+USE_ANSWER_CACHE = settings.use_answer_cache
+ANSWER_CACHE_PATH = settings.answer_cache_path
+ANSWER_CACHE_SIZE = settings.answer_cache_size
+
+# Answer routing: answer tiers are skipped for topics their graded answers show they get wrong
+ROUTING_MIN_ACCURACY = settings.routing_min_accuracy
+ROUTING_MIN_SAMPLES = settings.routing_min_samples
+ROUTING_SOLVER_SUMMARY = settings.routing_solver_summary
+
+# Upper bounds (in seconds) for the waits between page transitions
+PAGE_LOAD_TIMEOUT = settings.page_load_timeout
+QUESTION_LOAD_TIMEOUT = settings.question_load_timeout
+WAIT_POLL_INTERVAL = settings.wait_poll_interval
+
+# Optional pause (in seconds) between typing the answer and clicking Next
+ANSWER_SUBMIT_DELAY = settings.answer_submit_delay
+
+# Threads that evaluate snippets while the browser keeps working (0 for no overlap)
+EVALUATION_WORKERS = settings.evaluation_workers
+
+# Browser startup: pinned or cached ChromeDriver, headless mode and persistent Chrome profiles
+CHROMEDRIVER_PATH = settings.chromedriver_path
+CHROMEDRIVER_CACHE_PATH = settings.chromedriver_cache_path
+HEADLESS = settings.headless
+CHROME_USER_DATA_DIR = settings.chrome_user_data_dir
+PAGE_LOAD_STRATEGY = settings.page_load_strategy
+
+# Saved login sessions: runs and recoveries skip the login form while the session is valid
+USE_SAVED_SESSIONS = settings.use_saved_sessions
+session_store = SessionStore(settings.session_dir, settings.session_max_age) if USE_SAVED_SESSIONS else None
+
+# Recoveries allowed per session when the site bounces back to the dashboard or login page
+MAX_RECOVERIES = settings.max_recoveries
+
+# Direct mode: answer through the site's endpoints instead of the question pages
+USE_DIRECT_MODE = settings.use_direct_mode
+DIRECT_ENDPOINTS = settings.direct_endpoints
+DIRECT_POOL_SIZE = settings.direct_pool_size
+
+# Read question snippets from the page's network responses, scraping the page as fallback
+CAPTURE_NETWORK_PAYLOADS = settings.capture_network_payloads
+PAYLOAD_URL_PATTERN = settings.payload_url_pattern
+PAYLOAD_CODE_KEYS = tuple(settings.payload_code_keys)
+
+# Block images, fonts, media and analytics the bot does not need
+BLOCK_RESOURCES = settings.block_resources
+BLOCKED_RESOURCE_TYPES = settings.blocked_resource_types
+BLOCKED_URL_PATTERNS = settings.blocked_url_patterns
+RESOURCE_ALLOWLIST = settings.resource_allowlist
+
+# Site to play on (point this at a local stand-in site for testing)
+BASE_URL = settings.base_url.rstrip("/")
+
+# Accounts to play, each with its own topics and difficulty (main.py plays the first one)
+PROFILES = settings.profiles
+
+# "gemini" for the Gemini API, "stub" for the offline stand-in in stub_backend.py
+EVALUATION_BACKEND = settings.evaluation_backend
+STUB_LATENCY = settings.stub_latency
+STUB_ERROR_RATE = settings.stub_error_rate
+
+# Record every played question, and pre-warm the answer cache with the verified ones
+HARVEST_QUESTIONS = settings.harvest_questions
+HARVEST_PATH = settings.harvest_path
+PREWARM_FROM_HARVEST = settings.prewarm_from_harvest
+
+# Read the site's grading of every answer and feed it back into the caches
+READ_GRADING = settings.read_grading
+GRADING_URL_PATTERN = settings.grading_url_pattern
+GRADING_RESULT_KEYS = tuple(settings.grading_result_keys)
+GRADING_FEEDBACK_SELECTOR = settings.grading_feedback_selector
+
+# Gemini model, and the deadline, retries and hedging of every call
+GEMINI_MODEL = settings.gemini_model
+GEMINI_TIMEOUT = settings.gemini_timeout
+GEMINI_RETRIES = settings.gemini_retries
+GEMINI_RETRY_BACKOFF = settings.gemini_retry_backoff
+GEMINI_HEDGING = settings.gemini_hedging
+GEMINI_HEDGE_MIN_DELAY = settings.gemini_hedge_min_delay
+
+# Per-minute request and token budgets every Gemini request waits for (0 for no limit)
+GEMINI_REQUESTS_PER_MINUTE = settings.gemini_requests_per_minute
+GEMINI_TOKENS_PER_MINUTE = settings.gemini_tokens_per_minute
+
+# Read Gemini's answer while it is written, typing it and stopping once it is complete
+GEMINI_STREAMING = settings.gemini_streaming
+# Seconds between checks for new streamed text while typing the answer
+STREAM_POLL_INTERVAL = 0.02
 
-# Load environment variables from .env file
-print(f"Email: {EMAIL}")
-print(f"Password: {"*"*len(PASSWORD)}")
-print(f"Gemini API Key: {GEMINI_API_KEY[0:2]}{"*"*(len(GEMINI_API_KEY) - 2)}")
-print(f"Topic Selection: {TOPIC_SELECTION}")
-print(f"Difficulty Level: {DIFFICULTY}")
+# Share Gemini requests between sessions: "" for none, "local" for the sessions of this
+# process, "shared" for every process through the server on the port (runner.py starts it)
+EVALUATION_SERVICE = settings.evaluation_service
+EVALUATION_SERVICE_PORT = settings.evaluation_service_port
+EVALUATION_BATCH_SIZE = settings.evaluation_batch_size
+EVALUATION_MAX_REQUESTS = settings.evaluation_max_requests
+EVALUATION_BATCH_WINDOW = settings.evaluation_batch_window
+# Seconds the shared service may take beyond the Gemini deadline (batch window, rate limit
+# queue) before the session stops waiting and asks Gemini itself
+EVALUATION_SERVICE_TIMEOUT_MARGIN = 10
 
-# Configure the Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# Folder for the JSON lines traces of every run ("" for no tracing), and verbose output
+TRACE_DIR = settings.trace_dir
+VERBOSE = settings.verbose
+
+# Network payload capture, resource blocker and grading capture of every running session, by WebDriver session id
+payload_captures = {}
+resource_blockers = {}
+grading_captures = {}
+
+# Gemini answers being streamed, by snippet code, so they can be typed while they arrive
+answer_streams = {}
+
+# Evaluation backend, set up by init_evaluation() in every process that plays rounds
+stub_model = None
+gemini_client = None
+evaluation_service = None
+harvest = None
+grade_book = None
+answer_cache = None
+template_cache = None
+answer_router = None
+
+# Function to set up Gemini, the answer/template caches, the answer router and the run's trace
+def init_evaluation():
+    global answer_cache, template_cache, gemini_client, evaluation_service, harvest, grade_book, answer_router
+    
+    # Write the phases of this process' run as JSON lines
+    if TRACE_DIR:
+        tracing.start_run(TRACE_DIR)
+    
+    # Configure the Gemini API, or the offline stub that stands in for it
+    gemini_client = create_gemini_client()
+    if EVALUATION_SERVICE == "local":
+        evaluation_service = EvaluationService(gemini_client.generate, EVALUATION_BATCH_SIZE, EVALUATION_MAX_REQUESTS,
+                                               EVALUATION_BATCH_WINDOW)
+    elif EVALUATION_SERVICE == "shared":
+        evaluation_service = EvaluationClient(f"127.0.0.1:{EVALUATION_SERVICE_PORT}",
+                                              GEMINI_TIMEOUT + EVALUATION_SERVICE_TIMEOUT_MARGIN)
+    
+    # Open the answer cache (the SQLite file is shared by every process that uses it)
+    answer_cache = AnswerCache(ANSWER_CACHE_PATH, ANSWER_CACHE_SIZE) if USE_ANSWER_CACHE else None
+    if answer_cache is not None and PREWARM_FROM_HARVEST and os.path.exists(HARVEST_PATH):
+        added = prewarm(answer_cache, HARVEST_PATH)
+        if added:
+            print(f"Added {added} graded answers from {HARVEST_PATH} to the answer cache")
+    harvest = Harvest(HARVEST_PATH) if HARVEST_QUESTIONS else None
+    grade_book = GradeBook()
+    
+    # Set up the template cache, seeded with the shapes of previously answered questions
+    template_cache = TemplateCache() if USE_LOCAL_EVALUATOR and USE_TEMPLATE_CACHE else None
+    if template_cache is not None and answer_cache is not None:
+        template_cache.seed(answer_cache.snippets())
+    
+    # Route every snippet through the cheapest answer tier that is reliable for its topic,
+    # learning which ones are from the graded answers recorded so far
+    tiers = []
+    if answer_cache is not None:
+        tiers.append(("cache", answer_from_cache))
+    if template_cache is not None:
+        tiers.append(("template", answer_from_template))
+    if USE_LOCAL_EVALUATOR:
+        tiers.append(("local", answer_locally))
+    tiers.append(("gemini", answer_with_gemini))
+    answer_router = AnswerRouter(tiers, ROUTING_MIN_ACCURACY, ROUTING_MIN_SAMPLES)
+    learned = answer_router.learn_from_harvest(HARVEST_PATH) if os.path.exists(HARVEST_PATH) else 0
+    if ROUTING_SOLVER_SUMMARY:
+        with open(ROUTING_SOLVER_SUMMARY, encoding="utf-8") as summary_file:
+            learned += answer_router.learn_from_solver(json.load(summary_file))
+    if learned:
+        print(f"The answer router learned from {learned} graded answers")
+
+# Function to print the evaluation reports, close the answer cache and finish the trace
+def close_evaluation():
+    if evaluation_service is not None:
+        if isinstance(evaluation_service, EvaluationService):
+            evaluation_service.print_report()
+        evaluation_service.close()
+    if gemini_client is not None:
+        gemini_client.print_report()
+        gemini_client.close()
+    if grade_book is not None:
+        grade_book.print_report()
+    if answer_router is not None:
+        answer_router.print_report()
+    if template_cache is not None:
+        template_cache.print_report()
+    if answer_cache is not None:
+        answer_cache.print_stats()
+        answer_cache.close()
+    if harvest is not None:
+        print(f"Harvested {harvest.recorded} questions to {harvest.path}")
+    if tracing.tracer is not None:
+        print(f"Trace written to {tracing.tracer.path}")
+        tracing.stop_run()
+
+# Function to fill in the settings a profile does not override
+def complete_profile(profile, index=0):
+    profile = dict(profile)
+    profile.setdefault("name", f"profile{index + 1}")
+    profile.setdefault("email", EMAIL)
+    profile.setdefault("password", PASSWORD)
+    profile.setdefault("topic_selection", TOPIC_SELECTION)
+    profile.setdefault("difficulty", DIFFICULTY)
+    return profile
 
 # Function to extract JavaScript code from a webpage
 def extract_javascript(driver):
@@ -82,49 +287,62 @@ def extract_javascript(driver):
     return "\n\n".join(javascript_code)
 
 # Function to extract code from a code-snippet element
+@tracing.traced("extract code snippet")
 def extract_code_snippet(driver):
     try:
         # Find the code-snippet element
         code_element = driver.find_element(By.ID, "code-snippet")
         
-        # Extract the raw text content
-        raw_content = code_element.text
-        print("\n=== Raw Code Snippet Content ===")
-        print(raw_content)
-        print("=== End of Raw Content ===\n")
+        # Read the highlighted markup, the highlighter's line structure gives back the exact source
+        raw_content = code_element.get_attribute("innerHTML")
+        if VERBOSE:
+            print("\n=== Raw Code Snippet Content ===")
+            print(raw_content)
+            print("=== End of Raw Content ===\n")
         
-        # Process the text to extract only the JavaScript code
-        lines = raw_content.split('\n')
-        js_code_lines = []
+        processed_js_code = parse_highlighted_html(raw_content or "")
         
-        # Skip the question line and process the actual code
-        start_collecting = False
-        for line in lines:
-            # If we find a line with 'let', 'var', 'const', or 'function', start collecting code
-            if any(keyword in line for keyword in ['let ', 'var ', 'const ', 'function ']):
-                start_collecting = True
-            
-            if start_collecting:
-                # Remove line numbers if present
-                cleaned_line = line
-                
-                # Better line number removal - check if the line starts with a number followed by space
-                if line.strip() and line.strip()[0].isdigit():
-                    # Find where the actual code starts after the line number
-                    # This regex pattern matches any digits at the start of the line
-                    import re
-                    match = re.match(r'^\s*\d+\s+(.+)$', line)
-                    if match:
-                        cleaned_line = match.group(1)
-                    else:
-                        # Fallback to simpler method
-                        parts = line.split(None, 1)
-                        if len(parts) > 1 and parts[0].isdigit():
-                            cleaned_line = parts[1]
-                
-                js_code_lines.append(cleaned_line)
+        print("\n=== Processed JavaScript Code ===")
+        print(processed_js_code)
+        print("=== End of Processed Code ===\n")
+        
+        return processed_js_code
+    except Exception as e:
+        print(f"Error extracting code snippet: {e}")
+        return ""
+
+# Script that returns the highlighted code as [is_line_number, class, text] triples,
+# so the whole code element is read in a single WebDriver round-trip
+CODE_SNAPSHOT_SCRIPT = """
+const code = document.querySelector('code.language-javascript')
+    || document.querySelector('#code-snippet code')
+    || document.querySelector('code');
+if (!code) {
+    return null;
+}
+const tokens = [];
+const walker = document.createTreeWalker(code, NodeFilter.SHOW_TEXT);
+let node;
+while ((node = walker.nextNode())) {
+    const parent = node.parentElement;
+    const isLineNumber = !!(parent && parent.closest('.linenumber, .react-syntax-highlighter-line-number'));
+    tokens.push([isLineNumber, parent === code ? '' : parent.className, node.nodeValue]);
+}
+return tokens;
+"""
+
+# Function to extract code with a single execute_script call
+def extract_code_snapshot(driver):
+    try:
+        start_time = time.perf_counter()
+        tokens = driver.execute_script(CODE_SNAPSHOT_SCRIPT)
+        if not tokens:
+            print("No code element found in the page snapshot.")
+            return ""
         
-        processed_js_code = '\n'.join(js_code_lines)
+        processed_js_code = rebuild_from_tokens(tokens)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"Extracted {len(tokens)} tokens from the code snapshot in {elapsed_ms:.1f} ms")
         
         print("\n=== Processed JavaScript Code ===")
         print(processed_js_code)
@@ -132,10 +350,43 @@ def extract_code_snippet(driver):
         
         return processed_js_code
     except Exception as e:
-        print(f"Error extracting code snippet: {e}")
+        print(f"Error extracting code snapshot: {e}")
+        return ""
+
+# Function to take the question code from the page's network response
+@tracing.traced("extract payload")
+def extract_network_payload(driver):
+    capture = payload_captures.get(driver.session_id)
+    if capture is None:
         return ""
+    code_snippet = capture.take_snippet()
+    if code_snippet:
+        print("Read the code snippet from the question's network response")
+    return code_snippet
+
+# Function to extract the question code, trying each extraction method in turn
+def extract_question_code(driver):
+    # Use the snippet exactly as the site sent it, when it was captured
+    code_snippet = extract_network_payload(driver)
+    
+    # Read the whole code element in one round-trip
+    if not code_snippet:
+        code_snippet = extract_code_snapshot(driver)
+    
+    # Fall back to reading the code-snippet element text
+    if not code_snippet:
+        print("Code snapshot failed. Trying code-snippet element extraction...")
+        code_snippet = extract_code_snippet(driver)
+    
+    # If code-snippet element extraction failed, try the language-javascript extraction
+    if not code_snippet:
+        print("Code snippet element not found. Trying language-javascript extraction...")
+        code_snippet = extract_from_language_javascript(driver)
+    
+    return code_snippet
 
 # Function to extract code from language-javascript class element
+@tracing.traced("extract language-javascript")
 def extract_from_language_javascript(driver, max_attempts=3, delay=0.5):
     for attempt in range(max_attempts):
         try:
@@ -157,46 +408,17 @@ def extract_from_language_javascript(driver, max_attempts=3, delay=0.5):
             
             print(f"Found {len(js_elements)} code elements")
             
-            # Get the first element
-            code_element = js_elements[0]
-            
-            # Get all span elements within the code element
-            span_elements = code_element.find_elements(By.TAG_NAME, "span")
-            print(f"Found {len(span_elements)} span elements within the code element")
-            
-            # Extract and concatenate text from all span elements
-            combined_text = ""
-            for span in span_elements:
-                # Skip line number spans
-                if "linenumber" in span.get_attribute("class") or not span.text.strip():
-                    continue
-                span_text = span.text
-                if span_text:
-                    combined_text += span_text + " "
-            
-            # Clean up the combined text
-            raw_content = combined_text.strip()
-            print("\n=== Raw Content from Spans ===")
-            print(raw_content)
-            print("=== End of Raw Content ===\n")
+            # Read the markup of the first element in one call instead of one call per span
+            raw_content = js_elements[0].get_attribute("innerHTML")
+            if VERBOSE:
+                print("\n=== Raw Content of the Code Element ===")
+                print(raw_content)
+                print("=== End of Raw Content ===\n")
             
-            # Process the text to extract only the JavaScript code
-            # Check if the text starts with a question
-            if "What is the output" in raw_content or "What would be the output" in raw_content:
-                # Find where the actual code starts
-                code_start_indices = []
-                for keyword in ['let ', 'var ', 'const ', 'function ']:
-                    if keyword in raw_content:
-                        code_start_indices.append(raw_content.find(keyword))
-                
-                # Get the earliest starting point that's not -1
-                valid_indices = [idx for idx in code_start_indices if idx != -1]
-                if valid_indices:
-                    code_start = min(valid_indices)
-                    raw_content = raw_content[code_start:]
+            processed_js_code = parse_highlighted_html(raw_content or "")
+            if not processed_js_code:
+                raise Exception("The code element is empty")
             
-            # Clean up the code
-            processed_js_code = raw_content
             print("\n=== Processed JavaScript Code ===")
             print(processed_js_code)
             print("=== End of Processed Code ===\n")
@@ -210,61 +432,213 @@ def extract_from_language_javascript(driver, max_attempts=3, delay=0.5):
                 time.sleep(delay)
             else:
                 print("All attempts to extract code failed.")
-                
-                # Fallback: Try to get the innerHTML and parse it manually
-                try:
-                    print("Trying to extract using innerHTML...")
-                    js_elements = driver.find_elements(By.CSS_SELECTOR, "code")
-                    if js_elements:
-                        html_content = js_elements[0].get_attribute("innerHTML")
-                        print("HTML content of the code element:")
-                        print(html_content[:500] + "..." if len(html_content) > 500 else html_content)
-                        
-                        # Extract text from HTML, stripping tags
-                        soup = BeautifulSoup(html_content, 'html.parser')
-                        text_content = soup.get_text()
-                        print("Extracted text content:")
-                        print(text_content)
-                        return text_content
-                except Exception as inner_e:
-                    print(f"Fallback extraction also failed: {str(inner_e)}")
-                
                 return ""
 
-# Function to evaluate JavaScript code using Gemini API
-def evaluate_javascript_with_gemini(code):
+# Function to configure the Gemini API (or the offline stub) and create the client calling it
+def create_gemini_client():
+    global stub_model
+    if EVALUATION_BACKEND == "stub":
+        from stub_backend import StubModel
+        stub_model = StubModel(STUB_LATENCY, STUB_ERROR_RATE)
+    else:
+        genai.configure(api_key=GEMINI_API_KEY)
+    # The offline stub has no quota to stay within
+    limiter = None
+    if EVALUATION_BACKEND != "stub" and (GEMINI_REQUESTS_PER_MINUTE or GEMINI_TOKENS_PER_MINUTE):
+        limiter = RateLimiter(GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE)
+    return GeminiClient(create_gemini_model, GEMINI_TIMEOUT, GEMINI_RETRIES, GEMINI_RETRY_BACKOFF,
+                        GEMINI_HEDGING, GEMINI_HEDGE_MIN_DELAY, limiter=limiter)
+
+# Function to serve the evaluation of every process' sessions on the evaluation service port
+def start_evaluation_server(port=EVALUATION_SERVICE_PORT):
+    service = EvaluationService(create_gemini_client().generate, EVALUATION_BATCH_SIZE, EVALUATION_MAX_REQUESTS,
+                                EVALUATION_BATCH_WINDOW)
+    return EvaluationServer(service, port)
+
+# Function to create the model that answers snippets (the stub when running offline)
+def create_gemini_model():
+    if stub_model is not None:
+        return stub_model
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+# Function to read Gemini's answer while it is written, handing the text to the answer's stream
+def stream_gemini_answer(code, prompt):
+    stream = AnswerStream()
+    answer_streams[code] = stream
+    lines = expected_answer_lines(code)
+    is_complete = (lambda text: answer_complete(text, lines)) if lines else None
     try:
-        # Create a Gemini model instance
-        model = genai.GenerativeModel('gemini-1.5-flash')  # Changed from 'gemini-pro' to 'gemini-1.5-flash'
-        
-        # Prepare the prompt for Gemini
-        prompt = f"""
-        Execute this JavaScript code and respond with ONLY the exact console output value.
-        
-        No explanations, no code, no markdown formatting.
-        
-        ```javascript
-        {code}
-        ```
-        Return only the raw output value that would appear in the console. Nothing else.
-        """
-        
-        # Debug output to see what's being sent to Gemini
+        with tracing.span("gemini stream", expected_lines=lines) as span_attributes:
+            text, timings = gemini_client.stream(prompt, stream.append, is_complete)
+            first_token_ms = (timings["first_token"] or timings["answer"]) * 1000
+            span_attributes.update(first_token_ms=round(first_token_ms, 1),
+                                   answer_ms=round(timings["answer"] * 1000, 1), early_stop=timings["early_stop"])
+        print(f"Gemini streamed its first text after {first_token_ms:.0f} ms and the answer after "
+              f"{timings['answer'] * 1000:.0f} ms{' (stopped early)' if timings['early_stop'] else ''}")
+        # The stream may stop right after the answer's line break, and a fenced answer is
+        # only typed (and cached) without its fence
+        return strip_code_fence(text)
+    finally:
+        stream.finish()
+        if answer_streams.get(code) is stream:
+            del answer_streams[code]
+
+# Function to evaluate JavaScript code using Gemini API
+@tracing.traced("gemini")
+def evaluate_javascript_with_gemini(code, wrong_answers=()):
+    """
+    Raises:
+        GeminiError: if Gemini gave no answer within the timeout and retries
+    """
+    # Sessions asking for the same snippet at the same time share one request
+    if evaluation_service is not None:
+        try:
+            return strip_code_fence(evaluation_service.evaluate(code, wrong_answers))
+        except ServiceUnreachable as e:
+            print(f"{e}. Asking Gemini directly...")
+    
+    # Prepare the prompt for Gemini
+    prompt = answer_prompt(code, wrong_answers)
+    
+    # Debug output to see what's being sent to Gemini
+    if VERBOSE:
         print("\n=== DEBUG: PROMPT SENT TO GEMINI ===")
         print(prompt)
         print("=== END OF GEMINI PROMPT ===\n")
-        
-        # Generate a response
-        response = model.generate_content(prompt)
-        
-        return response.text
-    except Exception as e:
-        return f"Error using Gemini API: {str(e)}"
+    
+    # The shared client reuses the model and bounds the time the answer may take
+    if GEMINI_STREAMING:
+        return stream_gemini_answer(code, prompt)
+    return strip_code_fence(gemini_client.generate(prompt))
+
+# Function to get the answers the site graded wrong for a snippet, once per evaluation
+def graded_wrong(code, context):
+    if "wrong answers" not in context:
+        context["wrong answers"] = answer_cache.wrong_answers(code) if answer_cache is not None else set()
+    return context["wrong answers"]
+
+# Function to answer a snippet from the answer cache (the cache tier of the answer router)
+def answer_from_cache(code, context):
+    start_time = time.perf_counter()
+    cached = answer_cache.source(code)
+    if cached is None:
+        # Counts the miss
+        return answer_cache.get(code)
+    source, status = cached
+    if status == "verified":
+        context["confidence"] = 1.0
+    elif source in TIERS:
+        # An unverified answer is only as reliable as the tier that produced it
+        if not answer_router.allows(context["topic"], source):
+            print(f"The cached answer is from the {source} tier, which gets {context['topic']} wrong too often. "
+                  f"Evaluating again...")
+            return None
+        context["producer"] = source
+    cached_answer = answer_cache.get(code)
+    if cached_answer is not None:
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"Answer found in cache in {elapsed_ms:.2f} ms")
+    return cached_answer
+
+# Function to answer a snippet from the template of a known question shape (the template tier)
+def answer_from_template(code, context):
+    start_time = time.perf_counter()
+    try:
+        output, _ = template_cache.solve(code, compile_new=False)
+    except js_interpreter.UnsupportedSyntax:
+        return None
+    if output is None:
+        return None
+    if output.strip() in graded_wrong(code, context):
+        print("The template's answer was graded wrong before. Evaluating the snippet on its own...")
+        return None
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Evaluated code snippet from a known template in {elapsed_ms:.2f} ms")
+    return output
+
+# Function to evaluate a snippet with the built-in interpreter (the local tier)
+def answer_locally(code, context):
+    start_time = time.perf_counter()
+    try:
+        if template_cache is not None:
+            # Compiled into a template, so the snippet's later variants hit the template tier
+            output, _ = template_cache.solve(code, reuse=False)
+        else:
+            output = js_interpreter.run(code)
+    except js_interpreter.UnsupportedSyntax as e:
+        print(f"Local evaluation not possible ({e}). Falling back to Gemini API...")
+        return None
+    if output.strip() in graded_wrong(code, context):
+        # The site graded this answer wrong before, so the local result cannot be trusted
+        print("The local answer was graded wrong before. Falling back to Gemini API...")
+        return None
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Evaluated code snippet locally in {elapsed_ms:.2f} ms")
+    return output
 
+# Function to ask Gemini, the answer router's last resort
+def answer_with_gemini(code, context):
+    return evaluate_javascript_with_gemini(code, graded_wrong(code, context))
+
+# Function to evaluate JavaScript code with the cheapest answer tier that is reliable for its topic
+def evaluate_javascript(code):
+    # Errors of Gemini are raised, so they are never cached or typed into the page
+    output, route = answer_router.route(code)
+    print(f"Answered by the {route['tier']} tier, {route['confidence']:.0%} confident for {route['topic']}")
+    if route["tier"] != "cache" and answer_cache is not None:
+        answer_cache.put(code, output, route["tier"])
+    return output
+
+# Function to type an answer into the input field, starting while Gemini is still writing it
+def type_streamed_answer(input_field, code, evaluation, pipeline):
+    """
+    Types the first line of a streamed answer as it arrives, then the rest of the final
+    answer once the evaluation is done. Answers from the caches or the local evaluator
+    are typed at once.
+    
+    Returns:
+        str: The answer of the evaluation
+    """
+    typed = ""
+    seen = 0
+    stream = None
+    with pipeline.stage("stream answer"):
+        while not evaluation.done():
+            stream = stream or answer_streams.get(code)
+            if stream is None:
+                concurrent.futures.wait([evaluation], timeout=STREAM_POLL_INTERVAL)
+                continue
+            text, finished = stream.wait(seen, STREAM_POLL_INTERVAL)
+            seen = len(text)
+            text = text.lstrip()
+            # A fenced reply is typed once the final answer is known without its fence
+            if not text.startswith("`"):
+                ready = text.partition("\n")[0].rstrip()
+                if len(ready) > len(typed) and ready.startswith(typed):
+                    input_field.send_keys(ready[len(typed):])
+                    typed = ready
+            if finished:
+                break
+    answer = pipeline.result(evaluation)
+    with pipeline.stage("type answer"):
+        if answer.startswith(typed):
+            if len(answer) > len(typed):
+                input_field.send_keys(answer[len(typed):])
+        else:
+            # The final answer differs from what was typed, e.g. a retried or cleaned up answer
+            input_field.clear()
+            input_field.send_keys(answer)
+    if typed:
+        print(f"Typed {len(typed)} characters of the answer while Gemini was still writing it")
+    return answer
+
+@tracing.traced("select topics")
 def select_topics(driver, topic_selection):
     # Wait for the topic selection page to load
     print("Waiting for topic selection page to load...")
-    time.sleep(1)  # Increased wait time for page to fully load
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT, poll_frequency=WAIT_POLL_INTERVAL).until(
+        EC.presence_of_element_located((By.XPATH, "//input[@type='checkbox'] | //button[contains(text(), 'Select All Topics')]"))
+    )
     
     if topic_selection == 0:
         # Use the 'Select All Topics' button
@@ -304,7 +678,6 @@ def select_topics(driver, topic_selection):
                         print(f"Found checkbox wrapper for position {topic_position}. Clicking...")
                         checkbox_wrapper.click()
                         print(f"Clicked on wrapper for checkbox at position {topic_position}")
-                        time.sleep(0.1)  # Increased delay between clicks
                         continue  # Go to next checkbox if successful
                     except Exception as e1:
                         print(f"Couldn't click checkbox wrapper: {e1}")
@@ -319,7 +692,6 @@ def select_topics(driver, topic_selection):
                         print(f"Found checkbox label for position {topic_position}. Clicking...")
                         checkbox_label.click()
                         print(f"Clicked on label for checkbox at position {topic_position}")
-                        time.sleep(0.1)  # Increased delay between clicks
                         continue  # Go to next checkbox if successful
                     except Exception as e2:
                         print(f"Couldn't click checkbox label: {e2}")
@@ -333,7 +705,6 @@ def select_topics(driver, topic_selection):
                         print(f"Using JavaScript to click checkbox at position {topic_position}")
                         driver.execute_script("arguments[0].click();", checkbox)
                         print(f"JavaScript clicked checkbox at position {topic_position}")
-                        time.sleep(0.1)  # Increased delay between clicks
                     except Exception as e3:
                         print(f"JavaScript click failed: {e3}")
                         
@@ -347,7 +718,6 @@ def select_topics(driver, topic_selection):
                             print(f"Found outer container for position {topic_position}. Clicking...")
                             outer_container.click()
                             print(f"Clicked on container for checkbox at position {topic_position}")
-                            time.sleep(0.1)  # Increased delay between clicks
                         except Exception as e4:
                             print(f"All strategies failed for checkbox at position {topic_position}")
                             raise Exception(f"Could not click checkbox at position {topic_position}")
@@ -355,10 +725,8 @@ def select_topics(driver, topic_selection):
                     print(f"Warning: Topic position {topic_position} is not valid. Valid positions are 1-15.")
             except Exception as e:
                 print(f"Error selecting topic at position {topic_position}: {e}")
-    
-    # Wait for the selection to register
-    time.sleep(0.5)  # Increased wait time after selection
 
+@tracing.traced("select difficulty")
 def select_difficulty(driver, difficulty):
     """
     Selects the difficulty level based on user configuration.
@@ -374,9 +742,6 @@ def select_difficulty(driver, difficulty):
         print(f"Warning: Invalid difficulty '{difficulty}'. Using 'beginner' as default.")
         difficulty = "beginner"
     
-    # Wait for difficulty selection radio buttons to be present
-    time.sleep(0.5)
-    
     try:
         # Try multiple strategies to click the radio button
         
@@ -435,284 +800,432 @@ def select_difficulty(driver, difficulty):
     
     except Exception as e:
         print(f"Error selecting difficulty {difficulty}: {e}")
-    
-    # Wait for the selection to register
-    time.sleep(0.5)
 
 # Function to check if we are still on the question page and recover if needed
-def check_and_recover_page(driver, question_number):
+@tracing.traced("check and recover page")
+def check_and_recover_page(driver, state, profile):
     """
     Checks if we're still on the question page and attempts to recover if we've been
-    redirected back to the dashboard unexpectedly.
+    redirected back to the dashboard or the login page unexpectedly.
+    
+    The interrupted round cannot be continued, so a recovery starts a new round and the
+    state moves to its first question instead of clicking Next up to the old position.
     
     Returns:
-        bool: True if we're on the correct page or recovery was successful, False otherwise
+        bool: True if we're on a question page (possibly of a new round), False otherwise
     """
     current_url = driver.current_url
     print(f"Current URL: {current_url}")
     
-    # Check if we're on the dashboard page instead of a question page
     if "dashboard" in current_url:
-        print(f"WARNING: Detected unexpected return to dashboard during question {question_number}")
-        try:
-            print("Attempting to recover...")
-            
-            # 1. Click on "Single Player" button again
-            print("Looking for Single Player button...")
-            single_player_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'MuiListItemButton-root')]//span[text()='Single Player']//ancestor::div[contains(@class, 'MuiButtonBase-root')]"))
-            )
-            print("Clicking on Single Player button...")
-            single_player_button.click()
-            time.sleep(0.5)
-            
-            # 2. Select topics again
-            select_topics(driver, TOPIC_SELECTION)
-            
-            # 3. Select difficulty again
-            select_difficulty(driver, DIFFICULTY)
-            
-            # 4. Click "Start" again
-            print("Looking for Start button...")
-            start_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'MuiButton-containedPrimary') and contains(text(), 'Start')]"))
-            )
-            print("Clicking on Start button...")
-            start_button.click()
-            
-            print("Recovery attempt completed. Now we need to skip to the appropriate question...")
-            
-            # We need to skip to the current question
-            # Wait a moment for the first question to load
-            time.sleep(2)
-            
-            # Skip to the current question by clicking "Next" for (question_number-1) times
-            # But only if we're not already on question 1
-            if question_number > 1:
-                print(f"Skipping ahead to question {question_number}...")
-                for i in range(1, question_number):
-                    try:
-                        # Find and click any Next button to continue
-                        skip_button = WebDriverWait(driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Next')]"))
-                        )
-                        skip_button.click()
-                        print(f"Skipped question {i}")
-                        time.sleep(1.5)  # Wait for next question to load
-                    except Exception as e:
-                        print(f"Error while skipping to question {i+1}: {e}")
-                        return False
-            
-            print(f"Recovery successful! Now processing question {question_number}")
-            return True
-            
-        except Exception as e:
-            print(f"Recovery attempt failed: {e}")
-            return False
-    
-    # Check if we're on the authentication page
+        kind = "dashboard"
+        print(f"WARNING: Detected unexpected return to dashboard during question {state.index}")
     elif "authenticate" in current_url:
-        print(f"WARNING: Session expired, returned to login page during question {question_number}")
-        try:
+        kind = "login"
+        print(f"WARNING: Session expired, returned to login page during question {state.index}")
+    else:
+        # We're on the expected page
+        return True
+    
+    if not state.can_recover():
+        print(f"Already recovered {state.max_recoveries} times in this session. Giving up.")
+        return False
+    
+    start_time = time.perf_counter()
+    try:
+        if kind == "login":
             print("Attempting to log back in...")
-            
-            # Find and fill the login fields
-            email_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "«r1»"))
-            )
-            password_field = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.ID, "«r2»"))
-            )
-            login_button = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button.MuiButtonBase-root.MuiButton-containedPrimary[type='submit']"))
-            )
-            
-            email_field.send_keys(EMAIL)
-            password_field.send_keys(PASSWORD)
-            login_button.click()
-            
-            # Wait for successful login and redirect to dashboard
-            WebDriverWait(driver, 10).until(
-                EC.url_contains("dashboard")
-            )
-            
-            # Now follow the same recovery steps as above
-            # 1. Click on "Single Player" button again
-            single_player_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'MuiListItemButton-root')]//span[text()='Single Player']//ancestor::div[contains(@class, 'MuiButtonBase-root')]"))
-            )
-            single_player_button.click()
-            time.sleep(0.5)
-            
-            # 2. Select topics again
-            select_topics(driver, TOPIC_SELECTION)
-            
-            # 3. Select difficulty again
-            select_difficulty(driver, DIFFICULTY)
-            
-            # 4. Click "Start" again
-            start_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'MuiButton-containedPrimary') and contains(text(), 'Start')]"))
-            )
-            start_button.click()
-            
-            # Skip to the current question as above
-            time.sleep(2)
-            if question_number > 1:
-                print(f"Skipping ahead to question {question_number}...")
-                for i in range(1, question_number):
-                    try:
-                        skip_button = WebDriverWait(driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Next')]"))
-                        )
-                        skip_button.click()
-                        print(f"Skipped question {i}")
-                        time.sleep(1.5)
-                    except Exception as e:
-                        print(f"Error while skipping to question {i+1}: {e}")
-                        return False
-            
-            print(f"Login recovery successful! Now processing question {question_number}")
-            return True
-            
-        except Exception as e:
-            print(f"Login recovery attempt failed: {e}")
-            return False
+            # Log in again, with the saved session if it is still valid
+            if not restore_saved_session(driver, profile):
+                form_login(driver, profile)
+        else:
+            print("Attempting to recover...")
+        
+        # Open single player mode with the same topics and difficulty and press Start
+        start_round(driver, profile["topic_selection"], profile["difficulty"])
+        if not wait_for_question_ready(driver, QUESTION_LOAD_TIMEOUT, WAIT_POLL_INTERVAL):
+            raise TimeoutError("no question appeared after starting a new round")
+        success = True
+    except Exception as e:
+        print(f"Recovery attempt failed: {e}")
+        success = False
     
-    # We're on the expected page
-    return True
+    elapsed = time.perf_counter() - start_time
+    state.record_recovery(kind, elapsed, success)
+    if success:
+        print(f"Recovery successful in {elapsed:.2f} s! Continuing with question 1 of round {state.round_id}")
+    return success
 
-# Set up Chrome options
-chrome_options = Options()
-chrome_options.add_argument("--start-maximized")
+# Function to find the ChromeDriver binary, without a network check when one is known
+def resolve_chromedriver():
+    """
+    Returns the ChromeDriver path to use, or None to let Selenium find a driver itself.
+    
+    A pinned chromedriver_path is used as is. Otherwise the path webdriver_manager resolved
+    on a previous run is read from the cache file, so the online version check only runs
+    the first time (or after the cached driver stopped matching Chrome).
+    """
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    
+    if CHROMEDRIVER_CACHE_PATH and os.path.exists(CHROMEDRIVER_CACHE_PATH):
+        with open(CHROMEDRIVER_CACHE_PATH) as cache_file:
+            cached_path = cache_file.read().strip()
+        if cached_path and os.path.exists(cached_path):
+            return cached_path
+    
+    try:
+        driver_path = ChromeDriverManager().install()
+    except Exception as e:
+        print(f"Could not resolve ChromeDriver online ({e}). Letting Selenium find a driver...")
+        return None
+    
+    if CHROMEDRIVER_CACHE_PATH:
+        with open(CHROMEDRIVER_CACHE_PATH, "w") as cache_file:
+            cache_file.write(driver_path)
+    return driver_path
 
-# Initialize the WebDriver with the correct ChromeDriver version
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
+# Function to create a Chrome session
+def create_driver(profile_name="main", startup_timings=None, network_events=True):
+    """
+    Starts Chrome, recording the driver resolve and browser launch times in startup_timings.
+    
+    Args:
+        profile_name: Name of the persistent Chrome profile folder (with chrome_user_data_dir)
+        startup_timings: Optional dict that receives the timings in seconds
+        network_events: False to leave the performance log off even when a setting uses it,
+            for drivers whose log would not be read (see start_network_monitoring)
+    """
+    if startup_timings is None:
+        startup_timings = {}
+    
+    start_time = time.perf_counter()
+    driver_path = resolve_chromedriver()
+    startup_timings["driver resolve"] = time.perf_counter() - start_time
+    
+    # Set up Chrome options
+    chrome_options = Options()
+    if HEADLESS:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1920,1080")
+    else:
+        chrome_options.add_argument("--start-maximized")
+    
+    # Skip the first-run screens of a fresh Chrome profile
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--no-default-browser-check")
+    
+    # Keep cookies and cache between runs, every profile in its own folder because two
+    # running Chromes cannot share one
+    if CHROME_USER_DATA_DIR:
+        user_data_dir = os.path.abspath(os.path.join(CHROME_USER_DATA_DIR, profile_name))
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    
+    # "eager" returns from page loads once the DOM is ready, the waits find the elements
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+    
+    # Record the page's network events so question payloads, blocked resources and grading can be seen
+    if network_events and (CAPTURE_NETWORK_PAYLOADS or BLOCK_RESOURCES or READ_GRADING):
+        enable_capture(chrome_options)
+    
+    start_time = time.perf_counter()
+    try:
+        service = Service(driver_path) if driver_path else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    except SessionNotCreatedException:
+        # Chrome updated since the driver was cached, resolve a matching one once
+        if not driver_path or CHROMEDRIVER_PATH or not CHROMEDRIVER_CACHE_PATH:
+            raise
+        print("Cached ChromeDriver does not match this Chrome. Resolving it again...")
+        os.remove(CHROMEDRIVER_CACHE_PATH)
+        driver_path = resolve_chromedriver()
+        service = Service(driver_path) if driver_path else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    startup_timings["browser launch"] = time.perf_counter() - start_time
+    
+    return driver
 
-try:
-    # Navigate to the login page (changing to the login page instead of dashboard)
-    driver.get("https://practiceme.vercel.app/authenticate")
+# Function to print where the time before the first question went
+def print_startup_timings(startup_timings):
+    breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in startup_timings.items())
+    print(f"Startup: {breakdown} (total {sum(startup_timings.values()):.2f} s)")
+
+# Function to fill in and submit the login form, waiting for the dashboard
+def fill_login_form(driver, email, password):
+    # Find the email input field using the ID from the HTML
+    email_field = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "«r1»"))
+    )
+    
+    # Find the password field using the ID from the HTML
+    password_field = WebDriverWait(driver, 5).until(
+        EC.presence_of_element_located((By.ID, "«r2»"))
+    )
+    
+    # Find the login button using the CSS class from the HTML
+    login_button = WebDriverWait(driver, 5).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "button.MuiButtonBase-root.MuiButton-containedPrimary[type='submit']"))
+    )
+    
+    # Fill in the form using the profile's credentials
+    email_field.send_keys(email)
+    password_field.send_keys(password)
+    
+    print("About to click login button...")
+    
+    # Click the login button
+    login_button.click()
+    
+    # Wait for successful login and redirect to dashboard
+    print("Waiting for dashboard to load...")
+    WebDriverWait(driver, 10).until(
+        EC.url_contains("dashboard")
+    )
+
+# Function to log in with the profile's saved session instead of the login form
+def restore_saved_session(driver, profile):
+    """
+    Restores the saved cookies/localStorage of a profile and checks that the dashboard loads.
+    
+    Returns:
+        bool: True if the saved session was still valid and the dashboard is shown
+    """
+    if session_store is None:
+        return False
+    saved = session_store.load(profile["name"])
+    if saved is None:
+        return False
+    
+    start_time = time.perf_counter()
+    try:
+        script_id = apply_session(driver, saved, f"{BASE_URL}/dashboard")
+        try:
+            state = WebDriverWait(driver, PAGE_LOAD_TIMEOUT, poll_frequency=WAIT_POLL_INTERVAL).until(session_state)
+        finally:
+            finish_apply(driver, script_id)
+    except Exception as e:
+        print(f"Could not restore the saved session: {e}")
+        state = "stale"
+    
+    if state == "valid":
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"Logged in with the saved session in {elapsed_ms:.0f} ms")
+        return True
     
-    # Wait for the page to load
-    time.sleep(2)
+    print("Saved session is no longer valid. Using the login form...")
+    session_store.discard(profile["name"])
+    clear_session(driver)
+    return False
+
+# Function to log in with the login form and save the new session
+def form_login(driver, profile):
+    if "authenticate" not in driver.current_url:
+        driver.get(f"{BASE_URL}/authenticate")
+    fill_login_form(driver, profile["email"], profile["password"])
+    print("Successfully logged in!")
+    
+    if session_store is not None:
+        try:
+            session_store.save(driver, profile["name"])
+        except Exception as e:
+            print(f"Could not save the session: {e}")
+
+# Function to log in, with the saved session when possible
+@tracing.traced("login")
+def login(driver, profile, startup_timings=None):
+    start_time = time.perf_counter()
+    if restore_saved_session(driver, profile):
+        if startup_timings is not None:
+            startup_timings["session restore"] = time.perf_counter() - start_time
+        return
+    
+    # Navigate to the login page (changing to the login page instead of dashboard)
+    start_time = time.perf_counter()
+    driver.get(f"{BASE_URL}/authenticate")
+    if startup_timings is not None:
+        startup_timings["first page load"] = time.perf_counter() - start_time
     
     # Print page title for debugging
     print(f"Page title: {driver.title}")
     
-    # Try to find elements using the IDs from the HTML
-    try:
-        # Find the email input field using the ID from the HTML
-        email_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "«r1»"))
-        )
-        
-        # Find the password field using the ID from the HTML
-        password_field = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "«r2»"))
-        )
-        
-        # Find the login button using the CSS class from the HTML
-        login_button = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.MuiButtonBase-root.MuiButton-containedPrimary[type='submit']"))
-        )
-        
-        # Fill in the form using credentials from .env
-        email_field.send_keys(EMAIL)
-        password_field.send_keys(PASSWORD)
-        
-        # Optional: Add a pause before clicking login
-        print("About to click login button...")
-        time.sleep(0.5)
-        
-        # Click the login button
-        login_button.click()
-        
-        # Wait for successful login and redirect to dashboard
-        print("Waiting for dashboard to load...")
-        WebDriverWait(driver, 10).until(
-            EC.url_contains("dashboard")
-        )
-        
-        print("Successfully logged in!")
-        
-        # Now perform the requested clicks
-        
-        # 1. Click on "Single Player" button
-        print("Looking for Single Player button...")
-        single_player_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'MuiListItemButton-root')]//span[text()='Single Player']//ancestor::div[contains(@class, 'MuiButtonBase-root')]"))
-        )
-        print("Clicking on Single Player button...")
-        single_player_button.click()
-        time.sleep(1)
-        
-        # 2. Select topics based on user configuration
-        select_topics(driver, TOPIC_SELECTION)
-        
-        # 3. Select difficulty based on user configuration
-        select_difficulty(driver, DIFFICULTY)
+    # A persistent Chrome profile may still be logged in, then the site goes to the dashboard
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT, poll_frequency=WAIT_POLL_INTERVAL).until(
+        lambda d: "dashboard" in d.current_url or d.find_elements(By.ID, "«r1»")
+    )
+    if "dashboard" in driver.current_url:
+        print("Already logged in from a previous run")
+        return
+    
+    form_login(driver, profile)
+
+# Function to open single player mode, choose topics and difficulty and press Start
+def start_round(driver, topic_selection, difficulty):
+    # 1. Click on "Single Player" button
+    print("Looking for Single Player button...")
+    single_player_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'MuiListItemButton-root')]//span[text()='Single Player']//ancestor::div[contains(@class, 'MuiButtonBase-root')]"))
+    )
+    print("Clicking on Single Player button...")
+    single_player_button.click()
+    
+    # 2. Select topics based on user configuration
+    select_topics(driver, topic_selection)
+    
+    # 3. Select difficulty based on user configuration
+    select_difficulty(driver, difficulty)
+    
+    # 4. Click on "Start" button
+    print("Looking for Start button...")
+    start_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'MuiButton-containedPrimary') and contains(text(), 'Start')]"))
+    )
+    print("Clicking on Start button...")
+    start_button.click()
+
+# Function to get ready to read the grading of the answer about to be submitted
+def prepare_grading(driver):
+    """
+    Drops network grades of earlier requests and starts watching the feedback element, so
+    read_grading only takes the grading of the next answer.
+    """
+    if not READ_GRADING:
+        return
+    capture = grading_captures.get(driver.session_id)
+    if capture is not None:
+        capture.forget()
+    watch_feedback(driver, GRADING_FEEDBACK_SELECTOR)
+
+# Function to read the site's grading of the answer just submitted
+@tracing.traced("read grading")
+def read_grading(driver):
+    """
+    Returns:
+        bool: True or False as graded by the site, None if the grading could not be read
+    """
+    if not READ_GRADING:
+        return None
+    capture = grading_captures.get(driver.session_id)
+    if capture is not None:
+        correct = capture.take_grade()
+        if correct is not None:
+            return correct
+    # The feedback element only counts once the site updated it, it may still show the last question
+    return grade_from_text(read_feedback(driver, GRADING_FEEDBACK_SELECTOR))
+
+# Function to feed the site's grading of an answer back into the caches and the harvest
+def record_grading(code, answer, correct, difficulty, seconds):
+    # The grading is an attribute of this question's span only, the next question's spans stay untagged
+    with tracing.span("grading", correct=correct) as span_attributes:
+        # The tier that produced the answer learns whether it gets the snippet's topic right
+        tier = answer_router.record_grading(code, answer, correct) if answer_router is not None else None
+        span_attributes.update(tier=tier)
+        if correct is False:
+            print("The site graded the answer wrong. The snippet will be evaluated again when it comes back.")
+            # Neither the cached answer nor the template that produced it can be trusted
+            if template_cache is not None:
+                template_cache.forget(code)
+        elif correct:
+            print("The site graded the answer correct")
+        if correct is not None and answer_cache is not None:
+            answer_cache.record_grading(code, answer, correct)
+        if harvest is not None:
+            harvest.record(code, answer, difficulty, correct, tier)
+        if grade_book is not None:
+            grade_book.record(classify_topic(code), correct, seconds)
+
+# Function to answer the 10 questions of a round
+def run_round(driver, profile, pipeline, state):
+    """
+    Answers the questions of a started round, evaluating snippets through the pipeline.
+    The state says which question is on screen, a recovery moves it to a new round.
+    
+    Returns:
+        int: Number of questions answered
+    """
+    while not state.finished:
+        question_start = time.perf_counter()
+        question_number = state.index
+        round_id = state.round_id
+        tracing.annotate(profile=profile["name"], round=round_id, question=question_number)
+        # The answer router credits this session's gradings to this session's answers
+        routing_session.set(driver.session_id)
+        print(f"\n=== Processing Question {question_number}/{QUESTIONS_PER_ROUND} (round {round_id}) ===\n")
         
-        # 4. Click on "Start" button
-        print("Looking for Start button...")
-        start_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'MuiButton-containedPrimary') and contains(text(), 'Start')]"))
-        )
-        print("Clicking on Start button...")
-        start_button.click()
+        # Wait for the page to load the question
+        with pipeline.stage("question load"):
+            wait_for_question_ready(driver, QUESTION_LOAD_TIMEOUT, WAIT_POLL_INTERVAL)
+        update_resource_blocking(driver)
         
-        print("All buttons clicked successfully!")
-        time.sleep(3)  # Wait to see the results
+        with pipeline.stage("extract"):
+            code_snippet = extract_question_code(driver)
         
-        # Set up a loop to handle 10 questions
-        for question_number in range(1, 11):
-            print(f"\n=== Processing Question {question_number}/10 ===\n")
+        if code_snippet:
+            print("\n=== Code Snippet Found ===")
+            print(code_snippet)
+            print("=== End of Code Snippet ===\n")
             
-            # Wait for the page to load the question
-            time.sleep(1.5)
+            # Start evaluating right away, the browser work below runs meanwhile
+            print("Evaluating code snippet in the background...")
+            evaluation = pipeline.submit(code_snippet)
             
             # Check if we are still on the question page and recover if needed
-            if not check_and_recover_page(driver, question_number):
-                print(f"Failed to recover page for question {question_number}. Exiting loop.")
-                break
-            
-            # Try to find and extract code from code-snippet element
-            code_snippet = extract_code_snippet(driver)
-            
-            # If code-snippet element extraction failed, try the language-javascript extraction
-            if not code_snippet:
-                print("Code snippet element not found. Trying language-javascript extraction...")
-                code_snippet = extract_from_language_javascript(driver)
-            
-            if code_snippet:
-                print("\n=== Code Snippet Found ===")
-                print(code_snippet)
-                print("=== End of Code Snippet ===\n")
-                
-                # Evaluate the code snippet with Gemini
-                print("Evaluating code snippet with Gemini API...")
-                snippet_evaluation = evaluate_javascript_with_gemini(code_snippet)
-                print("\n=== Gemini Evaluation of Code Snippet ===")
-                print(snippet_evaluation)
-                print("=== End of Evaluation ===\n")
+            with pipeline.stage("page check"):
+                extracted_fingerprint = question_fingerprint(driver)
+                if not check_and_recover_page(driver, state, profile):
+                    print(f"Failed to recover page for question {question_number}. Exiting loop.")
+                    evaluation.cancel()
+                    break
                 
-                # Input the answer from Gemini into the text field
-                try:
-                    print("Entering the answer in the input field...")
+                # A recovery starts a new round, so the question on screen is another one
+                if state.round_id != round_id or question_fingerprint(driver) != extracted_fingerprint:
+                    print("Question changed during recovery. Extracting it again...")
+                    evaluation.cancel()
+                    question_number = state.index
+                    code_snippet = extract_question_code(driver)
+                    if not code_snippet:
+                        print("Could not extract the question after recovery. Exiting loop.")
+                        break
+                    evaluation = pipeline.submit(code_snippet)
+            
+            # Input the answer into the text field
+            try:
+                print("Looking for the input field...")
+                with pipeline.stage("input lookup"):
                     input_field = WebDriverWait(driver, 10).until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, "input.MuiInputBase-input.MuiOutlinedInput-input"))
                     )
-                    
-                    # Clear any existing text and enter the evaluation result
                     input_field.clear()
-                    input_field.send_keys(snippet_evaluation)
-                    print(f"Entered answer: {snippet_evaluation}")
-                    
-                    # Add a 1-second delay before clicking the Next button
-                    print("Waiting 1 second before clicking Next button...")
-                    time.sleep(1)
+                
+                if GEMINI_STREAMING:
+                    # Type the answer while it arrives
+                    print("Entering the answer in the input field as it arrives...")
+                    snippet_evaluation = type_streamed_answer(input_field, code_snippet, evaluation, pipeline)
+                    print("\n=== Evaluation of Code Snippet ===")
+                    print(snippet_evaluation)
+                    print("=== End of Evaluation ===\n")
+                else:
+                    snippet_evaluation = pipeline.result(evaluation)
+                    print("\n=== Evaluation of Code Snippet ===")
+                    print(snippet_evaluation)
+                    print("=== End of Evaluation ===\n")
                     
-                    # Click the "Next" button using the exact class structure you provided
+                    # Enter the evaluation result
+                    print("Entering the answer in the input field...")
+                    with pipeline.stage("type answer"):
+                        input_field.send_keys(snippet_evaluation)
+                print(f"Entered answer: {snippet_evaluation}")
+                
+                # Optional delay before clicking the Next button
+                if ANSWER_SUBMIT_DELAY:
+                    print(f"Waiting {ANSWER_SUBMIT_DELAY} seconds before clicking Next button...")
+                    time.sleep(ANSWER_SUBMIT_DELAY)
+                
+                # Watch the feedback on screen, so the grading of this answer can be told apart
+                with pipeline.stage("grading"):
+                    prepare_grading(driver)
+                
+                # Click the "Next" button using the exact class structure you provided
+                with pipeline.stage("next click"):
                     print("Looking for Next button...")
                     next_button_xpath = "//button[contains(@class, 'MuiButton-containedPrimary') and contains(@class, 'MuiButton-colorPrimary') and contains(text(), 'Next')]"
                     next_button_css = "button.MuiButtonBase-root.MuiButton-contained.MuiButton-containedPrimary.MuiButton-colorPrimary[type='submit']"
@@ -731,103 +1244,324 @@ try:
                         print("Found Next button using CSS selector")
                     
                     print("Clicking Next button...")
+                    watch_question(driver)
                     next_button.click()
-                    print(f"Completed question {question_number}/10")
-                    
-                    # Wait a moment and check if we're still on the right page
-                    time.sleep(1)
-                    if not check_and_recover_page(driver, question_number + 1):
-                        print(f"Failed to stay on question page after submitting answer for question {question_number}.")
-                        # If recovery failed, try once more before giving up
-                        time.sleep(1)
-                        if not check_and_recover_page(driver, question_number + 1):
-                            print("Second recovery attempt failed. Exiting loop.")
-                            break
-                    
-                    # Additional wait for next question to load
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"Error entering answer or clicking Next: {e}")
-                    
-                    # Check if we're on the right page before continuing
-                    if not check_and_recover_page(driver, question_number):
-                        print("Could not recover after error. Exiting loop.")
-                        break
-                    
-                    # Try to continue with the next question if possible
-                    try:
-                        # Find and click the Next button using a more generic selector
-                        fallback_next = driver.find_element(By.XPATH, "//button[contains(text(), 'Next')]")
-                        fallback_next.click()
-                        print("Used fallback method to proceed to next question")
-                        time.sleep(1)
-                        
-                        # Check again if we're on the right page
-                        if not check_and_recover_page(driver, question_number + 1):
-                            print("Could not recover after fallback next button. Exiting loop.")
-                            break
-                    except:
-                        print(f"Could not proceed to next question. Breaking loop.")
+                    print(f"Completed question {question_number}/{QUESTIONS_PER_ROUND}")
+                    state.advance(answered=True)
+                question_seconds = time.perf_counter() - question_start
+                pipeline.record("question total", question_seconds)
+                
+                # Wait for the page to move on and check if we're still on the right page
+                with pipeline.stage("transition"):
+                    wait_for_question_change(driver, QUESTION_LOAD_TIMEOUT, WAIT_POLL_INTERVAL)
+                with pipeline.stage("grading"):
+                    correct = read_grading(driver)
+                record_grading(code_snippet, snippet_evaluation.strip(), correct, profile["difficulty"], question_seconds)
+                if not state.finished and not check_and_recover_page(driver, state, profile):
+                    print(f"Failed to stay on question page after submitting answer for question {question_number}.")
+                    # If recovery failed, try once more before giving up
+                    if not check_and_recover_page(driver, state, profile):
+                        print("Second recovery attempt failed. Exiting loop.")
                         break
-            else:
+                
+            except Exception as e:
+                print(f"Error entering answer or clicking Next: {e}")
                 
                 # Check if we're on the right page before continuing
-                if not check_and_recover_page(driver, question_number):
-                    print("Could not recover after failing to find code. Exiting loop.")
+                if not check_and_recover_page(driver, state, profile):
+                    print("Could not recover after error. Exiting loop.")
                     break
+                if state.round_id != round_id or state.index != question_number:
+                    # Recovered into a new round, or Next was already clicked
+                    continue
                 
-                # Try to continue with the next question anyway
+                # Try to continue with the next question if possible
                 try:
-                    # Just try to find and click any Next button to continue
-                    next_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Next')]")
-                    next_button.click()
-                    print("Skipped to next question")
-                    time.sleep(1)
+                    # Find and click the Next button using a more generic selector
+                    fallback_next = driver.find_element(By.XPATH, "//button[contains(text(), 'Next')]")
+                    watch_question(driver)
+                    fallback_next.click()
+                    print("Used fallback method to proceed to next question")
+                    state.advance(answered=False)
+                    wait_for_question_change(driver, QUESTION_LOAD_TIMEOUT, WAIT_POLL_INTERVAL)
                     
                     # Check again if we're on the right page
-                    if not check_and_recover_page(driver, question_number + 1):
-                        print("Could not recover after skipping question. Exiting loop.")
+                    if not state.finished and not check_and_recover_page(driver, state, profile):
+                        print("Could not recover after fallback next button. Exiting loop.")
                         break
-                except Exception as e:
-                    print(f"Could not proceed to next question: {e}")
+                except:
+                    print(f"Could not proceed to next question. Breaking loop.")
                     break
-        
-        print("\n=== Completed all 10 questions! ===\n")
-        
-    except Exception as e:
-        print(f"Error interacting with elements: {e}")
-        
-        # Alternative approach: try using name attribute instead of ID
-        print("Trying alternative selectors...")
-        try:
-            email_field = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.NAME, "email"))
-            )
-            password_field = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.NAME, "password"))
-            )
+        else:
             
-            # Find the button using the exact CSS selector
-            login_button = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button.MuiButtonBase-root.MuiButton-root.MuiButton-contained.MuiButton-containedPrimary[type='submit']"))
-            )
+            # Check if we're on the right page before continuing
+            if not check_and_recover_page(driver, state, profile):
+                print("Could not recover after failing to find code. Exiting loop.")
+                break
+            if state.round_id != round_id:
+                # A new round was started, answer its first question
+                continue
             
-            login_button.click()
-            print("Login attempted using alternative selectors")
+            # Try to continue with the next question anyway
+            try:
+                # Just try to find and click any Next button to continue
+                next_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Next')]")
+                watch_question(driver)
+                next_button.click()
+                print("Skipped to next question")
+                state.advance(answered=False)
+                wait_for_question_change(driver, QUESTION_LOAD_TIMEOUT, WAIT_POLL_INTERVAL)
+                
+                # Check again if we're on the right page
+                if not state.finished and not check_and_recover_page(driver, state, profile):
+                    print("Could not recover after skipping question. Exiting loop.")
+                    break
+            except Exception as e:
+                print(f"Could not proceed to next question: {e}")
+                break
+    
+    return len(state.answered)
+
+# Function to submit an answer through the endpoints, finding out whether an interrupted submit went through
+def submit_answer_direct(client, round_id, question, answer):
+    """
+    Submits an answer. When the connection dropped after the answer was sent, the round's
+    current question tells whether the site took it; it is only submitted again if not.
+    
+    Returns:
+        dict: The site's reply, {} if the site took the answer without its reply arriving
+    """
+    try:
+        return client.answer(round_id, answer)
+    except RequestInterrupted as e:
+        print(f"{e}. Checking whether the site took the answer...")
+    current = client.question(round_id)
+    if current.get("finished") or current.get("index") != question.get("index"):
+        print("The site took the answer, its grading is unknown")
+        return {}
+    print("The site did not take the answer. Submitting it again...")
+    return client.answer(round_id, answer)
+
+# Function to answer a round through the site's endpoints instead of the question pages
+def run_round_direct(driver, profile, pipeline, state):
+    """
+    Starts and answers a round with the direct HTTP client. The browser is only used to
+    log in again when the endpoints stop accepting the login.
+    
+    Returns:
+        int: Number of questions answered
+    
+    Raises:
+        DirectModeError: if the endpoints do not answer as expected
+    """
+    client = DirectClient.from_driver(driver, BASE_URL, DIRECT_ENDPOINTS,
+                                      pool_size=DIRECT_POOL_SIZE, timeout=PAGE_LOAD_TIMEOUT)
+    try:
+        with pipeline.stage("start round"):
+            round_id = client.start_round(profile["topic_selection"], profile["difficulty"])
+        print(f"Started round {round_id} through the site's endpoints")
+        
+        while not state.finished:
+            question_start = time.perf_counter()
+            question_number = state.index
+            tracing.annotate(profile=profile["name"], round=state.round_id, question=question_number)
+            routing_session.set(driver.session_id)
+            try:
+                with pipeline.stage("question fetch"):
+                    question = client.question(round_id)
+                if question.get("finished"):
+                    print("The site has no more questions in this round")
+                    break
+                
+                print(f"\n=== Question {question_number}/{QUESTIONS_PER_ROUND} (direct) ===")
+                print(question["code"])
+                try:
+                    answer = pipeline.result(pipeline.submit(question["code"])).strip()
+                except GeminiError as e:
+                    # The endpoint needs an answer to move on, an empty one is at least not made up
+                    print(f"No answer from Gemini ({e}). Submitting an empty answer...")
+                    answer = ""
+                with pipeline.stage("answer submit"):
+                    reply = submit_answer_direct(client, round_id, question, answer)
+                print(f"Submitted answer: {answer}")
+                state.advance(answered=True)
+                question_seconds = time.perf_counter() - question_start
+                pipeline.record("question total", question_seconds)
+                if answer:
+                    correct = grade_from_payload(reply, GRADING_RESULT_KEYS) if READ_GRADING else None
+                    record_grading(question["code"], answer, correct, profile["difficulty"], question_seconds)
             
-            # Wait for redirect
-            time.sleep(2)
+            except SessionExpired as e:
+                print(f"{e}. Logging in again...")
+                if not state.can_recover():
+                    print("No recoveries left. Exiting loop.")
+                    break
+                start_time = time.perf_counter()
+                success = False
+                try:
+                    form_login(driver, profile)
+                    client.refresh_login(driver)
+                    round_id = client.start_round(profile["topic_selection"], profile["difficulty"])
+                    success = True
+                except Exception as login_error:
+                    print(f"Could not log in again: {login_error}")
+                state.record_recovery("login", time.perf_counter() - start_time, success)
+                if not success:
+                    break
+    finally:
+        client.close()
+    
+    return len(state.answered)
+
+# Function to set up the network event listeners of a new driver
+def start_network_monitoring(driver):
+    if not CAPTURE_NETWORK_PAYLOADS and not BLOCK_RESOURCES and not READ_GRADING:
+        return
+    network_log = NetworkLog(driver)
+    if CAPTURE_NETWORK_PAYLOADS:
+        payload_captures[driver.session_id] = PayloadCapture(network_log, PAYLOAD_URL_PATTERN, PAYLOAD_CODE_KEYS)
+    if READ_GRADING:
+        grading_captures[driver.session_id] = GradingCapture(network_log, GRADING_URL_PATTERN, GRADING_RESULT_KEYS)
+    if BLOCK_RESOURCES:
+        blocker = ResourceBlocker(network_log, BLOCKED_URL_PATTERNS, BLOCKED_RESOURCE_TYPES, RESOURCE_ALLOWLIST)
+        try:
+            # Before the first page load, so even the login page loads without them
+            blocker.apply()
+            resource_blockers[driver.session_id] = blocker
+        except Exception as e:
+            print(f"Could not block resources: {e}")
+
+# Function to learn the resources of the pages loaded so far, so later loads skip them
+def update_resource_blocking(driver):
+    blocker = resource_blockers.get(driver.session_id)
+    if blocker is not None:
+        blocker.update()
+
+# Function to play one round with a profile in its own Chrome session
+def run_session(profile, close_delay=0, pipeline=None):
+    """
+    Logs in with a profile, plays one round and closes the browser.
+    A pipeline passed in is shared with other sessions and left running.
+    
+    Returns:
+        dict: Profile name, questions answered, elapsed seconds, startup timings, recovery
+            incidents and pipeline timings
+    """
+    start_time = time.perf_counter()
+    answered = 0
+    
+    # Evaluate snippets in the background while the browser moves through the round
+    owns_pipeline = pipeline is None
+    if owns_pipeline:
+        pipeline = QuestionPipeline(evaluate_javascript, EVALUATION_WORKERS)
+    state = RoundState(MAX_RECOVERIES)
+    startup_timings = {}
+    driver = create_driver(profile["name"], startup_timings)
+    start_network_monitoring(driver)
+    
+    try:
+        try:
+            login(driver, profile, startup_timings)
+            print_startup_timings(startup_timings)
+            update_resource_blocking(driver)
+            if USE_DIRECT_MODE:
+                try:
+                    answered = run_round_direct(driver, profile, pipeline, state)
+                except DirectModeError as e:
+                    print(f"Direct mode failed ({e}). Playing the round in the browser instead...")
+                    if state.index > 1:
+                        # The browser starts a new round, like after any other recovery
+                        state.record_recovery("direct mode", 0.0, True)
+                    driver.get(f"{BASE_URL}/dashboard")
+                    start_round(driver, profile["topic_selection"], profile["difficulty"])
+                    answered = run_round(driver, profile, pipeline, state)
+            else:
+                start_round(driver, profile["topic_selection"], profile["difficulty"])
+                print("All buttons clicked successfully!")
+                answered = run_round(driver, profile, pipeline, state)
+            print("\n=== Completed all 10 questions! ===\n")
             
-        except Exception as e2:
-            print(f"Alternative approach also failed: {e2}")
+        except Exception as e:
+            print(f"Error interacting with elements: {e}")
+            
+            # Alternative approach: try using name attribute instead of ID
+            print("Trying alternative selectors...")
+            try:
+                email_field = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.NAME, "email"))
+                )
+                password_field = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.NAME, "password"))
+                )
+                
+                # Find the button using the exact CSS selector
+                login_button = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.MuiButtonBase-root.MuiButton-root.MuiButton-contained.MuiButton-containedPrimary[type='submit']"))
+                )
+                
+                login_button.click()
+                print("Login attempted using alternative selectors")
+                
+                # Wait for redirect
+                WebDriverWait(driver, PAGE_LOAD_TIMEOUT, poll_frequency=WAIT_POLL_INTERVAL).until(
+                    EC.url_contains("dashboard")
+                )
+                
+            except Exception as e2:
+                print(f"Alternative approach also failed: {e2}")
+    
+    finally:
+        state.print_report()
+        capture = payload_captures.pop(driver.session_id, None)
+        if capture is not None:
+            capture.print_stats()
+        blocker = resource_blockers.pop(driver.session_id, None)
+        if blocker is not None:
+            blocker.update()
+            blocker.print_report()
+        grading_captures.pop(driver.session_id, None)
+        if owns_pipeline:
+            pipeline.print_report()
+            pipeline.shutdown()
+        
+        # Optional: Add a pause to see the final state
+        if close_delay:
+            print(f"Session completed. Browser will close in {close_delay} seconds...")
+            time.sleep(close_delay)
         
+        # Close the browser
+        driver.quit()
+    
+    return {
+        "profile": profile["name"],
+        "answered": answered,
+        "elapsed": time.perf_counter() - start_time,
+        "startup": startup_timings,
+        "recoveries": state.recoveries,
+        "pipeline": pipeline.stats(),
+        "resources": blocker.stats() if blocker is not None else None,
+    }
 
-finally:
-    # Optional: Add a pause to see the final state
-    print("Script completed. Browser will close in 3 seconds...")
-    time.sleep(3)
+def main():
+    profile = complete_profile(PROFILES[0])
     
-    # Close the browser
-    driver.quit()
+    print(f"Profile: {profile['name']}")
+    print(f"Email: {profile['email']}")
+    print(f"Password: {"*"*len(profile['password'])}")
+    print(f"Gemini API Key: {GEMINI_API_KEY[0:2]}{"*"*(len(GEMINI_API_KEY) - 2)}")
+    print(f"Topic Selection: {profile['topic_selection']}")
+    print(f"Difficulty Level: {profile['difficulty']}")
+    print(f"Site: {BASE_URL}")
+    print(f"Local Evaluator: {'enabled' if USE_LOCAL_EVALUATOR else 'disabled'}")
+    print(f"Answer Cache: {ANSWER_CACHE_PATH if USE_ANSWER_CACHE else 'disabled'}")
+    print(f"Evaluation Backend: {EVALUATION_BACKEND}")
+    
+    init_evaluation()
+    try:
+        run_session(profile, close_delay=3)
+    finally:
+        close_evaluation()
+    print("Script completed.")
 
+if __name__ == "__main__":
+    main()
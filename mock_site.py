@@ -0,0 +1,462 @@
+# Local stand-in for the PracticeMe site, for measuring the bot without the live site.
+#
+# Usage: python mock_site.py [--port 8000] [--bounce-rate 0.05] [--session-ttl 60]
+#
+# Serves the authenticate page, the dashboard with the Single Player topic/difficulty
+# selection and the question pages, using the same ids, classes and texts the selectors in
+# main.py look for («r1»/«r2», the MUI buttons, #code-snippet, code.language-javascript,
+# the answer input). Questions come from snippet_corpus.py and answers are graded against
+# its expected outputs. To exercise recoveries, answers can bounce the browser back to the
+# dashboard and logins can expire. Only the standard library is used, so it runs offline.
+import argparse
+import html
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from snippet_corpus import corpus_for_positions
+from topics import TOPICS, TOPIC_POSITION_TO_VALUE
+
+QUESTIONS_PER_ROUND = 10
+TOPIC_VALUE_TO_POSITION = {value: position for position, value in TOPIC_POSITION_TO_VALUE.items()}
+
+# Decorative assets like the live site's logo and web font, which the bot never needs
+STATIC_ASSETS = {
+    "/static/logo.png": ("image/png", 48 * 1024),
+    "/static/mock-sans.woff2": ("font/woff2", 96 * 1024),
+}
+
+PRIMARY_BUTTON_CLASS = "MuiButtonBase-root MuiButton-root MuiButton-contained MuiButton-containedPrimary"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>
+@font-face { font-family: "Mock Sans"; src: url("/static/mock-sans.woff2") format("woff2"); }
+body { font-family: "Mock Sans", sans-serif; margin: 40px; }
+.react-syntax-highlighter-line-number { color: #999; margin-right: 12px; }
+pre { background: #f4f4f4; padding: 12px; }
+</style>
+</head>
+<body>
+<img src="/static/logo.png" alt="PracticeMe" width="120" height="40">
+%(body)s
+</body>
+</html>
+"""
+
+LOGIN_BODY = """
+<h1>PracticeMe</h1>
+<form id="login-form">
+  <div class="MuiFormControl-root"><input id="«r1»" name="email" type="email" placeholder="Email"></div>
+  <div class="MuiFormControl-root"><input id="«r2»" name="password" type="password" placeholder="Password"></div>
+  <button type="submit" class="%(button_class)s">Login</button>
+</form>
+<script>
+document.getElementById('login-form').addEventListener('submit', async (event) => {
+  event.preventDefault();
+  const response = await fetch('/api/login', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({
+      email: document.getElementById('«r1»').value,
+      password: document.getElementById('«r2»').value,
+    }),
+  });
+  if (response.ok) {
+    const data = await response.json();
+    localStorage.setItem('token', data.token);
+    window.location.href = '/dashboard';
+  }
+});
+</script>
+"""
+
+DASHBOARD_BODY = """
+<h1>Dashboard</h1>
+<nav>
+  <div class="MuiButtonBase-root MuiListItemButton-root" id="single-player"><span>Single Player</span></div>
+</nav>
+<section id="setup" hidden>
+  <button type="button" class="%(button_class)s" id="select-all">Select All Topics</button>
+  <div class="MuiFormGroup-root">
+%(checkboxes)s
+  </div>
+  <div class="MuiFormControl-root" role="radiogroup">
+    <label class="MuiFormControlLabel-root"><span class="MuiRadio-root"><input type="radio" name="difficulty" value="beginner" checked></span><span>Beginner</span></label>
+    <label class="MuiFormControlLabel-root"><span class="MuiRadio-root"><input type="radio" name="difficulty" value="intermediate"></span><span>Intermediate</span></label>
+  </div>
+  <button type="button" class="%(button_class)s" id="start">Start</button>
+</section>
+<script>
+document.getElementById('single-player').addEventListener('click', () => {
+  document.getElementById('setup').hidden = false;
+});
+document.getElementById('select-all').addEventListener('click', () => {
+  document.querySelectorAll('input[type=checkbox]').forEach((box) => { box.checked = true; });
+});
+document.getElementById('start').addEventListener('click', async () => {
+  const topics = Array.from(document.querySelectorAll('input[type=checkbox]:checked')).map((box) => box.value);
+  const difficulty = document.querySelector('input[name=difficulty]:checked').value;
+  const response = await fetch('/api/rounds', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({topics, difficulty}),
+  });
+  if (response.status === 401) {
+    window.location.href = '/authenticate';
+    return;
+  }
+  const data = await response.json();
+  window.location.href = '/play/' + data.round;
+});
+</script>
+"""
+
+CHECKBOX_TEMPLATE = """    <label class="MuiFormControlLabel-root"><span class="MuiCheckbox-root"><input type="checkbox" value="%(value)s"></span><span>%(name)s</span></label>"""
+
+QUESTION_BODY = """
+<div id="question">
+  <p id="progress"></p>
+  <div id="code-snippet">
+    <p>What is the output of the following code?</p>
+    <pre><code class="language-javascript"></code></pre>
+  </div>
+  <div class="MuiInputBase-root MuiOutlinedInput-root"><input class="MuiInputBase-input MuiOutlinedInput-input" type="text"></div>
+  <button type="submit" class="%(button_class)s MuiButton-colorPrimary" id="next">Next</button>
+  <p id="feedback" role="status"></p>
+</div>
+<script>
+const roundId = %(round_id)s;
+const questionDelay = %(question_delay_ms)s;
+const code = document.querySelector('code.language-javascript');
+const answer = document.querySelector('input.MuiInputBase-input');
+const next = document.getElementById('next');
+const feedback = document.getElementById('feedback');
+
+async function loadQuestion() {
+  const response = await fetch('/api/rounds/' + roundId + '/question');
+  if (response.status === 401) {
+    window.location.href = '/authenticate';
+    return;
+  }
+  const data = await response.json();
+  if (data.finished) {
+    window.location.href = '/dashboard';
+    return;
+  }
+  // Rendered like react-syntax-highlighter: a line number span and a code span per line
+  code.textContent = '';
+  data.code.split('\\n').forEach((line, index) => {
+    const number = document.createElement('span');
+    number.className = 'react-syntax-highlighter-line-number';
+    number.textContent = (index + 1) + ' ';
+    const text = document.createElement('span');
+    text.className = 'token';
+    text.textContent = line + '\\n';
+    code.appendChild(number);
+    code.appendChild(text);
+  });
+  answer.value = '';
+  document.getElementById('progress').textContent = 'Question ' + data.index + '/' + data.total;
+  next.disabled = false;
+}
+
+next.addEventListener('click', async () => {
+  next.disabled = true;
+  const response = await fetch('/api/rounds/' + roundId + '/answer', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({answer: answer.value}),
+  });
+  if (response.status === 401) {
+    window.location.href = '/authenticate';
+    return;
+  }
+  const data = await response.json();
+  // The grading stays on screen until the next answer is graded, with the same text for a
+  // streak of correct answers
+  feedback.textContent = data.correct ? 'Correct!' : 'Incorrect';
+  if (data.bounce) {
+    window.location.href = '/dashboard';
+    return;
+  }
+  // Like the live site, the next question shows up after a short delay
+  setTimeout(loadQuestion, questionDelay);
+});
+
+loadQuestion();
+</script>
+"""
+
+
+class MockSite:
+    """
+    State of the stand-in site: logins, rounds and graded answers.
+
+    Args:
+        bounce_rate: Probability that submitting an answer sends the browser to the dashboard
+        session_ttl: Seconds a login stays valid, 0 for no expiry
+        question_delay: Seconds before the next question is shown after clicking Next
+        asset_delay: Seconds the server takes to send each image or font
+        seed: Seed for the question order and the bounces
+    """
+
+    def __init__(self, bounce_rate=0.0, session_ttl=0, question_delay=0.15, asset_delay=0.1, seed=None):
+        self.bounce_rate = bounce_rate
+        self.asset_delay = asset_delay
+        self.session_ttl = session_ttl
+        self.question_delay = question_delay
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # token -> login time
+        self.sessions = {}
+        # round id -> {"questions": [(topic, code, expected)], "index": int}
+        self.rounds = {}
+        # One dict per submitted answer: round, topic, answer, expected, correct
+        self.results = []
+        self.bounces = 0
+        self.logins = 0
+        self.static_requests = 0
+
+    def login(self):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[token] = time.time()
+            self.logins += 1
+        return token
+
+    def is_logged_in(self, token):
+        with self.lock:
+            logged_in_at = self.sessions.get(token)
+        if logged_in_at is None:
+            return False
+        return not self.session_ttl or time.time() - logged_in_at < self.session_ttl
+
+    def start_round(self, topic_values):
+        positions = [TOPIC_VALUE_TO_POSITION[value] for value in topic_values if value in TOPIC_VALUE_TO_POSITION]
+        pool = corpus_for_positions(positions)
+        with self.lock:
+            if len(pool) >= QUESTIONS_PER_ROUND:
+                questions = self.random.sample(pool, QUESTIONS_PER_ROUND)
+            else:
+                questions = self.random.choices(pool, k=QUESTIONS_PER_ROUND)
+            round_id = len(self.rounds) + 1
+            self.rounds[round_id] = {"questions": questions, "index": 0}
+        return round_id
+
+    def question(self, round_id):
+        with self.lock:
+            played = self.rounds[round_id]
+            if played["index"] >= len(played["questions"]):
+                return {"finished": True}
+            return {
+                "finished": False,
+                "index": played["index"] + 1,
+                "total": len(played["questions"]),
+                "code": played["questions"][played["index"]][1],
+            }
+
+    def answer(self, round_id, answer):
+        with self.lock:
+            played = self.rounds[round_id]
+            if played["index"] >= len(played["questions"]):
+                return {"finished": True}
+            topic, _, expected = played["questions"][played["index"]]
+            correct = answer.strip() == expected
+            self.results.append({"round": round_id, "topic": topic, "answer": answer,
+                                 "expected": expected, "correct": correct})
+            played["index"] += 1
+            bounce = self.random.random() < self.bounce_rate
+            if bounce:
+                self.bounces += 1
+            return {"correct": correct, "bounce": bounce, "finished": played["index"] >= len(played["questions"])}
+
+    def stats(self):
+        with self.lock:
+            per_topic = {}
+            for result in self.results:
+                topic_stats = per_topic.setdefault(result["topic"], {"answered": 0, "correct": 0})
+                topic_stats["answered"] += 1
+                topic_stats["correct"] += result["correct"]
+            return {
+                "logins": self.logins,
+                "rounds": len(self.rounds),
+                "answered": len(self.results),
+                "correct": sum(result["correct"] for result in self.results),
+                "bounces": self.bounces,
+                "static_requests": self.static_requests,
+                "topics": per_topic,
+            }
+
+
+def render_page(title, body):
+    return (PAGE_TEMPLATE % {"title": title, "body": body}).encode("utf-8")
+
+
+def dashboard_body():
+    checkboxes = "\n".join(
+        CHECKBOX_TEMPLATE % {"value": TOPIC_POSITION_TO_VALUE[position], "name": html.escape(name)}
+        for position, name in TOPICS.items())
+    return DASHBOARD_BODY % {"button_class": PRIMARY_BUTTON_CLASS, "checkboxes": checkboxes}
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    # Keep-alive like the live site, every response has a Content-Length
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, Nagle's algorithm would delay the body ~40 ms
+    disable_nagle_algorithm = True
+    site = None
+
+    def log_message(self, format, *args):
+        # Keep the benchmark output readable
+        pass
+
+    def session_token(self):
+        authorization = self.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            return authorization[len("Bearer "):]
+        match = re.search(r"(?:^|;\s*)session=([0-9a-f]+)", self.headers.get("Cookie", ""))
+        return match.group(1) if match else None
+
+    def logged_in(self):
+        return self.site.is_logged_in(self.session_token())
+
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status=200, headers=()):
+        self.send_body(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+    def redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self.redirect("/authenticate")
+        elif path == "/authenticate":
+            if self.logged_in():
+                self.redirect("/dashboard")
+            else:
+                self.send_body(200, render_page("Login", LOGIN_BODY % {"button_class": PRIMARY_BUTTON_CLASS}),
+                               "text/html; charset=utf-8")
+        elif path == "/dashboard":
+            if not self.logged_in():
+                self.redirect("/authenticate")
+            else:
+                self.send_body(200, render_page("Dashboard", dashboard_body()), "text/html; charset=utf-8")
+        elif re.fullmatch(r"/play/\d+", path):
+            round_id = int(path.rsplit("/", 1)[1])
+            if not self.logged_in():
+                self.redirect("/authenticate")
+            elif round_id not in self.site.rounds:
+                self.redirect("/dashboard")
+            else:
+                body = QUESTION_BODY % {
+                    "button_class": PRIMARY_BUTTON_CLASS,
+                    "round_id": round_id,
+                    "question_delay_ms": int(self.site.question_delay * 1000),
+                }
+                self.send_body(200, render_page("Question", body), "text/html; charset=utf-8")
+        elif re.fullmatch(r"/api/rounds/\d+/question", path):
+            round_id = int(path.split("/")[3])
+            if not self.logged_in():
+                self.send_json({"error": "not logged in"}, 401)
+            elif round_id not in self.site.rounds:
+                self.send_json({"error": "unknown round"}, 404)
+            else:
+                self.send_json(self.site.question(round_id))
+        elif path in STATIC_ASSETS:
+            content_type, size = STATIC_ASSETS[path]
+            with self.site.lock:
+                self.site.static_requests += 1
+            # Served slowly on purpose, like assets from a CDN on a mediocre connection
+            time.sleep(self.site.asset_delay)
+            self.send_body(200, bytes(size), content_type, [("Cache-Control", "no-store")])
+        elif path == "/api/stats":
+            self.send_json(self.site.stats())
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        data = self.read_json()
+        if path == "/api/login":
+            if not data.get("email") or not data.get("password"):
+                self.send_json({"error": "email and password are required"}, 400)
+                return
+            token = self.site.login()
+            self.send_json({"token": token}, headers=[("Set-Cookie", f"session={token}; Path=/; SameSite=Lax")])
+        elif not self.logged_in():
+            self.send_json({"error": "not logged in"}, 401)
+        elif path == "/api/rounds":
+            self.send_json({"round": self.site.start_round(data.get("topics", []))})
+        elif re.fullmatch(r"/api/rounds/\d+/answer", path):
+            round_id = int(path.split("/")[3])
+            if round_id not in self.site.rounds:
+                self.send_json({"error": "unknown round"}, 404)
+            else:
+                self.send_json(self.site.answer(round_id, str(data.get("answer", ""))))
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+
+def start_server(port=0, **options):
+    """
+    Starts the mock site on a background thread.
+
+    Returns:
+        tuple: (server, MockSite), the address is http://127.0.0.1:<server.server_port>
+    """
+    site = MockSite(**options)
+    handler = type("BoundMockSiteHandler", (MockSiteHandler,), {"site": site})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-site", daemon=True).start()
+    return server, site
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the PracticeMe site")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bounce-rate", type=float, default=0.0,
+                        help="probability that an answer sends the browser back to the dashboard")
+    parser.add_argument("--session-ttl", type=float, default=0, help="seconds a login stays valid, 0 for no expiry")
+    parser.add_argument("--question-delay", type=float, default=0.15, help="seconds before the next question shows")
+    parser.add_argument("--asset-delay", type=float, default=0.1, help="seconds to send each image or font")
+    parser.add_argument("--seed", type=int, default=None)
+    arguments = parser.parse_args()
+
+    server, site = start_server(arguments.port, bounce_rate=arguments.bounce_rate, session_ttl=arguments.session_ttl,
+                                question_delay=arguments.question_delay, asset_delay=arguments.asset_delay,
+                                seed=arguments.seed)
+    print(f"Mock PracticeMe site running on http://127.0.0.1:{server.server_port}")
+    print("Set base_url in settings.py to this address. Grading stats: /api/stats")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(json.dumps(site.stats(), indent=2))
+        server.shutdown()
@@ -0,0 +1,544 @@
+# Plays several profiles inside a single Chrome, one isolated browser context per session.
+#
+# Usage: python multisession.py [sessions] [--compare]
+#
+# runner.py starts one Chrome per session, which costs a full browser process tree each.
+# Here one Chrome hosts every session in its own browser context (separate cookies and
+# storage, like an incognito window), created through the DevTools protocol. The sessions
+# are coroutines on one asyncio event loop: each step takes the shared driver for a single
+# quick command and gives it back, and waiting is done with asyncio.sleep instead of
+# WebDriverWait, so a session waiting for its page never blocks the others. Snippets are
+# evaluated on the pipeline's threads.
+#
+# With --compare, one extra Chrome plays a single session afterwards so the memory of the
+# two layouts can be compared.
+import asyncio
+import os
+import sys
+import time
+
+from selenium.webdriver.common.by import By #type: ignore
+
+import main as practiceme
+import settings
+from answer_router import routing_session
+from gemini_client import GeminiError
+from page_waits import question_changed, question_fingerprint, left_question_page, watch_question
+from pipeline import QuestionPipeline
+from round_state import RoundState
+from session_store import apply_session, finish_apply, clear_session, session_state
+from topics import TOPIC_POSITION_TO_VALUE
+
+ANSWER_INPUT_CSS = "input.MuiInputBase-input.MuiOutlinedInput-input"
+SINGLE_PLAYER_XPATH = "//div[contains(@class, 'MuiListItemButton-root')]//span[text()='Single Player']//ancestor::div[contains(@class, 'MuiButtonBase-root')]"
+TOPIC_PAGE_XPATH = "//input[@type='checkbox'] | //button[contains(text(), 'Select All Topics')]"
+START_BUTTON_XPATH = "//button[contains(@class, 'MuiButton-containedPrimary') and contains(text(), 'Start')]"
+NEXT_BUTTON_XPATH = "//button[contains(text(), 'Next')]"
+SELECT_ALL_TOPICS_XPATH = "//button[contains(@class, 'MuiButton-containedPrimary') and contains(text(), 'Select All Topics')]"
+# Seconds each way of clicking a topic checkbox or difficulty radio button is given
+SETUP_CLICK_TIMEOUT = 5
+
+
+def setup_locators(input_xpath, container_classes):
+    """
+    Ways of clicking a MUI checkbox or radio input, in the order main.select_topics and
+    main.select_difficulty try them.
+
+    Returns:
+        list: (xpath, True to click with a script as the input itself is hidden)
+    """
+    return [
+        (f"{input_xpath}/parent::span", False),
+        (f"{input_xpath}/ancestor::label", False),
+        (input_xpath, True),
+        (f"{input_xpath}/ancestor::div[{' or '.join(f'contains(@class, {name!r})' for name in container_classes)}]",
+         False),
+    ]
+
+
+def process_tree_rss(root_pid):
+    """
+    Returns the resident memory in bytes of a process and all of its descendants,
+    or None where /proc is not available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat_file:
+                # The process name can contain spaces, the fields after it are fixed
+                parent_pid = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent_pid, []).append(int(entry))
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as status_file:
+                for line in status_file:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+def browser_rss(driver):
+    # chromedriver is the root of the browser's process tree
+    try:
+        return process_tree_rss(driver.service.process.pid)
+    except AttributeError:
+        return None
+
+
+def first_displayed(driver, by, selector):
+    for element in driver.find_elements(by, selector):
+        if element.is_displayed() and element.is_enabled():
+            return element
+    return None
+
+
+class SharedBrowser:
+    """
+    A WebDriver shared by several sessions, each command runs on the caller's tab.
+
+    Args:
+        driver: The Selenium WebDriver of the single Chrome
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.lock = asyncio.Lock()
+        # Tab the driver is switched to, so switching is skipped when it is already there
+        self.active_handle = None
+
+    async def call(self, handle, function, *args):
+        async with self.lock:
+            if self.active_handle != handle:
+                self.driver.switch_to.window(handle)
+                self.active_handle = handle
+            return function(self.driver, *args)
+
+
+class ContextSession:
+    """
+    One profile playing in its own browser context of a shared Chrome.
+
+    Args:
+        browser: SharedBrowser hosting the session
+        profile: Completed profile (see main.complete_profile)
+        pipeline: QuestionPipeline shared by every session
+    """
+
+    def __init__(self, browser, profile, pipeline):
+        self.browser = browser
+        self.driver = browser.driver
+        self.profile = profile
+        self.pipeline = pipeline
+        self.context_id = None
+        self.handle = None
+        self.state = RoundState(practiceme.MAX_RECOVERIES)
+
+    def log(self, message):
+        print(f"[{self.profile['name']}] {message}")
+
+    def open(self, url):
+        # Must run before the event loop starts using the driver
+        handles_before = set(self.driver.window_handles)
+        self.context_id = self.driver.execute_cdp_cmd(
+            "Target.createBrowserContext", {"disposeOnDetach": True})["browserContextId"]
+        target_id = self.driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": url, "browserContextId": self.context_id})["targetId"]
+        # chromedriver uses the target id as the window handle
+        new_handles = set(self.driver.window_handles) - handles_before
+        self.handle = target_id if target_id in new_handles or not new_handles else new_handles.pop()
+
+    def close(self):
+        if self.context_id is not None:
+            try:
+                self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+            except Exception as e:
+                self.log(f"Could not dispose browser context: {e}")
+
+    async def call(self, function, *args):
+        """Runs one driver command on this session's tab while holding the shared driver."""
+        return await self.browser.call(self.handle, function, *args)
+
+    async def wait_until(self, condition, timeout):
+        """Polls a condition without blocking the event loop, returning its value or None."""
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                value = await self.call(condition)
+            except Exception:
+                value = None
+            if value:
+                return value
+            if time.perf_counter() >= deadline:
+                return None
+            await asyncio.sleep(practiceme.WAIT_POLL_INTERVAL)
+
+    async def click_first(self, locators, timeout):
+        """
+        Clicks the element of the first locator that turns up, giving each one timeout
+        seconds. The driver is only held for each poll and the click, so the other
+        sessions keep playing meanwhile.
+
+        Returns:
+            bool: False if none of the locators found a clickable element
+        """
+        for xpath, by_script in locators:
+            def find(driver, xpath=xpath, by_script=by_script):
+                if by_script:
+                    elements = driver.find_elements(By.XPATH, xpath)
+                    return elements[0] if elements else None
+                return first_displayed(driver, By.XPATH, xpath)
+
+            if not await self.wait_until(find, timeout):
+                continue
+
+            def click(driver, find=find, by_script=by_script):
+                # Found again, the element may be gone after another session used the driver
+                element = find(driver)
+                if element is None:
+                    return False
+                if by_script:
+                    driver.execute_script("arguments[0].click();", element)
+                else:
+                    element.click()
+                return True
+
+            try:
+                if await self.call(click):
+                    return True
+            except Exception as e:
+                self.log(f"Could not click {xpath}: {e}")
+        return False
+
+    async def select_topics(self, topic_selection):
+        # Same choices as main.select_topics, without holding the driver while waiting
+        if topic_selection == 0:
+            await self.click_when_ready(By.XPATH, SELECT_ALL_TOPICS_XPATH, practiceme.PAGE_LOAD_TIMEOUT)
+            return
+        if not isinstance(topic_selection, list):
+            topic_selection = [topic_selection]
+        for topic_position in topic_selection:
+            if topic_position not in TOPIC_POSITION_TO_VALUE:
+                self.log(f"Warning: Topic position {topic_position} is not valid. Valid positions are 1-15.")
+                continue
+            input_xpath = f"//input[@type='checkbox' and @value='{TOPIC_POSITION_TO_VALUE[topic_position]}']"
+            if not await self.click_first(setup_locators(input_xpath, ("MuiFormControl", "MuiCheckbox")),
+                                          SETUP_CLICK_TIMEOUT):
+                self.log(f"Could not click checkbox at position {topic_position}")
+
+    async def select_difficulty(self, difficulty):
+        # Same choices as main.select_difficulty, the script click on the input first
+        if difficulty not in ["beginner", "intermediate"]:
+            self.log(f"Warning: Invalid difficulty '{difficulty}'. Using 'beginner' as default.")
+            difficulty = "beginner"
+        input_xpath = f"//input[@type='radio' and @value='{difficulty}']"
+        locators = setup_locators(input_xpath, ("MuiFormControl", "MuiRadio"))
+        if not await self.click_first([locators[2]] + locators[:2] + locators[3:], SETUP_CLICK_TIMEOUT):
+            self.log(f"Could not select {difficulty} difficulty")
+
+    async def click_when_ready(self, by, selector, timeout):
+        element_found = await self.wait_until(lambda d: first_displayed(d, by, selector) is not None, timeout)
+        if not element_found:
+            raise TimeoutError(f"{selector} did not appear within {timeout} seconds")
+        await self.call(lambda d: first_displayed(d, by, selector).click())
+
+    async def restore_saved_session(self):
+        store = practiceme.session_store
+        saved = store.load(self.profile["name"]) if store is not None else None
+        if saved is None:
+            return False
+        try:
+            script_id = await self.call(apply_session, saved, f"{practiceme.BASE_URL}/dashboard")
+            state = await self.wait_until(session_state, practiceme.PAGE_LOAD_TIMEOUT)
+            await self.call(finish_apply, script_id)
+        except Exception as e:
+            self.log(f"Could not restore the saved session: {e}")
+            state = "stale"
+        if state == "valid":
+            self.log("Logged in with the saved session")
+            return True
+        self.log("Saved session is no longer valid. Using the login form...")
+        store.discard(self.profile["name"])
+        await self.call(clear_session)
+        await self.call(lambda d: d.get(f"{practiceme.BASE_URL}/authenticate"))
+        return False
+
+    async def login(self):
+        if await self.restore_saved_session():
+            return
+        self.log("Logging in...")
+        if not await self.wait_until(lambda d: d.find_elements(By.ID, "«r1»"), practiceme.PAGE_LOAD_TIMEOUT):
+            raise TimeoutError("login form did not appear")
+
+        def fill_form(driver):
+            driver.find_element(By.ID, "«r1»").send_keys(self.profile["email"])
+            driver.find_element(By.ID, "«r2»").send_keys(self.profile["password"])
+            driver.find_element(By.CSS_SELECTOR, "button.MuiButtonBase-root.MuiButton-containedPrimary[type='submit']").click()
+
+        await self.call(fill_form)
+        if not await self.wait_until(lambda d: "dashboard" in d.current_url, practiceme.PAGE_LOAD_TIMEOUT):
+            raise TimeoutError("dashboard did not load after logging in")
+        self.log("Successfully logged in!")
+        if practiceme.session_store is not None:
+            try:
+                await self.call(practiceme.session_store.save, self.profile["name"])
+            except Exception as e:
+                self.log(f"Could not save the session: {e}")
+
+    async def recover(self):
+        """
+        Same as main.check_and_recover_page: a session thrown back to the dashboard or the
+        login page starts a new round. Every page is polled on its own, so the other
+        sessions keep playing while this one logs in again and sets up the round.
+
+        Returns:
+            bool: True if a question page is shown (possibly of a new round)
+        """
+        current_url = await self.call(lambda d: d.current_url)
+        if "dashboard" in current_url:
+            kind = "dashboard"
+            self.log(f"WARNING: Detected unexpected return to dashboard during question {self.state.index}")
+        elif "authenticate" in current_url:
+            kind = "login"
+            self.log(f"WARNING: Session expired, returned to login page during question {self.state.index}")
+        else:
+            return True
+        if not self.state.can_recover():
+            self.log(f"Already recovered {self.state.max_recoveries} times in this session. Giving up.")
+            return False
+
+        start_time = time.perf_counter()
+        try:
+            if kind == "login":
+                await self.login()
+            await self.start_round()
+            if not await self.wait_until(question_fingerprint, practiceme.QUESTION_LOAD_TIMEOUT):
+                raise TimeoutError("no question appeared after starting a new round")
+            success = True
+        except Exception as e:
+            self.log(f"Recovery attempt failed: {e}")
+            success = False
+        elapsed = time.perf_counter() - start_time
+        self.state.record_recovery(kind, elapsed, success)
+        if success:
+            self.log(f"Recovery successful in {elapsed:.2f} s! Continuing with question 1 of round {self.state.round_id}")
+        return success
+
+    async def extract_question_code(self, max_attempts=3, delay=0.5):
+        """
+        Same extraction methods as main.extract_question_code, each one a single driver
+        command; the retries of the last fallback wait without holding the driver.
+        """
+        for extract in (practiceme.extract_network_payload, practiceme.extract_code_snapshot,
+                        practiceme.extract_code_snippet):
+            code_snippet = await self.call(extract)
+            if code_snippet:
+                return code_snippet
+        for attempt in range(max_attempts):
+            code_snippet = await self.call(practiceme.extract_from_language_javascript, 1)
+            if code_snippet or attempt == max_attempts - 1:
+                return code_snippet
+            await asyncio.sleep(delay)
+
+    async def start_round(self):
+        await self.click_when_ready(By.XPATH, SINGLE_PLAYER_XPATH, practiceme.PAGE_LOAD_TIMEOUT)
+        if not await self.wait_until(lambda d: d.find_elements(By.XPATH, TOPIC_PAGE_XPATH), practiceme.PAGE_LOAD_TIMEOUT):
+            raise TimeoutError("topic selection did not load")
+        # Every click polls on its own, a slow setup screen does not hold the shared driver
+        await self.select_topics(self.profile["topic_selection"])
+        await self.select_difficulty(self.profile["difficulty"])
+        await self.click_when_ready(By.XPATH, START_BUTTON_XPATH, practiceme.PAGE_LOAD_TIMEOUT)
+        self.log("Round started")
+
+    async def play_question(self):
+        question_number = self.state.index
+        question_start = time.perf_counter()
+        with self.pipeline.stage("question load"):
+            ready = await self.wait_until(
+                lambda d: question_fingerprint(d) or ("left" if left_question_page(d) else ""),
+                practiceme.QUESTION_LOAD_TIMEOUT)
+        if ready == "left" or not ready:
+            self.log(f"Not on a question page for question {question_number}, recovering...")
+            if not await self.recover():
+                return False
+            # After a recovery this is the first question of a new round
+            question_number = self.state.index
+
+        with self.pipeline.stage("extract"):
+            code_snippet = await self.extract_question_code()
+        answer = None
+        if not code_snippet:
+            self.log(f"No code found for question {question_number}, skipping it")
+        else:
+            evaluation = self.pipeline.submit(code_snippet)
+            with self.pipeline.stage("input lookup"):
+                await self.wait_until(lambda d: d.find_elements(By.CSS_SELECTOR, ANSWER_INPUT_CSS), practiceme.PAGE_LOAD_TIMEOUT)
+            with self.pipeline.stage("wait for answer"):
+                try:
+                    answer = await asyncio.wrap_future(evaluation)
+                except GeminiError as e:
+                    self.log(f"No answer for question {question_number} ({e}), skipping it")
+
+        if answer is not None:
+            def enter_answer(driver):
+                input_field = driver.find_element(By.CSS_SELECTOR, ANSWER_INPUT_CSS)
+                input_field.clear()
+                input_field.send_keys(answer)
+
+            with self.pipeline.stage("type answer"):
+                await self.call(enter_answer)
+            self.log(f"Question {question_number}: entered {answer!r}")
+            if practiceme.ANSWER_SUBMIT_DELAY:
+                await asyncio.sleep(practiceme.ANSWER_SUBMIT_DELAY)
+
+        # Watch the feedback on screen, so the grading of this answer can be told apart
+        with self.pipeline.stage("grading"):
+            await self.call(practiceme.prepare_grading)
+        await self.call(watch_question)
+        with self.pipeline.stage("next click"):
+            await self.click_when_ready(By.XPATH, NEXT_BUTTON_XPATH, 5)
+        self.state.advance(answered=answer is not None)
+        question_seconds = time.perf_counter() - question_start
+        self.pipeline.record("question total", question_seconds)
+        with self.pipeline.stage("transition"):
+            await self.wait_until(question_changed, practiceme.QUESTION_LOAD_TIMEOUT)
+        if answer is not None:
+            # Fed into the caches, the harvest and the answer router like in main.run_round
+            with self.pipeline.stage("grading"):
+                correct = await self.call(practiceme.read_grading)
+            practiceme.record_grading(code_snippet, answer.strip(), correct, self.profile["difficulty"], question_seconds)
+        return True
+
+    async def play(self):
+        start_time = time.perf_counter()
+        error = None
+        # Every session runs in its own task, so its answers are graded apart from the other contexts'
+        routing_session.set(self.context_id)
+        try:
+            await self.login()
+            await self.start_round()
+            while not self.state.finished:
+                if not await self.play_question():
+                    self.log("Could not recover, stopping this session")
+                    break
+        except Exception as e:
+            error = str(e)
+            self.log(f"Session failed: {e}")
+        answered = len(self.state.answered)
+        self.log(f"Answered {answered} questions in {self.state.round_id} round(s)")
+        return {
+            "profile": self.profile["name"],
+            "answered": answered,
+            "elapsed": time.perf_counter() - start_time,
+            "recoveries": self.state.recoveries,
+            "error": error,
+        }
+
+
+async def monitor_memory(driver, samples, interval=1.0):
+    while True:
+        rss = browser_rss(driver)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(interval)
+
+
+async def play_sessions(driver, profiles, pipeline):
+    browser = SharedBrowser(driver)
+    sessions = [ContextSession(browser, profile, pipeline) for profile in profiles]
+    for session in sessions:
+        session.open(f"{practiceme.BASE_URL}/authenticate")
+
+    memory_samples = []
+    monitor = asyncio.create_task(monitor_memory(driver, memory_samples))
+    try:
+        results = await asyncio.gather(*(session.play() for session in sessions))
+    finally:
+        monitor.cancel()
+        for session in sessions:
+            session.close()
+    return results, max(memory_samples) if memory_samples else None
+
+
+def run_layout(profiles, pipeline):
+    """
+    Plays the profiles in one new Chrome.
+
+    Returns:
+        tuple: (session results, peak memory of the browser in bytes or None, seconds)
+    """
+    start_time = time.perf_counter()
+    startup_timings = {}
+    # The performance log of one Chrome mixes the network events of every context and is
+    # never read here, so it is left off; the grading is read from each tab's feedback
+    driver = practiceme.create_driver("multisession", startup_timings, network_events=False)
+    practiceme.print_startup_timings(startup_timings)
+    try:
+        results, peak_rss = asyncio.run(play_sessions(driver, profiles, pipeline))
+    finally:
+        driver.quit()
+    return results, peak_rss, time.perf_counter() - start_time
+
+
+def megabytes(size):
+    return f"{size / 1024 / 1024:.0f} MB" if size is not None else "unavailable"
+
+
+def main():
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    compare = "--compare" in sys.argv
+    profiles = [practiceme.complete_profile(profile, index) for index, profile in enumerate(settings.profiles)]
+    session_count = int(arguments[0]) if arguments else len(profiles)
+    # With more sessions than profiles the profiles are reused, each in its own context
+    session_profiles = []
+    for index in range(session_count):
+        profile = dict(profiles[index % len(profiles)])
+        if index >= len(profiles):
+            profile["name"] = f"{profile['name']}-{index // len(profiles) + 1}"
+        session_profiles.append(profile)
+
+    practiceme.init_evaluation()
+    pipeline = QuestionPipeline(practiceme.evaluate_javascript, max(practiceme.EVALUATION_WORKERS, 1))
+    try:
+        print(f"Playing {session_count} sessions in one Chrome...")
+        results, peak_rss, elapsed = run_layout(session_profiles, pipeline)
+
+        single_rss = None
+        if compare:
+            print("Playing a single session in its own Chrome for comparison...")
+            _, single_rss, _ = run_layout(session_profiles[:1], pipeline)
+    finally:
+        pipeline.print_report()
+        pipeline.shutdown()
+        practiceme.close_evaluation()
+
+    answered = sum(result["answered"] for result in results)
+    print("\n=== Multi-Session Summary ===")
+    for result in results:
+        status = f"failed: {result['error']}" if result["error"] else "ok"
+        print(f"{result['profile']:<20}{result['answered']:>4} answered, {len(result['recoveries'])} recoveries"
+              f" in {result['elapsed']:>6.1f} s  {status}")
+    print(f"Questions answered: {answered} in {elapsed:.1f} s ({answered / elapsed * 60:.1f} questions/min)")
+    print(f"Peak browser memory, one Chrome for {session_count} sessions: {megabytes(peak_rss)}"
+          f" ({megabytes(peak_rss / session_count if peak_rss else None)} per session)")
+    if single_rss is not None:
+        print(f"One Chrome per session: {megabytes(single_rss)} per session"
+              f" ({megabytes(single_rss * session_count)} for {session_count} sessions)")
+    print("=== End of Multi-Session Summary ===\n")
+
+
+if __name__ == "__main__":
+    main()
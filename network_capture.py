@@ -0,0 +1,152 @@
+# Question snippets read from the site's network responses instead of the page.
+#
+# The question page gets its snippet as JSON before rendering it through the syntax
+# highlighter. With Chrome's performance log enabled, ChromeDriver records the DevTools
+# Network events of the page; the responses whose URL matches payload_url_pattern are
+# read back with Network.getResponseBody and the snippet is taken from the JSON as it was
+# sent, with no line numbers or highlighter tokens to strip. When no new payload was seen
+# for the current question, main.py falls back to scraping the DOM.
+#
+# The performance log can only be read once, so NetworkLog reads it and hands the
+# decoded events to every listener (the payload capture and the resource blocker).
+import json
+import re
+import time
+
+# Performance log settings for Chrome: only the Network domain is needed
+PERFORMANCE_LOG_PREFS = {"enableNetwork": True, "enablePage": False}
+
+
+def snippet_from_payload(data, keys):
+    """
+    Finds the snippet in a decoded JSON payload: the first string under one of the keys,
+    searched breadth first so top-level fields win over nested ones.
+
+    Returns:
+        str: The snippet, or None if the payload has none
+    """
+    pending = [data]
+    while pending:
+        value = pending.pop(0)
+        if isinstance(value, dict):
+            for key in keys:
+                if isinstance(value.get(key), str) and value[key].strip():
+                    return value[key]
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return None
+
+
+class NetworkLog:
+    """
+    Reads a driver's performance log and passes the DevTools events to its listeners.
+
+    Args:
+        driver: Chrome driver started with the performance log (see enable_capture)
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        # Objects with a handle_events(messages) method
+        self.listeners = []
+
+    def poll(self):
+        messages = []
+        for entry in self.driver.get_log("performance"):
+            try:
+                messages.append(json.loads(entry["message"])["message"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        for listener in self.listeners:
+            listener.handle_events(messages)
+
+
+class PayloadCapture:
+    """
+    Watches a driver's network responses for question payloads.
+
+    Args:
+        network_log: NetworkLog of the driver, the capture adds itself as a listener
+        url_pattern: Regular expression matching the URLs of question responses
+        keys: JSON keys that may hold the snippet
+    """
+
+    def __init__(self, network_log, url_pattern, keys=("code", "snippet")):
+        self.network_log = network_log
+        self.driver = network_log.driver
+        network_log.listeners.append(self)
+        self.url_pattern = re.compile(url_pattern)
+        self.keys = keys
+        # requestId -> URL of matching responses whose body has not been read yet
+        self.pending = {}
+        # Newest snippet seen and not yet handed out
+        self.snippet = None
+        self.captured = 0
+        self.used = 0
+        self.misses = 0
+
+    def handle_events(self, messages):
+        """Reads the bodies of the question responses that finished loading."""
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if self.url_pattern.search(url):
+                    self.pending[params["requestId"]] = url
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.pending:
+                data = self.read_body(params["requestId"])
+                snippet = snippet_from_payload(data, self.keys) if data is not None else None
+                if snippet is not None:
+                    self.snippet = snippet
+                    self.captured += 1
+            elif method == "Network.loadingFailed":
+                self.pending.pop(params.get("requestId"), None)
+
+    def read_body(self, request_id):
+        self.pending.pop(request_id, None)
+        try:
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            return json.loads(body["body"])
+        except Exception:
+            # Bodies of old requests can already be evicted from Chrome's buffer
+            return None
+
+    def take_snippet(self, timeout=0.0, interval=0.05):
+        """
+        Returns the snippet of the newest question payload and forgets it, so the same
+        payload is never used for two questions.
+
+        Args:
+            timeout: Seconds to keep polling when no payload arrived yet
+
+        Returns:
+            str: The snippet, or "" if none was captured
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.network_log.poll()
+            except Exception as e:
+                print(f"Could not read the network log: {e}")
+                break
+            if self.snippet is not None or time.monotonic() >= deadline:
+                break
+            time.sleep(interval)
+        snippet, self.snippet = self.snippet, None
+        if snippet:
+            self.used += 1
+            return snippet.strip("\n")
+        self.misses += 1
+        return ""
+
+    def print_stats(self):
+        print(f"Network payloads: {self.captured} captured, {self.used} used for extraction, "
+              f"{self.misses} questions scraped from the page instead")
+
+
+def enable_capture(chrome_options):
+    # ChromeDriver only records DevTools events when the performance log is requested
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", PERFORMANCE_LOG_PREFS)
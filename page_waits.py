@@ -0,0 +1,141 @@
+# Event-driven waits for the PracticeMe run loop.
+#
+# Instead of sleeping for a fixed time after every click, these helpers poll the page and
+# return as soon as it actually changed, with an upper bound. A question is shown once its
+# code snippet has text (fingerprinted by a hash of it). Before Next is clicked,
+# watch_question() puts a MutationObserver on the snippet element; the next question has
+# come up once that element was re-rendered, replaced or removed, so two consecutive
+# questions with the same code are told apart by the page's own update.
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait #type: ignore
+from selenium.common.exceptions import TimeoutException #type: ignore
+
+# Finds the element holding the question's code snippet
+SNIPPET_ELEMENT_SCRIPT = """
+const code = document.querySelector('#code-snippet')
+    || document.querySelector('code.language-javascript');
+"""
+
+# Returns "<snippet length>:<snippet hash>", or "" when no question is shown
+QUESTION_FINGERPRINT_SCRIPT = SNIPPET_ELEMENT_SCRIPT + """
+if (!code) {
+    return '';
+}
+const text = code.textContent || '';
+if (!text.trim()) {
+    return '';
+}
+let hash = 0;
+for (let i = 0; i < text.length; i++) {
+    hash = (hash * 31 + text.charCodeAt(i)) | 0;
+}
+return text.length + ':' + hash;
+"""
+
+# Counts the changes of the current snippet element from now on; returns false if no
+# question is shown
+WATCH_QUESTION_SCRIPT = SNIPPET_ELEMENT_SCRIPT + """
+if (window.__practicemeQuestionWatch) {
+    window.__practicemeQuestionWatch.observer.disconnect();
+    window.__practicemeQuestionWatch = null;
+}
+if (!code) {
+    return false;
+}
+const watch = {node: code, changes: 0};
+watch.observer = new MutationObserver(() => { watch.changes += 1; });
+watch.observer.observe(code, {childList: true, subtree: true, characterData: true});
+window.__practicemeQuestionWatch = watch;
+return true;
+"""
+
+# True once the watched snippet element changed, was replaced or removed. A missing watch
+# means the document itself was replaced.
+QUESTION_CHANGED_SCRIPT = SNIPPET_ELEMENT_SCRIPT + """
+const watch = window.__practicemeQuestionWatch;
+return !watch || !code || code !== watch.node || watch.changes > 0;
+"""
+
+# Pages that mean we were thrown out of the question flow
+LEFT_QUESTION_PAGE_MARKERS = ("dashboard", "authenticate")
+
+
+def question_fingerprint(driver):
+    try:
+        return driver.execute_script(QUESTION_FINGERPRINT_SCRIPT) or ""
+    except Exception:
+        return ""
+
+
+def watch_question(driver):
+    """
+    Starts watching the question on screen for the change wait_for_question_change()
+    waits for; call it right before the click that moves on.
+
+    Returns:
+        bool: False if no question is shown (any page change then counts)
+    """
+    try:
+        return bool(driver.execute_script(WATCH_QUESTION_SCRIPT))
+    except Exception:
+        return False
+
+
+def question_changed(driver):
+    """
+    True once the watched question was re-rendered, replaced or removed (e.g. for the
+    round's results), or the page left the question flow.
+    """
+    try:
+        changed = driver.execute_script(QUESTION_CHANGED_SCRIPT)
+    except Exception:
+        # The page is being replaced, wait for the next one
+        return False
+    return bool(changed) or left_question_page(driver)
+
+
+def left_question_page(driver):
+    try:
+        current_url = driver.current_url
+    except Exception:
+        return False
+    return any(marker in current_url for marker in LEFT_QUESTION_PAGE_MARKERS)
+
+
+def wait_for_question_ready(driver, timeout, poll_interval=0.05):
+    """
+    Waits until a question snippet is shown (or we were sent back to the dashboard/login).
+
+    Returns:
+        str: The question fingerprint, or "" if no question appeared before the timeout
+    """
+    start_time = time.perf_counter()
+    try:
+        fingerprint = WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(
+            lambda d: question_fingerprint(d) or ("left" if left_question_page(d) else False)
+        )
+    except TimeoutException:
+        print(f"No question appeared within {timeout} seconds")
+        return ""
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Question ready after {elapsed_ms:.0f} ms")
+    return "" if fingerprint == "left" else fingerprint
+
+
+def wait_for_question_change(driver, timeout, poll_interval=0.05):
+    """
+    Waits until the question watched by watch_question() is no longer shown.
+
+    Returns:
+        bool: True if the page changed before the timeout
+    """
+    start_time = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(question_changed)
+    except TimeoutException:
+        print(f"Question did not change within {timeout} seconds")
+        return False
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Page changed after {elapsed_ms:.0f} ms")
+    return True
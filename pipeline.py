@@ -0,0 +1,145 @@
+# Pipelined question processing.
+#
+# Evaluating a snippet (cache, local interpreter or Gemini) does not need the browser,
+# so it runs in a worker thread as soon as the snippet is extracted while the driver
+# thread carries on with the page check and the input field lookup. Every stage is
+# timed so a round's wall-clock time can be broken down afterwards.
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import tracing
+
+# time.monotonic() when the question evaluated on this thread was submitted, so the Gemini
+# rate limiter can serve the questions that have waited longest first
+question_started = contextvars.ContextVar("question_started", default=None)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class QuestionPipeline:
+    """
+    Runs answer evaluation in a thread pool and records timings per stage.
+
+    Args:
+        evaluate: Function taking a code snippet and returning the answer
+        workers: Number of evaluation threads (0 evaluates on the calling thread, without overlap)
+    """
+
+    def __init__(self, evaluate, workers=2):
+        self.evaluate = evaluate
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evaluation") if workers > 0 else None
+        self.lock = threading.Lock()
+        # stage name -> list of durations in seconds
+        self.timings = {}
+        # stage name -> list of queue depths sampled when work entered the stage
+        self.queue_depths = {}
+        self.in_flight = 0
+        self.started = time.perf_counter()
+
+    def record(self, stage, duration):
+        with self.lock:
+            self.timings.setdefault(stage, []).append(duration)
+
+    def record_depth(self, stage, depth):
+        with self.lock:
+            self.queue_depths.setdefault(stage, []).append(depth)
+
+    @contextmanager
+    def stage(self, name):
+        """Times a block of driver-thread work, e.g. `with pipeline.stage("extract"):`."""
+        start_time = time.perf_counter()
+        try:
+            with tracing.span(name):
+                yield
+        finally:
+            self.record(name, time.perf_counter() - start_time)
+
+    def _run_evaluation(self, code, submitted_at):
+        started_at = time.perf_counter()
+        self.record("evaluation queue", started_at - submitted_at)
+        # Without a thread pool this runs in the caller's own context, so the value is reset afterwards
+        token = question_started.set(time.monotonic() - (started_at - submitted_at))
+        try:
+            with tracing.span("evaluate", queued=round(started_at - submitted_at, 6)):
+                return self.evaluate(code)
+        finally:
+            question_started.reset(token)
+            self.record("evaluate", time.perf_counter() - started_at)
+
+    def _evaluation_done(self, future):
+        # Also runs for a future cancelled before its evaluation started
+        with self.lock:
+            self.in_flight -= 1
+
+    def submit(self, code):
+        """Starts evaluating a snippet in the background and returns a Future for the answer."""
+        with self.lock:
+            self.in_flight += 1
+            depth = self.in_flight
+        self.record_depth("evaluate", depth)
+        if self.executor is not None:
+            # The worker runs in the question's context: its spans belong to the question
+            future = tracing.submit(self.executor, self._run_evaluation, code, time.perf_counter())
+        else:
+            future = Future()
+            try:
+                future.set_result(self._run_evaluation(code, time.perf_counter()))
+            except Exception as e:
+                future.set_exception(e)
+        future.add_done_callback(self._evaluation_done)
+        return future
+
+    def result(self, future, timeout=None):
+        """Waits for an evaluation; the time spent blocked here is what the overlap did not hide."""
+        start_time = time.perf_counter()
+        try:
+            return future.result(timeout=timeout)
+        finally:
+            self.record("wait for answer", time.perf_counter() - start_time)
+
+    def stats(self):
+        with self.lock:
+            stages = {}
+            for name, durations in self.timings.items():
+                depths = self.queue_depths.get(name, [])
+                stages[name] = {
+                    "count": len(durations),
+                    "total": sum(durations),
+                    "mean": sum(durations) / len(durations),
+                    "p50": percentile(durations, 0.5),
+                    "p95": percentile(durations, 0.95),
+                    "max_queue": max(depths) if depths else 0,
+                }
+            return {
+                "wall_clock": time.perf_counter() - self.started,
+                "in_flight": self.in_flight,
+                "stages": stages,
+            }
+
+    def print_report(self):
+        stats = self.stats()
+        print("\n=== Pipeline Timings ===")
+        print(f"Wall-clock time: {stats['wall_clock']:.2f} s")
+        print(f"{'Stage':<20}{'Count':>7}{'Total s':>10}{'Mean ms':>10}{'p95 ms':>10}{'Max queue':>11}")
+        for name, stage in sorted(stats["stages"].items(), key=lambda item: -item[1]["total"]):
+            print(f"{name:<20}{stage['count']:>7}{stage['total']:>10.2f}"
+                  f"{stage['mean'] * 1000:>10.1f}{stage['p95'] * 1000:>10.1f}{stage['max_queue']:>11}")
+        evaluate = stats["stages"].get("evaluate")
+        waited = stats["stages"].get("wait for answer")
+        if evaluate and waited:
+            hidden = max(evaluate["total"] - waited["total"], 0.0)
+            print(f"Evaluation time hidden behind page work: {hidden:.2f} s of {evaluate['total']:.2f} s")
+        print("=== End of Pipeline Timings ===\n")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,214 @@
+# Token buckets that keep Gemini requests within the API's per-minute quota.
+#
+# Every request the Gemini client sends first takes one request and its estimated tokens
+# from two buckets that refill at requests_per_minute and tokens_per_minute. A request
+# that finds them empty waits in a queue instead of being sent and failing with a rate
+# limit error, so under load the question loop simply waits a little longer for its
+# answer (backpressure) rather than skipping the question. Waiting requests are served
+# by deadline: a question that has been waiting longest goes first, and retries keep
+# their question's deadline. A rate limit error from the API anyway empties the buckets
+# for the retry delay, and hedged duplicates are only sent when budget is left over.
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+from pipeline import percentile
+
+# Characters per token of the prompt, and tokens reserved for the answer, until the
+# API reports the actual use
+CHARACTERS_PER_TOKEN = 4
+ANSWER_TOKENS = 64
+# Seconds added to the API's one minute window, as requests reach it a little after they leave
+WINDOW_MARGIN = 0.5
+
+
+def estimate_tokens(prompt):
+    """Tokens a request is expected to use: the prompt plus a short answer."""
+    return len(prompt) // CHARACTERS_PER_TOKEN + ANSWER_TOKENS
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets shared by every thread.
+
+    Args:
+        requests_per_minute: Requests allowed per minute, 0 for no limit
+        tokens_per_minute: Tokens allowed per minute, 0 for no limit
+        burst_seconds: Seconds of budget that may be spent at once after an idle period
+    """
+
+    def __init__(self, requests_per_minute=15, tokens_per_minute=1000000, burst_seconds=10.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_rate = requests_per_minute / 60
+        self.token_rate = tokens_per_minute / 60
+        self.request_capacity = max(1.0, self.request_rate * burst_seconds)
+        self.token_capacity = max(float(ANSWER_TOKENS), self.token_rate * burst_seconds)
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.updated = time.monotonic()
+        # No request is let through before this time (after a rate limit error)
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        # (deadline, arrival) of every waiting request, the earliest deadline first
+        self.waiters = []
+        self.arrivals = itertools.count()
+        # (time, tokens) of the requests let through in the last minute
+        self.granted = collections.deque()
+        # Seconds each request waited for budget
+        self.waits = []
+        self.counts = {"requests": 0, "waited": 0, "hedges let through": 0, "pauses": 0, "gave up": 0}
+        self.max_queue = 0
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+        while self.granted and self.granted[0][0] <= now - 60 - WINDOW_MARGIN:
+            self.granted.popleft()
+
+    def time_until(self, tokens, now):
+        # Seconds until both buckets hold enough for a request (a request larger than the
+        # token bucket waits for a full one and leaves it in debt)
+        waits = [self.paused_until - now]
+        if self.request_rate:
+            waits.append((1 - self.requests) / self.request_rate)
+            # The API counts requests per minute, which a refilled bucket alone can exceed
+            limit = max(1, int(self.requests_per_minute))
+            if len(self.granted) >= limit:
+                waits.append(self.granted[-limit][0] + 60 + WINDOW_MARGIN - now)
+        if self.token_rate:
+            waits.append((min(tokens, self.token_capacity) - self.tokens) / self.token_rate)
+        return max(0.0, *waits)
+
+    def take(self, tokens, now):
+        if self.request_rate:
+            self.requests -= 1
+        if self.token_rate:
+            self.tokens -= tokens
+        self.granted.append((now, tokens))
+        self.counts["requests"] += 1
+
+    def acquire(self, tokens, deadline=None, timeout=None):
+        """
+        Waits until a request of the given tokens fits in the budget, serving waiting
+        requests by earliest deadline.
+
+        Args:
+            deadline: time.monotonic() by which the request's question should be answered,
+                None for a minute from now
+            timeout: Seconds to wait at most, None to wait as long as it takes
+
+        Returns:
+            float: Seconds waited, None if the budget did not come within the timeout
+        """
+        start = time.monotonic()
+        entry = (deadline if deadline is not None else start + 60, next(self.arrivals))
+        with self.condition:
+            heapq.heappush(self.waiters, entry)
+            self.max_queue = max(self.max_queue, len(self.waiters))
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.refill(now)
+                    wait = None
+                    if self.waiters[0] == entry:
+                        wait = self.time_until(tokens, now)
+                        if wait <= 0:
+                            heapq.heappop(self.waiters)
+                            self.take(tokens, now)
+                            waited = now - start
+                            self.waits.append(waited)
+                            if waited > 0.001:
+                                self.counts["waited"] += 1
+                            # The next request in line may fit as well
+                            self.condition.notify_all()
+                            return waited
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            self.counts["gave up"] += 1
+                            return None
+                        wait = remaining if wait is None else min(wait, remaining)
+                    # Only the first in line sleeps until it fits, the others until it is served
+                    self.condition.wait(wait)
+            finally:
+                if entry in self.waiters:
+                    self.waiters.remove(entry)
+                    heapq.heapify(self.waiters)
+                    self.condition.notify_all()
+
+    def try_acquire(self, tokens):
+        """Takes the budget for an optional request (a hedge) only if nobody waits and it fits now."""
+        with self.condition:
+            now = time.monotonic()
+            self.refill(now)
+            if self.waiters or self.time_until(tokens, now) > 0:
+                return False
+            self.take(tokens, now)
+            self.counts["hedges let through"] += 1
+            return True
+
+    def settle(self, estimated, actual):
+        """Corrects the token bucket once the API reported the tokens a request really used."""
+        if not self.token_rate or not actual:
+            return
+        with self.condition:
+            self.tokens = min(self.token_capacity, self.tokens + estimated - actual)
+
+    def pause(self, seconds):
+        """Lets no request through for some seconds, after the API answered with a rate limit error."""
+        with self.condition:
+            now = time.monotonic()
+            self.refill(now)
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.requests = min(self.requests, 0.0)
+            self.counts["pauses"] += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: The counts, "queue" (requests waiting now), "max queue", requests and tokens
+                let through in the last minute with their share of the budgets ("request use",
+                "token use", None without a budget), and "wait p50"/"wait p95"/"wait max" seconds
+        """
+        with self.condition:
+            now = time.monotonic()
+            self.refill(now)
+            stats = dict(self.counts)
+            stats["queue"] = len(self.waiters)
+            stats["max queue"] = self.max_queue
+            stats["last minute requests"] = len(self.granted)
+            stats["last minute tokens"] = sum(tokens for _, tokens in self.granted)
+            stats["request use"] = (len(self.granted) / self.requests_per_minute
+                                    if self.requests_per_minute else None)
+            stats["token use"] = (stats["last minute tokens"] / self.tokens_per_minute
+                                  if self.tokens_per_minute else None)
+            stats["wait p50"] = percentile(self.waits, 0.5)
+            stats["wait p95"] = percentile(self.waits, 0.95)
+            stats["wait max"] = max(self.waits, default=0.0)
+            return stats
+
+    def print_report(self):
+        stats = self.stats()
+        if not stats["requests"]:
+            return
+        print("\n=== Gemini Rate Limit ===")
+        budgets = []
+        if self.requests_per_minute:
+            budgets.append(f"{self.requests_per_minute:g} requests/min")
+        if self.tokens_per_minute:
+            budgets.append(f"{self.tokens_per_minute:g} tokens/min")
+        print(f"Budget: {', '.join(budgets)}; last minute: {stats['last minute requests']} requests"
+              + (f" ({stats['request use']:.0%})" if stats["request use"] is not None else "")
+              + f", {stats['last minute tokens']} tokens"
+              + (f" ({stats['token use']:.0%})" if stats["token use"] is not None else ""))
+        print(f"Requests: {stats['requests']}, waited for budget: {stats['waited']} "
+              f"(p50 {stats['wait p50'] * 1000:.0f} ms, p95 {stats['wait p95'] * 1000:.0f} ms, "
+              f"max {stats['wait max'] * 1000:.0f} ms), longest queue: {stats['max queue']}")
+        print(f"Hedges within budget: {stats['hedges let through']}, pauses after rate limit errors: {stats['pauses']}, "
+              f"retries given up for lack of budget: {stats['gave up']}")
+        print("=== End of Gemini Rate Limit ===\n")
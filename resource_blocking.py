@@ -0,0 +1,115 @@
+# Blocking of page resources the bot never uses (images, fonts, media, analytics).
+#
+# Chrome is told through the DevTools protocol (Network.setBlockedURLs) to fail requests
+# matching blocked_url_patterns right away. Resource types like images and fonts have no
+# fixed URLs, so they are learned: when a request of a blocked type finishes loading and
+# its URL is not on the allowlist, the exact URL is added to Chrome's block list and every
+# later page that uses it skips it. The size and transfer time measured on that first
+# load are what each later block saves, reported per page type (login page, dashboard,
+# question page). Events come from the same performance log as the payload capture.
+import re
+import urllib.parse
+
+
+def page_type(url):
+    path = urllib.parse.urlsplit(url).path
+    if "authenticate" in path:
+        return "login"
+    if "dashboard" in path:
+        return "dashboard"
+    if "play" in path or "question" in path:
+        return "question"
+    return "other"
+
+
+class ResourceBlocker:
+    """
+    Blocks unneeded requests of a driver's pages and counts what it saved.
+
+    Args:
+        network_log: NetworkLog of the driver, the blocker adds itself as a listener
+        url_patterns: URL patterns to block from the start (* matches any characters)
+        resource_types: DevTools resource types to block once seen, e.g. "Image", "Font"
+        allowlist: Regular expressions of URLs that are never blocked
+    """
+
+    def __init__(self, network_log, url_patterns=(), resource_types=(), allowlist=()):
+        self.network_log = network_log
+        self.driver = network_log.driver
+        network_log.listeners.append(self)
+        self.url_patterns = list(url_patterns)
+        self.resource_types = set(resource_types)
+        self.allowlist = [re.compile(pattern) for pattern in allowlist]
+        # requestId -> (url, resource type, page type, start timestamp)
+        self.requests = {}
+        # URL -> (bytes, milliseconds) measured when it loaded before being blocked
+        self.learned = {}
+        self.changed = False
+        # page type -> {"blocked", "bytes", "ms", "loaded", "loaded_bytes"}
+        self.pages = {}
+
+    def allowed(self, url):
+        return any(pattern.search(url) for pattern in self.allowlist)
+
+    def apply(self):
+        """Sends the current block list (configured patterns and learned URLs) to Chrome."""
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.url_patterns + sorted(self.learned)})
+        self.changed = False
+
+    def page_stats(self, page):
+        return self.pages.setdefault(page, {"blocked": 0, "bytes": 0, "ms": 0.0, "loaded": 0, "loaded_bytes": 0})
+
+    def handle_events(self, messages):
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                url = params.get("request", {}).get("url", "")
+                self.requests[params["requestId"]] = (url, params.get("type", ""),
+                                                      page_type(params.get("documentURL", url)),
+                                                      params.get("timestamp", 0.0))
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.requests:
+                url, resource_type, page, started = self.requests.pop(params["requestId"])
+                size = params.get("encodedDataLength", 0)
+                stats = self.page_stats(page)
+                stats["loaded"] += 1
+                stats["loaded_bytes"] += size
+                if (resource_type in self.resource_types and url not in self.learned
+                        and not url.startswith("data:") and not self.allowed(url)):
+                    self.learned[url] = (size, (params.get("timestamp", started) - started) * 1000)
+                    self.changed = True
+            elif method == "Network.loadingFailed" and params.get("requestId") in self.requests:
+                url, _, page, _ = self.requests.pop(params["requestId"])
+                if params.get("blockedReason"):
+                    size, milliseconds = self.learned.get(url, (0, 0.0))
+                    stats = self.page_stats(page)
+                    stats["blocked"] += 1
+                    stats["bytes"] += size
+                    stats["ms"] += milliseconds
+        if self.changed:
+            try:
+                self.apply()
+            except Exception as e:
+                print(f"Could not update the blocked resources: {e}")
+
+    def update(self):
+        """Reads the new network events, e.g. after a page load."""
+        try:
+            self.network_log.poll()
+        except Exception as e:
+            print(f"Could not read the network log: {e}")
+
+    def stats(self):
+        return {"learned": len(self.learned), "pages": {page: dict(stats) for page, stats in self.pages.items()}}
+
+    def print_report(self):
+        print("\n=== Blocked Resources ===")
+        print(f"Block list: {len(self.url_patterns)} patterns, {len(self.learned)} learned URLs")
+        print(f"{'Page':<12}{'Blocked':>9}{'KB saved':>10}{'ms saved':>10}{'Loaded':>8}{'KB loaded':>11}")
+        for page, stats in sorted(self.pages.items()):
+            print(f"{page:<12}{stats['blocked']:>9}{stats['bytes'] / 1024:>10.1f}{stats['ms']:>10.0f}"
+                  f"{stats['loaded']:>8}{stats['loaded_bytes'] / 1024:>11.1f}")
+        # Requests that were blocked by a pattern before ever loading have no measured size
+        print("Savings are the size and transfer time each URL had when it last loaded")
+        print("=== End of Blocked Resources ===\n")
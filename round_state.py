@@ -0,0 +1,73 @@
+# Round state of a session and the recovery incidents that happened during it.
+#
+# When the site bounces back to the dashboard or the login page, the round that was
+# being played is gone and starting again begins a new round at its first question.
+# Rather than clicking Next through the questions that were already done (which submits
+# them empty and costs a page transition each), the state moves to question 1 of the new
+# round and the run loop answers from there. Every recovery is timed as its own incident.
+QUESTIONS_PER_ROUND = 10
+
+
+class RoundState:
+    """
+    Tracks which round and question a session is on, and its recoveries.
+
+    Args:
+        max_recoveries: Recoveries allowed per session before giving up
+    """
+
+    def __init__(self, max_recoveries=3):
+        self.max_recoveries = max_recoveries
+        self.round_id = 1
+        # Question of the current round shown on the page (1-based)
+        self.index = 1
+        # (round id, question index) of every answered question
+        self.answered = []
+        self.skipped = 0
+        # One dict per incident: round, question, kind, seconds, success
+        self.recoveries = []
+
+    @property
+    def finished(self):
+        return self.index > QUESTIONS_PER_ROUND
+
+    def advance(self, answered=True):
+        """Moves on to the next question after clicking Next."""
+        if answered:
+            self.answered.append((self.round_id, self.index))
+        else:
+            self.skipped += 1
+        self.index += 1
+
+    def can_recover(self):
+        return len(self.recoveries) < self.max_recoveries
+
+    def record_recovery(self, kind, seconds, success):
+        self.recoveries.append({
+            "round": self.round_id,
+            "question": self.index,
+            "kind": kind,
+            "seconds": seconds,
+            "success": success,
+        })
+        if success:
+            # The recovery started a new round, which is played from its first question
+            self.round_id += 1
+            self.index = 1
+
+    def stats(self):
+        return {
+            "rounds": self.round_id,
+            "answered": len(self.answered),
+            "skipped": self.skipped,
+            "recoveries": list(self.recoveries),
+        }
+
+    def print_report(self):
+        print("\n=== Round State ===")
+        print(f"Rounds started: {self.round_id}, Answered: {len(self.answered)}, Skipped: {self.skipped}")
+        for incident in self.recoveries:
+            outcome = "recovered" if incident["success"] else "failed"
+            print(f"Recovery from {incident['kind']} at round {incident['round']} question {incident['question']}: "
+                  f"{outcome} in {incident['seconds']:.2f} s")
+        print("=== End of Round State ===\n")
@@ -0,0 +1,147 @@
+# Plays every profile from settings.py in parallel, one Chrome session per worker process.
+#
+# Usage: python runner.py [rounds per profile]
+#
+# Each worker process sets up its own Gemini client and template cache and writes its
+# output to <runner_log_dir>/<worker>.log. The answer cache is the shared backend: all
+# workers open the same SQLite file, so an answer found by one session is reused by the
+# others. Aggregate throughput is printed when every session has finished. With
+# evaluation_service = "shared" the runner also serves the evaluation service, so workers
+# that get the same question at the same time share one Gemini request.
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+
+import settings
+
+settings.initialize()
+
+
+def init_worker(log_dir, budget_share):
+    # Every worker writes to its own log instead of interleaving on the console
+    worker_name = multiprocessing.current_process().name
+    log_file = open(os.path.join(log_dir, f"{worker_name}.log"), "a", buffering=1, encoding="utf-8")
+    sys.stdout = log_file
+    sys.stderr = log_file
+
+    import main
+
+    # Workers asking Gemini themselves each get their share of the per-minute budgets
+    main.GEMINI_REQUESTS_PER_MINUTE *= budget_share
+    main.GEMINI_TOKENS_PER_MINUTE *= budget_share
+    main.init_evaluation()
+    # Pool workers skip atexit handlers, a Finalize runs when the worker shuts down
+    multiprocessing.util.Finalize(None, main.close_evaluation, exitpriority=10)
+
+
+def run_task(task):
+    import main
+
+    profile, round_number = task
+    worker_name = multiprocessing.current_process().name
+    print(f"\n=== {profile['name']}: round {round_number} ===\n")
+    try:
+        result = main.run_session(profile)
+    except Exception as e:
+        print(f"Session failed: {e}")
+        result = {"profile": profile["name"], "answered": 0, "elapsed": 0.0, "startup": {}, "recoveries": [],
+                  "pipeline": None, "error": str(e)}
+    result["worker"] = worker_name
+    result["round"] = round_number
+    return result
+
+
+def print_summary(results, wall_clock):
+    print("\n=== Runner Summary ===")
+    answered = sum(result["answered"] for result in results)
+    failed = sum(1 for result in results if result.get("error"))
+    print(f"Sessions: {len(results)} ({failed} failed), Questions answered: {answered}")
+    print(f"Wall-clock time: {wall_clock:.1f} s, Throughput: {answered / wall_clock * 60:.1f} questions/min")
+
+    print(f"\n{'Profile':<20}{'Rounds':>8}{'Answered':>10}{'Mean round s':>14}")
+    by_profile = {}
+    for result in results:
+        by_profile.setdefault(result["profile"], []).append(result)
+    for name, profile_results in by_profile.items():
+        mean_elapsed = sum(result["elapsed"] for result in profile_results) / len(profile_results)
+        profile_answered = sum(result["answered"] for result in profile_results)
+        print(f"{name:<20}{len(profile_results):>8}{profile_answered:>10}{mean_elapsed:>14.1f}")
+
+    print(f"\n{'Worker':<28}{'Sessions':>10}{'Answered':>10}")
+    by_worker = {}
+    for result in results:
+        by_worker.setdefault(result["worker"], []).append(result)
+    for name, worker_results in sorted(by_worker.items()):
+        print(f"{name:<28}{len(worker_results):>10}{sum(result['answered'] for result in worker_results):>10}")
+
+    # Mean time before the first question, per startup phase
+    startup_phases = {}
+    for result in results:
+        for phase, seconds in result["startup"].items():
+            startup_phases.setdefault(phase, []).append(seconds)
+    if startup_phases:
+        print(f"\n{'Startup phase':<20}{'Mean ms':>10}")
+        for phase, durations in startup_phases.items():
+            print(f"{phase:<20}{sum(durations) / len(durations) * 1000:>10.0f}")
+
+    incidents = [incident for result in results for incident in result["recoveries"]]
+    if incidents:
+        recovered = [incident["seconds"] for incident in incidents if incident["success"]]
+        mean_recovery = f", mean recovery {sum(recovered) / len(recovered):.2f} s" if recovered else ""
+        print(f"\nRecoveries: {len(incidents)} ({len(recovered)} successful{mean_recovery})")
+
+    # Where the time went, summed over every session
+    stage_totals = {}
+    for result in results:
+        if result["pipeline"]:
+            for stage, stats in result["pipeline"]["stages"].items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + stats["total"]
+    if stage_totals:
+        print(f"\n{'Stage':<20}{'Total s':>10}")
+        for stage, total in sorted(stage_totals.items(), key=lambda item: -item[1]):
+            print(f"{stage:<20}{total:>10.1f}")
+    print("=== End of Runner Summary ===\n")
+
+
+def main():
+    import main as practiceme
+
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    profiles = [practiceme.complete_profile(profile, index) for index, profile in enumerate(settings.profiles)]
+    tasks = [(profile, round_number) for round_number in range(1, rounds + 1) for profile in profiles]
+    workers = max(1, min(settings.runner_workers, len(tasks)))
+
+    os.makedirs(settings.runner_log_dir, exist_ok=True)
+    print(f"Playing {len(tasks)} rounds for {len(profiles)} profiles with {workers} workers")
+    print(f"Site: {practiceme.BASE_URL}, Logs: {settings.runner_log_dir}/")
+
+    # Serve the shared evaluation before the workers start asking it
+    evaluation_server = None
+    if settings.evaluation_service == "shared":
+        evaluation_server = practiceme.start_evaluation_server()
+        print(f"Evaluation service: {evaluation_server.address}")
+
+    start_time = time.perf_counter()
+    results = []
+    # Spawned workers start clean instead of inheriting the parent's state
+    context = multiprocessing.get_context("spawn")
+    budget_share = 1.0 if evaluation_server is not None else 1.0 / workers
+    with context.Pool(workers, initializer=init_worker, initargs=(settings.runner_log_dir, budget_share)) as pool:
+        for result in pool.imap_unordered(run_task, tasks):
+            status = f"failed: {result['error']}" if result.get("error") else f"{result['answered']} answered"
+            print(f"{result['profile']} round {result['round']} ({result['worker']}): "
+                  f"{status} in {result['elapsed']:.1f} s")
+            results.append(result)
+        pool.close()
+        pool.join()
+
+    print_summary(results, time.perf_counter() - start_time)
+    if evaluation_server is not None:
+        evaluation_server.service.print_report()
+        evaluation_server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Saved login sessions, so runs and recoveries can skip the login form.
+#
+# After a successful form login the site's cookies and localStorage are written to
+# <session_dir>/<profile>.json. On the next start (or when a recovery lands on the login
+# page) they are put back through the DevTools protocol before the dashboard is opened:
+# cookies with Network.setCookies and localStorage with a script that runs before the
+# site's own scripts. If the dashboard shows up the session is still valid, otherwise the
+# file is discarded and the normal form login is used.
+#
+# The files contain the login cookies of the account, keep the folder private.
+import json
+import os
+import re
+import time
+
+from selenium.webdriver.common.by import By #type: ignore
+
+# Copies the saved localStorage into the page before the site's scripts read it
+STORAGE_SEED_SCRIPT = """
+(function () {
+    if (window.location.origin !== %(origin)s) {
+        return;
+    }
+    const items = %(items)s;
+    for (const key in items) {
+        window.localStorage.setItem(key, items[key]);
+    }
+})();
+"""
+
+LOCAL_STORAGE_SCRIPT = "return Object.assign({}, window.localStorage);"
+
+SINGLE_PLAYER_XPATH = "//span[text()='Single Player']"
+
+
+def session_state(driver):
+    """
+    Tells whether a restored session got through to the dashboard.
+
+    Returns:
+        str: "valid" on the dashboard, "stale" on the login page, "" while still loading
+    """
+    current_url = driver.current_url
+    if "authenticate" in current_url:
+        return "stale"
+    if "dashboard" in current_url and driver.find_elements(By.XPATH, SINGLE_PLAYER_XPATH):
+        return "valid"
+    return ""
+
+
+class SessionStore:
+    """
+    Saves and restores the login session of each profile.
+
+    Args:
+        directory: Folder holding one JSON file per profile
+        max_age: Seconds after which a saved session is not even tried
+    """
+
+    def __init__(self, directory, max_age=7 * 24 * 3600):
+        self.directory = directory
+        self.max_age = max_age
+
+    def path(self, profile_name):
+        safe_name = re.sub(r"[^\w.-]", "_", profile_name)
+        return os.path.join(self.directory, f"{safe_name}.json")
+
+    def load(self, profile_name):
+        """Returns the saved session of a profile, or None if there is none or it is too old."""
+        try:
+            with open(self.path(profile_name), encoding="utf-8") as session_file:
+                saved = json.load(session_file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - saved.get("saved_at", 0) > self.max_age:
+            self.discard(profile_name)
+            return None
+        return saved
+
+    def save(self, driver, profile_name):
+        """Stores the cookies and localStorage of the page the driver is on."""
+        saved = {
+            "saved_at": time.time(),
+            "origin": driver.execute_script("return window.location.origin;"),
+            "cookies": driver.get_cookies(),
+            "local_storage": driver.execute_script(LOCAL_STORAGE_SCRIPT) or {},
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first so parallel workers never read half a file
+        temporary_path = self.path(profile_name) + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as session_file:
+            json.dump(saved, session_file)
+        os.replace(temporary_path, self.path(profile_name))
+
+    def discard(self, profile_name):
+        try:
+            os.remove(self.path(profile_name))
+        except OSError:
+            pass
+
+
+def cdp_cookie(cookie):
+    # Selenium's cookie format to the DevTools protocol's CookieParam
+    converted = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly") if key in cookie}
+    if "expiry" in cookie:
+        converted["expires"] = cookie["expiry"]
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        converted["sameSite"] = cookie["sameSite"]
+    return converted
+
+
+def apply_session(driver, saved, dashboard_url):
+    """
+    Puts a saved session into the current tab's browser context and opens the dashboard.
+
+    Returns:
+        str: Identifier of the localStorage script, to pass to finish_apply
+    """
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": [cdp_cookie(cookie) for cookie in saved["cookies"]]})
+    script = STORAGE_SEED_SCRIPT % {
+        "origin": json.dumps(saved["origin"]),
+        "items": json.dumps(saved["local_storage"]),
+    }
+    script_id = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})["identifier"]
+    driver.get(dashboard_url)
+    return script_id
+
+
+def finish_apply(driver, script_id):
+    # Later page loads must keep whatever the site writes to localStorage itself
+    try:
+        driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+    except Exception:
+        pass
+
+
+def clear_session(driver):
+    # Drops what a stale session left behind, so the form login starts clean
+    try:
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear();")
+    except Exception:
+        pass
@@ -1,6 +1,21 @@
 # Enter your email, password and gemini api key here.
 def initialize():
-    global EMAIL,PASSWORD,GEMINI_API_KEY,topic_selection,difficulty
+    global EMAIL,PASSWORD,GEMINI_API_KEY,topic_selection,difficulty,use_local_evaluator
+    global use_answer_cache,answer_cache_path,answer_cache_size,use_template_cache
+    global page_load_timeout,question_load_timeout,wait_poll_interval,answer_submit_delay
+    global evaluation_workers,base_url,profiles,runner_workers,runner_log_dir
+    global chromedriver_path,chromedriver_cache_path,headless,chrome_user_data_dir,page_load_strategy
+    global use_saved_sessions,session_dir,session_max_age,max_recoveries
+    global evaluation_backend,stub_latency,stub_error_rate,trace_dir,verbose
+    global use_direct_mode,direct_endpoints,direct_pool_size
+    global capture_network_payloads,payload_url_pattern,payload_code_keys
+    global block_resources,blocked_resource_types,blocked_url_patterns,resource_allowlist
+    global harvest_questions,harvest_path,prewarm_from_harvest
+    global read_grading,grading_url_pattern,grading_result_keys,grading_feedback_selector
+    global gemini_model,gemini_timeout,gemini_retries,gemini_retry_backoff,gemini_hedging,gemini_hedge_min_delay
+    global gemini_streaming,gemini_requests_per_minute,gemini_tokens_per_minute
+    global evaluation_service,evaluation_service_port,evaluation_batch_size,evaluation_max_requests,evaluation_batch_window
+    global routing_min_accuracy,routing_min_samples,routing_solver_summary
 
     EMAIL="YOUR_EMAIL"
     PASSWORD="YOUR_PASSWORD"
@@ -13,7 +28,8 @@ def initialize():
     # OR a list of topic positions (1-15) to select specific topics by their position in the list
     # Example: [1, 3, 5] will select the 1st, 3rd, and 5th topics in the list
 
-    # Topic List:
+    # Topic List (the notes are from experience with Gemini; the answer router learns which
+    # answer tiers get each topic right from graded answers, see Answer routing below):
     """
     1. Length
     2. Index
@@ -36,4 +52,213 @@ def initialize():
 
     # Difficulty selection:
     # "beginner" or "intermediate"
-    difficulty = "beginner"
\ No newline at end of file
+    difficulty = "beginner"
+
+    # Local evaluation:
+    # True to run snippets with the built-in JavaScript interpreter first (exact and instant),
+    # only asking Gemini when a snippet uses syntax the interpreter does not support
+    use_local_evaluator = True
+
+    # Template cache (needs use_local_evaluator):
+    # True to reuse the compiled program of a known question shape for questions that only
+    # differ in their strings, numbers or variable names, and report the hit rate per topic
+    use_template_cache = True
+
+    # Answer cache:
+    # Answers are stored in a SQLite file and reused when the same snippet comes up again
+    # answer_cache_size is the number of answers kept (least recently used are evicted)
+    # Wrong answers can be removed with: python answer_cache.py invalidate <key prefix>
+    use_answer_cache = True
+    answer_cache_path = "answer_cache.sqlite3"
+    answer_cache_size = 5000
+
+    # Answer routing:
+    # Every snippet is answered by the first tier that can, from the cheapest: answer cache,
+    # template cache, local interpreter, Gemini. A tier is skipped for a topic once
+    # routing_min_samples of its answers were graded and fewer than routing_min_accuracy of
+    # them were correct (0 to never skip a tier). The gradings are learned from the harvest
+    # (see harvest_questions), from routing_solver_summary (a file written by
+    # python bench_solver.py --json, "" for none) and from the running session.
+    # python answer_router.py prints the rules learned so far
+    routing_min_accuracy = 0.9
+    routing_min_samples = 5
+    routing_solver_summary = ""
+
+    # Waiting:
+    # The bot moves on as soon as the page changes instead of sleeping for a fixed time.
+    # These are the upper bounds (in seconds) for page and question loads, and how often
+    # the page is checked while waiting
+    page_load_timeout = 10
+    question_load_timeout = 10
+    wait_poll_interval = 0.05
+
+    # Pause (in seconds) between typing the answer and clicking Next, 0 for none
+    answer_submit_delay = 0
+
+    # Pipelining:
+    # Snippets are evaluated in background threads while the browser checks the page and
+    # looks up the answer field. Number of evaluation threads, 0 to evaluate one step at a time
+    evaluation_workers = 2
+
+    # Site:
+    # Address of the PracticeMe site, change it to test against a local stand-in site
+    base_url = "https://practiceme.vercel.app"
+
+    # Profiles:
+    # Each profile is an account with its own topics and difficulty (missing keys use the
+    # settings above). main.py plays the first profile, runner.py plays all of them.
+    # Example: {"name": "second", "email": "...", "password": "...", "topic_selection": [1, 2]}
+    profiles = [
+        {"name": "main", "email": EMAIL, "password": PASSWORD,
+         "topic_selection": topic_selection, "difficulty": difficulty},
+    ]
+
+    # Runner (python runner.py):
+    # Number of browser sessions played at the same time (one Chrome per worker process),
+    # and the folder where every profile writes its log
+    runner_workers = 2
+    runner_log_dir = "logs"
+
+    # Browser startup:
+    # chromedriver_path pins a ChromeDriver binary (no download or version check at all).
+    # When it is empty, the driver found online is remembered in chromedriver_cache_path
+    # and reused on the next runs without any network access
+    chromedriver_path = ""
+    chromedriver_cache_path = ".chromedriver_path"
+    # True to run Chrome without a window
+    headless = False
+    # Folder for persistent Chrome profiles (one per settings profile), "" for a fresh
+    # profile every run. Keeps the browser cache and the login between runs
+    chrome_user_data_dir = ""
+    # "eager" continues as soon as a page's HTML is ready, "normal" waits for every resource
+    page_load_strategy = "eager"
+
+    # Saved sessions:
+    # True to save the login (cookies and local storage) after logging in and reuse it on
+    # the next runs and recoveries, the login form is only used when it has expired.
+    # session_max_age is in seconds. The files contain your login, keep the folder private
+    use_saved_sessions = True
+    session_dir = "sessions"
+    session_max_age = 7 * 24 * 3600
+
+    # Recovery:
+    # When the site sends the bot back to the dashboard or login page, a new round is started
+    # and answered from its first question. Number of recoveries allowed per session
+    max_recoveries = 3
+
+    # Evaluation backend:
+    # "gemini" asks the Gemini API, "stub" answers from snippet_corpus.py without network
+    # access (for the local mock site and benchmarks). stub_latency is the mean seconds per
+    # answer and stub_error_rate the fraction of answers the stub gets wrong on purpose
+    evaluation_backend = "gemini"
+    stub_latency = 0.8
+    stub_error_rate = 0.0
+
+    # Tracing and output:
+    # Every run writes its phases (login, selection, extraction, Gemini, answer entry,
+    # recoveries...) as JSON lines to trace_dir, "" to turn it off. Summarize them with
+    # python tracing.py. True for verbose output (full Gemini prompts and raw page text)
+    trace_dir = "traces"
+    verbose = False
+
+    # Direct mode:
+    # True to fetch questions and submit answers through the site's JSON endpoints once the
+    # browser has logged in, instead of driving the question pages. The browser is used
+    # again when the endpoints do not answer as expected. {round} is replaced by the round id
+    use_direct_mode = False
+    direct_endpoints = {
+        "start": "/api/rounds",
+        "question": "/api/rounds/{round}/question",
+        "answer": "/api/rounds/{round}/answer",
+    }
+    # Keep-alive connections the direct mode keeps open
+    direct_pool_size = 4
+
+    # Network payloads:
+    # True to read each question's snippet from the JSON response the page receives
+    # (through Chrome's DevTools network events) instead of scraping the highlighted code.
+    # payload_url_pattern is a regular expression for the URLs of question responses and
+    # payload_code_keys the JSON keys that may hold the snippet. The page is still scraped
+    # when no payload was seen for a question
+    capture_network_payloads = False
+    payload_url_pattern = r"/api/rounds/\d+/question"
+    payload_code_keys = ["code", "snippet"]
+
+    # Resource blocking:
+    # True to stop pages from loading what the bot never uses. Requests of the resource
+    # types below are blocked from their second load on (the first load measures what
+    # blocking them saves), URLs matching blocked_url_patterns (* is a wildcard) are always
+    # blocked, and URLs matching a regular expression in resource_allowlist never are
+    block_resources = True
+    blocked_resource_types = ["Image", "Font", "Media"]
+    blocked_url_patterns = [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*/_vercel/insights/*",
+        "*/_vercel/speed-insights/*",
+    ]
+    resource_allowlist = [r"/api/"]
+
+    # Harvest:
+    # True to append every answered question (snippet, topic, difficulty, answer and, when
+    # known, whether the site graded it correct) to harvest_path. With prewarm_from_harvest
+    # the answers graded correct are put into the answer cache when a run starts
+    harvest_questions = False
+    harvest_path = "harvest/questions.jsonl"
+    prewarm_from_harvest = True
+
+    # Grading:
+    # True to read whether the site graded each answer correct, from the JSON response of
+    # the answer request (grading_url_pattern, grading_result_keys) when the network events
+    # are recorded, else from the text of the page's feedback element (only feedback that is
+    # nothing but the verdict, like "Correct!" or "Incorrect", grades). Answers graded
+    # correct are marked verified in the answer cache, wrong ones are removed and the
+    # snippet is evaluated again next time without accepting the same answer
+    read_grading = True
+    grading_url_pattern = r"/api/rounds/\d+/answer"
+    grading_result_keys = ["correct", "isCorrect"]
+    grading_feedback_selector = "#feedback, .feedback"
+
+    # Gemini client:
+    # The model is created once and shared. Each answer may take gemini_timeout seconds at
+    # most; calls failing with a transient error (rate limit, server error, timeout) are
+    # retried up to gemini_retries times, waiting gemini_retry_backoff seconds (doubled
+    # every time) in between. With gemini_hedging a duplicate request is sent when a call
+    # is slower than 95% of the recent ones (and than gemini_hedge_min_delay seconds), and
+    # the first answer is used
+    gemini_model = "gemini-1.5-flash"
+    gemini_timeout = 20
+    gemini_retries = 2
+    gemini_retry_backoff = 0.5
+    gemini_hedging = True
+    gemini_hedge_min_delay = 1.0
+
+    # Gemini rate limit:
+    # Every request waits until it fits in these per-minute budgets (0 for no limit)
+    # instead of failing with a rate limit error; the question loop waits for the answer
+    # meanwhile. The defaults are the free tier of gemini-1.5-flash. runner.py splits them
+    # between its workers unless they share the evaluation service. Not applied to the
+    # offline stub
+    gemini_requests_per_minute = 15
+    gemini_tokens_per_minute = 1000000
+
+    # Streaming Gemini answers:
+    # The answer is read while Gemini writes it and typed into the input field as it
+    # arrives. Reading stops as soon as the answer line is complete when the snippet can
+    # only print one line (one console.log outside any loop or function). Streamed calls
+    # are retried before the first text arrives only, and are not hedged
+    gemini_streaming = False
+
+    # Evaluation service:
+    # Sessions asking for the same snippet while it is being evaluated share one Gemini
+    # request. "" turns this off, "local" shares the requests of the sessions of one process
+    # (multisession.py), "shared" those of every process through a local server on
+    # evaluation_service_port, started by runner.py or with python eval_service.py. At most
+    # evaluation_max_requests requests run at once; snippets waiting for one are sent
+    # together, up to evaluation_batch_size per prompt, and a request waits up to
+    # evaluation_batch_window seconds for more snippets. Takes precedence over streaming
+    evaluation_service = ""
+    evaluation_service_port = 8765
+    evaluation_batch_size = 4
+    evaluation_max_requests = 2
+    evaluation_batch_window = 0.0
@@ -0,0 +1,107 @@
+# Snippets in the style of PracticeMe questions, with their expected console output.
+#
+# Used by the local mock site to serve questions and by the benchmarks to measure the
+# answer paths offline. Every expected output was checked with Node.js.
+from topics import TOPICS
+
+CORPUS = {
+    "Length": [
+        ('let word = "banana";\nconsole.log(word.length);', "6"),
+        ("let items = [3, 7, 1, 9];\nconsole.log(items.length);", "4"),
+        ('let text = "hello world";\nconsole.log(text.length - 1);', "10"),
+        ('let empty = "";\nconsole.log(empty.length);', "0"),
+    ],
+    "Index": [
+        ('let fruit = "apple";\nconsole.log(fruit[2]);', "p"),
+        ("let nums = [10, 20, 30, 40];\nconsole.log(nums[3]);", "40"),
+        ('let name = "Sarah";\nconsole.log(name[0]);', "S"),
+        ('let letters = ["a", "b", "c"];\nconsole.log(letters[5]);', "undefined"),
+    ],
+    "Index Operations": [
+        ('let word = "javascript";\nconsole.log(word[word.length - 1]);', "t"),
+        ("let nums = [4, 8, 15, 16];\nconsole.log(nums[1] + nums[2]);", "23"),
+        ('let text = "coding";\nlet i = 2;\nconsole.log(text[i * 2]);', "n"),
+        ("let arr = [5, 10, 15];\nconsole.log(arr[arr.length - 2] * 2);", "20"),
+    ],
+    "Methods": [
+        ('let s = "Hello";\nconsole.log(s.toUpperCase());', "HELLO"),
+        ('let words = ["red", "green", "blue"];\nconsole.log(words.join("-"));', "red-green-blue"),
+        ('let s = "practice";\nconsole.log(s.slice(2, 5));', "act"),
+        ("let nums = [3, 1, 2];\nnums.push(7);\nconsole.log(nums.indexOf(7));", "3"),
+    ],
+    "For Loops": [
+        ("let total = 0;\nfor (let i = 1; i <= 4; i++) {\n  total += i;\n}\nconsole.log(total);", "10"),
+        ('let result = "";\nfor (let i = 0; i < 3; i++) {\n  result += i;\n}\nconsole.log(result);', "012"),
+        ("let count = 0;\nfor (let i = 10; i > 0; i -= 3) {\n  count++;\n}\nconsole.log(count);", "4"),
+        ('let word = "loop";\nlet reversed = "";\nfor (let i = word.length - 1; i >= 0; i--) {\n  reversed += word[i];\n}\nconsole.log(reversed);', "pool"),
+    ],
+    "While Loops": [
+        ("let n = 1;\nwhile (n < 50) {\n  n *= 3;\n}\nconsole.log(n);", "81"),
+        ("let i = 0;\nlet sum = 0;\nwhile (i < 5) {\n  sum += i;\n  i++;\n}\nconsole.log(sum);", "10"),
+        ("let x = 100;\nlet steps = 0;\nwhile (x > 1) {\n  x = Math.floor(x / 2);\n  steps++;\n}\nconsole.log(steps);", "6"),
+        ('let s = "";\nlet k = 3;\nwhile (k > 0) {\n  s += k;\n  k--;\n}\nconsole.log(s);', "321"),
+    ],
+    "Function Scopes": [
+        ("let x = 5;\nfunction change() {\n  let x = 10;\n  return x;\n}\nchange();\nconsole.log(x);", "5"),
+        ("let count = 0;\nfunction increment() {\n  count++;\n}\nincrement();\nincrement();\nconsole.log(count);", "2"),
+        ("function outer() {\n  let a = 3;\n  function inner() {\n    return a * 2;\n  }\n  return inner();\n}\nconsole.log(outer());", "6"),
+        ("var y = 1;\nfunction test() {\n  y = 7;\n}\ntest();\nconsole.log(y);", "7"),
+    ],
+    "Function Parameters": [
+        ("function add(a, b) {\n  return a + b;\n}\nconsole.log(add(2, 3));", "5"),
+        ('function greet(name, greeting = "Hi") {\n  return greeting + " " + name;\n}\nconsole.log(greet("Sam"));', "Hi Sam"),
+        ("function f(a, b) {\n  return b;\n}\nconsole.log(f(1));", "undefined"),
+        ('const multiply = (x, y) => x * y;\nconsole.log(multiply(4, "3"));', "12"),
+    ],
+    "Boolean": [
+        ("let a = 5;\nlet b = 8;\nconsole.log(a > b || b === 8);", "true"),
+        ("let t = true;\nconsole.log(!t && false);", "false"),
+        ('let x = "5";\nconsole.log(x == 5);', "true"),
+        ("let n = 0;\nconsole.log(Boolean(n) === false);", "true"),
+    ],
+    "Shorthand": [
+        ("let x = 10;\nx += 5;\nx *= 2;\nconsole.log(x);", "30"),
+        ('let s = "ab";\ns += "cd";\nconsole.log(s);', "abcd"),
+        ("let n = 17;\nn %= 5;\nconsole.log(n);", "2"),
+        ("let y = 100;\ny -= 40;\ny /= 3;\nconsole.log(y);", "20"),
+    ],
+    "Arithmetic Precedence": [
+        ("let result = 2 + 3 * 4;\nconsole.log(result);", "14"),
+        ("let v = (10 - 4) / 2 + 1;\nconsole.log(v);", "4"),
+        ("let r = 2 ** 3 ** 2;\nconsole.log(r);", "512"),
+        ("let m = 20 % 6 * 3 - 1;\nconsole.log(m);", "5"),
+    ],
+    "Post/Pre In/Decrement": [
+        ("let a = 5;\nlet b = a++;\nconsole.log(b);", "5"),
+        ("let a = 5;\nlet b = ++a + a++;\nconsole.log(b);", "12"),
+        ("let i = 3;\ni--;\nconsole.log(--i);", "1"),
+        ("let x = 1;\nlet y = x++ + ++x;\nconsole.log(x + y);", "7"),
+    ],
+    "Switch": [
+        ('let day = 3;\nlet name;\nswitch (day) {\n  case 1:\n    name = "Mon";\n    break;\n  case 3:\n    name = "Wed";\n    break;\n  default:\n    name = "Other";\n}\nconsole.log(name);', "Wed"),
+        ('let n = 2;\nlet out = "";\nswitch (n) {\n  case 1:\n    out += "a";\n  case 2:\n    out += "b";\n  case 3:\n    out += "c";\n    break;\n  default:\n    out += "d";\n}\nconsole.log(out);', "bc"),
+        ('let grade = "B";\nswitch (grade) {\n  case "A":\n    console.log("Great");\n    break;\n  case "B":\n    console.log("Good");\n    break;\n  default:\n    console.log("Try again");\n}', "Good"),
+        ('let v = "5";\nlet result = "none";\nswitch (v) {\n  case 5:\n    result = "number";\n    break;\n  case "5":\n    result = "string";\n    break;\n}\nconsole.log(result);', "string"),
+    ],
+    "Do...While": [
+        ("let i = 0;\ndo {\n  i += 2;\n} while (i < 7);\nconsole.log(i);", "8"),
+        ("let n = 10;\ndo {\n  n++;\n} while (n < 5);\nconsole.log(n);", "11"),
+        ('let s = "";\nlet k = 1;\ndo {\n  s += k;\n  k *= 2;\n} while (k < 10);\nconsole.log(s);', "1248"),
+        ("let count = 0;\nlet x = 3;\ndo {\n  count++;\n  x--;\n} while (x > 0);\nconsole.log(count);", "3"),
+    ],
+    "If/Else": [
+        ('let age = 16;\nif (age >= 18) {\n  console.log("adult");\n} else {\n  console.log("minor");\n}', "minor"),
+        ('let n = 15;\nif (n % 3 === 0 && n % 5 === 0) {\n  console.log("FizzBuzz");\n} else if (n % 3 === 0) {\n  console.log("Fizz");\n} else {\n  console.log(n);\n}', "FizzBuzz"),
+        ('let score = 72;\nlet grade;\nif (score > 80) {\n  grade = "A";\n} else if (score > 70) {\n  grade = "B";\n} else {\n  grade = "C";\n}\nconsole.log(grade);', "B"),
+        ('let x = 0;\nif (x) {\n  console.log("yes");\n} else {\n  console.log("no");\n}', "no"),
+    ],
+}
+
+
+def corpus_for_positions(positions):
+    """
+    Returns (topic, code, expected output) for the topics at the given selector positions,
+    or for every topic when no valid position is given.
+    """
+    names = [TOPICS[position] for position in positions if position in TOPICS] or list(TOPICS.values())
+    return [(name, code, expected) for name in names for code, expected in CORPUS[name]]
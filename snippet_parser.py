@@ -0,0 +1,100 @@
+# Rebuilds the exact snippet source from the syntax highlighter's markup.
+#
+# The question code is rendered by react-syntax-highlighter: a <code> element holding one
+# span per line (or a flat list of tokens), a line number span at the start of every line
+# and token spans whose text is the source itself. Taking the text of everything but the
+# line numbers, in document order, gives the source back character for character, so
+# there is no need to guess where the code starts from keywords or to strip numbers with
+# regular expressions. The markup is read with a few precompiled substitutions that
+# run over the whole string at once, without a Python step per line or per token.
+import html
+import re
+
+CODE_START_PATTERN = re.compile(r"<code\b[^>]*>", re.I)
+# The rest of a line number element from its class name on. innerHTML always quotes
+# attributes with double quotes, and patterns starting with the class name let the regex
+# engine jump straight to it instead of trying every tag.
+LINE_NUMBER_CLASSES = ("linenumber", "react-syntax-highlighter-line-number")
+LINE_NUMBER_PATTERNS = [re.compile(re.escape(name) + r"""[^"<>]*"(?:\s+[\w:-]+="[^"]*")*\s*>[^<]*</(?:span|td|div)>""")
+                        for name in LINE_NUMBER_CLASSES]
+# Ends the class attribute and the tag cut by a line number pattern, leaving a placeholder
+LINE_NUMBER_REPLACEMENT = '">\x00'
+BREAK_PATTERN = re.compile(r"<br\b[^>]*>", re.I)
+TAG_PATTERN = re.compile(r"<[^>]*>|<!--.*?-->", re.S)
+# Line starts that are not already at the start of a line
+LINE_START_PATTERN = re.compile(r"(?<=[^\n])\x00")
+# Placeholder left where a line number was
+LINE_START = "\x00"
+
+QUESTION_PREFIXES = ("What is the output", "What would be the output")
+
+
+def strip_question(source):
+    # Drops the question line if it was rendered inside the code element
+    if source.startswith(QUESTION_PREFIXES):
+        return source.partition("\n")[2].lstrip("\n")
+    return source
+
+
+def rebuild_from_tokens(tokens):
+    """
+    Rebuilds the source from (is line number, class, text) triples in document order, as
+    returned by the page snapshot script.
+    """
+    parts = []
+    at_line_start = True
+    for is_line_number, _, text in tokens:
+        if is_line_number:
+            # Line numbers mark the start of a new line when lines are wrapped in elements
+            if not at_line_start:
+                parts.append("\n")
+                at_line_start = True
+            continue
+        if text:
+            parts.append(text)
+            at_line_start = text.endswith("\n")
+    return strip_question("".join(parts).strip("\n"))
+
+
+def markup_text(markup):
+    """
+    Returns the text of highlighted markup without its line numbers, with a line break
+    where a line number started a line that did not already start with one.
+    """
+    for name, pattern in zip(LINE_NUMBER_CLASSES, LINE_NUMBER_PATTERNS):
+        if name in markup:
+            markup = pattern.sub(LINE_NUMBER_REPLACEMENT, markup)
+    if "<br" in markup or "<BR" in markup:
+        markup = BREAK_PATTERN.sub("\n", markup)
+    text = TAG_PATTERN.sub("", markup)
+    if LINE_START in text:
+        text = LINE_START_PATTERN.sub("\n", text).replace(LINE_START, "")
+    if "&" in text:
+        text = html.unescape(text)
+    return text
+
+
+def parse_highlighted_html(markup):
+    """
+    Rebuilds the snippet from the innerHTML of the code element or of #code-snippet. Only
+    the first <code> element holding code is read when there is one: the question text
+    sits outside of it, and without wrapped lines the line numbers get a <code> of their own.
+
+    Returns:
+        str: The source, "" if the markup holds no code
+    """
+    position = 0
+    while True:
+        code_start = CODE_START_PATTERN.search(markup, position)
+        if code_start is None:
+            # Without a code element the markup is the code element's own
+            if position:
+                return ""
+            return strip_question(markup_text(markup).strip("\n"))
+        code_end = markup.find("</code", code_start.end())
+        if code_end < 0:
+            code_end = len(markup)
+        source = markup_text(markup[code_start.end():code_end]).strip("\n")
+        if source.strip():
+            return strip_question(source)
+        position = code_end
@@ -0,0 +1,141 @@
+# Offline stand-in for the Gemini API, used with the local mock site and the benchmarks.
+#
+# StubModel has the same generate_content(prompt) -> response.text interface as
+# genai.GenerativeModel. It answers from the snippet corpus (looked up by the normalized
+# snippet found in the prompt) after a delay that imitates a remote model, so runs can be
+# measured end to end without network access or an API key. It can also fail like the
+# API does (rate limits, slow outliers, request timeouts) to exercise gemini_client.py,
+# and enforce a requests-per-minute quota like the API's free tier.
+# With stream=True the answer comes in chunks like the API streams it: the first one after
+# FIRST_TOKEN_SHARE of the delay, the answer line by the end of ANSWER_SHARE of it, and the
+# end of the response (an empty last chunk) once the whole delay has passed. A prompt
+# holding several snippets (a batch from eval_service.py) is answered under the batch's
+# headers, taking BATCH_SNIPPET_SHARE of the delay longer for every snippet after the first.
+import collections
+import random
+import re
+import threading
+import time
+
+from answer_cache import snippet_key
+from eval_service import BATCH_HEADER
+from snippet_corpus import CORPUS
+
+PROMPT_CODE_PATTERN = re.compile(r"```javascript\s*\n(.*?)```", re.S)
+
+# Shares of a call's delay after which the first chunk and the complete answer arrive
+FIRST_TOKEN_SHARE = 0.4
+ANSWER_SHARE = 0.7
+# Characters per streamed chunk
+CHUNK_SIZE = 4
+# Extra share of the delay per additional snippet of a batch prompt
+BATCH_SNIPPET_SHARE = 0.25
+
+KNOWN_ANSWERS = {snippet_key(code): expected for items in CORPUS.values() for code, expected in items}
+
+
+class StubUnavailable(Exception):
+    """Transient failure of the stub, like a 503 or 429 from the API."""
+    code = 503
+
+
+class StubRateLimited(Exception):
+    """More requests than the stub's per-minute quota, like a 429 from the API."""
+    code = 429
+
+
+class StubDeadlineExceeded(Exception):
+    """The request took longer than its request_options timeout."""
+    code = 504
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    Answers prompts like a Gemini model would, without leaving the machine.
+
+    Args:
+        latency: Mean seconds per call (each call takes 50% to 150% of it)
+        error_rate: Fraction of answers that are made wrong on purpose, like model mistakes
+        seed: Seed for the latency and error draws
+        failure_rate: Fraction of calls that fail with a transient error
+        slow_rate: Fraction of calls that take slow_factor times longer (the slow tail)
+        slow_factor: How much longer a slow call takes
+        requests_per_minute: Requests accepted in any minute, 0 for no quota
+    """
+
+    def __init__(self, latency=0.8, error_rate=0.0, seed=None, failure_rate=0.0, slow_rate=0.0, slow_factor=10.0,
+                 requests_per_minute=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.calls = 0
+        self.requests_per_minute = requests_per_minute
+        # Times of the requests of the last minute, and the requests turned away for the quota
+        self.recent = collections.deque()
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+    def check_quota(self):
+        if not self.requests_per_minute:
+            return
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and self.recent[0] <= now - 60:
+                self.recent.popleft()
+            if len(self.recent) >= self.requests_per_minute:
+                self.rate_limited += 1
+                raise StubRateLimited(f"quota of {self.requests_per_minute} requests per minute exceeded")
+            self.recent.append(now)
+
+    def generate_content(self, prompt, request_options=None, stream=False):
+        self.calls += 1
+        self.check_quota()
+        codes = [code.strip() for code in PROMPT_CODE_PATTERN.findall(prompt)] or [""]
+        delay = self.latency * self.random.uniform(0.5, 1.5) * (1 + BATCH_SNIPPET_SHARE * (len(codes) - 1))
+        if self.random.random() < self.slow_rate:
+            delay *= self.slow_factor
+        if self.random.random() < self.failure_rate:
+            # Errors come back quicker than answers
+            time.sleep(delay / 4)
+            raise StubUnavailable("the stub model is overloaded, try again later")
+        timeout = (request_options or {}).get("timeout")
+        answers = []
+        for code in codes:
+            answer = KNOWN_ANSWERS.get(snippet_key(code), "undefined")
+            if self.random.random() < self.error_rate:
+                answer = f"{answer} (wrong)"
+            answers.append(answer)
+        if len(answers) > 1:
+            answer = "\n".join(f"{BATCH_HEADER.format(number=number)}\n{answer}" for number, answer in enumerate(answers, 1))
+        else:
+            answer = answers[0]
+        if stream:
+            return self.stream_chunks(answer, delay, timeout)
+        if timeout is not None and delay > timeout:
+            time.sleep(max(0.0, timeout))
+            raise StubDeadlineExceeded(f"no response within {timeout:.2f} s")
+        time.sleep(delay)
+        return StubResponse(answer)
+
+    def stream_chunks(self, answer, delay, timeout):
+        # Yields the answer in CHUNK_SIZE pieces spread between the first token and the
+        # answer share of the delay, then an empty chunk at the end of the delay
+        start_time = time.monotonic()
+        text = answer + "\n"
+        pieces = [text[index:index + CHUNK_SIZE] for index in range(0, len(text), CHUNK_SIZE)]
+        times = [delay * (FIRST_TOKEN_SHARE + (ANSWER_SHARE - FIRST_TOKEN_SHARE) * index / max(1, len(pieces) - 1))
+                 for index in range(len(pieces))]
+        for piece, at in zip(pieces + [""], times + [delay]):
+            if timeout is not None and at > timeout:
+                time.sleep(max(0.0, start_time + timeout - time.monotonic()))
+                raise StubDeadlineExceeded(f"no response within {timeout:.2f} s")
+            time.sleep(max(0.0, start_time + at - time.monotonic()))
+            yield StubResponse(piece)
@@ -0,0 +1,221 @@
+# Structural template cache for questions that only differ in their literals.
+#
+# Many PracticeMe questions are the same program with a different string, different
+# operands or different variable names. The canonicalizer alpha-renames identifiers and
+# replaces literals with placeholders, so all those variants share one shape key. The
+# first variant of a shape is compiled by js_interpreter into a Program whose literals
+# live in a separate table; later variants are answered by running that Program with
+# their own literals, without parsing again and without calling Gemini.
+import threading
+from collections import OrderedDict
+
+import js_interpreter
+from topics import classify_topic
+
+LITERAL_PLACEHOLDERS = {"num": "<num>", "str": "<str>"}
+
+# Names that keep their meaning across variants and must not be renamed
+JS_KEYWORDS = {
+    "break", "case", "catch", "const", "continue", "default", "delete", "do", "else",
+    "false", "finally", "for", "function", "if", "in", "instanceof", "let", "new", "null",
+    "of", "return", "switch", "this", "throw", "true", "try", "typeof", "var", "void",
+    "while", "arguments",
+}
+RESERVED_NAMES = JS_KEYWORDS | set(js_interpreter.BUILTINS)
+
+
+def _canonical_parts(tokens, renames, parts):
+    previous = None
+    for index, token in enumerate(tokens):
+        kind = token.kind
+        if kind == "eof":
+            break
+        if kind in LITERAL_PLACEHOLDERS:
+            parts.append(LITERAL_PLACEHOLDERS[kind])
+        elif kind == "template":
+            quasis, expressions = token.value
+            parts.append("`" + repr(quasis[0]))
+            for expression, quasi in zip(expressions, quasis[1:]):
+                parts.append("${")
+                _canonical_parts(expression, renames, parts)
+                parts.append("}" + repr(quasi))
+            parts.append("`")
+        elif kind == "name":
+            name = token.value
+            following = tokens[index + 1]
+            is_property = previous is not None and previous.kind == "punct" and previous.value in (".", "?.")
+            is_key = following.kind == "punct" and following.value == ":"
+            if name in RESERVED_NAMES or is_property or is_key:
+                parts.append(name)
+            else:
+                if name not in renames:
+                    renames[name] = f"v{len(renames)}"
+                parts.append(renames[name])
+        else:
+            parts.append(token.value)
+        previous = token
+
+
+def canonicalize(code):
+    """
+    Reduces a snippet to its shape.
+
+    Returns:
+        tuple: (shape key, tokens, literal values, original identifier names in order)
+    """
+    tokens, literals = js_interpreter.tokenize(code)
+    renames = {}
+    parts = []
+    _canonical_parts(tokens, renames, parts)
+    return " ".join(parts), tokens, literals, tuple(renames)
+
+
+class Template:
+    __slots__ = ("program", "names", "uses")
+
+    def __init__(self, program, names):
+        self.program = program
+        # Identifier names of the variant the template was compiled from
+        self.names = names
+        self.uses = 0
+
+
+class TemplateCache:
+    """
+    Keeps one compiled Program per snippet shape and reports hit rates per topic.
+
+    Args:
+        max_templates: Number of shapes kept in memory (least recently used are dropped)
+    """
+
+    def __init__(self, max_templates=2000):
+        self.max_templates = max_templates
+        self.templates = OrderedDict()
+        # Shapes known from previous runs, compiled the first time they are needed
+        self.pending = {}
+        # topic -> {"lookups", "hits", "compiled", "unsupported"}
+        self.topic_stats = {}
+        # Templates are shared by the evaluation threads of the pipeline
+        self.lock = threading.RLock()
+
+    def seed(self, snippets):
+        """Registers the shapes of already answered snippets (e.g. from the answer cache)."""
+        for code in snippets:
+            try:
+                shape = canonicalize(code)[0]
+            except js_interpreter.UnsupportedSyntax:
+                continue
+            if shape not in self.templates:
+                self.pending[shape] = code
+
+    def forget(self, code):
+        """Drops the template of a snippet's shape, e.g. after its answer was graded wrong."""
+        try:
+            shape = canonicalize(code)[0]
+        except js_interpreter.UnsupportedSyntax:
+            return False
+        with self.lock:
+            self.pending.pop(shape, None)
+            return self.templates.pop(shape, None) is not None
+
+    def record(self, topic, outcome):
+        stats = self.topic_stats.setdefault(topic, {"lookups": 0, "hits": 0, "compiled": 0, "unsupported": 0})
+        stats["lookups"] += 1
+        if outcome:
+            stats[outcome] += 1
+
+    def store(self, shape, program, names):
+        self.templates[shape] = Template(program, names)
+        self.templates.move_to_end(shape)
+        while len(self.templates) > self.max_templates:
+            self.templates.popitem(last=False)
+
+    def solve(self, code, reuse=True, compile_new=True):
+        """
+        Answers a snippet from its shape's template, compiling a new template if needed.
+
+        Args:
+            reuse: False to compile the snippet even if its shape has a template
+            compile_new: False to only answer from an existing template
+
+        Returns:
+            tuple: (console output, True if an existing template was reused), (None, False)
+                if compile_new is False and no template applies
+
+        Raises:
+            js_interpreter.UnsupportedSyntax: if the snippet cannot be evaluated locally
+        """
+        with self.lock:
+            return self._solve(code, reuse, compile_new)
+
+    def _solve(self, code, reuse=True, compile_new=True):
+        topic = classify_topic(code)
+        try:
+            shape, tokens, literals, names = canonicalize(code)
+        except js_interpreter.UnsupportedSyntax:
+            # Without compiling, the lookup is counted when the snippet is compiled
+            if compile_new:
+                self.record(topic, "unsupported")
+            raise
+
+        if reuse and shape not in self.templates and shape in self.pending:
+            try:
+                _, seed_tokens, seed_literals, seed_names = canonicalize(self.pending.pop(shape))
+                self.store(shape, js_interpreter.compile_tokens(seed_tokens, seed_literals), seed_names)
+            except js_interpreter.UnsupportedSyntax:
+                pass
+
+        template = self.templates.get(shape) if reuse else None
+        if template is not None:
+            self.templates.move_to_end(shape)
+            try:
+                interpreter = template.program.execute(literals)
+                names_matter = template.program.name_sensitive or interpreter.names_observed
+                output = "\n".join(interpreter.output)
+                # Identifier names leak into the output (printed functions, .name, error
+                # messages), so the template only applies to variants that use the same names
+                if output and (not names_matter or names == template.names):
+                    template.uses += 1
+                    self.record(topic, "hits")
+                    return output, True
+            except js_interpreter.UnsupportedSyntax:
+                # Different literals can push a shape past what runs locally (e.g. the step
+                # limit); compiling this variant on its own would fail the same way
+                if compile_new:
+                    self.record(topic, "unsupported")
+                raise
+
+        if not compile_new:
+            return None, False
+        try:
+            program = js_interpreter.compile_tokens(tokens, literals)
+            output = program.run()
+            if not output:
+                raise js_interpreter.UnsupportedSyntax("the snippet produced no console output")
+        except js_interpreter.UnsupportedSyntax:
+            self.record(topic, "unsupported")
+            raise
+        self.store(shape, program, names)
+        self.record(topic, "compiled")
+        return output, False
+
+    def print_report(self):
+        print("\n=== Template Cache ===")
+        print(f"Shapes: {len(self.templates)} compiled, {len(self.pending)} known from previous runs")
+        print(f"{'Topic':<24}{'Questions':>10}{'Template hits':>15}{'Hit rate':>10}{'No Gemini':>11}")
+        total = {"lookups": 0, "hits": 0, "compiled": 0, "unsupported": 0}
+        for topic in sorted(self.topic_stats):
+            stats = self.topic_stats[topic]
+            for name in total:
+                total[name] += stats[name]
+            self.print_row(topic, stats)
+        self.print_row("Total", total)
+        print("=== End of Template Cache ===\n")
+
+    @staticmethod
+    def print_row(topic, stats):
+        lookups = stats["lookups"]
+        hit_rate = stats["hits"] / lookups if lookups else 0.0
+        # Everything that was not unsupported was answered without Gemini
+        local_rate = (lookups - stats["unsupported"]) / lookups if lookups else 0.0
+        print(f"{topic:<24}{lookups:>10}{stats['hits']:>15}{hit_rate:>10.0%}{local_rate:>11.0%}")
@@ -0,0 +1,107 @@
+import contextvars
+import unittest
+
+from answer_router import AnswerRouter, routing_session
+
+BOOLEAN_SNIPPET = "console.log(true && false);"
+
+
+def tiers(answers):
+    """Tiers answering with the given answer (None for a miss), and the calls they got."""
+    calls = []
+
+    def tier(name):
+        def solve(code, context):
+            calls.append(name)
+            return answers[name]
+        return name, solve
+
+    return [tier(name) for name in answers], calls
+
+
+class AllowsTest(unittest.TestCase):
+    def setUp(self):
+        tier_list, _ = tiers({"local": "false", "gemini": "false"})
+        self.router = AnswerRouter(tier_list, min_accuracy=0.9, min_samples=5)
+
+    def test_tier_is_tried_until_min_samples_gradings(self):
+        self.router.learn("Boolean", "local", False, 4)
+        self.assertTrue(self.router.allows("Boolean", "local"))
+        self.router.learn("Boolean", "local", False)
+        self.assertFalse(self.router.allows("Boolean", "local"))
+
+    def test_tier_at_min_accuracy_is_allowed(self):
+        self.router.learn("Boolean", "local", True, 9)
+        self.router.learn("Boolean", "local", False, 1)
+        self.assertTrue(self.router.allows("Boolean", "local"))
+        self.router.learn("Boolean", "local", False, 1)
+        self.assertFalse(self.router.allows("Boolean", "local"))
+        # Other topics keep their own rules
+        self.assertTrue(self.router.allows("Length", "local"))
+
+    def test_last_tier_is_never_skipped(self):
+        self.router.learn("Boolean", "gemini", False, 10)
+        self.assertTrue(self.router.allows("Boolean", "gemini"))
+
+    def test_tier_better_than_the_last_tier_is_kept(self):
+        self.router.learn("Boolean", "local", True, 7)
+        self.router.learn("Boolean", "local", False, 3)
+        self.router.learn("Boolean", "gemini", True, 5)
+        self.router.learn("Boolean", "gemini", False, 5)
+        self.assertTrue(self.router.allows("Boolean", "local"))
+
+    def test_zero_min_accuracy_never_skips(self):
+        self.router.min_accuracy = 0
+        self.router.learn("Boolean", "local", False, 10)
+        self.assertTrue(self.router.allows("Boolean", "local"))
+
+
+class RouteTest(unittest.TestCase):
+    def test_first_answering_tier_wins_and_skipped_tiers_are_not_called(self):
+        tier_list, calls = tiers({"cache": None, "local": "false", "gemini": "true"})
+        router = AnswerRouter(tier_list, min_accuracy=0.9, min_samples=1)
+        answer, route = router.route(BOOLEAN_SNIPPET)
+        self.assertEqual((answer, route["tier"], route["topic"]), ("false", "local", "Boolean"))
+        self.assertEqual(calls, ["cache", "local"])
+
+        router.learn("Boolean", "local", False)
+        calls.clear()
+        answer, route = router.route(BOOLEAN_SNIPPET)
+        self.assertEqual((answer, route["tier"]), ("true", "gemini"))
+        self.assertEqual(calls, ["cache", "gemini"])
+        self.assertEqual(router.stats()["local"]["skipped"], 1)
+
+
+class PendingAttributionTest(unittest.TestCase):
+    def test_each_session_is_credited_for_its_own_answer(self):
+        answers = {"local": "false", "gemini": "true"}
+        tier_list, _ = tiers(answers)
+        router = AnswerRouter(tier_list)
+
+        def route_in(session, skip_local=False):
+            routing_session.set(session)
+            answers["local"] = None if skip_local else "false"
+            return router.route(BOOLEAN_SNIPPET)
+
+        def grade_in(session, answer, correct):
+            routing_session.set(session)
+            return router.record_grading(BOOLEAN_SNIPPET, answer, correct)
+
+        # Session a got the local answer, session b (evaluating the same snippet) Gemini's
+        contextvars.copy_context().run(route_in, "a")
+        contextvars.copy_context().run(route_in, "b", True)
+        self.assertEqual(contextvars.copy_context().run(grade_in, "a", "false", True), "local")
+        self.assertEqual(contextvars.copy_context().run(grade_in, "b", "true", False), "gemini")
+        self.assertEqual(router.accuracy("Boolean", "local"), (1.0, 1))
+        self.assertEqual(router.accuracy("Boolean", "gemini"), (0.0, 1))
+
+    def test_grading_of_a_different_answer_is_not_credited(self):
+        tier_list, _ = tiers({"local": "false", "gemini": "true"})
+        router = AnswerRouter(tier_list)
+        router.route(BOOLEAN_SNIPPET)
+        self.assertIsNone(router.record_grading(BOOLEAN_SNIPPET, "something else", True))
+        self.assertEqual(router.accuracy("Boolean", "local"), (None, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+from gemini_client import answer_complete, strip_code_fence
+
+
+class StripCodeFenceTest(unittest.TestCase):
+    def test_fenced_answer_is_unwrapped(self):
+        self.assertEqual(strip_code_fence("```\n5\n```"), "5")
+        self.assertEqual(strip_code_fence("```text\nHello\nWorld\n```\n"), "Hello\nWorld")
+        self.assertEqual(strip_code_fence("`true`"), "true")
+
+    def test_plain_answer_is_only_stripped(self):
+        self.assertEqual(strip_code_fence("  42\n"), "42")
+        self.assertEqual(strip_code_fence("a`b"), "a`b")
+
+    def test_fenced_stream_is_not_complete_early(self):
+        self.assertFalse(answer_complete("```\n5\n", 1))
+        self.assertTrue(answer_complete("5\n", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from grading import grade_from_payload, grade_from_text
+
+
+class GradeFromTextTest(unittest.TestCase):
+    def test_verdicts_grade(self):
+        self.assertIs(grade_from_text("Correct!"), True)
+        self.assertIs(grade_from_text("Well done."), True)
+        self.assertIs(grade_from_text("Incorrect"), False)
+        self.assertIs(grade_from_text("Wrong, try again!"), False)
+
+    def test_text_mentioning_a_verdict_does_not_grade(self):
+        self.assertIsNone(grade_from_text("The correct answer is 5"))
+        self.assertIsNone(grade_from_text("Correct answers so far: 3"))
+        self.assertIsNone(grade_from_text("Saved. Well done on finishing the round"))
+        self.assertIsNone(grade_from_text(""))
+        self.assertIsNone(grade_from_text(None))
+
+    def test_counters_are_not_verdicts(self):
+        # Only the verdict itself grades, whatever a site puts in front of it
+        self.assertIsNone(grade_from_text("Answer 3: Correct!"))
+
+
+class GradeFromPayloadTest(unittest.TestCase):
+    def test_first_boolean_key(self):
+        self.assertIs(grade_from_payload({"isCorrect": False}, ("correct", "isCorrect")), False)
+        self.assertIsNone(grade_from_payload({"correct": "yes"}, ("correct",)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import threading
+import unittest
+
+from pipeline import QuestionPipeline
+
+
+class InFlightTest(unittest.TestCase):
+    def test_cancelled_evaluation_leaves_the_count(self):
+        release = threading.Event()
+        pipeline = QuestionPipeline(lambda code: release.wait(5) and code, workers=1)
+        running = pipeline.submit("a")
+        queued = pipeline.submit("b")
+        self.assertEqual(pipeline.stats()["in_flight"], 2)
+        self.assertTrue(queued.cancel())
+        release.set()
+        self.assertEqual(running.result(5), "a")
+        pipeline.executor.shutdown(wait=True)
+        self.assertEqual(pipeline.stats()["in_flight"], 0)
+
+    def test_evaluation_without_workers(self):
+        pipeline = QuestionPipeline(lambda code: code.upper(), workers=0)
+        self.assertEqual(pipeline.submit("a").result(), "A")
+        self.assertEqual(pipeline.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from template_cache import TemplateCache
+
+
+class NameLeakTest(unittest.TestCase):
+    # Variants of one shape whose output spells out an identifier
+    def assert_variant_answer(self, first, second, expected):
+        cache = TemplateCache()
+        cache.solve(first)
+        self.assertEqual(cache.solve(second)[0], expected)
+
+    def test_function_name(self):
+        self.assert_variant_answer("let f=()=>1; console.log(f.name)", "let g=()=>1; console.log(g.name)", "g")
+
+    def test_function_name_length(self):
+        self.assert_variant_answer("function f(){}; console.log(f.name.length)",
+                                   "function abc(){}; console.log(abc.name.length)", "3")
+
+    def test_error_message_naming_the_callee(self):
+        self.assert_variant_answer("let a=1; try{a()}catch(e){console.log(e.message)}",
+                                   "let b=1; try{b()}catch(e){console.log(e.message)}", "b is not a function")
+
+    def test_names_that_do_not_show_reuse_the_template(self):
+        cache = TemplateCache()
+        cache.solve("let a=1; console.log(a+2)")
+        self.assertEqual(cache.solve("let b=5; console.log(b+2)"), ("7", True))
+
+
+if __name__ == "__main__":
+    unittest.main()
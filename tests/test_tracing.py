@@ -0,0 +1,53 @@
+import contextvars
+import json
+import tempfile
+import unittest
+
+import tracing
+from pipeline import QuestionPipeline
+
+
+class ContextPropagationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tracer = tracing.start_run(self.directory.name, "test")
+
+    def tearDown(self):
+        tracing.stop_run()
+        self.directory.cleanup()
+
+    def spans(self):
+        with open(self.tracer.path, encoding="utf-8") as trace_file:
+            return {record["name"]: record for record in map(json.loads, trace_file)}
+
+    def test_evaluation_span_nests_under_the_submitting_span(self):
+        def evaluate(code):
+            with tracing.span("tier local"):
+                return code.upper()
+
+        def play_question():
+            # Like run_round, on the thread driving the browser
+            tracing.annotate(profile="main", round=3, question=7)
+            with pipeline.stage("extract"):
+                return pipeline.result(pipeline.submit("abc"))
+
+        pipeline = QuestionPipeline(evaluate, workers=2)
+        try:
+            # The annotations stay out of the other tests
+            answer = contextvars.copy_context().run(play_question)
+        finally:
+            pipeline.shutdown()
+        self.assertEqual(answer, "ABC")
+
+        spans = self.spans()
+        self.assertEqual(spans["evaluate"]["parent"], spans["extract"]["id"])
+        self.assertEqual(spans["tier local"]["parent"], spans["evaluate"]["id"])
+        self.assertTrue(spans["evaluate"]["thread"].startswith("evaluation"))
+        for name in ("evaluate", "tier local"):
+            self.assertEqual(spans[name]["attributes"]["profile"], "main")
+            self.assertEqual(spans[name]["attributes"]["round"], 3)
+            self.assertEqual(spans[name]["attributes"]["question"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
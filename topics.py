@@ -0,0 +1,83 @@
+# PracticeMe topics and a classifier that guesses the topic of an extracted snippet.
+#
+# The site does not say which topic a question belongs to, so statistics per topic
+# (cache/template hit rates, accuracy, routing) rely on recognising the shape of the
+# code instead. The checks go from the most specific construct to the most generic.
+import re
+
+# Topic names by their position in the selector (same order as settings.py)
+TOPICS = {
+    1: "Length",
+    2: "Index",
+    3: "Index Operations",
+    4: "Methods",
+    5: "For Loops",
+    6: "While Loops",
+    7: "Function Scopes",
+    8: "Function Parameters",
+    9: "Boolean",
+    10: "Shorthand",
+    11: "Arithmetic Precedence",
+    12: "Post/Pre In/Decrement",
+    13: "Switch",
+    14: "Do...While",
+    15: "If/Else",
+}
+
+# Map of topic positions (1-15) to their actual checkbox values in the HTML
+# This mapping is based on the provided HTML elements
+TOPIC_POSITION_TO_VALUE = {
+    1: "8",
+    2: "9",
+    3: "10",
+    4: "11",
+    5: "5",
+    6: "6",
+    7: "12",
+    8: "13",
+    9: "0",
+    10: "1",
+    11: "14",
+    12: "2",
+    13: "4",
+    14: "7",
+    15: "3"
+}
+
+UNKNOWN_TOPIC = "Unknown"
+
+# Strings are blanked out before matching so their contents cannot trigger a rule
+STRING_PATTERN = re.compile(r"\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\]|\\.)*`")
+
+TOPIC_RULES = [
+    (13, re.compile(r"\bswitch\s*\(")),
+    (14, re.compile(r"\bdo\s*\{")),
+    (5, re.compile(r"\bfor\s*\(")),
+    (6, re.compile(r"\bwhile\s*\(")),
+    (8, re.compile(r"\bfunction\b[^(]*\(\s*[A-Za-z_$]|\(\s*[A-Za-z_$][\w$]*(?:\s*,\s*[A-Za-z_$][\w$]*)*\s*\)\s*=>|\b[A-Za-z_$][\w$]*\s*=>")),
+    (7, re.compile(r"\bfunction\b|=>")),
+    (12, re.compile(r"\+\+|--")),
+    (10, re.compile(r"(?:\*\*|[-+*/%&|^]|<<|>>>?|&&|\|\||\?\?)=")),
+    (15, re.compile(r"\bif\s*\(")),
+    (3, re.compile(r"\[[^\]]*[-+*/%][^\]]*\]|\]\s*[-+*/%]|[-+*/%]\s*[\w$]+\s*\[")),
+    (1, re.compile(r"\.length\b")),
+    (4, re.compile(r"\.\s*[A-Za-z_$][\w$]*\s*\(")),
+    (2, re.compile(r"[\w$\]\)]\s*\[")),
+    (9, re.compile(r"\b(?:true|false)\b|[<>]=?|[!=]==?|&&|\|\||!")),
+    (11, re.compile(r"[-+*/%].*[-+*/%]|\*\*")),
+]
+
+
+def classify_topic(code):
+    """
+    Guesses which PracticeMe topic a snippet belongs to.
+
+    Returns:
+        str: One of the names in TOPICS, or UNKNOWN_TOPIC
+    """
+    # console.log(...) calls are in every snippet, so they are not evidence of "Methods"
+    code = STRING_PATTERN.sub('""', code).replace("console.log", "print")
+    for position, pattern in TOPIC_RULES:
+        if pattern.search(code):
+            return TOPICS[position]
+    return UNKNOWN_TOPIC
@@ -0,0 +1,245 @@
+# Structured per-phase tracing, written as JSON lines.
+#
+# Usage: python tracing.py [trace file or folder ...]   (prints per-phase histograms)
+#
+# Every traced phase (login, topic and difficulty selection, extraction, Gemini calls,
+# recoveries and the pipeline stages of each question) becomes a span: one JSON object per
+# line with its name, start, duration, outcome and attributes, in
+# <trace_dir>/<label>-<time>-<pid>.jsonl. Spans opened inside another span record it as
+# their parent, and annotate() adds attributes such as the round and question number to
+# every later span of the same thread or asyncio task; work handed to a thread pool with
+# submit() keeps both. When no run is started, spans cost a single check and nothing is
+# written.
+import contextvars
+import functools
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket upper bounds of the histograms, in milliseconds
+HISTOGRAM_BUCKETS = (1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+# Innermost open span and the annotations of the current thread or asyncio task
+current_span = contextvars.ContextVar("current_span", default=None)
+current_annotations = contextvars.ContextVar("current_annotations", default={})
+
+
+class Tracer:
+    """
+    Writes the spans of one run to a JSON lines file.
+
+    Args:
+        path: File the spans are appended to
+        run_id: Identifier stored on every span, defaults to the file name
+    """
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id or os.path.splitext(os.path.basename(path))[0]
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.started = time.time()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def new_id(self):
+        with self.lock:
+            span_id = self.next_id
+            self.next_id += 1
+        return span_id
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(line + "\n")
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Times a block as a span; the yielded dict can be filled with more attributes."""
+        span_id = self.new_id()
+        parent = current_span.get()
+        token = current_span.set(span_id)
+        attributes = {**current_annotations.get(), **attributes}
+        start_time = time.time()
+        start_counter = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            self.write({
+                "run": self.run_id,
+                "id": span_id,
+                "parent": parent,
+                "name": name,
+                "thread": threading.current_thread().name,
+                "start": round(start_time - self.started, 6),
+                "duration": round(time.perf_counter() - start_counter, 6),
+                "status": "error" if error else "ok",
+                "error": error,
+                "attributes": attributes,
+            })
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+# Tracer of the current run in this process, None when tracing is off
+tracer = None
+
+
+def start_run(directory, label="run"):
+    """Starts writing spans to a new file in directory and returns its tracer."""
+    global tracer
+    stop_run()
+    file_name = f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+    tracer = Tracer(os.path.join(directory, file_name))
+    return tracer
+
+
+def stop_run():
+    global tracer
+    if tracer is not None:
+        tracer.close()
+        tracer = None
+
+
+@contextmanager
+def span(name, **attributes):
+    """Span on the current run's tracer, or a no-op when tracing is off."""
+    if tracer is None:
+        yield attributes
+        return
+    with tracer.span(name, **attributes) as span_attributes:
+        yield span_attributes
+
+
+def traced(name):
+    """Decorator that runs every call of a function inside a span."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if tracer is None:
+                return function(*args, **kwargs)
+            with tracer.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attributes):
+    """Adds attributes to every span opened afterwards in this thread or asyncio task."""
+    current_annotations.set({**current_annotations.get(), **attributes})
+
+
+def submit(executor, function, *args):
+    """
+    Submits a call to a thread pool in a copy of the caller's context, so its spans nest
+    under the caller's open span and keep its annotations (pool threads start empty).
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
+
+def load(paths):
+    """Reads the spans of trace files, or of every .jsonl file in the given folders."""
+    records = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, encoding="utf-8") as trace_file:
+                for line in trace_file:
+                    line = line.strip()
+                    if line:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            # A run that was killed can leave half a line behind
+                            continue
+    return records
+
+
+def summarize(records):
+    """
+    Groups spans by name.
+
+    Returns:
+        dict: name -> {"count", "errors", "total", "p50", "p95", "max", "buckets"}, durations in seconds
+    """
+    # pipeline.py traces its stages, so it is only imported once both modules are loaded
+    from pipeline import percentile
+
+    durations = {}
+    errors = {}
+    for record in records:
+        durations.setdefault(record["name"], []).append(record["duration"])
+        if record.get("status") == "error":
+            errors[record["name"]] = errors.get(record["name"], 0) + 1
+    summary = {}
+    for name, values in durations.items():
+        buckets = [0] * len(HISTOGRAM_BUCKETS)
+        for value in values:
+            milliseconds = value * 1000
+            for index, bound in enumerate(HISTOGRAM_BUCKETS):
+                if milliseconds <= bound:
+                    buckets[index] += 1
+                    break
+        summary[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "total": sum(values),
+            "p50": percentile(values, 0.5),
+            "p95": percentile(values, 0.95),
+            "max": max(values),
+            "buckets": buckets,
+        }
+    return summary
+
+
+def bucket_label(index):
+    bound = HISTOGRAM_BUCKETS[index]
+    if bound == float("inf"):
+        return f">{HISTOGRAM_BUCKETS[index - 1]} ms"
+    return f"<={bound} ms"
+
+
+def print_histograms(summary, width=40):
+    print("\n=== Trace Summary ===")
+    print(f"{'Phase':<28}{'Count':>7}{'Errors':>8}{'Total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'Max ms':>10}")
+    ordered = sorted(summary.items(), key=lambda item: -item[1]["total"])
+    for name, stats in ordered:
+        print(f"{name:<28}{stats['count']:>7}{stats['errors']:>8}{stats['total']:>10.2f}"
+              f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}")
+    for name, stats in ordered:
+        print(f"\n{name}")
+        largest = max(stats["buckets"])
+        first = next(index for index, count in enumerate(stats["buckets"]) if count)
+        last = max(index for index, count in enumerate(stats["buckets"]) if count)
+        for index in range(first, last + 1):
+            count = stats["buckets"][index]
+            bar = "#" * max(round(count / largest * width), 1 if count else 0)
+            print(f"  {bucket_label(index):>12} {count:>6} {bar}")
+    print("=== End of Trace Summary ===\n")
+
+
+if __name__ == "__main__":
+    import settings
+
+    settings.initialize()
+    paths = sys.argv[1:] or [settings.trace_dir]
+    records = load(paths)
+    if not records:
+        print(f"No spans found in {', '.join(paths)}")
+    else:
+        print(f"{len(records)} spans from {len({record['run'] for record in records})} runs")
+        print_histograms(summarize(records))